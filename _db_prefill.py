@@ -0,0 +1,353 @@
+"""
+_db_prefill.py
+
+This module seeds the database with the initial data of the JSON
+files configured in `settings.PREFILL_FILES`.
+
+Usage:
+    $ python _db_prefill.py
+    $ python _db_prefill.py --force --batch-size 5000
+
+Prefill files hold a single JSON object of documents keyed by their
+string IDs (see the initial_data directory). Files are streamed, so
+only a single batch of documents is held in memory at a time, and
+documents are written with unordered bulk writes, which the server
+applies without waiting for every single write.
+
+String IDs are mapped to ObjectIds deterministically, so references
+can be mapped before the referenced document is written and repeated
+runs upsert the same documents instead of duplicating them.
+References to documents found neither in the files nor in the
+database are removed in a second pass, once all documents are written.
+
+A checksum of every prefilled file is stored in the database and
+files that didn't change since the last run are skipped.
+"""
+
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+import mongoengine
+from bson import ObjectId
+from pymongo import InsertOne, ReplaceOne
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from data_access.base_dao import count_write
+from data_access.models import Character, Power
+from logger import CustomLogger
+from settings import MONGODB_CONNECTION, PREFILL_FILES
+
+
+logger = CustomLogger('db_prefill')
+
+# Collection holding checksums of prefilled files
+CHECKSUM_COLLECTION = 'prefill_checksums'
+# Reference fields per prefill file, mapped to the referenced file
+REFERENCES = {
+    'powers': {},
+    'characters': {'powers': 'powers', 'enemies': 'characters'},
+}
+MODELS = {'powers': Power, 'characters': Character}
+
+_CHUNK_SIZE = 1 << 16
+_decoder = json.JSONDecoder()
+
+
+def to_object_id(kind: str, id: str) -> ObjectId:
+    """
+    Map a string ID of a prefill file to an ObjectId. The mapping is
+    deterministic, so the same ID is always mapped to the same
+    ObjectId and IDs of different files never collide.
+
+    :param kind: Name of the prefill file (e.g. 'characters').
+    :param id: String ID of the document.
+
+    :return: ObjectId of the document.
+    """
+    return ObjectId(hashlib.md5(f'{kind}:{id}'.encode()).digest()[:12])
+
+
+def iter_json_object(
+    file: TextIO, chunk_size: int = _CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """
+    Stream the members of a top-level JSON object, without loading
+    the whole file.
+
+    :param file: File opened in text mode.
+    :param chunk_size: Number of characters read at once.
+
+    :return: Iterator of (key, value) pairs.
+
+    :raise ValueError: If the file is not a valid JSON object.
+    """
+    buffer, position, eof = '', 0, False
+
+    def skip_whitespace() -> str:
+        # Returns the next significant character, '' at the end of file
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position:position+1]
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+
+    def decode() -> Any:
+        # Decodes the next value, reading more data while it's incomplete
+        nonlocal buffer, position, eof
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # Numbers may continue in the next chunk
+                if end < len(buffer) or eof:
+                    position = end
+                    return value
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+    def expect(char: str):
+        nonlocal position
+        if skip_whitespace() != char:
+            raise ValueError(f'Expected {char!r} at the prefill file')
+        position += 1
+
+    expect('{')
+    if skip_whitespace() == '}':
+        return
+
+    while True:
+        skip_whitespace()
+        key = decode()
+        if not isinstance(key, str):
+            raise ValueError('Expected a string key at the prefill file')
+        expect(':')
+        skip_whitespace()
+        yield key, decode()
+
+        if skip_whitespace() == '}':
+            return
+        expect(',')
+
+
+def map_document(kind: str, key: str, entry: dict[str, Any]) -> dict[str, Any]:
+    """
+    Map a prefill file entry to a raw database document.
+
+    :param kind: Name of the prefill file.
+    :param key: Key of the entry in the file.
+    :param entry: Entry of the file.
+
+    :return: Document with ObjectIds instead of string IDs.
+    """
+    document = {
+        field: value for field, value in entry.items() if field != 'id'
+    }
+    document['_id'] = to_object_id(kind, entry.get('id', key))
+    for field, referenced in REFERENCES[kind].items():
+        if field in document:
+            document[field] = [
+                to_object_id(referenced, id) for id in document[field]
+            ]
+    return document
+
+
+def file_checksum(path: Path) -> str:
+    """
+    Compute the checksum of a file.
+
+    :param path: Path of the file.
+
+    :return: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_batch(collection: Collection, batch: list[dict], upsert: bool):
+    """
+    Write a batch of documents with a single unordered bulk write.
+
+    :param collection: Target collection.
+    :param batch: Documents to write.
+    :param upsert: Whether documents replace existing ones with the
+                   same ID, or are plainly inserted.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    if upsert:
+        requests = [ReplaceOne({'_id': document['_id']}, document, upsert=True)
+                    for document in batch]
+    else:
+        requests = [InsertOne(document) for document in batch]
+    collection.bulk_write(requests, ordered=False)
+
+
+def prefill_file(
+    kind: str,
+    path: Path,
+    batch_size: int,
+    seen: dict[str, set[ObjectId]],
+    referenced: dict[str, set[ObjectId]],
+) -> int:
+    """
+    Stream a prefill file into the collection of its model.
+
+    :param kind: Name of the prefill file.
+    :param path: Path of the file.
+    :param batch_size: Number of documents written at once.
+    :param seen: IDs of written documents per file, updated in place.
+    :param referenced: Referenced IDs per file, updated in place.
+
+    :return: Number of written documents.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    model = MODELS[kind]
+    model.ensure_indexes()
+    collection = model._get_collection()
+    # Plain inserts are faster, upserts are only needed over existing data
+    upsert = collection.estimated_document_count() > 0
+
+    written, batch = 0, []
+    with open(path, encoding='utf-8') as file:
+        for key, entry in iter_json_object(file):
+            document = map_document(kind, key, entry)
+            seen[kind].add(document['_id'])
+            for field, target in REFERENCES[kind].items():
+                referenced[target].update(document.get(field, ()))
+
+            batch.append(document)
+            if len(batch) >= batch_size:
+                _write_batch(collection, batch, upsert)
+                written, batch = written + len(batch), []
+
+    if batch:
+        _write_batch(collection, batch, upsert)
+        written += len(batch)
+    count_write(model)
+    return written
+
+
+def remove_dangling_references(
+    seen: dict[str, set[ObjectId]],
+    referenced: dict[str, set[ObjectId]],
+    batch_size: int,
+) -> int:
+    """
+    Remove references to documents found neither in the prefilled
+    files nor in the database.
+
+    :param seen: IDs of written documents per file.
+    :param referenced: Referenced IDs per file.
+    :param batch_size: Number of IDs looked up at once.
+
+    :return: Number of removed reference targets.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    removed = 0
+    for target, ids in referenced.items():
+        unknown = list(ids - seen[target])
+        collection = MODELS[target]._get_collection()
+
+        dangling = []
+        for start in range(0, len(unknown), batch_size):
+            chunk = unknown[start:start+batch_size]
+            existing = {document['_id'] for document in collection.find(
+                {'_id': {'$in': chunk}}, {'_id': True},
+            )}
+            dangling.extend(id for id in chunk if id not in existing)
+        if not dangling:
+            continue
+
+        for kind, fields in REFERENCES.items():
+            for field, referenced_kind in fields.items():
+                if referenced_kind == target:
+                    MODELS[kind]._get_collection().update_many(
+                        {field: {'$in': dangling}},
+                        {'$pullAll': {field: dangling}},
+                    )
+                    count_write(MODELS[kind])
+        removed += len(dangling)
+    return removed
+
+
+def prefill(batch_size: int = 1000, force: bool = False) -> dict[str, int]:
+    """
+    Prefill the database of the active mongoengine connection with
+    all changed prefill files.
+
+    :param batch_size: Number of documents written at once.
+    :param force: Whether unchanged files are prefilled as well.
+
+    :return: Number of written documents per file, skipped files
+             are missing.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    checksums = mongoengine.get_db()[CHECKSUM_COLLECTION]
+    seen = {kind: set() for kind in PREFILL_FILES}
+    referenced = {kind: set() for kind in PREFILL_FILES}
+
+    written, changed = dict(), dict()
+    # Referenced files go first, so their IDs are known in the second pass
+    for kind in sorted(PREFILL_FILES, key=lambda kind: bool(REFERENCES[kind])):
+        path = PREFILL_FILES[kind]
+        checksum = file_checksum(path)
+        stored = checksums.find_one({'_id': kind})
+        if not force and stored and stored['checksum'] == checksum:
+            logger.log_event(f'Skipping unchanged prefill file {path}')
+            continue
+
+        changed[kind] = checksum
+        written[kind] = prefill_file(kind, path, batch_size, seen, referenced)
+        logger.log_event(f'Prefilled {written[kind]} documents from {path}')
+
+    removed = remove_dangling_references(seen, referenced, batch_size)
+    if removed:
+        logger.log_warning(f'Removed {removed} dangling references')
+
+    # Checksums are stored last, so failed runs are repeated
+    for kind, checksum in changed.items():
+        checksums.replace_one(
+            {'_id': kind}, {'_id': kind, 'checksum': checksum}, upsert=True,
+        )
+    return written
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description='Prefill the database with the initial data.',
+    )
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument(
+        '--force', action='store_true',
+        help='Prefill files even if they did not change.',
+    )
+    args = parser.parse_args(argv)
+
+    mongoengine.connect(**MONGODB_CONNECTION)
+    try:
+        prefill(args.batch_size, args.force)
+    except PyMongoError as e:
+        logger.log_error(f'Prefilling the database failed: {e}')
+        raise
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+benchmarks
+
+This package provides a load-testing benchmark suite of the app:
+
+- generator.py: Builds synthetic character and power graphs of
+  configurable size, enemy out-degree and cycle density.
+- loader.py: Loads a generated graph into MongoDB.
+- driver.py: Replays a weighted mix of GraphQL query shapes against
+  the ASGI app in process and reports throughput, latency percentiles
+  and MongoDB round trips per query.
+
+Usage:
+    $ python -m benchmarks load --characters 10000 --powers 500 --drop
+    $ python -m benchmarks run --requests 2000 --output results.json
+
+Results are saved as JSON, so runs can be compared.
+"""
@@ -0,0 +1,104 @@
+"""
+Command line interface of the benchmark suite.
+
+Usage:
+    $ python -m benchmarks load --characters 10000 --powers 500 --drop
+    $ python -m benchmarks run --requests 2000 --concurrency 4 \\
+          --output results.json
+"""
+
+
+import argparse
+import json
+import sys
+
+import mongoengine
+
+from benchmarks.driver import DEFAULT_MIX, QUERY_SHAPES, run_benchmark
+from benchmarks.generator import generate_graph
+from benchmarks.loader import load_graph
+from settings import MONGODB_CONNECTION
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """
+    Parse a query mix argument, e.g. 'all_powers=1,character_depth_2=3'.
+
+    :param value: Comma separated shape=weight pairs.
+
+    :return: Weights of query shapes.
+
+    :raise argparse.ArgumentTypeError: For a malformed mix.
+    """
+    mix = dict()
+    for item in value.split(','):
+        shape, _, weight = item.partition('=')
+        if shape not in QUERY_SHAPES or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f'invalid mix item: {item}')
+        mix[shape] = int(weight)
+    return mix
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser(
+        'load', help='Generate a synthetic graph and load it into MongoDB.',
+    )
+    load.add_argument('--characters', type=int, default=10000)
+    load.add_argument('--powers', type=int, default=500)
+    load.add_argument('--enemy-degree', type=int, default=3)
+    load.add_argument('--cycle-density', type=float, default=0.3)
+    load.add_argument('--powers-per-character', type=int, default=2)
+    load.add_argument('--seed', type=int, default=0)
+    load.add_argument('--batch-size', type=int, default=1000)
+    load.add_argument(
+        '--drop', action='store_true',
+        help='Drop existing characters and powers first.',
+    )
+
+    run = commands.add_parser(
+        'run', help='Replay a query mix against the app.',
+    )
+    run.add_argument('--requests', type=int, default=1000)
+    run.add_argument('--concurrency', type=int, default=1)
+    run.add_argument('--warmup', type=int, default=100)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument(
+        '--mix', type=parse_mix, default=DEFAULT_MIX,
+        help='Comma separated shape=weight pairs, shapes: '
+             + ', '.join(QUERY_SHAPES),
+    )
+    run.add_argument('--output', help='Path of the JSON report.')
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'load':
+        mongoengine.connect(**MONGODB_CONNECTION)
+        powers, characters = generate_graph(
+            args.characters,
+            args.powers,
+            args.enemy_degree,
+            args.cycle_density,
+            args.powers_per_character,
+            args.seed,
+        )
+        load_graph(powers, characters, args.drop, args.batch_size)
+        return
+
+    report = run_benchmark(
+        args.requests, args.concurrency, args.warmup, args.mix, args.seed,
+    )
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
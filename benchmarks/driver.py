@@ -0,0 +1,328 @@
+"""
+driver.py
+
+This module replays a weighted mix of GraphQL query shapes against
+the ASGI app in process and reports throughput, latency percentiles
+and MongoDB round trips per query.
+
+Round trips are counted with a pymongo command listener. Listeners
+only apply to clients created after their registration, so the app
+is imported by `run_benchmark` after the listener is installed.
+The app lifespan (database connection and warm-up) is run around
+the replay, as the ASGI transport doesn't run it.
+"""
+
+
+import asyncio
+import math
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any
+
+import httpx
+from pymongo import monitoring
+
+import settings
+
+
+PAGE_SIZE = 50
+
+
+def _character_query(depth: int) -> str:
+    """
+    Build a `character` query selecting nested enemies.
+
+    :param depth: Number of nested enemy levels.
+
+    :return: GraphQL query text.
+    """
+    selection = '{alias}'
+    for _ in range(depth - 1):
+        selection = f'{{alias enemies {selection}}}'
+    return (
+        'query ($id: ID!) {character(id: $id) '
+        f'{{id alias name role powers {{name}} enemies {selection}}}}}'
+    )
+
+
+QUERY_SHAPES = {
+    **{f'character_depth_{depth}': _character_query(depth)
+       for depth in range(1, 5)},
+    'all_characters': (
+        f'{{allCharacters(first: {PAGE_SIZE}) '
+        '{edges {node {id alias name role}}}}'
+    ),
+    'all_characters_powers': (
+        f'{{allCharacters(first: {PAGE_SIZE}) '
+        '{edges {node {id alias powers {name description}}}}}'
+    ),
+    'all_powers': (
+        f'{{allPowers(first: {PAGE_SIZE}) '
+        '{edges {node {id name description}}}}'
+    ),
+}
+
+DEFAULT_MIX = {
+    'character_depth_1': 2,
+    'character_depth_2': 2,
+    'character_depth_3': 1,
+    'character_depth_4': 1,
+    'all_characters': 2,
+    'all_characters_powers': 2,
+    'all_powers': 1,
+}
+
+_round_trips: ContextVar[list[int] | None] = ContextVar(
+    'round_trips', default=None,
+)
+_listener_installed = False
+
+
+class RoundTripListener(monitoring.CommandListener):
+    """
+    Counts MongoDB commands issued within the current request
+    (the counter is kept in a context variable).
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        counter = _round_trips.get()
+        if counter is not None:
+            counter[0] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        pass
+
+
+def install_listener():
+    """
+    Register the round trip listener for all MongoDB clients
+    created afterwards.
+    """
+    global _listener_installed
+    if not _listener_installed:
+        monitoring.register(RoundTripListener())
+        _listener_installed = True
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Compute a percentile with the nearest-rank method.
+
+    :param values: Sorted values.
+    :param q: Percentile in range 0-100.
+
+    :return: Percentile value, 0 for no values.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q * len(values) / 100), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(results: list[dict[str, Any]], duration: float) -> dict:
+    """
+    Summarize request results.
+
+    :param results: Results of single requests.
+    :param duration: Wall time of the run in seconds.
+
+    :return: Dict with request and error counts, throughput, latency
+             percentiles in milliseconds and average round trips.
+    """
+    latencies = sorted(result['latency'] * 1000 for result in results)
+    count = len(results)
+    return {
+        'requests': count,
+        'errors': sum(result['error'] for result in results),
+        'throughput': count / duration if duration else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / count if count else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        },
+        'round_trips_per_query': (
+            sum(result['round_trips'] for result in results) / count
+            if count else 0.0
+        ),
+    }
+
+
+def _sample_character_ids(count: int) -> list[str]:
+    """
+    Pick random character IDs from the database.
+
+    :param count: Number of IDs to pick.
+
+    :return: List of IDs as strings.
+    """
+    from data_access.models import Character
+
+    pipeline = [{'$sample': {'size': count}}, {'$project': {'_id': 1}}]
+    return [str(document['_id']) for document
+            in Character._get_collection().aggregate(pipeline)]
+
+
+def _build_requests(
+    count: int,
+    mix: dict[str, int],
+    character_ids: list[str],
+    rng: random.Random,
+) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Draw a sequence of requests from the query mix.
+
+    :param count: Number of requests.
+    :param mix: Weights of query shapes.
+    :param character_ids: IDs used for `character` queries.
+    :param rng: Random generator.
+
+    :return: List of (shape name, request body) pairs.
+    """
+    shapes = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    requests = []
+    for shape in shapes:
+        body = {'query': QUERY_SHAPES[shape]}
+        if shape.startswith('character_'):
+            body['variables'] = {'id': rng.choice(character_ids)}
+        requests.append((shape, body))
+    return requests
+
+
+async def _execute(
+    client: httpx.AsyncClient, body: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Execute a single request.
+
+    :param client: HTTP client bound to the app.
+    :param body: GraphQL request body.
+
+    :return: Dict with latency in seconds, round trips and error flag.
+    """
+    counter = [0]
+    token = _round_trips.set(counter)
+    started = perf_counter()
+    try:
+        response = await client.post('/graphql', json=body)
+    finally:
+        latency = perf_counter() - started
+        _round_trips.reset(token)
+
+    error = response.status_code != 200 or 'errors' in response.json()
+    return {'latency': latency, 'round_trips': counter[0], 'error': error}
+
+
+async def _replay(
+    app: Any,
+    requests: list[tuple[str, dict[str, Any]]],
+    concurrency: int,
+) -> tuple[list[dict[str, Any]], float]:
+    """
+    Replay requests with a number of concurrent workers.
+
+    :param app: ASGI app.
+    :param requests: List of (shape name, request body) pairs.
+    :param concurrency: Number of concurrent workers.
+
+    :return: A tuple of results aligned with requests and the wall
+             time of the replay in seconds.
+    """
+    results: list[dict[str, Any] | None] = [None] * len(requests)
+    pending = iter(enumerate(requests))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://benchmark',
+    ) as client:
+        async def worker():
+            for index, (shape, body) in pending:
+                results[index] = await _execute(client, body)
+                results[index]['shape'] = shape
+
+        started = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = perf_counter() - started
+    return results, duration
+
+
+def run_benchmark(
+    requests: int = 1000,
+    concurrency: int = 1,
+    warmup: int = 100,
+    mix: dict[str, int] | None = None,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Run the benchmark against the app and the database configured
+    in settings.
+
+    :param requests: Number of measured requests.
+    :param concurrency: Number of concurrent clients.
+    :param warmup: Number of requests sent before measuring
+                   (e.g. to fill caches).
+    :param mix: Weights of query shapes, DEFAULT_MIX if not provided.
+    :param seed: Seed of the random generator.
+
+    :return: JSON-serializable report with the configuration, total
+             and per-shape summaries.
+
+    :raise ValueError: For unknown query shapes or an empty database.
+    """
+    mix = mix or DEFAULT_MIX
+    unknown = set(mix) - set(QUERY_SHAPES)
+    if unknown:
+        raise ValueError(f'Unknown query shapes: {", ".join(sorted(unknown))}')
+
+    install_listener()
+    from main import app
+
+    async def replay() -> tuple[list[dict[str, Any]], float]:
+        # Both runs share the event loop the async client is bound to
+        async with app.router.lifespan_context(app):
+            character_ids = _sample_character_ids(1000)
+            if not character_ids:
+                raise ValueError('No characters in the database.')
+
+            rng = random.Random(seed)
+            warmup_requests = _build_requests(warmup, mix, character_ids, rng)
+            measured_requests = _build_requests(
+                requests, mix, character_ids, rng,
+            )
+            await _replay(app, warmup_requests, 1)
+            return await _replay(app, measured_requests, concurrency)
+
+    results, duration = asyncio.run(replay())
+
+    shapes = dict()
+    for result in results:
+        shapes.setdefault(result['shape'], []).append(result)
+
+    return {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'requests': requests,
+            'concurrency': concurrency,
+            'warmup': warmup,
+            'mix': mix,
+            'seed': seed,
+            'settings': {
+                'ASYNC_DATA_PATH': settings.ASYNC_DATA_PATH,
+                'CACHE_ENABLED': settings.CACHE_ENABLED,
+                'ENEMY_GRAPH_LOOKUP': settings.ENEMY_GRAPH_LOOKUP,
+                'MONGODB_POOL': settings.MONGODB_POOL,
+                'RESPONSE_CACHE_ENABLED': settings.RESPONSE_CACHE_ENABLED,
+            },
+        },
+        'duration': duration,
+        'total': summarize(results, duration),
+        'shapes': {
+            shape: summarize(shape_results, duration)
+            for shape, shape_results in sorted(shapes.items())
+        },
+    }
@@ -0,0 +1,133 @@
+"""
+generator.py
+
+This module builds synthetic superhero graphs for benchmarks.
+
+Documents are generated as raw MongoDB documents (dicts with ObjectId
+references), ready to be inserted into the collections of the
+Character and Power models. Generation is deterministic for a seed.
+"""
+
+
+import random
+from typing import Any
+
+from bson import ObjectId
+
+from gql.types.character_types import RoleEnum
+
+
+def _object_id(rng: random.Random) -> ObjectId:
+    """
+    Generate a pseudo-random ObjectId.
+
+    :param rng: Random generator.
+
+    :return: ObjectId instance.
+    """
+    return ObjectId(rng.randbytes(12))
+
+
+def generate_powers(count: int, rng: random.Random) -> list[dict[str, Any]]:
+    """
+    Generate power documents with unique names.
+
+    :param count: Number of powers.
+    :param rng: Random generator.
+
+    :return: List of raw power documents.
+    """
+    return [
+        {
+            '_id': _object_id(rng),
+            'name': f'power {i}',
+            'description': f'Synthetic power number {i}.',
+        }
+        for i in range(count)
+    ]
+
+
+def generate_characters(
+    count: int,
+    power_ids: list[ObjectId],
+    enemy_degree: int,
+    cycle_density: float,
+    powers_per_character: int,
+    rng: random.Random,
+) -> list[dict[str, Any]]:
+    """
+    Generate character documents referencing each other as enemies.
+
+    Every character gets `enemy_degree` random enemies. With
+    probability `cycle_density` an enemy relation is made mutual,
+    which creates short cycles in the enemy graph (as in the real
+    data, where heroes and villains are enemies of each other).
+
+    :param count: Number of characters.
+    :param power_ids: IDs of powers to assign.
+    :param enemy_degree: Number of enemies of every character.
+    :param cycle_density: Probability of a mutual enemy relation.
+    :param powers_per_character: Number of powers of every character.
+    :param rng: Random generator.
+
+    :return: List of raw character documents.
+    """
+    roles = [role.value for role in RoleEnum]
+    ids = [_object_id(rng) for _ in range(count)]
+    enemies: list[dict[ObjectId, None]] = [dict() for _ in range(count)]
+
+    degree = min(enemy_degree, count - 1)
+    for i in range(count):
+        while len(enemies[i]) < degree:
+            j = rng.randrange(count)
+            if j == i:
+                continue
+            enemies[i][ids[j]] = None
+            if rng.random() < cycle_density:
+                enemies[j][ids[i]] = None
+
+    powers_count = min(powers_per_character, len(power_ids))
+    return [
+        {
+            '_id': ids[i],
+            'alias': f'Character {i}',
+            'name': f'Name {i}',
+            'role': rng.choice(roles),
+            'powers': rng.sample(power_ids, powers_count),
+            'enemies': list(enemies[i]),
+        }
+        for i in range(count)
+    ]
+
+
+def generate_graph(
+    characters: int,
+    powers: int,
+    enemy_degree: int = 3,
+    cycle_density: float = 0.3,
+    powers_per_character: int = 2,
+    seed: int = 0,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Generate a synthetic superhero graph.
+
+    :param characters: Number of characters.
+    :param powers: Number of powers.
+    :param enemy_degree: Number of enemies of every character.
+    :param cycle_density: Probability of a mutual enemy relation.
+    :param powers_per_character: Number of powers of every character.
+    :param seed: Seed of the random generator.
+
+    :return: A tuple of raw power and character documents.
+    """
+    rng = random.Random(seed)
+    power_documents = generate_powers(powers, rng)
+    character_documents = generate_characters(
+        characters,
+        [power['_id'] for power in power_documents],
+        enemy_degree,
+        cycle_density,
+        powers_per_character,
+        rng,
+    )
+    return power_documents, character_documents
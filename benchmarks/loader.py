@@ -0,0 +1,60 @@
+"""
+loader.py
+
+This module loads generated benchmark graphs into MongoDB, into the
+collections of the Character and Power models.
+"""
+
+
+from typing import Any, Iterator
+
+from data_access.models import Character, Power
+from logger import CustomLogger
+
+
+logger = CustomLogger('benchmarks.loader')
+
+
+def _batches(
+    documents: list[dict[str, Any]], size: int
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Split documents into batches.
+
+    :param documents: Documents to split.
+    :param size: Maximum size of a batch.
+
+    :return: Iterator of batches.
+    """
+    for start in range(0, len(documents), size):
+        yield documents[start:start+size]
+
+
+def load_graph(
+    powers: list[dict[str, Any]],
+    characters: list[dict[str, Any]],
+    drop: bool = False,
+    batch_size: int = 1000,
+):
+    """
+    Insert a generated graph into the database of the active
+    mongoengine connection. Model indexes are created as well.
+
+    :param powers: Raw power documents.
+    :param characters: Raw character documents.
+    :param drop: Whether existing collections are dropped first.
+    :param batch_size: Number of documents inserted at once.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    for model, documents in ((Power, powers), (Character, characters)):
+        if drop:
+            model.drop_collection()
+        model.ensure_indexes()
+
+        collection = model._get_collection()
+        for batch in _batches(documents, batch_size):
+            collection.insert_many(batch, ordered=False)
+        logger.log_event(
+            f'Loaded {len(documents)} documents into {model.__name__}'
+        )
@@ -0,0 +1,707 @@
+"""
+async_base_dao.py
+
+This module provides the AsyncBaseDAO class, a stateless data access
+object that defines base interactions with the MongoDB through the
+asyncio pymongo driver (AsyncMongoClient).
+
+It mirrors the interface of BaseDAO with coroutine methods, and is
+used as a foundation for all specialized async DAO classes.
+Documents are decoded into the same RawDocuments the sync path
+returns, so the service layer can share its assembly logic between
+both paths. Both paths share the identity
+map and the process-wide document cache as well.
+Bulk write operations report the same WriteResults as BaseDAO.
+The asyncio client is managed by connection.py.
+"""
+
+
+from time import perf_counter
+from typing import Any, Generic, TypeVar
+
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from data_access import events
+from data_access.base_dao import (
+    WriteResult,
+    create_filter,
+    create_page_query,
+    create_update_requests,
+    WRITE_COUNTER_COLLECTION,
+    create_upsert_requests,
+    get_aggregate_key,
+    get_write_errors,
+)
+from data_access.cache import ALL_KEY, get_aggregate_cache, get_cache
+from data_access.connection import get_async_client
+from data_access.identity_map import get_identity_map, to_key
+from data_access.models import Character, Power, RawDocument
+from logger import CustomLogger
+from metrics import observe_query
+from settings import MONGODB_CONNECTION
+
+
+T = TypeVar('T', Character, Power)
+logger = CustomLogger('data_access.async_base_dao')
+
+
+class AsyncBaseDAO(Generic[T]):
+    """
+    Base class for all async DAO classes.
+    Provides base CRUD operations, regardless the document type.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = None
+
+    @classmethod
+    def _collection(cls) -> AsyncCollection:
+        """
+        Get the collection of the DAO model.
+
+        :return: AsyncCollection instance.
+
+        :raise ValueError: If the model is not specified in AsyncBaseDAO
+                           or its subclasses.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        database = get_async_client()[MONGODB_CONNECTION['db']]
+        return database[cls.model._get_collection_name()]
+
+    @classmethod
+    def _projection(cls, only: list[str] | None) -> dict[str, int] | None:
+        """
+        Convert a list of model fields into a MongoDB projection.
+
+        :param only: Fields to load, None to load whole documents.
+
+        :return: Projection dict or None.
+        """
+        if not only:
+            return None
+        return {cls.model._fields[field].db_field: 1 for field in only}
+
+    @classmethod
+    async def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> RawDocument | None:
+        """
+        Retrieve an object by its ID.
+
+        :param id: The ID of the object to retrieve.
+        :param only: Fields to load, None to load the whole document.
+
+        :return: The object if found, otherwise None.
+
+        :raise ValueError: If the model is not specified in AsyncBaseDAO
+                           or its subclasses.
+        :raise PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            known, document = identity_map.get_document(
+                cls.model, id, only,
+            )
+            if known:
+                return document
+
+        cache = get_cache(cls.model)
+        if cache is not None:
+            hit, document = cache.get(to_key(id))
+            if hit:
+                if identity_map is not None:
+                    identity_map.put_document(cls.model, id, document)
+                return document
+            # Only whole documents are cached
+            only = None
+
+        started = perf_counter()
+        try:
+            document = await collection.find_one(
+                {'_id': to_key(id)}, cls._projection(only),
+            )
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_one_by_id', started, 1 if document else 0,
+        )
+
+        if cache is not None:
+            cache.put_documents([id], [document] if document else [])
+        if identity_map is not None:
+            identity_map.put_document(cls.model, id, document, only)
+        return document
+
+    @classmethod
+    async def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects by their IDs.
+
+        :param ids: The list of IDs of the objects to retrieve.
+        :param only: Fields to load, None to load whole documents.
+
+        :return: A list of all found objects, or an empty list if
+                 none were found. Objects already known to the identity
+                 map come first, followed by freshly fetched ones.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        identity_map = get_identity_map()
+        if identity_map is None:
+            known, missing = [], list(dict.fromkeys(to_key(id) for id in ids))
+        else:
+            known, missing = identity_map.get_documents(
+                cls.model, ids, only,
+            )
+
+        if not missing:
+            return known
+
+        cache = get_cache(cls.model)
+        if cache is not None:
+            cached, uncached = cache.get_documents(missing)
+            if identity_map is not None:
+                pending = set(uncached)
+                identity_map.put_documents(
+                    cls.model,
+                    [id for id in missing if id not in pending],
+                    cached,
+                )
+            known, missing = known + cached, uncached
+            if not missing:
+                return known
+            # Only whole documents are cached
+            only = None
+
+        started = perf_counter()
+        try:
+            cursor = collection.find(
+                {'_id': {'$in': missing}}, cls._projection(only),
+            )
+            fetched = await cursor.to_list()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_many_by_ids', started, len(fetched),
+        )
+
+        if cache is not None:
+            cache.put_documents(missing, fetched)
+        if identity_map is not None:
+            identity_map.put_documents(cls.model, missing, fetched, only)
+        return known + fetched
+
+    @classmethod
+    async def get_all(cls, only: list[str] | None = None) -> list[RawDocument]:
+        """
+        Retrieve all objects.
+
+        :param only: Fields to load, None to load whole documents.
+
+        :return: A list of all objects, or an empty list if
+                 there are no corresponding objects.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        cache = get_cache(cls.model)
+        hit, documents = (
+            cache.get(ALL_KEY) if cache is not None else (False, None)
+        )
+        if not hit:
+            if cache is not None:
+                # Only whole documents are cached
+                only = None
+
+            started = perf_counter()
+            try:
+                cursor = collection.find({}, cls._projection(only))
+                documents = await cursor.to_list()
+            except PyMongoError:
+                logger.log_error('DB interaction error')
+                raise
+
+            observe_query(
+                cls.model.__name__, 'get_all', started, len(documents),
+            )
+
+            if cache is not None:
+                cache.set(ALL_KEY, documents)
+                cache.put_documents(
+                    [document.id for document in documents], documents,
+                )
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    async def get_page(
+        cls,
+        limit: int,
+        after: str | None = None,
+        before: str | None = None,
+        reverse: bool = False,
+        only: list[str] | None = None,
+        filters: dict[str, Any] | None = None,
+        sort: tuple[str, int] | None = None,
+    ) -> list[RawDocument]:
+        """
+        Retrieve a page of objects ordered by ID or by a field with
+        the ID as a tiebreaker (keyset pagination). Every page is
+        a single bounded query, backed by the _id index or by
+        a compound index of the filtered and ordering fields.
+
+        :param limit: Maximum number of objects to retrieve.
+        :param after: Retrieve only objects following this cursor
+                      position, an ID for pages ordered by ID,
+                      otherwise a (value, ID) pair.
+        :param before: Retrieve only objects preceding this cursor
+                       position.
+        :param reverse: Retrieve the page from the end of the range,
+                        objects are then ordered in reverse.
+        :param only: Fields to load, None to load whole documents.
+                     The ordering field is always loaded.
+        :param filters: Filters of model fields (see create_filter).
+        :param sort: A pair of the ordering model field and direction
+                     (1 or -1), None to order by ascending ID.
+
+        :return: A list of found objects, or an empty list if
+                 there are no corresponding objects.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses, or if
+                            a filter or the ordering field is not
+                            known.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        query, sort, only = create_page_query(
+            cls.model, after, before, reverse, only, filters, sort,
+        )
+
+        started = perf_counter()
+        try:
+            cursor = collection.find(
+                query, cls._projection(only),
+            ).sort(sort).limit(limit)
+            documents = await cursor.to_list()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(cls.model.__name__, 'get_page', started, len(documents))
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    async def get_many_by_reference(
+        cls, field: str, ids: list[Any], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects referencing any of provided IDs in a list
+        field (e.g. characters listing given characters as enemies),
+        with a single query backed by the multikey index of the field.
+
+        :param field: Name of the reference list field.
+        :param ids: Referenced IDs.
+        :param only: Fields to load, None to load whole documents.
+                     The reference field is always loaded, so results
+                     can be matched with referenced IDs.
+
+        :return: A list of found objects in any order, or an empty
+                 list if there are no corresponding objects.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        keys = list(dict.fromkeys(to_key(id) for id in ids))
+        if not keys:
+            return []
+        if only and field not in only:
+            only = [*only, field]
+
+        started = perf_counter()
+        try:
+            documents = await collection.find(
+                {cls.model._fields[field].db_field: {'$in': keys}},
+                cls._projection(only),
+            ).to_list()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_many_by_reference', started,
+            len(documents),
+        )
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            # Any write of the model may change the referencing objects
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    async def get_count(cls, filters: dict[str, Any] | None = None) -> int:
+        """
+        Retrieve the number of objects. Without filters the number is
+        estimated from collection metadata and doesn't scan documents,
+        filtered objects are counted with an index-backed query.
+
+        :param filters: Filters of model fields (see create_filter).
+
+        :return: Number of objects, estimated without filters.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses, or if
+                            a filter is not known.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+
+        started = perf_counter()
+        try:
+            if filters:
+                count = await collection.count_documents(
+                    create_filter(cls.model, filters),
+                )
+            else:
+                count = await collection.estimated_document_count()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(cls.model.__name__, 'get_count', started, 0)
+        return count
+
+    @classmethod
+    async def aggregate(
+        cls,
+        pipeline: list[dict[str, Any]],
+        method: str = 'aggregate',
+        cached: bool = False,
+    ) -> list[RawDocument]:
+        """
+        Run an aggregation pipeline on the collection of the model.
+
+        :param pipeline: Aggregation pipeline.
+        :param method: Name the query is recorded with in metrics.
+        :param cached: Whether the result may be served from
+                       the aggregation cache.
+
+        :return: A list of result documents. Cached results are
+                 shared, so they must be treated as read-only.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+
+        cache = get_aggregate_cache() if cached else None
+        key = get_aggregate_key(cls.model, pipeline)
+        if cache is not None:
+            hit, entry = cache.get(key)
+            if hit:
+                return entry[1]
+
+        started = perf_counter()
+        try:
+            cursor = await collection.aggregate(pipeline)
+            result = await cursor.to_list()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(cls.model.__name__, method, started, len(result))
+
+        if cache is not None:
+            cache.set(key, (cls.model.__name__, result))
+        return result
+
+    @classmethod
+    async def get_existing_ids(cls, ids: list[Any]) -> set[ObjectId | str]:
+        """
+        Check which of provided IDs belong to existing objects, with
+        a single query (e.g. to validate references of a whole batch).
+        The identity map and caches are skipped, so the result is
+        never stale.
+
+        :param ids: IDs to check.
+
+        :return: Set of IDs (as identity map keys) of existing objects.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        keys = list(dict.fromkeys(to_key(id) for id in ids))
+        if not keys:
+            return set()
+
+        started = perf_counter()
+        try:
+            existing = {document['_id'] async for document in collection.find(
+                {'_id': {'$in': keys}}, {'_id': 1},
+            )}
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_existing_ids', started, len(existing),
+        )
+        return existing
+
+    @classmethod
+    def _write_counters(cls) -> AsyncCollection:
+        """
+        Get the collection of write counters.
+
+        :return: AsyncCollection instance.
+        """
+        database = get_async_client()[MONGODB_CONNECTION['db']]
+        return database[WRITE_COUNTER_COLLECTION]
+
+    @classmethod
+    async def get_write_count(cls) -> int:
+        """
+        Retrieve the number of bulk writes to the collection of
+        the model, stored in the database.
+
+        :return: Write counter, 0 if the collection was never written.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        name = cls._collection().name
+
+        try:
+            counter = await cls._write_counters().find_one({'_id': name})
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+        return counter['count'] if counter else 0
+
+    @classmethod
+    async def _bulk_write(
+        cls, method: str, requests: list[Any]
+    ) -> tuple[dict[int, str], dict[int, Any]]:
+        """
+        Execute requests with a single unordered bulk write and
+        increment the write counter of the collection.
+
+        :param method: Name of the calling DAO method, for metrics.
+        :param requests: Write requests (e.g. InsertOne).
+
+        :return: A tuple of error messages and IDs of upserted
+                 documents, both keyed by index of the request.
+
+        :raises PyMongoError: For general database interaction issues.
+        """
+        collection = cls._collection()
+
+        started = perf_counter()
+        try:
+            result = await collection.bulk_write(requests, ordered=False)
+            errors, upserted = dict(), dict(result.upserted_ids or {})
+        except BulkWriteError as e:
+            errors = get_write_errors(e.details)
+            upserted = {entry['index']: entry['_id']
+                        for entry in e.details.get('upserted', ())}
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, method, started, len(requests) - len(errors),
+        )
+
+        # Counted after writing, so a counter read before reading
+        # the documents is never newer than them
+        try:
+            await cls._write_counters().update_one(
+                {'_id': collection.name}, {'$inc': {'count': 1}}, upsert=True,
+            )
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        return errors, upserted
+
+    @classmethod
+    async def bulk_insert(
+        cls, documents: list[dict[str, Any]]
+    ) -> list[WriteResult]:
+        """
+        Insert objects with a single unordered bulk write.
+
+        :param documents: Raw documents to insert. Documents without
+                          '_id' get a new ObjectId.
+
+        :return: WriteResults aligned with documents.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+        if not documents:
+            return []
+
+        documents = [{'_id': ObjectId(), **document} for document in documents]
+        errors, _ = await cls._bulk_write(
+            'bulk_insert', [InsertOne(document) for document in documents],
+        )
+
+        results = [
+            WriteResult(None, errors[index]) if index in errors
+            else WriteResult(document['_id'])
+            for index, document in enumerate(documents)
+        ]
+        events.publish_write(
+            cls.model, [result.id for result in results if not result.error],
+        )
+        return results
+
+    @classmethod
+    async def bulk_upsert(
+        cls, documents: list[dict[str, Any]], key: str
+    ) -> list[WriteResult]:
+        """
+        Update objects identified by a unique field, or insert them if
+        they don't exist yet, with a single unordered bulk write. IDs
+        of updated objects are looked up with one more query.
+
+        :param documents: Raw documents to upsert.
+        :param key: Database name of the unique field (e.g. 'name').
+
+        :return: WriteResults aligned with documents.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+        if not documents:
+            return []
+
+        errors, upserted = await cls._bulk_write(
+            'bulk_upsert', create_upsert_requests(documents, key),
+        )
+
+        updated = [document[key] for index, document in enumerate(documents)
+                   if index not in errors and index not in upserted]
+        ids = dict()
+        if updated:
+            try:
+                ids = {entry[key]: entry['_id'] async for entry
+                       in cls._collection().find({key: {'$in': updated}},
+                                                 {key: 1})}
+            except PyMongoError:
+                logger.log_error('DB interaction error')
+                raise
+
+        results = [
+            WriteResult(None, errors[index]) if index in errors
+            else WriteResult(upserted.get(index, ids.get(document[key])))
+            for index, document in enumerate(documents)
+        ]
+        events.publish_write(cls.model, [
+            result.id for result in results if result.id is not None
+        ])
+        return results
+
+    @classmethod
+    async def bulk_update(
+        cls, updates: list[tuple[Any, dict[str, Any]]]
+    ) -> list[WriteResult]:
+        """
+        Update fields of objects identified by their IDs with a single
+        unordered bulk write. Existence of the objects is checked with
+        one more query, so missing objects are reported as errors.
+
+        :param updates: Pairs of object IDs and raw fields to set.
+
+        :return: WriteResults aligned with updates.
+
+        :raises ValueError: If the model is not specified in
+                            AsyncBaseDAO or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        existing = await cls.get_existing_ids([id for id, _ in updates])
+        found = [index for index, (id, _) in enumerate(updates)
+                 if to_key(id) in existing]
+
+        errors = dict()
+        if found:
+            errors, _ = await cls._bulk_write(
+                'bulk_update',
+                create_update_requests([updates[index] for index in found]),
+            )
+
+        results = [WriteResult(None, 'Document not found.')] * len(updates)
+        for position, index in enumerate(found):
+            if position in errors:
+                results[index] = WriteResult(None, errors[position])
+            else:
+                results[index] = WriteResult(to_key(updates[index][0]))
+        events.publish_write(
+            cls.model, [result.id for result in results if not result.error],
+        )
+        return results
@@ -7,20 +7,308 @@ that defines base interactions with the MongoDB.
 The BaseDAO handles simple CRUD operations for all defined Documents.
 It is used as a foundation for all specialized DAO classes to reduce
 redundancy.
+
+Read operations skip mongoengine Documents: they query the collection
+through pymongo and return RawDocuments (see models.py), decoded
+directly into dicts. Documents are left for the write path.
+
+Read operations by ID go through the identity map of the current
+request (if any), so every document is loaded at most once per
+GraphQL request. All read operations accept an optional field
+projection, so only the fields requested by the client are
+transferred from the database.
+
+Models configured in `settings.DAO_CACHE` are additionally served from
+a process-wide read-through cache (see cache.py), which is checked
+after the identity map. Cached models are always fetched as whole
+documents, so every cached entry satisfies any projection.
+
+Aggregation pipelines (e.g. statistics) are run with `aggregate`,
+so only aggregated values are transferred. Their results may be
+cached for a short time in the aggregation cache (see cache.py).
+
+Bulk write operations send a whole batch of raw documents with
+a single unordered `bulk_write`, so a failing item doesn't stop the
+others, and report a WriteResult for every item. IDs of written
+documents are published as write events (see events.py). Every bulk
+write increments the write counter of its collection, stored in the
+database, so data derived from a collection by any process (e.g.
+a saved graph index) can be checked against later writes.
 """
 
 
-from typing import Generic, TypeVar
+import json
+import re
+from time import perf_counter
+from typing import Any, Generic, NamedTuple, TypeVar
 
-from mongoengine.errors import MongoEngineException
+from bson import ObjectId
+from mongoengine import LazyReferenceField, ObjectIdField
+from pymongo import InsertOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from data_access.models import Character, Power
+from data_access import events
+from data_access.cache import ALL_KEY, get_aggregate_cache, get_cache
+from data_access.identity_map import get_identity_map, to_key
+from data_access.models import (
+    Character, Power, RawDocument, get_raw_codec_options
+)
 from logger import CustomLogger
+from metrics import observe_query
 
 
 T = TypeVar('T', Character, Power)
 logger = CustomLogger('data_access.base_dao')
 
+# Server error code of unique index violations
+DUPLICATE_KEY_ERROR = 11000
+# Collection holding write counters keyed by collection name
+WRITE_COUNTER_COLLECTION = 'write_counters'
+
+
+class WriteResult(NamedTuple):
+    """
+    Result of a single item of a bulk write operation.
+
+    Attributes:
+        id: ID of the written document, None if it is not known.
+        error: Error message, None if the item was written.
+    """
+    id: Any
+    error: str | None = None
+
+
+def get_write_errors(details: dict[str, Any]) -> dict[int, str]:
+    """
+    Extract errors of single items from the details of a failed
+    unordered bulk write.
+
+    :param details: Details of a BulkWriteError.
+
+    :return: Error messages keyed by index of the failed request.
+    """
+    errors = dict()
+    for error in details.get('writeErrors', ()):
+        if error.get('code') == DUPLICATE_KEY_ERROR:
+            errors[error['index']] = 'Document already exists.'
+        else:
+            errors[error['index']] = error.get('errmsg', 'Write failed.')
+    return errors
+
+
+def count_write(model: type):
+    """
+    Increment the write counter of the collection of a model. Must be
+    called after writes bypassing BaseDAO (e.g. by the prefill script).
+
+    :param model: Document model class of the written collection.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    model._get_db()[WRITE_COUNTER_COLLECTION].update_one(
+        {'_id': model._get_collection_name()},
+        {'$inc': {'count': 1}},
+        upsert=True,
+    )
+
+
+def create_upsert_requests(
+    documents: list[dict[str, Any]], key: str
+) -> list[UpdateOne]:
+    """
+    Create update requests of documents identified by a unique field,
+    inserting documents that don't exist yet.
+
+    :param documents: Raw documents to upsert.
+    :param key: Database name of the unique field.
+
+    :return: List of UpdateOne requests aligned with documents.
+    """
+    return [
+        UpdateOne({key: document[key]}, {'$set': document}, upsert=True)
+        for document in documents
+    ]
+
+
+def create_update_requests(
+    updates: list[tuple[Any, dict[str, Any]]]
+) -> list[UpdateOne]:
+    """
+    Create update requests of documents identified by their IDs.
+
+    :param updates: Pairs of document IDs and fields to set.
+
+    :return: List of UpdateOne requests aligned with updates.
+    """
+    return [
+        UpdateOne({'_id': to_key(id)}, {'$set': fields})
+        for id, fields in updates
+    ]
+
+
+def create_filter(
+    model: type, filters: dict[str, Any] | None
+) -> dict[str, Any]:
+    """
+    Translate filters of model fields into a MongoDB filter.
+
+    Filter keys are model field names, matched by equality (list
+    fields match documents containing the value), or names suffixed
+    with '__prefix', matched by an anchored regex, which is served
+    by an index on the field. Conditions on the same field (e.g.
+    'alias' and 'alias__prefix') must all match.
+
+    :param model: Document model class.
+    :param filters: Filter values keyed by filter keys, None for
+                    no filters.
+
+    :return: MongoDB filter.
+
+    :raise ValueError: If a filter key is not known.
+    """
+    conditions: dict[str, dict[str, Any]] = dict()
+    for key, value in (filters or {}).items():
+        name, _, lookup = key.partition('__')
+        field = model._fields.get(name)
+        if field is None or lookup not in ('', 'prefix'):
+            raise ValueError(f'Unknown filter: {key}')
+
+        # References are stored as ObjectIds, also inside of lists
+        if isinstance(getattr(field, 'field', field), (
+            LazyReferenceField, ObjectIdField,
+        )):
+            value = to_key(value)
+        condition = conditions.setdefault(field.db_field, dict())
+        if lookup:
+            condition['$regex'] = f'^{re.escape(value)}'
+        else:
+            condition['$eq'] = value
+
+    # A lone equality condition stays a plain value
+    return {
+        db_field: condition['$eq'] if list(condition) == ['$eq'] else condition
+        for db_field, condition in conditions.items()
+    }
+
+
+def get_aggregate_key(model: type, pipeline: list[dict[str, Any]]) -> str:
+    """
+    Build the aggregation cache key of a pipeline.
+
+    :param model: Document model class the pipeline runs on.
+    :param pipeline: Aggregation pipeline.
+
+    :return: Cache key.
+    """
+    return json.dumps(
+        [model.__name__, pipeline], sort_keys=True, default=str,
+    )
+
+
+def create_keyset_filter(
+    field: str,
+    direction: int,
+    after: Any = None,
+    before: Any = None,
+) -> dict[str, Any]:
+    """
+    Create a MongoDB filter selecting objects between two cursors
+    of a page ordered by a field, with the ID as a tiebreaker.
+
+    :param field: Database name of the ordering field, '_id' for
+                  pages ordered by ID.
+    :param direction: Direction of the order, 1 for ascending
+                      and -1 for descending.
+    :param after: Cursor position to paginate forward from, an ID
+                  for pages ordered by ID, otherwise a (value, ID)
+                  pair.
+    :param before: Cursor position to paginate backward from.
+
+    :return: MongoDB filter, empty for no cursors.
+    """
+    bounds = [
+        ('$gt' if direction > 0 else '$lt', after),
+        ('$lt' if direction > 0 else '$gt', before),
+    ]
+    if field == '_id':
+        id_filter = {
+            operator: to_key(cursor)
+            for operator, cursor in bounds if cursor is not None
+        }
+        return {'_id': id_filter} if id_filter else {}
+
+    conditions = [
+        {'$or': [
+            {field: {operator: cursor[0]}},
+            {field: cursor[0], '_id': {operator: to_key(cursor[1])}},
+        ]}
+        for operator, cursor in bounds if cursor is not None
+    ]
+    if len(conditions) > 1:
+        return {'$and': conditions}
+    return conditions[0] if conditions else {}
+
+
+def create_sort(
+    field: str, direction: int, reverse: bool
+) -> list[tuple[str, int]]:
+    """
+    Create a MongoDB sort of a page ordered by a field, with the ID
+    as a tiebreaker.
+
+    :param field: Database name of the ordering field.
+    :param direction: Direction of the order, 1 for ascending
+                      and -1 for descending.
+    :param reverse: Whether the page is taken from the end of the
+                    range, the order is then flipped.
+
+    :return: List of (database field, direction) pairs.
+    """
+    direction = -direction if reverse else direction
+    if field == '_id':
+        return [('_id', direction)]
+    return [(field, direction), ('_id', direction)]
+
+
+def create_page_query(
+    model: type,
+    after: Any,
+    before: Any,
+    reverse: bool,
+    only: list[str] | None,
+    filters: dict[str, Any] | None,
+    sort: tuple[str, int] | None,
+) -> tuple[dict[str, Any], list[tuple[str, int]], list[str] | None]:
+    """
+    Translate arguments of a page into a MongoDB query.
+
+    :param model: Document model class.
+    :param after: Cursor position to paginate forward from.
+    :param before: Cursor position to paginate backward from.
+    :param reverse: Whether the page is taken from the end.
+    :param only: Fields to load, None to load whole documents.
+    :param filters: Filters of model fields.
+    :param sort: A pair of the ordering model field and direction.
+
+    :return: A tuple of the MongoDB filter, sort and fields to load,
+             extended with the ordering field.
+
+    :raise ValueError: If a filter or the ordering field is not known.
+    """
+    field, direction = sort or ('id', 1)
+    if field not in model._fields:
+        raise ValueError(f'Unknown ordering field: {field}')
+    db_field = model._fields[field].db_field
+
+    query = create_filter(model, filters)
+    keyset = create_keyset_filter(db_field, direction, after, before)
+    if query and keyset:
+        query = {'$and': [query, keyset]}
+    if only and field not in only:
+        only = [*only, field]
+    return query or keyset, create_sort(db_field, direction, reverse), only
+
 
 class BaseDAO(Generic[T]):
     """
@@ -33,70 +321,647 @@ class BaseDAO(Generic[T]):
     model = None
 
     @classmethod
-    def get_one_by_id(cls, id: str) -> T | None:
+    def _collection(cls) -> Collection:
+        """
+        Get the collection of the DAO model, decoding documents
+        into RawDocuments.
+
+        :return: Collection instance.
+
+        :raise ValueError: If the model is not specified in BaseDAO
+                           or its subclasses.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        collection = cls.model._get_collection()
+        return collection.with_options(
+            codec_options=get_raw_codec_options(collection.codec_options),
+        )
+
+    @classmethod
+    def _projection(cls, only: list[str] | None) -> dict[str, int] | None:
+        """
+        Convert a list of model fields into a MongoDB projection.
+
+        :param only: Fields to load, None to load whole documents.
+
+        :return: Projection dict or None.
+        """
+        if not only:
+            return None
+        return {cls.model._fields[field].db_field: 1 for field in only}
+
+    @classmethod
+    def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> RawDocument | None:
         """
         Retrieve an object by its ID.
 
         :param id: The ID of the object to retrieve.
+        :param only: Fields to load, None to load the whole document.
 
         :return: The object if found, otherwise None.
 
         :raise ValueError: If the model is not specified in BaseDAO
                            or its subclasses.
-        :raise MongoEngineException: For general database interaction
-                                     issues.
+        :raise PyMongoError: For general database interaction issues.
         """
         if not cls.model:
             raise ValueError('Model not set for this DAO.')
 
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            known, document = identity_map.get_document(
+                cls.model, id, only,
+            )
+            if known:
+                return document
+
+        cache = get_cache(cls.model)
+        if cache is not None:
+            hit, document = cache.get(to_key(id))
+            if hit:
+                if identity_map is not None:
+                    identity_map.put_document(cls.model, id, document)
+                return document
+            # Only whole documents are cached
+            only = None
+
+        started = perf_counter()
         try:
-            return cls.model.objects(id=id).first()
-        except MongoEngineException:
+            document = cls._collection().find_one(
+                {'_id': to_key(id)}, cls._projection(only),
+            )
+        except PyMongoError:
             logger.log_error('DB interaction error')
             raise
 
+        observe_query(
+            cls.model.__name__, 'get_one_by_id', started, 1 if document else 0,
+        )
+
+        if cache is not None:
+            cache.put_documents([id], [document] if document else [])
+        if identity_map is not None:
+            identity_map.put_document(cls.model, id, document, only)
+        return document
+
     @classmethod
-    def get_many_by_ids(cls, ids: list[str]) -> list[T]:
+    def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[RawDocument]:
         """
         Retrieve objects by their IDs.
 
         :param ids: The list of IDs of the objects to retrieve.
+        :param only: Fields to load, None to load whole documents.
 
         :return: A list of all found objects, or an empty list if
-                 none were found.
+                 none were found. Objects already known to the identity
+                 map come first, followed by freshly fetched ones.
 
         :raises ValueError: If the model is not specified in BaseDAO
                             or its subclasses.
-        :raises MongoEngineException: For general database interaction
-                                      issues.
+        :raises PyMongoError: For general database interaction issues.
         """
         if not cls.model:
             raise ValueError('Model not set for this DAO.')
 
+        identity_map = get_identity_map()
+        if identity_map is None:
+            known, missing = [], list(ids)
+        else:
+            known, missing = identity_map.get_documents(
+                cls.model, ids, only,
+            )
+
+        if not missing:
+            return known
+
+        cache = get_cache(cls.model)
+        if cache is not None:
+            cached, uncached = cache.get_documents(missing)
+            if identity_map is not None:
+                pending = set(uncached)
+                identity_map.put_documents(
+                    cls.model,
+                    [id for id in missing if id not in pending],
+                    cached,
+                )
+            known, missing = known + cached, uncached
+            if not missing:
+                return known
+            # Only whole documents are cached
+            only = None
+
+        started = perf_counter()
         try:
-            return list(cls.model.objects(id__in=ids))
-        except MongoEngineException:
+            fetched = list(cls._collection().find(
+                {'_id': {'$in': [to_key(id) for id in missing]}},
+                cls._projection(only),
+            ))
+        except PyMongoError:
             logger.log_error('DB interaction error')
             raise
 
+        observe_query(
+            cls.model.__name__, 'get_many_by_ids', started, len(fetched),
+        )
+
+        if cache is not None:
+            cache.put_documents(missing, fetched)
+        if identity_map is not None:
+            identity_map.put_documents(cls.model, missing, fetched, only)
+        return known + fetched
+
     @classmethod
-    def get_all(cls) -> list[T]:
+    def get_all(cls, only: list[str] | None = None) -> list[RawDocument]:
         """
         Retrieve all objects.
 
+        :param only: Fields to load, None to load whole documents.
+
         :return: A list of all objects, or an empty list if
                  there are no corresponding objects.
 
         :raises ValueError: If the model is not specified in BaseDAO
                             or its subclasses.
-        :raises MongoEngineException: For general database interaction
-                                      issues.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        cache = get_cache(cls.model)
+        hit, documents = (
+            cache.get(ALL_KEY) if cache is not None else (False, None)
+        )
+        if not hit:
+            if cache is not None:
+                # Only whole documents are cached
+                only = None
+
+            started = perf_counter()
+            try:
+                documents = list(
+                    cls._collection().find({}, cls._projection(only))
+                )
+            except PyMongoError:
+                logger.log_error('DB interaction error')
+                raise
+
+            observe_query(
+                cls.model.__name__, 'get_all', started, len(documents),
+            )
+
+            if cache is not None:
+                cache.set(ALL_KEY, documents)
+                cache.put_documents(
+                    [document.id for document in documents], documents,
+                )
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    def get_page(
+        cls,
+        limit: int,
+        after: str | None = None,
+        before: str | None = None,
+        reverse: bool = False,
+        only: list[str] | None = None,
+        filters: dict[str, Any] | None = None,
+        sort: tuple[str, int] | None = None,
+    ) -> list[RawDocument]:
+        """
+        Retrieve a page of objects ordered by ID or by a field with
+        the ID as a tiebreaker (keyset pagination). Every page is
+        a single bounded query, backed by the _id index or by
+        a compound index of the filtered and ordering fields.
+
+        :param limit: Maximum number of objects to retrieve.
+        :param after: Retrieve only objects following this cursor
+                      position, an ID for pages ordered by ID,
+                      otherwise a (value, ID) pair.
+        :param before: Retrieve only objects preceding this cursor
+                       position.
+        :param reverse: Retrieve the page from the end of the range,
+                        objects are then ordered in reverse.
+        :param only: Fields to load, None to load whole documents.
+                     The ordering field is always loaded.
+        :param filters: Filters of model fields (see create_filter).
+        :param sort: A pair of the ordering model field and direction
+                     (1 or -1), None to order by ascending ID.
+
+        :return: A list of found objects, or an empty list if
+                 there are no corresponding objects.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses, or if a filter or
+                            the ordering field is not known.
+        :raises PyMongoError: For general database interaction issues.
         """
         if not cls.model:
             raise ValueError('Model not set for this DAO.')
-        
+
+        query, sort, only = create_page_query(
+            cls.model, after, before, reverse, only, filters, sort,
+        )
+
+        started = perf_counter()
         try:
-            return list(cls.model.objects())
-        except MongoEngineException:
+            cursor = cls._collection().find(
+                query, cls._projection(only),
+            ).sort(sort).limit(limit)
+            documents = list(cursor)
+        except PyMongoError:
             logger.log_error('DB interaction error')
             raise
+
+        observe_query(cls.model.__name__, 'get_page', started, len(documents))
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    def get_many_by_reference(
+        cls, field: str, ids: list[Any], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects referencing any of provided IDs in a list
+        field (e.g. characters listing given characters as enemies),
+        with a single query backed by the multikey index of the field.
+
+        :param field: Name of the reference list field.
+        :param ids: Referenced IDs.
+        :param only: Fields to load, None to load whole documents.
+                     The reference field is always loaded, so results
+                     can be matched with referenced IDs.
+
+        :return: A list of found objects in any order, or an empty
+                 list if there are no corresponding objects.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        keys = list(dict.fromkeys(to_key(id) for id in ids))
+        if not keys:
+            return []
+        if only and field not in only:
+            only = [*only, field]
+
+        started = perf_counter()
+        try:
+            documents = list(cls._collection().find(
+                {cls.model._fields[field].db_field: {'$in': keys}},
+                cls._projection(only),
+            ))
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_many_by_reference', started,
+            len(documents),
+        )
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            # Any write of the model may change the referencing objects
+            identity_map.collections.add(cls.model.__name__)
+            for document in documents:
+                identity_map.put_document(
+                    cls.model, document.id, document, only,
+                )
+        return documents
+
+    @classmethod
+    def get_count(cls, filters: dict[str, Any] | None = None) -> int:
+        """
+        Retrieve the number of objects. Without filters the number is
+        estimated from collection metadata and doesn't scan documents,
+        filtered objects are counted with an index-backed query.
+
+        :param filters: Filters of model fields (see create_filter).
+
+        :return: Number of objects, estimated without filters.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses, or if a filter
+                            is not known.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+
+        started = perf_counter()
+        try:
+            if filters:
+                count = cls._collection().count_documents(
+                    create_filter(cls.model, filters),
+                )
+            else:
+                count = cls._collection().estimated_document_count()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(cls.model.__name__, 'get_count', started, 0)
+        return count
+
+    @classmethod
+    def aggregate(
+        cls,
+        pipeline: list[dict[str, Any]],
+        method: str = 'aggregate',
+        cached: bool = False,
+    ) -> list[RawDocument]:
+        """
+        Run an aggregation pipeline on the collection of the model.
+
+        :param pipeline: Aggregation pipeline.
+        :param method: Name the query is recorded with in metrics.
+        :param cached: Whether the result may be served from
+                       the aggregation cache.
+
+        :return: A list of result documents. Cached results are
+                 shared, so they must be treated as read-only.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.collections.add(cls.model.__name__)
+
+        cache = get_aggregate_cache() if cached else None
+        key = get_aggregate_key(cls.model, pipeline)
+        if cache is not None:
+            hit, entry = cache.get(key)
+            if hit:
+                return entry[1]
+
+        started = perf_counter()
+        try:
+            result = list(cls._collection().aggregate(pipeline))
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(cls.model.__name__, method, started, len(result))
+
+        if cache is not None:
+            cache.set(key, (cls.model.__name__, result))
+        return result
+
+    @classmethod
+    def get_existing_ids(cls, ids: list[Any]) -> set[ObjectId | str]:
+        """
+        Check which of provided IDs belong to existing objects, with
+        a single query (e.g. to validate references of a whole batch).
+        The identity map and caches are skipped, so the result is
+        never stale.
+
+        :param ids: IDs to check.
+
+        :return: Set of IDs (as identity map keys) of existing objects.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        keys = list(dict.fromkeys(to_key(id) for id in ids))
+        if not keys:
+            return set()
+
+        started = perf_counter()
+        try:
+            existing = {document['_id'] for document in cls._collection().find(
+                {'_id': {'$in': keys}}, {'_id': 1},
+            )}
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, 'get_existing_ids', started, len(existing),
+        )
+        return existing
+
+    @classmethod
+    def get_write_count(cls) -> int:
+        """
+        Retrieve the number of bulk writes to the collection of
+        the model, stored in the database.
+
+        :return: Write counter, 0 if the collection was never written.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        try:
+            counter = cls.model._get_db()[WRITE_COUNTER_COLLECTION].find_one(
+                {'_id': cls.model._get_collection_name()},
+            )
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+        return counter['count'] if counter else 0
+
+    @classmethod
+    def _bulk_write(
+        cls, method: str, requests: list[Any]
+    ) -> tuple[dict[int, str], dict[int, Any]]:
+        """
+        Execute requests with a single unordered bulk write and
+        increment the write counter of the collection.
+
+        :param method: Name of the calling DAO method, for metrics.
+        :param requests: Write requests (e.g. InsertOne).
+
+        :return: A tuple of error messages and IDs of upserted
+                 documents, both keyed by index of the request.
+
+        :raises PyMongoError: For general database interaction issues.
+        """
+        started = perf_counter()
+        try:
+            result = cls._collection().bulk_write(requests, ordered=False)
+            errors, upserted = dict(), dict(result.upserted_ids or {})
+        except BulkWriteError as e:
+            errors = get_write_errors(e.details)
+            upserted = {entry['index']: entry['_id']
+                        for entry in e.details.get('upserted', ())}
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__, method, started, len(requests) - len(errors),
+        )
+
+        # Counted after writing, so a counter read before reading
+        # the documents is never newer than them
+        try:
+            count_write(cls.model)
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        return errors, upserted
+
+    @classmethod
+    def bulk_insert(cls, documents: list[dict[str, Any]]) -> list[WriteResult]:
+        """
+        Insert objects with a single unordered bulk write.
+
+        :param documents: Raw documents to insert. Documents without
+                          '_id' get a new ObjectId.
+
+        :return: WriteResults aligned with documents.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+        if not documents:
+            return []
+
+        documents = [{'_id': ObjectId(), **document} for document in documents]
+        errors, _ = cls._bulk_write(
+            'bulk_insert', [InsertOne(document) for document in documents],
+        )
+
+        results = [
+            WriteResult(None, errors[index]) if index in errors
+            else WriteResult(document['_id'])
+            for index, document in enumerate(documents)
+        ]
+        events.publish_write(
+            cls.model, [result.id for result in results if not result.error],
+        )
+        return results
+
+    @classmethod
+    def bulk_upsert(
+        cls, documents: list[dict[str, Any]], key: str
+    ) -> list[WriteResult]:
+        """
+        Update objects identified by a unique field, or insert them if
+        they don't exist yet, with a single unordered bulk write. IDs
+        of updated objects are looked up with one more query.
+
+        :param documents: Raw documents to upsert.
+        :param key: Database name of the unique field (e.g. 'name').
+
+        :return: WriteResults aligned with documents.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+        if not documents:
+            return []
+
+        errors, upserted = cls._bulk_write(
+            'bulk_upsert', create_upsert_requests(documents, key),
+        )
+
+        updated = [document[key] for index, document in enumerate(documents)
+                   if index not in errors and index not in upserted]
+        ids = dict()
+        if updated:
+            try:
+                ids = {entry[key]: entry['_id'] for entry in cls._collection()
+                       .find({key: {'$in': updated}}, {key: 1})}
+            except PyMongoError:
+                logger.log_error('DB interaction error')
+                raise
+
+        results = [
+            WriteResult(None, errors[index]) if index in errors
+            else WriteResult(upserted.get(index, ids.get(document[key])))
+            for index, document in enumerate(documents)
+        ]
+        events.publish_write(cls.model, [
+            result.id for result in results if result.id is not None
+        ])
+        return results
+
+    @classmethod
+    def bulk_update(
+        cls, updates: list[tuple[Any, dict[str, Any]]]
+    ) -> list[WriteResult]:
+        """
+        Update fields of objects identified by their IDs with a single
+        unordered bulk write. Existence of the objects is checked with
+        one more query, so missing objects are reported as errors.
+
+        :param updates: Pairs of object IDs and raw fields to set.
+
+        :return: WriteResults aligned with updates.
+
+        :raises ValueError: If the model is not specified in BaseDAO
+                            or its subclasses.
+        :raises PyMongoError: For general database interaction issues.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        existing = cls.get_existing_ids([id for id, _ in updates])
+        found = [index for index, (id, _) in enumerate(updates)
+                 if to_key(id) in existing]
+
+        errors = dict()
+        if found:
+            errors, _ = cls._bulk_write('bulk_update', create_update_requests(
+                [updates[index] for index in found]
+            ))
+
+        results = [WriteResult(None, 'Document not found.')] * len(updates)
+        for position, index in enumerate(found):
+            if position in errors:
+                results[index] = WriteResult(None, errors[position])
+            else:
+                results[index] = WriteResult(to_key(updates[index][0]))
+        events.publish_write(
+            cls.model, [result.id for result in results if not result.error],
+        )
+        return results
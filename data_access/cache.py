@@ -0,0 +1,328 @@
+"""
+cache.py
+
+This module provides the Cache class, a process-wide read-through
+cache of documents shared between requests.
+
+Unlike the identity map, which lives for a single GraphQL request,
+caches live as long as the process and are configured per model in
+`settings.DAO_CACHE`. Every cache is bounded in size (least recently
+used entries are evicted first) and every entry expires after a time
+to live. IDs that were not found in the database are cached as well
+(negative caching), usually with a shorter time to live, so repeated
+lookups of unknown IDs don't reach the database either.
+
+Cached documents are shared between requests and threads, so they
+must be treated as read-only. Written documents are dropped from the
+caches on write events (see events.py).
+
+Results of aggregation pipelines (e.g. statistics) may be cached as
+well, in a separate short-lived cache configured by
+`settings.AGGREGATE_CACHE`. A write of any document of a model drops
+all cached results of pipelines over the model.
+"""
+
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+from data_access import events
+from data_access.identity_map import to_key
+from settings import AGGREGATE_CACHE, CACHE_ENABLED, DAO_CACHE
+
+
+# Key of the cached result of `get_all`, never collides with IDs
+ALL_KEY = ('*',)
+
+_caches: dict[str, 'Cache'] = dict()
+_caches_lock = Lock()
+_aggregate_cache: 'Cache | None' = None
+
+
+class Cache:
+    """
+    Thread-safe LRU cache with per-entry expiration.
+
+    Attributes:
+        max_size: Maximum number of entries. The least recently used
+                  entry is evicted when the limit is exceeded.
+        ttl: Time to live of cached values in seconds.
+        negative_ttl: Time to live of cached misses (None values)
+                      in seconds.
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups of unknown or expired keys.
+        evictions: Number of entries evicted because of the size limit.
+        expirations: Number of entries dropped because of their age.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float | None = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._timer = timer
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable, now: float) -> tuple[bool, Any]:
+        """
+        Look up a key and update counters. Must be called
+        with the lock held.
+
+        :param key: Cache key.
+        :param now: Current time of the timer.
+
+        :return: A tuple of a hit flag and the cached value.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def _store(
+        self, key: Hashable, value: Any, now: float, ttl: float | None = None
+    ):
+        """
+        Store a value and evict entries over the size limit. Must be
+        called with the lock held.
+
+        :param key: Cache key.
+        :param value: Value to cache, None for a cached miss.
+        :param now: Current time of the timer.
+        :param ttl: Time to live of the entry, overrides the default one.
+        """
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = (now + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Look up a single key.
+
+        :param key: Cache key.
+
+        :return: A tuple of a hit flag and the cached value (None for
+                 cached misses).
+        """
+        with self._lock:
+            return self._lookup(key, self._timer())
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """
+        Cache a value.
+
+        :param key: Cache key.
+        :param value: Value to cache, None to cache a miss.
+        :param ttl: Time to live of the entry, overrides the default one.
+        """
+        with self._lock:
+            self._store(key, value, self._timer(), ttl)
+
+    def get_documents(self, ids: list[Any]) -> tuple[list[Any], list[Any]]:
+        """
+        Split provided IDs into cached documents and IDs that
+        still have to be fetched.
+
+        :param ids: IDs of the documents.
+
+        :return: A tuple of found cached documents and unique
+                 uncached IDs. Cached misses are in neither list.
+        """
+        found, missing = [], []
+        with self._lock:
+            now = self._timer()
+            for id in dict.fromkeys(to_key(id) for id in ids):
+                hit, document = self._lookup(id, now)
+                if not hit:
+                    missing.append(id)
+                elif document is not None:
+                    found.append(document)
+        return found, missing
+
+    def put_documents(self, ids: list[Any], documents: list[Any]):
+        """
+        Cache documents fetched for provided IDs. IDs without
+        a matching document are cached as misses.
+
+        :param ids: Requested IDs.
+        :param documents: Fetched documents.
+        """
+        fetched = {to_key(document.id): document for document in documents}
+        with self._lock:
+            now = self._timer()
+            for id in ids:
+                if to_key(id) not in fetched:
+                    self._store(to_key(id), None, now)
+            for id, document in fetched.items():
+                self._store(id, document, now)
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop a cached entry, if any. IDs are normalized, so documents
+        can be invalidated by their ID in any form.
+
+        :param key: Cache key or document ID.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            if key != ALL_KEY:
+                self._entries.pop(to_key(key), None)
+
+    def invalidate_if(self, predicate: Callable[[Any], bool]) -> int:
+        """
+        Drop all cached entries with values matching the predicate.
+        Scans the whole cache, so it's meant for rare events
+        like writes.
+
+        :param predicate: Function accepting a cached value.
+
+        :return: Number of dropped entries.
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items()
+                    if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        """
+        Drop all cached entries. Counters are preserved.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get cache counters, e.g. for tuning size and time to live.
+
+        :return: Dict with size, hits, misses, evictions
+                 and expirations.
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def get_cache(model: type) -> Cache | None:
+    """
+    Get the process-wide cache of a model, creating it on
+    the first call.
+
+    :param model: Document model class.
+
+    :return: Cache instance or None if caching is disabled
+             for the model.
+    """
+    if not CACHE_ENABLED or model.__name__ not in DAO_CACHE:
+        return None
+
+    cache = _caches.get(model.__name__)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(
+                model.__name__, Cache(**DAO_CACHE[model.__name__]),
+            )
+    return cache
+
+
+def get_aggregate_cache() -> Cache | None:
+    """
+    Get the process-wide cache of aggregation results, creating it on
+    the first call. Cached values are (model name, result) pairs.
+
+    :return: Cache instance or None if caching is disabled.
+    """
+    global _aggregate_cache
+    if not CACHE_ENABLED:
+        return None
+
+    if _aggregate_cache is None:
+        with _caches_lock:
+            if _aggregate_cache is None:
+                _aggregate_cache = Cache(**AGGREGATE_CACHE)
+    return _aggregate_cache
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    """
+    Get counters of all created caches.
+
+    :return: Dict of cache counters keyed by model name.
+    """
+    return {name: cache.get_stats() for name, cache in _caches.items()}
+
+
+def clear_caches():
+    """
+    Drop all cached entries of all models.
+    """
+    for cache in _caches.values():
+        cache.clear()
+
+
+def invalidate_documents(model_name: str, ids: list[Any]):
+    """
+    Drop written documents from the cache of their model, along with
+    the cached result of `get_all`. Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    cache = _caches.get(model_name)
+    if cache is None:
+        return
+
+    cache.invalidate(ALL_KEY)
+    for id in ids:
+        cache.invalidate(id)
+
+
+def invalidate_aggregates(model_name: str, ids: list[Any]):
+    """
+    Drop cached aggregation results over the written model.
+    Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    if _aggregate_cache is not None:
+        _aggregate_cache.invalidate_if(lambda entry: entry[0] == model_name)
+
+
+events.subscribe(invalidate_documents)
+events.subscribe(invalidate_aggregates)
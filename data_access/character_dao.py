@@ -6,11 +6,314 @@ data access object that abstracts and encapsulates interactions
 with the MongoDB database for the `Character` model.
 
 All base operations are inherited from BaseDAO class.
+AsyncCharacterDAO is its counterpart for the asyncio data path,
+with all base operations inherited from AsyncBaseDAO class.
+
+Both DAO classes can also expand the enemy subgraph of a character
+with a single aggregation pipeline ($graphLookup on enemies and
+$lookup on powers). Fetched documents are registered in the request
+identity map and the document caches, so the assembly of nested
+enemies doesn't need any further queries. Subgraphs whose documents
+are all known to the identity map or the caches already are resolved
+from them, without running the pipeline.
+
+Statistics (characters per role, degrees of references and holders
+per power) are computed by aggregation pipelines, so only aggregated
+numbers leave the database. Their results are cached for a short time.
+
+SnapshotCharacterDAO and AsyncSnapshotCharacterDAO serve reads from
+the in-process snapshot (see snapshot.py) instead.
 """
 
 
+from time import perf_counter
+from typing import Any
+
+from pymongo.errors import PyMongoError
+
+from data_access.async_base_dao import AsyncBaseDAO
 from data_access.base_dao import BaseDAO
-from data_access.models import Character
+from data_access.cache import get_cache
+from data_access.identity_map import get_identity_map, to_key
+from data_access.models import Character, Power, RawDocument
+from data_access.snapshot import AsyncSnapshotDAO, SnapshotDAO
+from logger import CustomLogger
+from metrics import observe_query
+
+
+logger = CustomLogger('data_access.character_dao')
+
+
+def _build_graph_pipeline(
+    id: str, depth: int, with_powers: bool
+) -> list[dict[str, Any]]:
+    """
+    Build the aggregation pipeline expanding the enemy subgraph
+    of a character.
+
+    :param id: ID of the root character.
+    :param depth: Number of enemy levels to expand, at least 1.
+    :param with_powers: Whether powers of all expanded characters
+                        have to be looked up as well.
+
+    :return: Aggregation pipeline.
+    """
+    pipeline = [
+        {'$match': {'_id': to_key(id)}},
+        {'$graphLookup': {
+            'from': Character._get_collection_name(),
+            'startWith': '$enemies',
+            'connectFromField': 'enemies',
+            'connectToField': '_id',
+            'as': '_enemy_graph',
+            'maxDepth': depth - 1,
+        }},
+    ]
+    if with_powers:
+        pipeline += [
+            {'$addFields': {'_power_ids': {'$reduce': {
+                'input': '$_enemy_graph.powers',
+                'initialValue': '$powers',
+                'in': {'$setUnion': ['$$value', '$$this']},
+            }}}},
+            {'$lookup': {
+                'from': Power._get_collection_name(),
+                'localField': '_power_ids',
+                'foreignField': '_id',
+                'as': '_powers',
+            }},
+        ]
+    return pipeline
+
+
+def _degree(field: str) -> dict[str, Any]:
+    """
+    Build the aggregation expression of the length of a list field,
+    missing fields count as empty.
+
+    :param field: Database name of the list field.
+
+    :return: Aggregation expression.
+    """
+    return {'$size': {'$ifNull': [f'${field}', []]}}
+
+
+def _build_role_stats_pipeline() -> list[dict[str, Any]]:
+    """
+    Build the aggregation pipeline counting characters per role,
+    along with the total and maximum numbers of their powers
+    and enemies.
+
+    :return: Aggregation pipeline.
+    """
+    return [
+        {'$group': {
+            '_id': '$role',
+            'count': {'$sum': 1},
+            'powers': {'$sum': _degree('powers')},
+            'max_powers': {'$max': _degree('powers')},
+            'enemies': {'$sum': _degree('enemies')},
+            'max_enemies': {'$max': _degree('enemies')},
+        }},
+        {'$sort': {'_id': 1}},
+    ]
+
+
+def _build_power_stats_pipeline(limit: int) -> list[dict[str, Any]]:
+    """
+    Build the aggregation pipeline counting holders of powers.
+
+    :param limit: Maximum number of powers, the most common first.
+
+    :return: Aggregation pipeline.
+    """
+    return [
+        {'$unwind': '$powers'},
+        {'$group': {'_id': '$powers', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1, '_id': 1}},
+        {'$limit': limit},
+    ]
+
+
+def _build_reference_version_pipeline(field: str) -> list[dict[str, Any]]:
+    """
+    Build the aggregation pipeline summarizing a reference list field
+    of all documents.
+
+    :param field: Database name of the list field.
+
+    :return: Aggregation pipeline.
+    """
+    return [
+        {'$group': {
+            '_id': None,
+            'count': {'$sum': 1},
+            'max_id': {'$max': '$_id'},
+            'references': {'$sum': _degree(field)},
+        }},
+    ]
+
+
+def _get_reference_version(result: list[RawDocument]) -> str:
+    """
+    Format the result of the reference version pipeline.
+
+    :param result: Result of the pipeline, empty for an empty
+                   collection.
+
+    :return: Version string.
+    """
+    summary = result[0] if result else dict()
+    return ':'.join(str(summary.get(key, '')) for key in (
+        'count', 'max_id', 'references',
+    ))
+
+
+def _register_documents(model: type, ids: list[Any], documents: list[Any]):
+    """
+    Register whole documents fetched for provided IDs in the request
+    identity map and the document cache of the model.
+
+    :param model: Document model class.
+    :param ids: Requested IDs, IDs without a matching document are
+                registered as not found.
+    :param documents: Fetched documents.
+    """
+    cache = get_cache(model)
+    if cache is not None:
+        cache.put_documents(ids, documents)
+
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.put_documents(model, ids, documents)
+
+
+def _lookup_documents(
+    model: type, ids: list[Any]
+) -> tuple[list[Any], list[Any]]:
+    """
+    Look up whole documents in the request identity map, then in the
+    document cache of the model. Cached documents are registered in
+    the identity map.
+
+    :param model: Document model class.
+    :param ids: IDs of the documents.
+
+    :return: A tuple of found known documents and unique unknown IDs.
+             Documents known to be missing are in neither list.
+    """
+    identity_map = get_identity_map()
+    if identity_map is None:
+        known, missing = [], list(dict.fromkeys(to_key(id) for id in ids))
+    else:
+        known, missing = identity_map.get_documents(model, ids)
+
+    cache = get_cache(model)
+    if missing and cache is not None:
+        cached, uncached = cache.get_documents(missing)
+        if identity_map is not None:
+            pending = set(uncached)
+            identity_map.put_documents(
+                model, [id for id in missing if id not in pending], cached,
+            )
+        known, missing = known + cached, uncached
+    return known, missing
+
+
+def _get_known_graph(
+    id: str, depth: int, with_powers: bool
+) -> tuple[bool, RawDocument | None]:
+    """
+    Resolve the enemy subgraph of a character from documents known to
+    the request identity map or the document caches, so subgraphs
+    loaded before aren't expanded again.
+
+    :param id: ID of the root character.
+    :param depth: Number of enemy levels to resolve, at least 1.
+    :param with_powers: Whether powers of all resolved characters
+                        have to be known as well.
+
+    :return: A tuple of a flag whether the whole subgraph is known and
+             the root character document (None if it doesn't exist).
+    """
+    found, missing = _lookup_documents(Character, [id])
+    if missing:
+        return False, None
+    if not found:
+        return True, None
+
+    root = found[0]
+    characters = {to_key(root.id): root}
+    level = [root]
+    for _ in range(depth):
+        ids = [id for entry in level for id in entry.get('enemies', [])
+               if to_key(id) not in characters]
+        if not ids:
+            break
+        level, missing = _lookup_documents(Character, ids)
+        if missing:
+            return False, None
+        characters.update((to_key(entry.id), entry) for entry in level)
+
+    if with_powers:
+        _, missing = _lookup_documents(Power, [
+            id for entry in characters.values()
+            for id in entry.get('powers', [])
+        ])
+        if missing:
+            return False, None
+    return True, root
+
+
+def _count_graph_documents(result: list[RawDocument]) -> int:
+    """
+    Count documents returned by the enemy graph pipeline.
+
+    :param result: Result of the pipeline.
+
+    :return: Number of root, enemy and power documents.
+    """
+    return sum(
+        1 + len(root.get('_enemy_graph', [])) + len(root.get('_powers', []))
+        for root in result
+    )
+
+
+def _process_graph(
+    root: RawDocument, depth: int, with_powers: bool
+) -> RawDocument:
+    """
+    Split the result of the enemy graph pipeline into documents and
+    register all of them. Enemies referenced within the expanded depth
+    but missing in the database are registered as not found.
+
+    :param root: Root character with the looked up documents.
+    :param depth: Number of expanded enemy levels.
+    :param with_powers: Whether powers were looked up.
+
+    :return: The root character document.
+    """
+    enemies = root.pop('_enemy_graph', [])
+    powers = root.pop('_powers', [])
+    root.pop('_power_ids', None)
+
+    found = {root.id: root} | {enemy.id: enemy for enemy in enemies}
+    enemy_ids, level = [], [root]
+    for _ in range(depth):
+        ids = list(dict.fromkeys(
+            id for entry in level for id in entry.get('enemies', [])
+        ))
+        enemy_ids += ids
+        level = [found[id] for id in ids if id in found]
+
+    _register_documents(Character, [root.id] + enemy_ids, [root] + enemies)
+    if with_powers:
+        _register_documents(
+            Power,
+            [id for entry in found.values() for id in entry.get('powers', [])],
+            powers,
+        )
+    return root
 
 
 class CharacterDAO(BaseDAO[Character]):
@@ -21,3 +324,283 @@ class CharacterDAO(BaseDAO[Character]):
         model: A specific document model to work with
     """
     model = Character
+
+    @classmethod
+    def get_enemy_graph(
+        cls, id: str, depth: int, with_powers: bool = False
+    ) -> RawDocument | None:
+        """
+        Retrieve a character along with its enemies up to provided
+        depth (and their powers) with a single aggregation pipeline.
+        All fetched documents are registered in the request identity
+        map and the document caches. The pipeline isn't run if all
+        documents of the subgraph are known to them already.
+
+        :param id: The ID of the character to retrieve.
+        :param depth: Number of enemy levels to expand, at least 1.
+        :param with_powers: Whether powers of all expanded characters
+                            have to be retrieved as well.
+
+        :return: The character document if found, otherwise None.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        known, root = _get_known_graph(id, depth, with_powers)
+        if known:
+            return root
+
+        pipeline = _build_graph_pipeline(id, depth, with_powers)
+        started = perf_counter()
+        try:
+            result = list(cls._collection().aggregate(pipeline))
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__,
+            'get_enemy_graph',
+            started,
+            _count_graph_documents(result),
+        )
+
+        if not result:
+            _register_documents(cls.model, [id], [])
+            return None
+        return _process_graph(result[0], depth, with_powers)
+
+    @classmethod
+    def get_role_stats(cls) -> list[RawDocument]:
+        """
+        Retrieve the number of characters per role, along with total
+        and maximum numbers of their powers and enemies, with a single
+        aggregation pipeline. The result is cached for a short time.
+
+        :return: A list of documents with the role as '_id' and the
+                 'count', 'powers', 'max_powers', 'enemies' and
+                 'max_enemies' fields, ordered by role.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        return cls.aggregate(
+            _build_role_stats_pipeline(), 'get_role_stats', cached=True,
+        )
+
+    @classmethod
+    def get_reference_version(cls, field: str) -> str:
+        """
+        Retrieve a version of a reference list field of all characters
+        (e.g. 'enemies'): the write counter of the collection, bumped
+        by every bulk write, along with the number of characters,
+        the greatest ID and the total number of references, read with
+        a single aggregation pipeline. The summary covers writes
+        bypassing the DAO classes, except updates keeping the number
+        of references.
+
+        :param field: Name of the list field.
+
+        :return: Version string.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        pipeline = _build_reference_version_pipeline(
+            cls.model._fields[field].db_field,
+        )
+        summary = _get_reference_version(
+            cls.aggregate(pipeline, 'get_reference_version')
+        )
+        return f'{cls.get_write_count()}:{summary}'
+
+    @classmethod
+    def get_power_stats(cls, limit: int) -> list[RawDocument]:
+        """
+        Retrieve the most common powers with the number of their
+        holders, with a single aggregation pipeline. The result
+        is cached for a short time.
+
+        :param limit: Maximum number of powers.
+
+        :return: A list of documents with the power ID as '_id' and
+                 the 'count' field, the most common powers first.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        return cls.aggregate(
+            _build_power_stats_pipeline(limit), 'get_power_stats',
+            cached=True,
+        )
+
+
+class AsyncCharacterDAO(AsyncBaseDAO[Character]):
+    """
+    Main class for async interactions related to the `Character` model.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Character
+
+    @classmethod
+    async def get_enemy_graph(
+        cls, id: str, depth: int, with_powers: bool = False
+    ) -> RawDocument | None:
+        """
+        Retrieve a character along with its enemies up to provided
+        depth (and their powers) with a single aggregation pipeline.
+        All fetched documents are registered in the request identity
+        map and the document caches. The pipeline isn't run if all
+        documents of the subgraph are known to them already.
+
+        :param id: The ID of the character to retrieve.
+        :param depth: Number of enemy levels to expand, at least 1.
+        :param with_powers: Whether powers of all expanded characters
+                            have to be retrieved as well.
+
+        :return: The character document if found, otherwise None.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        known, root = _get_known_graph(id, depth, with_powers)
+        if known:
+            return root
+
+        collection = cls._collection()
+        pipeline = _build_graph_pipeline(id, depth, with_powers)
+        started = perf_counter()
+        try:
+            cursor = await collection.aggregate(pipeline)
+            result = await cursor.to_list()
+        except PyMongoError:
+            logger.log_error('DB interaction error')
+            raise
+
+        observe_query(
+            cls.model.__name__,
+            'get_enemy_graph',
+            started,
+            _count_graph_documents(result),
+        )
+
+        if not result:
+            _register_documents(cls.model, [id], [])
+            return None
+        return _process_graph(result[0], depth, with_powers)
+
+    @classmethod
+    async def get_role_stats(cls) -> list[RawDocument]:
+        """
+        Retrieve the number of characters per role, along with total
+        and maximum numbers of their powers and enemies, with a single
+        aggregation pipeline. The result is cached for a short time.
+
+        :return: A list of documents with the role as '_id' and the
+                 'count', 'powers', 'max_powers', 'enemies' and
+                 'max_enemies' fields, ordered by role.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        return await cls.aggregate(
+            _build_role_stats_pipeline(), 'get_role_stats', cached=True,
+        )
+
+    @classmethod
+    async def get_reference_version(cls, field: str) -> str:
+        """
+        Retrieve a version of a reference list field of all characters
+        (e.g. 'enemies'): the write counter of the collection, bumped
+        by every bulk write, along with the number of characters,
+        the greatest ID and the total number of references, read with
+        a single aggregation pipeline. The summary covers writes
+        bypassing the DAO classes, except updates keeping the number
+        of references.
+
+        :param field: Name of the list field.
+
+        :return: Version string.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        pipeline = _build_reference_version_pipeline(
+            cls.model._fields[field].db_field,
+        )
+        summary = _get_reference_version(
+            await cls.aggregate(pipeline, 'get_reference_version')
+        )
+        return f'{await cls.get_write_count()}:{summary}'
+
+    @classmethod
+    async def get_power_stats(cls, limit: int) -> list[RawDocument]:
+        """
+        Retrieve the most common powers with the number of their
+        holders, with a single aggregation pipeline. The result
+        is cached for a short time.
+
+        :param limit: Maximum number of powers.
+
+        :return: A list of documents with the power ID as '_id' and
+                 the 'count' field, the most common powers first.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        return await cls.aggregate(
+            _build_power_stats_pipeline(limit), 'get_power_stats',
+            cached=True,
+        )
+
+
+class SnapshotCharacterDAO(SnapshotDAO[Character], CharacterDAO):
+    """
+    Class for interactions related to the `Character` model, serving
+    reads from the in-process snapshot.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Character
+
+    @classmethod
+    def get_enemy_graph(
+        cls, id: str, depth: int, with_powers: bool = False
+    ) -> RawDocument | None:
+        """
+        Retrieve a character from the snapshot. Its enemies and powers
+        are read from the snapshot as well, so the subgraph doesn't
+        have to be expanded up front.
+
+        :param id: The ID of the character to retrieve.
+        :param depth: Number of enemy levels to expand, unused.
+        :param with_powers: Whether powers are required, unused.
+
+        :return: The character document if found, otherwise None.
+        """
+        return cls.get_one_by_id(id)
+
+
+class AsyncSnapshotCharacterDAO(
+    AsyncSnapshotDAO[Character], AsyncCharacterDAO
+):
+    """
+    Class for async interactions related to the `Character` model,
+    serving reads from the in-process snapshot.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Character
+
+    @classmethod
+    async def get_enemy_graph(
+        cls, id: str, depth: int, with_powers: bool = False
+    ) -> RawDocument | None:
+        """
+        Retrieve a character from the snapshot. Its enemies and powers
+        are read from the snapshot as well, so the subgraph doesn't
+        have to be expanded up front.
+
+        :param id: The ID of the character to retrieve.
+        :param depth: Number of enemy levels to expand, unused.
+        :param with_powers: Whether powers are required, unused.
+
+        :return: The character document if found, otherwise None.
+        """
+        return await cls.get_one_by_id(id)
@@ -0,0 +1,210 @@
+"""
+connection.py
+
+This module manages MongoDB connections of the app: the mongoengine
+connection of the blocking data path and the asyncio client of the
+async data path (see async_base_dao.py). Both clients share the pool
+configuration of `settings.MONGODB_POOL`.
+
+Connections are opened by the FastAPI lifespan (see main.py), not at
+import time. The startup warms up the connection pool and creates
+indexes of all models, so the first requests pay neither for
+connection setup nor for index builds. A failed warm-up doesn't
+prevent the startup, it is reported by the readiness probe instead.
+
+Pool usage is tracked with connection pool event listeners, as
+pymongo doesn't expose pool counters. Each client gets its own
+listener, registered when the client is created.
+"""
+
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
+import mongoengine
+from pymongo import AsyncMongoClient, monitoring
+
+from data_access.models import Character, Power, RawDocument
+from settings import MONGODB_CONNECTION, MONGODB_POOL
+
+
+# Models whose indexes are created at startup
+MODELS = (Character, Power)
+
+_async_client: AsyncMongoClient | None = None
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener counting open and checked out
+    connections of a single client.
+
+    Attributes:
+        open: Number of open connections.
+        in_use: Number of connections checked out of the pool.
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self._lock = Lock()
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        with self._lock:
+            self.open -= 1
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ):
+        with self._lock:
+            self.in_use += 1
+
+    def connection_checked_in(
+        self, event: monitoring.ConnectionCheckedInEvent
+    ):
+        with self._lock:
+            self.in_use -= 1
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent):
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent):
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent):
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent):
+        pass
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ):
+        pass
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ):
+        pass
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Get the pool counters.
+
+        :return: Dict with open and checked out connections
+                 and the maximum pool size.
+        """
+        return {
+            'open': self.open,
+            'in_use': self.in_use,
+            'max': MONGODB_POOL['maxPoolSize'],
+        }
+
+
+# Pool listeners of the sync (mongoengine) and async clients
+pool_stats = {'sync': PoolStats(), 'async': PoolStats()}
+
+
+def connect():
+    """
+    Open the mongoengine connection of the blocking data path with
+    the configured pool settings.
+    """
+    mongoengine.connect(
+        **MONGODB_CONNECTION, **MONGODB_POOL,
+        event_listeners=[pool_stats['sync']],
+    )
+
+
+def get_async_client() -> AsyncMongoClient:
+    """
+    Get the process-wide asyncio MongoDB client, creating it on
+    the first call. The client connects lazily.
+
+    :return: AsyncMongoClient instance.
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncMongoClient(
+            host=MONGODB_CONNECTION['host'],
+            port=MONGODB_CONNECTION['port'],
+            document_class=RawDocument,
+            event_listeners=[pool_stats['async']],
+            **MONGODB_POOL,
+        )
+    return _async_client
+
+
+async def disconnect():
+    """
+    Close both clients, e.g. at shutdown.
+    """
+    global _async_client
+    mongoengine.disconnect()
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.close()
+
+
+def ping() -> float:
+    """
+    Ping the database through the mongoengine connection.
+
+    :return: Round trip time in seconds.
+
+    :raise PyMongoError: For general database interaction issues.
+    :raise ConnectionFailure: If mongoengine is not connected
+                              (mongoengine exception).
+    """
+    started = perf_counter()
+    mongoengine.get_connection().admin.command('ping')
+    return perf_counter() - started
+
+
+async def async_ping() -> float:
+    """
+    Ping the database through the asyncio client.
+
+    :return: Round trip time in seconds.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    started = perf_counter()
+    await get_async_client().admin.command('ping')
+    return perf_counter() - started
+
+
+def warm_up():
+    """
+    Open the minimum number of pooled connections of the mongoengine
+    connection with concurrent pings, and create indexes of all
+    models.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    size = max(MONGODB_POOL['minPoolSize'], 1)
+    with ThreadPoolExecutor(size) as executor:
+        list(executor.map(lambda _: ping(), range(size)))
+    for model in MODELS:
+        model.ensure_indexes()
+
+
+async def async_warm_up():
+    """
+    Open the minimum number of pooled connections of the asyncio
+    client with concurrent pings. Indexes are created with the
+    mongoengine connection by `warm_up`.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    size = max(MONGODB_POOL['minPoolSize'], 1)
+    await asyncio.gather(*(async_ping() for _ in range(size)))
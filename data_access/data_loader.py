@@ -0,0 +1,180 @@
+"""
+data_loader.py
+
+This module provides the DataLoader class, a request-scoped batching
+loader used to avoid the N+1 queries problem.
+
+A DataLoader wraps a batch load function (e.g. `get_many_by_ids` of
+a DAO or a handler) and memoizes its results by ID and projection. All IDs requested
+with a single `load_many` call are resolved with one call of the
+batch load function, so the number of database round trips grows
+with the query depth rather than with the size of the result.
+
+A new DataLoader instance must be created for every GraphQL request,
+otherwise the memoized data would leak between requests.
+
+For the asyncio data path `create_async_loader` builds strawberry's
+DataLoader around a coroutine batch load function with the same
+contract, batching all loads awaited within one event loop tick.
+"""
+
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Iterable, TypeVar
+
+from strawberry.dataloader import DataLoader as AsyncDataLoader
+
+
+T = TypeVar('T')
+
+
+class DataLoader(Generic[T]):
+    """
+    Synchronous batching loader with a per-instance memo.
+    Objects are memoized per ID and field projection.
+
+    Attributes:
+        load_fn: Batch load function. Accepts a list of IDs and
+                 a field projection (None for whole objects), and
+                 returns a list of found objects in any order.
+                 Every returned object must have an `id` attribute.
+        batch_count: Number of calls made to the batch load function.
+                     Mostly useful for tests and diagnostics.
+    """
+
+    def __init__(
+        self, load_fn: Callable[[list[Any], list[str] | None], list[T]]
+    ):
+        self.load_fn = load_fn
+        self.batch_count = 0
+        self._cache: dict[tuple[str, tuple | None], T | None] = dict()
+
+    def load(self, id: Any, only: list[str] | None = None) -> T | None:
+        """
+        Load a single object by its ID.
+
+        :param id: The ID of the object to load.
+        :param only: Fields to load, None to load the whole object.
+
+        :return: The object if found, otherwise None.
+        """
+        return self.load_many([id], only)[0]
+
+    def load_many(
+        self, ids: Iterable[Any], only: list[str] | None = None
+    ) -> list[T | None]:
+        """
+        Load objects by their IDs. IDs that are not memoized yet
+        are fetched with a single call of the batch load function.
+
+        :param ids: The IDs of the objects to load.
+        :param only: Fields to load, None to load whole objects.
+
+        :return: A list aligned with provided IDs. Contains None
+                 for every ID that was not found.
+        """
+        projection = tuple(only) if only else None
+        keys = [str(id) for id in ids]
+        missing = list(dict.fromkeys(
+            key for key in keys if (key, projection) not in self._cache
+        ))
+        if missing:
+            self.batch_count += 1
+            found = align_results(missing, self.load_fn(missing, only))
+            self._cache.update(
+                ((key, projection), entry)
+                for key, entry in zip(missing, found)
+            )
+
+        return [self._cache[(key, projection)] for key in keys]
+
+    def prime(self, key: Any, value: T, only: list[str] | None = None):
+        """
+        Put an already fetched object into the memo, so it won't be
+        requested from the batch load function. Mirrors the `prime`
+        method of strawberry's DataLoader.
+
+        :param key: ID of the object.
+        :param value: The object itself.
+        :param only: Fields the object was loaded with, None for
+                     the whole object.
+        """
+        projection = tuple(only) if only else None
+        self._cache.setdefault((str(key), projection), value)
+
+
+def align_results(keys: list[str], entries: list[T]) -> list[T | None]:
+    """
+    Align found objects with requested IDs.
+
+    :param keys: Requested IDs as strings.
+    :param entries: Found objects in any order. Every object must have
+                    an `id` attribute.
+
+    :return: A list aligned with keys. Contains None for every ID
+             without a matching object.
+    """
+    found = {str(entry.id): entry for entry in entries}
+    return [found.get(key) for key in keys]
+
+
+def prime_loader(
+    loader: DataLoader[T] | AsyncDataLoader,
+    entries: Iterable[T],
+    only: list[str] | None = None,
+):
+    """
+    Put already fetched objects into the memo of a synchronous or
+    an asyncio DataLoader, keyed by their IDs and projection.
+
+    :param loader: DataLoader or a loader built by create_async_loader.
+    :param entries: Fetched objects. Every object must have an `id`
+                    attribute.
+    :param only: Fields the objects were loaded with, None for
+                 whole objects.
+    """
+    if isinstance(loader, AsyncDataLoader):
+        projection = tuple(only) if only else None
+        loader.prime_many(
+            {(str(entry.id), projection): entry for entry in entries}
+        )
+    else:
+        for entry in entries:
+            loader.prime(entry.id, entry, only)
+
+
+def create_async_loader(
+    load_fn: Callable[[list[str], list[str] | None], Awaitable[list[T]]]
+) -> AsyncDataLoader[tuple[str, tuple | None], T | None]:
+    """
+    Create a request-scoped asyncio DataLoader.
+
+    :param load_fn: Coroutine batch load function. Accepts a list of
+                    IDs and a field projection (None for whole
+                    objects), and returns a list of found objects in
+                    any order. Every returned object must have an `id`
+                    attribute.
+
+    :return: strawberry's DataLoader. Its keys are pairs of a string
+             ID and a projection tuple (or None), keys of a batch are
+             grouped by projection, one load_fn call per group.
+    """
+    async def batch_load(
+        keys: list[tuple[str, tuple | None]]
+    ) -> list[T | None]:
+        groups: dict[tuple | None, list[str]] = dict()
+        for id, projection in keys:
+            groups.setdefault(projection, []).append(id)
+
+        results = await asyncio.gather(*(
+            load_fn(ids, list(projection) if projection else None)
+            for projection, ids in groups.items()
+        ))
+        found = {
+            (id, projection): entry
+            for (projection, ids), entries in zip(groups.items(), results)
+            for id, entry in zip(ids, align_results(ids, entries))
+        }
+        return [found[key] for key in keys]
+
+    return AsyncDataLoader(load_fn=batch_load)
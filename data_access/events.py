@@ -0,0 +1,62 @@
+"""
+events.py
+
+This module provides a minimal in-process publish/subscribe hub for
+write events.
+
+Every write path (DAO write operations, bulk mutations, etc.) has to
+publish the IDs of written documents with `publish_write`, so caches
+holding copies of these documents (document caches, response cache)
+can drop them. Subscribers are called synchronously, in order of
+subscription, within the writing thread.
+"""
+
+
+from typing import Any, Callable
+
+from data_access.identity_map import to_key
+from logger import CustomLogger
+
+
+Subscriber = Callable[[str, list[Any]], None]
+
+logger = CustomLogger('data_access.events')
+_subscribers: list[Subscriber] = []
+
+
+def subscribe(subscriber: Subscriber):
+    """
+    Subscribe to write events.
+
+    :param subscriber: Function accepting the model name and the list
+                       of written document IDs (as identity map keys).
+    """
+    if subscriber not in _subscribers:
+        _subscribers.append(subscriber)
+
+
+def unsubscribe(subscriber: Subscriber):
+    """
+    Unsubscribe from write events.
+
+    :param subscriber: Previously subscribed function.
+    """
+    if subscriber in _subscribers:
+        _subscribers.remove(subscriber)
+
+
+def publish_write(model: type, ids: list[Any]):
+    """
+    Notify all subscribers about written (created, updated or
+    deleted) documents. A failing subscriber doesn't prevent
+    notification of the others.
+
+    :param model: Document model class.
+    :param ids: IDs of written documents.
+    """
+    keys = [to_key(id) for id in ids]
+    for subscriber in list(_subscribers):
+        try:
+            subscriber(model.__name__, keys)
+        except Exception:
+            logger.log_error('Write event subscriber failed')
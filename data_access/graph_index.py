@@ -0,0 +1,571 @@
+"""
+graph_index.py
+
+This module provides the GraphIndex class, a process-wide in-memory
+index of references between documents of a single model (e.g. enemies
+of characters), answering graph queries (shortest paths and
+neighborhoods) with breadth-first searches, without a database round
+trip.
+
+The graph is kept in the compressed sparse row (CSR) layout: documents
+are numbered by positions, and references of all documents are stored
+in a single int32 array of neighbour positions, delimited by an int32
+array of offsets (references of position p are
+neighbours[offsets[p]:offsets[p + 1]]). A search touches only these
+arrays and the visited positions, so its cost depends on the explored
+part of the graph, not on the number of documents.
+
+References are directed, as stored (a character listing an enemy
+doesn't have to be listed by the enemy). The transposed arrays
+(incoming references) are kept as well, so shortest paths are searched
+from both ends at once, exploring far fewer documents than a search
+from one end. Referenced IDs without an indexed document get positions
+too, but searches never pass through them.
+
+The arrays can be saved to a file and memory-mapped at the next
+startup, which skips reading all documents from the database. Pages
+of a mapped file are loaded by the OS on first access. The file header
+holds a digest of a version of the indexed data, provided by the
+caller (e.g. derived from the database), so a file saved before later
+writes is not loaded.
+
+Indexes are built by handlers (at startup or on the first search).
+Written documents are marked stale on write events (see events.py)
+and refreshed by handlers before the next search, with a single query
+for all documents written in the meantime. Refreshed references are
+kept aside of the arrays until they outnumber COMPACTION_RATIO of the
+documents, the arrays are then rebuilt in memory.
+"""
+
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate
+from threading import Lock
+from time import time
+from typing import Any, Iterable
+
+from data_access import events
+from data_access.identity_map import to_key
+
+
+# File signature, the last byte marks the byte order of the arrays
+MAGIC = b'CSRGRP2' + (b'L' if sys.byteorder == 'little' else b'B')
+# File header: signature, number of positions, number of references,
+# SHA-256 digest of the version of the indexed data
+HEADER = struct.Struct('<8sqq32s')
+# Share of refreshed documents kept aside of the arrays
+COMPACTION_RATIO = 0.1
+# Number of refreshed documents always kept aside of the arrays
+COMPACTION_MIN = 64
+
+_indexes: dict[tuple[str, str], 'GraphIndex'] = dict()
+_indexes_lock = Lock()
+
+
+class Adjacency:
+    """
+    References of one direction (outgoing or incoming) in the CSR
+    layout, with lists of refreshed positions kept aside.
+
+    Attributes:
+        offsets: Offsets of references of every position, plus
+                 the total number of references.
+        neighbours: Referenced positions.
+        changed: Refreshed references, overriding the arrays.
+    """
+
+    def __init__(
+        self, offsets: Sequence[int], neighbours: Sequence[int]
+    ):
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.changed: dict[int, array] = dict()
+
+    def get(self, position: int) -> Sequence[int]:
+        """
+        Get references of a position.
+
+        :param position: Position of a document.
+
+        :return: Referenced positions.
+        """
+        changed = self.changed.get(position)
+        if changed is not None:
+            return changed
+        if position + 1 < len(self.offsets):
+            return self.neighbours[
+                self.offsets[position]:self.offsets[position + 1]
+            ]
+        return ()
+
+    def compact(self, count: int) -> 'Adjacency':
+        """
+        Build arrays with refreshed references merged in.
+
+        :param count: Number of positions.
+
+        :return: New Adjacency without refreshed references.
+        """
+        offsets = array('i', [0])
+        neighbours = array('i')
+        for position in range(count):
+            neighbours.extend(self.get(position))
+            offsets.append(len(neighbours))
+        return Adjacency(offsets, neighbours)
+
+    def transpose(self, count: int) -> 'Adjacency':
+        """
+        Build arrays of references in the opposite direction. Must be
+        called without refreshed references.
+
+        :param count: Number of positions.
+
+        :return: New Adjacency, references of a position are ordered
+                 by their positions.
+        """
+        counts = [0] * (count + 1)
+        for neighbour in self.neighbours:
+            counts[neighbour + 1] += 1
+        offsets = array('i', accumulate(counts))
+
+        neighbours = array('i', bytes(len(self.neighbours) * 4))
+        free = list(offsets)
+        for position in range(count):
+            for neighbour in self.get(position):
+                neighbours[free[neighbour]] = position
+                free[neighbour] += 1
+        return Adjacency(offsets, neighbours)
+
+
+class GraphIndex:
+    """
+    Thread-safe in-memory graph of references between documents.
+
+    Attributes:
+        built: Whether the index was built (or loaded from a file).
+        compactions: Number of rebuilds of the arrays with refreshed
+                     references merged in.
+    """
+
+    def __init__(self):
+        self.built = False
+        self.compactions = 0
+        # Document IDs by position and positions by ID
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = dict()
+        # Outgoing and incoming references, the arrays are possibly
+        # views of a memory-mapped file
+        self._outgoing = Adjacency(array('i', [0]), array('i'))
+        self._incoming = Adjacency(array('i', [0]), array('i'))
+        # Flags of positions with an indexed document
+        self._present = bytearray()
+        self._stale: set[str] = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return self._present.count(1)
+
+    def _get_position(self, id: str) -> int:
+        """
+        Get the position of a document, assigning a new one to
+        unknown IDs. Must be called with the lock held.
+
+        :param id: ID of the document as a string.
+
+        :return: Position of the document.
+        """
+        position = self._positions.get(id)
+        if position is None:
+            position = self._positions[id] = len(self._ids)
+            self._ids.append(id)
+            self._present.append(0)
+        return position
+
+    def _set_references(self, position: int, references: list[int]):
+        """
+        Replace references of a position, in both directions.
+        Must be called with the lock held.
+
+        :param position: Position of a document.
+        :param references: Referenced positions, without duplicates.
+        """
+        previous = set(self._outgoing.get(position))
+        self._outgoing.changed[position] = array('i', references)
+
+        incoming = self._incoming
+        for neighbour in previous.difference(references):
+            changed = array('i', incoming.get(neighbour))
+            changed.remove(position)
+            incoming.changed[neighbour] = changed
+        for neighbour in references:
+            if neighbour not in previous:
+                changed = array('i', incoming.get(neighbour))
+                changed.append(position)
+                incoming.changed[neighbour] = changed
+
+        if len(self._outgoing.changed) > max(
+            COMPACTION_MIN, COMPACTION_RATIO * len(self._ids)
+        ):
+            self._compact()
+
+    def _compact(self):
+        """
+        Rebuild the arrays with refreshed references merged in.
+        Must be called with the lock held.
+        """
+        count = len(self._ids)
+        self._outgoing = self._outgoing.compact(count)
+        self._incoming = self._outgoing.transpose(count)
+        self.compactions += 1
+
+    def build(self, documents: Iterable[tuple[Any, Iterable[Any]]]):
+        """
+        Replace the whole index. Documents marked stale are kept
+        marked, as they could have been written after being read.
+
+        :param documents: Pairs of document IDs and referenced IDs.
+        """
+        documents = [(str(to_key(id)), references)
+                     for id, references in documents]
+        ids = [id for id, _ in documents]
+        positions = {id: position for position, id in enumerate(ids)}
+        present = bytearray(b'\x01') * len(ids)
+
+        offsets = array('i', [0])
+        neighbours = array('i')
+        for _, references in documents:
+            targets = dict()
+            for reference in references or ():
+                reference = str(to_key(reference))
+                position = positions.get(reference)
+                if position is None:
+                    position = positions[reference] = len(ids)
+                    ids.append(reference)
+                    present.append(0)
+                targets[position] = None
+            neighbours.extend(targets)
+            offsets.append(len(neighbours))
+        offsets.extend([len(neighbours)] * (len(ids) + 1 - len(offsets)))
+        outgoing = Adjacency(offsets, neighbours)
+        incoming = outgoing.transpose(len(ids))
+
+        with self._lock:
+            self._ids, self._positions = ids, positions
+            self._outgoing, self._incoming = outgoing, incoming
+            self._present = present
+            self.built = True
+
+    def put(self, id: Any, references: Iterable[Any]):
+        """
+        Add a document or replace its references.
+
+        :param id: ID of the document.
+        :param references: Referenced IDs.
+        """
+        with self._lock:
+            position = self._get_position(str(to_key(id)))
+            self._present[position] = 1
+            self._set_references(position, list(dict.fromkeys(
+                self._get_position(str(to_key(reference)))
+                for reference in references or ()
+            )))
+
+    def remove(self, id: Any):
+        """
+        Remove a document, unknown IDs are ignored. References to the
+        document are kept, in case it is created again.
+
+        :param id: ID of the document.
+        """
+        with self._lock:
+            position = self._positions.get(str(to_key(id)))
+            if position is not None:
+                self._present[position] = 0
+                self._set_references(position, [])
+
+    def mark_stale(self, ids: Iterable[Any]):
+        """
+        Mark documents to be refreshed before the next search.
+
+        :param ids: IDs of written documents.
+        """
+        with self._lock:
+            self._stale.update(str(to_key(id)) for id in ids)
+
+    def pop_stale(self) -> list[str]:
+        """
+        Take the documents marked stale, unmarking them.
+
+        :return: IDs of stale documents as strings.
+        """
+        with self._lock:
+            stale, self._stale = list(self._stale), set()
+        return stale
+
+    def _find_present(self, id: Any) -> int | None:
+        """
+        Get the position of an indexed document. Must be called with
+        the lock held.
+
+        :param id: ID of the document.
+
+        :return: Position, or None if the document isn't indexed.
+        """
+        position = self._positions.get(str(to_key(id)))
+        if position is None or not self._present[position]:
+            return None
+        return position
+
+    def shortest_path(self, source: Any, target: Any) -> list[str] | None:
+        """
+        Find a shortest path of references between two documents.
+        Both ends are searched level by level, the end with fewer
+        positions to expand goes first.
+
+        :param source: ID of the first document.
+        :param target: ID of the last document.
+
+        :return: IDs of documents along the path, both ends included,
+                 or None if there is no path or a document isn't
+                 indexed.
+        """
+        with self._lock:
+            start = self._find_present(source)
+            end = self._find_present(target)
+            if start is None or end is None:
+                return None
+            if start == end:
+                return [self._ids[start]]
+
+            present = self._present
+            # Predecessors and distances of positions visited from
+            # the start, successors and distances of positions visited
+            # from the end
+            forward = {start: (start, 0)}
+            backward = {end: (end, 0)}
+            forward_frontier, backward_frontier = [start], [end]
+            meeting = None
+            while meeting is None and forward_frontier and backward_frontier:
+                if len(forward_frontier) <= len(backward_frontier):
+                    visited, other = forward, backward
+                    frontier, get = forward_frontier, self._outgoing.get
+                else:
+                    visited, other = backward, forward
+                    frontier, get = backward_frontier, self._incoming.get
+
+                # The whole level is expanded, the meeting position
+                # nearest to the other end is taken
+                next_frontier = []
+                distance = visited[frontier[0]][1] + 1
+                for position in frontier:
+                    for neighbour in get(position):
+                        if neighbour in visited or not present[neighbour]:
+                            continue
+                        visited[neighbour] = (position, distance)
+                        next_frontier.append(neighbour)
+                        if neighbour in other and (
+                            meeting is None
+                            or other[neighbour][1] < other[meeting][1]
+                        ):
+                            meeting = neighbour
+
+                if visited is forward:
+                    forward_frontier = next_frontier
+                else:
+                    backward_frontier = next_frontier
+            if meeting is None:
+                return None
+
+            path = [meeting]
+            while path[-1] != start:
+                path.append(forward[path[-1]][0])
+            path.reverse()
+            while path[-1] != end:
+                path.append(backward[path[-1]][0])
+            return [self._ids[position] for position in path]
+
+    def neighborhood(self, source: Any, hops: int) -> list[tuple[str, int]]:
+        """
+        Find documents reachable from a document within a number of
+        references.
+
+        :param source: ID of the document.
+        :param hops: Maximum number of references between documents.
+
+        :return: Pairs of document IDs and their distances from the
+                 document, ordered by distance. The document itself
+                 isn't included, the list is empty if it isn't indexed.
+        """
+        with self._lock:
+            start = self._find_present(source)
+            if start is None:
+                return []
+
+            present, get = self._present, self._outgoing.get
+            visited = {start}
+            found = []
+            frontier = [start]
+            for distance in range(1, hops + 1):
+                next_frontier = []
+                for position in frontier:
+                    for neighbour in get(position):
+                        if neighbour not in visited and present[neighbour]:
+                            visited.add(neighbour)
+                            next_frontier.append(neighbour)
+                if not next_frontier:
+                    break
+                found.extend((self._ids[position], distance)
+                             for position in next_frontier)
+                frontier = next_frontier
+            return found
+
+    def save(self, path: str, version: str = ''):
+        """
+        Save the index to a file, replacing it atomically. Refreshed
+        references are merged into the arrays first.
+
+        :param path: Path of the file.
+        :param version: Version of the indexed data, the index must
+                        not be older than the version.
+
+        :raise OSError: Raised if the file can't be written.
+        """
+        with self._lock:
+            if self._outgoing.changed or self._incoming.changed:
+                self._compact()
+            ids, present = self._ids, bytes(self._present)
+            outgoing, incoming = self._outgoing, self._incoming
+
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(
+                MAGIC, len(ids), len(outgoing.neighbours),
+                _get_digest(version),
+            ))
+            for adjacency in (outgoing, incoming):
+                file.write(memoryview(adjacency.offsets).cast('B'))
+                file.write(memoryview(adjacency.neighbours).cast('B'))
+            file.write(present)
+            file.write('\n'.join(ids).encode())
+        os.replace(temporary, path)
+
+    def load(self, path: str):
+        """
+        Replace the whole index with a saved one. The arrays are
+        memory-mapped, not read. Documents marked stale are kept
+        marked.
+
+        :param path: Path of a file written by `save`.
+
+        :raise OSError: Raised if the file can't be read.
+        :raise ValueError: Raised if the file is not a saved index of
+                           this platform or it is truncated.
+        """
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(mapped) < HEADER.size:
+            raise ValueError(f'Not a graph index file: {path}')
+        magic, count, size, _ = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError(f'Not a graph index file: {path}')
+        itemsize = array('i').itemsize
+        end = HEADER.size + 2 * (count + 1 + size) * itemsize
+        if len(mapped) < end + count:
+            raise ValueError(f'Truncated graph index file: {path}')
+
+        view = memoryview(mapped)
+        arrays = []
+        start = HEADER.size
+        for length in (count + 1, size, count + 1, size):
+            arrays.append(view[start:start + length * itemsize].cast('i'))
+            start += length * itemsize
+        present = bytearray(view[end:end + count])
+        ids = bytes(view[end + count:]).decode().split('\n') \
+            if count else []
+        if len(ids) != count:
+            raise ValueError(f'Corrupted graph index file: {path}')
+        positions = {id: position for position, id in enumerate(ids)}
+
+        with self._lock:
+            self._ids, self._positions = ids, positions
+            self._outgoing = Adjacency(arrays[0], arrays[1])
+            self._incoming = Adjacency(arrays[2], arrays[3])
+            self._present = present
+            self.built = True
+
+
+def get_graph_index(model: type, field: str) -> GraphIndex:
+    """
+    Get the process-wide graph index of a reference field, creating
+    it on the first call.
+
+    :param model: Document model class.
+    :param field: Name of the list field referencing documents of
+                  the same model (e.g. 'enemies').
+
+    :return: GraphIndex instance.
+    """
+    key = (model.__name__, field)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(key, GraphIndex())
+    return index
+
+
+def _get_digest(version: str) -> bytes:
+    """
+    Get the digest of a version stored in file headers.
+
+    :param version: Version of the indexed data.
+
+    :return: SHA-256 digest.
+    """
+    return hashlib.sha256(version.encode()).digest()
+
+
+def is_file_fresh(path: str, max_age: float, version: str = '') -> bool:
+    """
+    Check whether a saved index exists and is recent enough to be
+    loaded instead of being built.
+
+    :param path: Path of the file.
+    :param max_age: Maximum age of the file in seconds.
+    :param version: Current version of the indexed data.
+
+    :return: True if the file was modified within max_age and saved
+             with the same version.
+    """
+    try:
+        modified = os.path.getmtime(path)
+        with open(path, 'rb') as file:
+            header = file.read(HEADER.size)
+    except OSError:
+        return False
+    if modified < time() - max_age or len(header) < HEADER.size:
+        return False
+    magic, _, _, digest = HEADER.unpack(header)
+    return magic == MAGIC and digest == _get_digest(version)
+
+
+def mark_stale_documents(model_name: str, ids: list[Any]):
+    """
+    Mark written documents stale in graph indexes of their model.
+    Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    for (name, _), index in list(_indexes.items()):
+        if name == model_name:
+            index.mark_stale(ids)
+
+
+events.subscribe(mark_stale_documents)
@@ -0,0 +1,209 @@
+"""
+identity_map.py
+
+This module provides the IdentityMap class, a request-level registry
+of already loaded documents and already assembled objects.
+
+The active identity map is stored in a context variable, so the
+stateless DAO and handler classes can share it without passing it
+through every call. An identity map is activated for the duration of
+a GraphQL operation with `identity_map_scope` and is discarded when
+the operation ends. Outside of a scope there is no active map and
+every DAO call goes straight to the database.
+"""
+
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Hashable, Iterator
+
+from bson import ObjectId
+
+
+_current_map: ContextVar['IdentityMap | None'] = ContextVar(
+    'identity_map', default=None,
+)
+
+
+def to_key(id: Any) -> ObjectId | str:
+    """
+    Normalize provided ID to the identity map key.
+
+    :param id: ID as ObjectId or its string representation.
+
+    :return: ObjectId if provided ID is a valid one,
+             otherwise its string representation.
+    """
+    if isinstance(id, ObjectId):
+        return id
+    return ObjectId(id) if ObjectId.is_valid(id) else str(id)
+
+
+class IdentityMap:
+    """
+    Request-level registry that guarantees every document is loaded
+    at most once per request.
+
+    Documents may be loaded partially (with a field projection), so
+    the set of loaded fields is stored along with every document.
+    A registered document is only reused for requests, that don't
+    need any fields beyond the loaded ones.
+
+    Attributes:
+        documents: Loaded documents keyed by model name and ObjectId.
+                   Values are (document, loaded fields) pairs, where
+                   loaded fields are None for whole documents.
+                   None is stored as document for IDs that were
+                   not found.
+        assembled: Objects built from the documents (e.g. GraphQL
+                   types), keyed by arbitrary hashable keys.
+        collections: Names of models read as a whole (e.g. pages or
+                     counts), results of such reads may change with
+                     a write of any document of the model.
+    """
+
+    def __init__(self):
+        self.documents: dict[
+            tuple[str, Hashable], tuple[Any, frozenset[str] | None]
+        ] = dict()
+        self.assembled: dict[Hashable, Any] = dict()
+        self.collections: set[str] = set()
+
+    def get_tags(self) -> frozenset[tuple[str, Hashable]]:
+        """
+        Get the data the request depends on, e.g. to invalidate
+        a cached response on writes.
+
+        :return: Set of (model name, ID) pairs of all looked up
+                 documents (found or not), and (model name, None)
+                 pairs of models read as a whole.
+        """
+        return frozenset(self.documents) | frozenset(
+            (model_name, None) for model_name in self.collections
+        )
+
+    def get_document(
+        self, model: type, id: Any, only: list[str] | None = None
+    ) -> tuple[bool, Any]:
+        """
+        Look up a document in the registry.
+
+        :param model: Document model class.
+        :param id: ID of the document.
+        :param only: Fields that have to be loaded, None for
+                     the whole document.
+
+        :return: A tuple of a flag whether the ID is known with all
+                 required fields and the document itself (None for
+                 not found documents).
+        """
+        key = (model.__name__, to_key(id))
+        if key not in self.documents:
+            return False, None
+
+        document, fields = self.documents[key]
+        if document is None or fields is None or (
+            only is not None and fields.issuperset(only)
+        ):
+            return True, document
+        return False, None
+
+    def put_document(
+        self,
+        model: type,
+        id: Any,
+        document: Any,
+        only: list[str] | None = None,
+    ):
+        """
+        Register a loaded document. A registered document is not
+        replaced with one loaded with fewer fields.
+
+        :param model: Document model class.
+        :param id: ID of the document.
+        :param document: Loaded document or None if it was not found.
+        :param only: Fields the document was loaded with, None for
+                     the whole document.
+        """
+        key = (model.__name__, to_key(id))
+        if document is not None and key in self.documents:
+            known, fields = self.documents[key]
+            if known is not None and (fields is None or (
+                only is not None and fields.issuperset(only)
+            )):
+                return
+
+        fields = None if only is None else frozenset(only)
+        self.documents[key] = (document, fields)
+
+    def get_documents(
+        self, model: type, ids: list[Any], only: list[str] | None = None
+    ) -> tuple[list[Any], list[ObjectId | str]]:
+        """
+        Split provided IDs into already known documents and IDs that
+        still have to be fetched.
+
+        :param model: Document model class.
+        :param ids: IDs of the documents.
+        :param only: Fields that have to be loaded, None for
+                     the whole documents.
+
+        :return: A tuple of found known documents and unique
+                 unknown IDs.
+        """
+        known, missing = [], []
+        for id in dict.fromkeys(to_key(id) for id in ids):
+            is_known, document = self.get_document(model, id, only)
+            if not is_known:
+                missing.append(id)
+            elif document:
+                known.append(document)
+        return known, missing
+
+    def put_documents(
+        self,
+        model: type,
+        ids: list[Any],
+        documents: list[Any],
+        only: list[str] | None = None,
+    ):
+        """
+        Register documents fetched for provided IDs. IDs without
+        a matching document are registered as not found.
+
+        :param model: Document model class.
+        :param ids: Requested IDs.
+        :param documents: Fetched documents.
+        :param only: Fields the documents were loaded with, None for
+                     whole documents.
+        """
+        found = {to_key(document.id) for document in documents}
+        for id in ids:
+            if to_key(id) not in found:
+                self.put_document(model, id, None)
+        for document in documents:
+            self.put_document(model, document.id, document, only)
+
+
+def get_identity_map() -> IdentityMap | None:
+    """
+    Get the identity map of the current request.
+
+    :return: Active IdentityMap or None outside of a scope.
+    """
+    return _current_map.get()
+
+
+@contextmanager
+def identity_map_scope() -> Iterator[IdentityMap]:
+    """
+    Activate a new identity map for the enclosed block.
+
+    :return: Context manager yielding the activated IdentityMap.
+    """
+    identity_map = IdentityMap()
+    token = _current_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current_map.reset(token)
@@ -0,0 +1,261 @@
+"""
+inverted_index.py
+
+This module provides the InvertedIndex class, a process-wide in-memory
+index of documents by values of a list field (e.g. characters by their
+powers), answering "documents with all of these values" and "documents
+sharing values with this one" without a database round trip.
+
+Documents are numbered by positions, and every value maps to a sorted
+int32 array of positions of documents having it (a posting list).
+Intersections start from the shortest posting list. Much longer lists
+are probed with binary searches, so the cost depends on the rarest
+value rather than on the number of documents; lists of comparable
+length are intersected as sets. Shared values are counted over the
+posting lists of the document's values only, and only the requested
+number of the most similar documents is ranked.
+
+Indexes are built by handlers (at startup or on the first lookup).
+Written documents are marked stale on write events (see events.py)
+and refreshed by handlers before the next lookup, with a single query
+for all documents written in the meantime. Refreshed documents are
+moved between posting lists in place.
+"""
+
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import nsmallest
+from itertools import chain
+from threading import Lock
+from typing import Any, Iterable
+
+from data_access import events
+from data_access.identity_map import to_key
+
+
+# Minimum length ratio of posting lists, for which the shorter one is
+# probed in the longer one with binary searches
+PROBE_RATIO = 16
+
+_indexes: dict[tuple[str, str], 'InvertedIndex'] = dict()
+_indexes_lock = Lock()
+
+
+def contains(postings: array, position: int) -> bool:
+    """
+    Check whether a sorted posting list contains a position.
+
+    :param postings: Sorted array of positions.
+    :param position: Position of a document.
+
+    :return: True if the position is in the list.
+    """
+    index = bisect_left(postings, position)
+    return index < len(postings) and postings[index] == position
+
+
+class InvertedIndex:
+    """
+    Thread-safe in-memory inverted index of documents.
+
+    Attributes:
+        built: Whether the index was built from the database.
+    """
+
+    def __init__(self):
+        self.built = False
+        # Document IDs by position and positions by ID
+        self._ids: list[str] = []
+        self._positions: dict[str, int] = dict()
+        # Sorted positions of documents keyed by value
+        self._postings: dict[str, array] = dict()
+        # Values of indexed documents keyed by position
+        self._values: dict[int, tuple[str, ...]] = dict()
+        self._stale: set[str] = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _remove(self, position: int):
+        """
+        Remove a document from its posting lists. Must be called with
+        the lock held.
+
+        :param position: Position of the document.
+        """
+        for value in self._values.pop(position, ()):
+            postings = self._postings[value]
+            del postings[bisect_left(postings, position)]
+            if not postings:
+                del self._postings[value]
+
+    def build(self, documents: Iterable[tuple[Any, Iterable[Any]]]):
+        """
+        Replace the whole index. Documents marked stale are kept
+        marked, as they could have been written after being read.
+
+        :param documents: Pairs of document IDs and values of the
+                          indexed field.
+        """
+        ids = []
+        positions = dict()
+        postings = dict()
+        indexed = dict()
+        for id, values in documents:
+            id = str(to_key(id))
+            position = positions[id] = len(ids)
+            ids.append(id)
+            values = indexed[position] = tuple(dict.fromkeys(
+                str(to_key(value)) for value in values or ()
+            ))
+            for value in values:
+                postings.setdefault(value, array('i')).append(position)
+
+        with self._lock:
+            self._ids, self._positions = ids, positions
+            self._postings, self._values = postings, indexed
+            self.built = True
+
+    def put(self, id: Any, values: Iterable[Any]):
+        """
+        Add a document or replace its values.
+
+        :param id: ID of the document.
+        :param values: Values of the indexed field.
+        """
+        id = str(to_key(id))
+        values = tuple(dict.fromkeys(
+            str(to_key(value)) for value in values or ()
+        ))
+        with self._lock:
+            position = self._positions.get(id)
+            if position is None:
+                position = self._positions[id] = len(self._ids)
+                self._ids.append(id)
+            self._remove(position)
+            self._values[position] = values
+            for value in values:
+                insort(self._postings.setdefault(value, array('i')), position)
+
+    def remove(self, id: Any):
+        """
+        Remove a document, unknown IDs are ignored.
+
+        :param id: ID of the document.
+        """
+        with self._lock:
+            position = self._positions.get(str(to_key(id)))
+            if position is not None:
+                self._remove(position)
+
+    def mark_stale(self, ids: Iterable[Any]):
+        """
+        Mark documents to be refreshed before the next lookup.
+
+        :param ids: IDs of written documents.
+        """
+        with self._lock:
+            self._stale.update(str(to_key(id)) for id in ids)
+
+    def pop_stale(self) -> list[str]:
+        """
+        Take the documents marked stale, unmarking them.
+
+        :return: IDs of stale documents as strings.
+        """
+        with self._lock:
+            stale, self._stale = list(self._stale), set()
+        return stale
+
+    def find_all(self, values: Iterable[Any]) -> list[str]:
+        """
+        Find documents having all of the values.
+
+        :param values: Values to match.
+
+        :return: IDs of matching documents, in order of indexing.
+                 The list is empty if no value is given.
+        """
+        values = {str(to_key(value)) for value in values}
+        with self._lock:
+            postings = sorted(
+                (self._postings.get(value, array('i')) for value in values),
+                key=len,
+            )
+            if not postings:
+                return []
+            found = postings[0]
+            for other in postings[1:]:
+                if not found:
+                    break
+                if len(found) * PROBE_RATIO <= len(other):
+                    found = [position for position in found
+                             if contains(other, position)]
+                else:
+                    found = sorted(set(found).intersection(other))
+            return [self._ids[position] for position in found]
+
+    def find_sharing(
+        self, id: Any, min_shared: int = 1, limit: int | None = None
+    ) -> list[tuple[str, int]]:
+        """
+        Find documents sharing values with a document.
+
+        :param id: ID of the document.
+        :param min_shared: Minimum number of shared values.
+        :param limit: Maximum number of documents, None for all.
+
+        :return: Pairs of document IDs and numbers of shared values,
+                 the most similar documents first (ties in order of
+                 indexing). The document itself isn't included, the
+                 list is empty if it isn't indexed.
+        """
+        with self._lock:
+            position = self._positions.get(str(to_key(id)))
+            values = self._values.get(position, ())
+            counts = Counter(chain.from_iterable(
+                self._postings[value] for value in values
+            ))
+            counts.pop(position, None)
+            found = ((-shared, other) for other, shared in counts.items()
+                     if shared >= min_shared)
+            found = sorted(found) if limit is None \
+                else nsmallest(limit, found)
+            return [(self._ids[other], -shared) for shared, other in found]
+
+
+def get_inverted_index(model: type, field: str) -> InvertedIndex:
+    """
+    Get the process-wide inverted index of a list field, creating it
+    on the first call.
+
+    :param model: Document model class.
+    :param field: Name of the indexed list field (e.g. 'powers').
+
+    :return: InvertedIndex instance.
+    """
+    key = (model.__name__, field)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(key, InvertedIndex())
+    return index
+
+
+def mark_stale_documents(model_name: str, ids: list[Any]):
+    """
+    Mark written documents stale in inverted indexes of their model.
+    Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    for (name, _), index in list(_indexes.items()):
+        if name == model_name:
+            index.mark_stale(ids)
+
+
+events.subscribe(mark_stale_documents)
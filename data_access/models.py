@@ -4,9 +4,16 @@ models.py
 This module defines the MongoDB document models for the application.
 These models define the structure of the database collections,
 document fields and validation requirements.
+
+Document models are used on the write path only. Reads skip the
+costly Document instantiation and return RawDocuments, plain dicts
+built directly by the pymongo decoder.
 """
 
 
+from typing import Any
+
+from bson.codec_options import CodecOptions
 from mongoengine import (
     Document, StringField, ListField, LazyReferenceField, CASCADE
 )
@@ -37,6 +44,11 @@ class Character(Document):
 
     Indexes:
         - A compound index on 'alias' and 'name' ensuring uniqueness.
+        - Multikey indexes on 'enemies' and 'powers', serving reverse
+          lookups (e.g. characters listing a character as an enemy).
+        - Compound indexes serving filtered and ordered pages: every
+          filtered field (e.g. 'role') is followed by the ordering
+          field and the ID, which breaks ties of the keyset order.
     """
     alias = StringField(required=True, min_length=2, max_length=40)
     name = StringField(default='unknown', min_length=2, max_length=40)
@@ -55,5 +67,41 @@ class Character(Document):
                 'fields': ['alias', 'name'],
                 'unique': True,
             },
+            'enemies',
+            'powers',
+            ('alias', 'id'),
+            ('name', 'id'),
+            ('role', 'id'),
+            ('role', 'alias', 'id'),
+            ('role', 'name', 'id'),
         ]
     }
+
+
+class RawDocument(dict):
+    """
+    A raw MongoDB document of any model, as decoded by pymongo.
+    Fields are accessed by their database names (e.g. '_id'),
+    references are plain ObjectIds. RawDocuments may be shared
+    between requests, so they must be treated as read-only.
+    """
+    __slots__ = ()
+
+    @property
+    def id(self) -> Any:
+        """
+        ID of the document, so RawDocuments can be registered in the
+        identity map, caches and DataLoaders like any other object.
+        """
+        return self.get('_id')
+
+
+def get_raw_codec_options(codec_options: CodecOptions) -> CodecOptions:
+    """
+    Derive codec options decoding documents into RawDocuments.
+
+    :param codec_options: Codec options of the client or collection.
+
+    :return: Codec options with RawDocument as document class.
+    """
+    return codec_options.with_options(document_class=RawDocument)
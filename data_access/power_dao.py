@@ -6,11 +6,18 @@ data access object that abstracts and encapsulates interactions
 with the MongoDB database for the `Power` model.
 
 All base operations are inherited from BaseDAO class.
+AsyncPowerDAO is its counterpart for the asyncio data path,
+with all base operations inherited from AsyncBaseDAO class.
+
+SnapshotPowerDAO and AsyncSnapshotPowerDAO serve reads from
+the in-process snapshot (see snapshot.py) instead.
 """
 
 
+from data_access.async_base_dao import AsyncBaseDAO
 from data_access.base_dao import BaseDAO
 from data_access.models import Power
+from data_access.snapshot import AsyncSnapshotDAO, SnapshotDAO
 
 
 class PowerDAO(BaseDAO[Power]):
@@ -21,3 +28,35 @@ class PowerDAO(BaseDAO[Power]):
         model: A specific document model to work with
     """
     model = Power
+
+
+class AsyncPowerDAO(AsyncBaseDAO[Power]):
+    """
+    Main class for async interactions related to the `Power` model.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Power
+
+
+class SnapshotPowerDAO(SnapshotDAO[Power], PowerDAO):
+    """
+    Class for interactions related to the `Power` model, serving
+    reads from the in-process snapshot.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Power
+
+
+class AsyncSnapshotPowerDAO(AsyncSnapshotDAO[Power], AsyncPowerDAO):
+    """
+    Class for async interactions related to the `Power` model,
+    serving reads from the in-process snapshot.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = Power
@@ -0,0 +1,248 @@
+"""
+prefix_index.py
+
+This module provides the PrefixIndex class, a process-wide in-memory
+index of documents by prefixes of their text fields (e.g. aliases
+and names of characters), answering autocomplete lookups without
+a database round trip.
+
+Indexed values are case-folded and stripped of diacritics, and kept
+in sorted arrays searched with bisect. A lookup is a binary search
+per ranking tier followed by a scan of at most `limit` matches, so
+its cost doesn't grow with the number of matching documents.
+
+Matches are ranked by tiers: prefixes of the first indexed field
+(e.g. aliases) go first, prefixes of the following fields next and
+prefixes of inner words of any field (e.g. 'wayne' of 'Bruce Wayne')
+last. Matches of a tier are ordered alphabetically, so an exact match
+always precedes longer completions.
+
+Indexes are built from the database by handlers (at startup or on
+the first lookup). Written documents are marked stale on write events
+(see events.py) and refreshed by handlers before the next lookup,
+with a single query for all documents written in the meantime.
+"""
+
+
+import unicodedata
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Any, Iterable, NamedTuple
+
+from data_access import events
+from data_access.identity_map import to_key
+
+
+_indexes: dict[str, 'PrefixIndex'] = dict()
+_indexes_lock = Lock()
+
+
+class Suggestion(NamedTuple):
+    """
+    A single match of an autocomplete lookup.
+
+    Attributes:
+        id: ID of the matched document as a string.
+        values: Indexed values of the document, aligned with fields
+                of the index.
+    """
+    id: str
+    values: tuple[str | None, ...]
+
+
+def fold(text: str) -> str:
+    """
+    Normalize a text for case-insensitive and accent-insensitive
+    matching.
+
+    :param text: Text to normalize.
+
+    :return: Case-folded text without diacritics.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed
+                   if not unicodedata.combining(char))
+
+
+class PrefixIndex:
+    """
+    Thread-safe in-memory prefix index of documents.
+
+    Attributes:
+        fields: Names of the indexed fields, in order of ranking.
+        built: Whether the index was built from the database.
+    """
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.fields = fields
+        self.built = False
+        # Sorted (term, ID) pairs of every ranking tier
+        self._tiers: list[list[tuple[str, str]]] = [
+            [] for _ in range(len(fields) + 1)
+        ]
+        # Indexed values and (tier, term) pairs keyed by ID
+        self._entries: dict[
+            str, tuple[tuple[str | None, ...], list[tuple[int, str]]]
+        ] = dict()
+        self._stale: set[str] = set()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_terms(
+        self, values: tuple[str | None, ...]
+    ) -> list[tuple[int, str]]:
+        """
+        Get the indexed terms of a document.
+
+        :param values: Values of the indexed fields.
+
+        :return: Unique (tier, term) pairs.
+        """
+        words_tier = len(self.fields)
+        terms = []
+        for tier, value in enumerate(values):
+            if not value:
+                continue
+            terms.append((tier, fold(value)))
+            terms.extend((words_tier, fold(word))
+                         for word in value.split()[1:])
+        return list(dict.fromkeys(terms))
+
+    def _remove(self, id: str):
+        """
+        Remove a document. Must be called with the lock held.
+
+        :param id: ID of the document as a string.
+        """
+        entry = self._entries.pop(id, None)
+        if entry is None:
+            return
+        for tier, term in entry[1]:
+            terms = self._tiers[tier]
+            index = bisect_left(terms, (term, id))
+            if index < len(terms) and terms[index] == (term, id):
+                del terms[index]
+
+    def build(self, documents: Iterable[tuple[Any, tuple[str | None, ...]]]):
+        """
+        Replace the whole index. Documents marked stale are kept
+        marked, as they could have been written after being read.
+
+        :param documents: Pairs of document IDs and values of the
+                          indexed fields.
+        """
+        tiers = [[] for _ in self._tiers]
+        entries = dict()
+        for id, values in documents:
+            id = str(to_key(id))
+            terms = self._get_terms(values)
+            entries[id] = (values, terms)
+            for tier, term in terms:
+                tiers[tier].append((term, id))
+        for terms in tiers:
+            terms.sort()
+
+        with self._lock:
+            self._tiers, self._entries = tiers, entries
+            self.built = True
+
+    def put(self, id: Any, values: tuple[str | None, ...]):
+        """
+        Add a document or replace its indexed values.
+
+        :param id: ID of the document.
+        :param values: Values of the indexed fields.
+        """
+        id = str(to_key(id))
+        terms = self._get_terms(values)
+        with self._lock:
+            self._remove(id)
+            self._entries[id] = (values, terms)
+            for tier, term in terms:
+                insort(self._tiers[tier], (term, id))
+
+    def remove(self, id: Any):
+        """
+        Remove a document, unknown IDs are ignored.
+
+        :param id: ID of the document.
+        """
+        with self._lock:
+            self._remove(str(to_key(id)))
+
+    def mark_stale(self, ids: Iterable[Any]):
+        """
+        Mark documents to be refreshed before the next lookup.
+
+        :param ids: IDs of written documents.
+        """
+        with self._lock:
+            self._stale.update(str(to_key(id)) for id in ids)
+
+    def pop_stale(self) -> list[str]:
+        """
+        Take the documents marked stale, unmarking them.
+
+        :return: IDs of stale documents as strings.
+        """
+        with self._lock:
+            stale, self._stale = list(self._stale), set()
+        return stale
+
+    def search(self, prefix: str, limit: int) -> list[Suggestion]:
+        """
+        Find documents by a prefix of their indexed values.
+
+        :param prefix: Prefix to match, matched case-insensitively.
+        :param limit: Maximum number of matches.
+
+        :return: List of ranked matches, empty for a blank prefix.
+        """
+        prefix = fold(prefix.strip())
+        if not prefix or limit <= 0:
+            return []
+
+        found: dict[str, None] = dict()
+        with self._lock:
+            for terms in self._tiers:
+                index = bisect_left(terms, (prefix,))
+                while len(found) < limit and index < len(terms) \
+                        and terms[index][0].startswith(prefix):
+                    found.setdefault(terms[index][1])
+                    index += 1
+            return [Suggestion(id, self._entries[id][0]) for id in found]
+
+
+def get_prefix_index(model: type, fields: tuple[str, ...]) -> PrefixIndex:
+    """
+    Get the process-wide prefix index of a model, creating it on
+    the first call.
+
+    :param model: Document model class.
+    :param fields: Names of the indexed fields, in order of ranking.
+
+    :return: PrefixIndex instance.
+    """
+    index = _indexes.get(model.__name__)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(model.__name__, PrefixIndex(fields))
+    return index
+
+
+def mark_stale_documents(model_name: str, ids: list[Any]):
+    """
+    Mark written documents stale in the index of their model.
+    Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    index = _indexes.get(model_name)
+    if index is not None:
+        index.mark_stale(ids)
+
+
+events.subscribe(mark_stale_documents)
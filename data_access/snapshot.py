@@ -0,0 +1,713 @@
+"""
+snapshot.py
+
+This module provides an in-process, read-only snapshot of whole
+collections (characters and powers), serving hot reads without any
+database round trip, and the SnapshotDAO classes reading from it.
+
+A snapshot keeps every document keyed by its ID, along with integer
+positions of documents in ID order. Reference lists (e.g. enemies)
+are inverted into adjacency lists of positions (`array('i')`), so
+reverse lookups (e.g. characters listing a character as an enemy)
+don't scan documents. Orders of pages by a field are sorted lazily,
+once per field and snapshot, and pages are then bisected.
+
+Snapshots are never modified, a refreshed snapshot replaces the
+current one by reference, so readers always see a consistent copy.
+The snapshot is refreshed:
+    - by a background thread every `SNAPSHOT_REFRESH_INTERVAL`
+      seconds, picking up writes of other processes,
+    - on a version bump: every write event of a snapshotted model
+      (see events.py) bumps the version, and the next read reloads
+      the snapshot first, so writes of the process are read back.
+
+SnapshotDAO and AsyncSnapshotDAO serve reads of BaseDAO and
+AsyncBaseDAO from the snapshot. Writes, existence checks (which must
+never be stale) and aggregations are inherited and still go to
+the database.
+"""
+
+
+import asyncio
+from array import array
+from bisect import bisect_left, bisect_right
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+from mongoengine import LazyReferenceField, ListField, ObjectIdField
+
+from data_access import events
+from data_access.async_base_dao import AsyncBaseDAO
+from data_access.base_dao import BaseDAO
+from data_access.identity_map import get_identity_map, to_key
+from data_access.models import (
+    Character, Power, RawDocument, get_raw_codec_options
+)
+from logger import CustomLogger
+from settings import SNAPSHOT_REFRESH_INTERVAL
+
+
+T = TypeVar('T', Character, Power)
+logger = CustomLogger('data_access.snapshot')
+
+# Models loaded into the snapshot
+MODELS = (Character, Power)
+
+
+def _sort_value(value: Any) -> tuple:
+    """
+    Map a field value to a sort key, missing values go first
+    as in MongoDB.
+
+    :param value: Field value.
+
+    :return: Comparable sort key.
+    """
+    return (0,) if value is None else (1, value)
+
+
+def create_matcher(
+    model: type, filters: dict[str, Any] | None
+) -> Callable[[RawDocument], bool]:
+    """
+    Translate filters of model fields into a predicate on raw
+    documents, with the semantics of `base_dao.create_filter`.
+
+    :param model: Document model class.
+    :param filters: Filter values keyed by filter keys, None for
+                    no filters.
+
+    :return: Predicate accepting a raw document.
+
+    :raise ValueError: If a filter key is not known.
+    """
+    conditions = []
+    for key, value in (filters or {}).items():
+        name, _, lookup = key.partition('__')
+        field = model._fields.get(name)
+        if field is None or lookup not in ('', 'prefix'):
+            raise ValueError(f'Unknown filter: {key}')
+
+        if isinstance(getattr(field, 'field', field), (
+            LazyReferenceField, ObjectIdField,
+        )):
+            value = to_key(value)
+        conditions.append((field.db_field, lookup, value))
+
+    def match(document: RawDocument) -> bool:
+        for db_field, lookup, value in conditions:
+            stored = document.get(db_field)
+            if lookup:
+                if not isinstance(stored, str) or not stored.startswith(value):
+                    return False
+            elif stored != value and not (
+                isinstance(stored, list) and value in stored
+            ):
+                return False
+        return True
+
+    return match
+
+
+class ModelSnapshot:
+    """
+    Read-only in-memory copy of the collection of a model.
+
+    Attributes:
+        model: Document model class.
+        documents: Raw documents keyed by their IDs.
+        ids: IDs of documents in ascending order, so documents can be
+             referred to by integer positions.
+        referencing: Adjacency lists of reference list fields: positions
+                     of documents referencing an ID, keyed by database
+                     field name and the referenced ID.
+    """
+
+    def __init__(self, model: type, documents: list[RawDocument]):
+        self.model = model
+        self.documents = {document['_id']: document for document in documents}
+        self.ids = sorted(self.documents)
+        positions = {id: position for position, id in enumerate(self.ids)}
+
+        self.referencing: dict[str, dict[Any, array]] = dict()
+        for field in model._fields.values():
+            if isinstance(field, ListField) \
+                    and isinstance(field.field, LazyReferenceField):
+                adjacency = dict()
+                for id in self.ids:
+                    position = positions[id]
+                    for referenced in dict.fromkeys(
+                        self.documents[id].get(field.db_field, ())
+                    ):
+                        adjacency.setdefault(
+                            referenced, array('i'),
+                        ).append(position)
+                self.referencing[field.db_field] = adjacency
+
+        # Positions and sort keys of pages ordered by a field
+        self._orders: dict[str, tuple[array, list[tuple]]] = dict()
+        self._orders_lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _get_order(self, db_field: str) -> tuple[array, list[tuple]]:
+        """
+        Get positions of documents ordered by a field with the ID as
+        a tiebreaker, sorting them on the first call.
+
+        :param db_field: Database name of the ordering field.
+
+        :return: A tuple of ordered positions and their sort keys.
+        """
+        order = self._orders.get(db_field)
+        if order is None:
+            with self._orders_lock:
+                order = self._orders.get(db_field)
+                if order is None:
+                    keys = sorted(
+                        (_sort_value(self.documents[id].get(db_field)), id,
+                         position)
+                        for position, id in enumerate(self.ids)
+                    )
+                    order = (
+                        array('i', (key[2] for key in keys)),
+                        [key[:2] for key in keys],
+                    )
+                    self._orders[db_field] = order
+        return order
+
+    def get_one(self, id: Any) -> RawDocument | None:
+        """
+        Get a document by its ID.
+
+        :param id: ID of the document.
+
+        :return: The document if found, otherwise None.
+        """
+        return self.documents.get(to_key(id))
+
+    def get_many(self, ids: list[Any]) -> list[RawDocument]:
+        """
+        Get documents by their IDs.
+
+        :param ids: IDs of the documents.
+
+        :return: Found documents, unique and in order of IDs.
+        """
+        documents = self.documents
+        return [documents[key] for key in dict.fromkeys(map(to_key, ids))
+                if key in documents]
+
+    def get_all(self) -> list[RawDocument]:
+        """
+        Get all documents.
+
+        :return: All documents in ID order.
+        """
+        return [self.documents[id] for id in self.ids]
+
+    def get_page(
+        self,
+        limit: int,
+        after: Any = None,
+        before: Any = None,
+        reverse: bool = False,
+        filters: dict[str, Any] | None = None,
+        sort: tuple[str, int] | None = None,
+    ) -> list[RawDocument]:
+        """
+        Get a page of documents with the semantics of
+        `BaseDAO.get_page`. The range between cursors is bisected
+        and scanned until the page is full.
+
+        :param limit: Maximum number of documents.
+        :param after: Cursor position to paginate forward from.
+        :param before: Cursor position to paginate backward from.
+        :param reverse: Whether the page is taken from the end.
+        :param filters: Filters of model fields.
+        :param sort: A pair of the ordering model field and direction.
+
+        :return: Documents of the page.
+
+        :raise ValueError: If a filter or the ordering field
+                           is not known.
+        """
+        field, direction = sort or ('id', 1)
+        if field not in self.model._fields:
+            raise ValueError(f'Unknown ordering field: {field}')
+        db_field = self.model._fields[field].db_field
+        match = create_matcher(self.model, filters)
+
+        if db_field == '_id':
+            positions, keys, bound = None, self.ids, to_key
+        else:
+            positions, keys = self._get_order(db_field)
+
+            def bound(cursor: Any) -> tuple:
+                return (_sort_value(cursor[0]), to_key(cursor[1]))
+
+        # Range of sort keys in ascending order, cursors are exclusive
+        low, high = 0, len(keys)
+        forward, backward = (after, before) if direction > 0 \
+            else (before, after)
+        if forward is not None:
+            low = bisect_right(keys, bound(forward))
+        if backward is not None:
+            high = bisect_left(keys, bound(backward))
+
+        indexes = range(low, high)
+        if (direction < 0) != reverse:
+            indexes = reversed(indexes)
+
+        page = []
+        for index in indexes:
+            position = index if positions is None else positions[index]
+            document = self.documents[self.ids[position]]
+            if match(document):
+                page.append(document)
+                if len(page) >= limit:
+                    break
+        return page
+
+    def get_many_by_reference(
+        self, field: str, ids: list[Any]
+    ) -> list[RawDocument]:
+        """
+        Get documents referencing any of provided IDs in a list field.
+
+        :param field: Name of the reference list field.
+        :param ids: Referenced IDs.
+
+        :return: Found documents in ID order.
+        """
+        db_field = self.model._fields[field].db_field
+        adjacency = self.referencing.get(db_field)
+        if adjacency is None:
+            keys = set(map(to_key, ids))
+            return [document for document in self.get_all()
+                    if keys.intersection(document.get(db_field, ()))]
+
+        positions = set()
+        for id in ids:
+            positions.update(adjacency.get(to_key(id), ()))
+        return [self.documents[self.ids[position]]
+                for position in sorted(positions)]
+
+    def get_count(self, filters: dict[str, Any] | None = None) -> int:
+        """
+        Count documents matching filters.
+
+        :param filters: Filters of model fields.
+
+        :return: Number of matching documents.
+
+        :raise ValueError: If a filter is not known.
+        """
+        if not filters:
+            return len(self.ids)
+        match = create_matcher(self.model, filters)
+        return sum(1 for document in self.documents.values()
+                   if match(document))
+
+
+class Snapshot:
+    """
+    Consistent in-memory copy of all snapshotted collections.
+
+    Attributes:
+        models: ModelSnapshots keyed by model name.
+        version: Write version the snapshot was loaded at.
+        loaded_at: Value of `perf_counter` at the load.
+    """
+
+    def __init__(self, models: dict[str, ModelSnapshot], version: int):
+        self.models = models
+        self.version = version
+        self.loaded_at = perf_counter()
+
+
+def load_snapshot(models: tuple[type, ...], version: int) -> Snapshot:
+    """
+    Load whole collections of provided models.
+
+    :param models: Document model classes.
+    :param version: Write version at the start of the load.
+
+    :return: Loaded Snapshot.
+
+    :raise PyMongoError: For general database interaction issues.
+    """
+    started = perf_counter()
+    loaded = dict()
+    for model in models:
+        collection = model._get_collection()
+        collection = collection.with_options(
+            codec_options=get_raw_codec_options(collection.codec_options),
+        )
+        loaded[model.__name__] = ModelSnapshot(model, list(collection.find()))
+
+    logger.log_event('Loaded snapshot of {} in {:.3f}s'.format(
+        ', '.join(f'{len(snapshot)} {name}'
+                  for name, snapshot in loaded.items()),
+        perf_counter() - started,
+    ))
+    return Snapshot(loaded, version)
+
+
+class SnapshotStore:
+    """
+    Holder of the current snapshot, refreshing it on version bumps
+    and periodically.
+
+    Attributes:
+        models: Snapshotted document model classes.
+        interval: Seconds between periodic refreshes, 0 to refresh
+                  on version bumps only.
+        snapshot: The current Snapshot, None until the first load.
+        version: Write version, bumped by write events.
+    """
+
+    def __init__(self, models: tuple[type, ...], interval: float):
+        self.models = models
+        self.interval = interval
+        self.snapshot: Snapshot | None = None
+        self.version = 0
+        self._names = {model.__name__ for model in models}
+        self._lock = Lock()
+        self._version_lock = Lock()
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def bump(self, model_name: str, ids: list[Any]):
+        """
+        Bump the version on writes of snapshotted models.
+        Subscribed to write events.
+
+        :param model_name: Name of the written model.
+        :param ids: IDs of written documents.
+        """
+        if model_name in self._names:
+            with self._version_lock:
+                self.version += 1
+
+    def is_current(self) -> bool:
+        """
+        Check whether the snapshot can be read without a reload.
+
+        :return: Whether the snapshot is loaded and no write
+                 happened since.
+        """
+        snapshot = self.snapshot
+        return snapshot is not None and snapshot.version == self.version
+
+    def refresh(self, force: bool = False) -> Snapshot:
+        """
+        Load a new snapshot and swap it in. Concurrent callers wait
+        for a single load. Writes during the load bump the version
+        again, so the snapshot is reloaded once more on the next read.
+
+        :param force: Whether the snapshot is reloaded even if it is
+                      current (e.g. to pick up writes of other
+                      processes).
+
+        :return: The current Snapshot.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        with self._lock:
+            if not force and self.is_current():
+                return self.snapshot
+            self.snapshot = load_snapshot(self.models, self.version)
+            self._start()
+            return self.snapshot
+
+    def get(self) -> Snapshot:
+        """
+        Get the current snapshot, loading it first if it isn't
+        loaded yet or a write happened since the last load.
+
+        :return: The current Snapshot.
+
+        :raise PyMongoError: For general database interaction issues.
+        """
+        if self.is_current():
+            return self.snapshot
+        return self.refresh()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.refresh(force=True)
+            except Exception:
+                logger.log_error('Refreshing the snapshot failed')
+
+    def _start(self):
+        """
+        Start the periodic refresh thread, if it isn't running.
+        """
+        if self.interval > 0 and self._thread is None:
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self._run, name='snapshot-refresh', daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the periodic refresh thread, e.g. at shutdown.
+        """
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+
+_store = SnapshotStore(MODELS, SNAPSHOT_REFRESH_INTERVAL)
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """
+    Get the process-wide snapshot store.
+
+    :return: SnapshotStore instance.
+    """
+    return _store
+
+
+def _register_documents(model: type, ids: list[Any], documents: list[Any]):
+    """
+    Register documents read for provided IDs in the request identity
+    map, so responses depending on them are tagged.
+
+    :param model: Document model class.
+    :param ids: Requested IDs.
+    :param documents: Found documents.
+    """
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.put_documents(model, ids, documents)
+
+
+def _register_collection(model: type):
+    """
+    Register a read of a model as a whole in the request identity map.
+
+    :param model: Document model class.
+    """
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.collections.add(model.__name__)
+
+
+class SnapshotDAO(BaseDAO[T]):
+    """
+    Base class of DAO classes serving reads from the snapshot.
+    Snapshot documents are whole documents shared between requests,
+    so projections are ignored and documents must be treated as
+    read-only.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = None
+
+    @classmethod
+    def _snapshot(cls) -> ModelSnapshot:
+        """
+        Get the snapshot of the DAO model.
+
+        :return: ModelSnapshot instance.
+
+        :raise ValueError: If the model is not specified in SnapshotDAO
+                           or its subclasses.
+        :raise PyMongoError: If the snapshot has to be loaded and
+                             the load fails.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+        return get_snapshot_store().get().models[cls.model.__name__]
+
+    @classmethod
+    def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> RawDocument | None:
+        """
+        Retrieve an object by its ID from the snapshot.
+        """
+        document = cls._snapshot().get_one(id)
+        _register_documents(cls.model, [id], [document] if document else [])
+        return document
+
+    @classmethod
+    def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects by their IDs from the snapshot.
+        """
+        documents = cls._snapshot().get_many(ids)
+        _register_documents(cls.model, ids, documents)
+        return documents
+
+    @classmethod
+    def get_all(cls, only: list[str] | None = None) -> list[RawDocument]:
+        """
+        Retrieve all objects from the snapshot.
+        """
+        documents = cls._snapshot().get_all()
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    def get_page(
+        cls,
+        limit: int,
+        after: str | None = None,
+        before: str | None = None,
+        reverse: bool = False,
+        only: list[str] | None = None,
+        filters: dict[str, Any] | None = None,
+        sort: tuple[str, int] | None = None,
+    ) -> list[RawDocument]:
+        """
+        Retrieve a page of objects from the snapshot
+        (see BaseDAO.get_page).
+        """
+        documents = cls._snapshot().get_page(
+            limit, after, before, reverse, filters, sort,
+        )
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    def get_many_by_reference(
+        cls, field: str, ids: list[Any], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects referencing any of provided IDs in a list
+        field, through the adjacency lists of the snapshot.
+        """
+        documents = cls._snapshot().get_many_by_reference(field, ids)
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    def get_count(cls, filters: dict[str, Any] | None = None) -> int:
+        """
+        Count objects of the snapshot.
+        """
+        count = cls._snapshot().get_count(filters)
+        _register_collection(cls.model)
+        return count
+
+
+class AsyncSnapshotDAO(AsyncBaseDAO[T]):
+    """
+    Base class of async DAO classes serving reads from the snapshot.
+    Loads of the snapshot run in a worker thread, so they don't block
+    the event loop.
+
+    Attributes:
+        model: A specific document model to work with
+    """
+    model = None
+
+    @classmethod
+    async def _snapshot(cls) -> ModelSnapshot:
+        """
+        Get the snapshot of the DAO model.
+
+        :return: ModelSnapshot instance.
+
+        :raise ValueError: If the model is not specified in
+                           AsyncSnapshotDAO or its subclasses.
+        :raise PyMongoError: If the snapshot has to be loaded and
+                             the load fails.
+        """
+        if not cls.model:
+            raise ValueError('Model not set for this DAO.')
+
+        store = get_snapshot_store()
+        if store.is_current():
+            snapshot = store.snapshot
+        else:
+            snapshot = await asyncio.to_thread(store.get)
+        return snapshot.models[cls.model.__name__]
+
+    @classmethod
+    async def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> RawDocument | None:
+        """
+        Retrieve an object by its ID from the snapshot.
+        """
+        document = (await cls._snapshot()).get_one(id)
+        _register_documents(cls.model, [id], [document] if document else [])
+        return document
+
+    @classmethod
+    async def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects by their IDs from the snapshot.
+        """
+        documents = (await cls._snapshot()).get_many(ids)
+        _register_documents(cls.model, ids, documents)
+        return documents
+
+    @classmethod
+    async def get_all(cls, only: list[str] | None = None) -> list[RawDocument]:
+        """
+        Retrieve all objects from the snapshot.
+        """
+        documents = (await cls._snapshot()).get_all()
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    async def get_page(
+        cls,
+        limit: int,
+        after: str | None = None,
+        before: str | None = None,
+        reverse: bool = False,
+        only: list[str] | None = None,
+        filters: dict[str, Any] | None = None,
+        sort: tuple[str, int] | None = None,
+    ) -> list[RawDocument]:
+        """
+        Retrieve a page of objects from the snapshot
+        (see BaseDAO.get_page).
+        """
+        documents = (await cls._snapshot()).get_page(
+            limit, after, before, reverse, filters, sort,
+        )
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    async def get_many_by_reference(
+        cls, field: str, ids: list[Any], only: list[str] | None = None
+    ) -> list[RawDocument]:
+        """
+        Retrieve objects referencing any of provided IDs in a list
+        field, through the adjacency lists of the snapshot.
+        """
+        documents = (await cls._snapshot()).get_many_by_reference(field, ids)
+        _register_collection(cls.model)
+        return documents
+
+    @classmethod
+    async def get_count(cls, filters: dict[str, Any] | None = None) -> int:
+        """
+        Count objects of the snapshot.
+        """
+        count = (await cls._snapshot()).get_count(filters)
+        _register_collection(cls.model)
+        return count
+
+
+events.subscribe(_store.bump)
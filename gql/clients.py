@@ -0,0 +1,33 @@
+"""
+clients.py
+
+This module identifies API clients of the app, e.g. to apply their
+query cost limits. Clients send their API key in the API_KEY_HEADER
+header, keys are mapped to client IDs server-side (CLIENT_API_KEYS),
+so a client can't claim the identity of another one without knowing
+its key. Requests without a known key are anonymous.
+"""
+
+
+from typing import Any
+
+from settings import API_KEY_HEADER, CLIENT_API_KEYS
+
+
+# Key of the authenticated client ID in the GraphQL context
+CLIENT_CONTEXT_KEY = 'client_id'
+
+
+def get_client_id(request: Any) -> str | None:
+    """
+    Authenticate the client sending a request by its API key.
+
+    :param request: HTTP request.
+
+    :return: ID of the client, None for requests without a known key.
+    """
+    try:
+        key = request.headers.get(API_KEY_HEADER)
+    except AttributeError:
+        return None
+    return CLIENT_API_KEYS.get(key) if key else None
@@ -0,0 +1,262 @@
+"""
+cost.py
+
+This module provides static cost analysis of GraphQL operations.
+
+Costs are declared on schema fields with the `cost_metadata` helper
+(passed as `metadata` of strawberry fields). The cost of a field is
+its own cost plus the cost of its selection, multiplied by the
+expected number of returned items:
+
+    field cost = multiplier * (own cost + selection cost)
+
+The multiplier of list fields is either a fixed estimate (e.g. average
+number of enemies) or taken from pagination arguments (e.g. 'first').
+The multiplier of batch mutations is taken from the length of their
+input list arguments (e.g. 'powers'). Graph traversals raise the
+multiplier to the power of their depth argument (e.g. 'hops'), as
+every further step multiplies the number of reached items.
+Fields without declared costs are free and are not multiplied.
+
+The cost is computed from the parsed document only, so operations can
+be rejected before any resolver (and database access) is executed.
+"""
+
+
+from typing import Any
+
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    IntValueNode,
+    ListValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    VariableNode,
+    get_named_type,
+    value_from_ast_untyped,
+)
+
+from settings import DEFAULT_PAGE_SIZE
+
+
+COST_KEY = 'cost'
+MULTIPLIER_KEY = 'multiplier'
+MULTIPLIER_ARGUMENTS_KEY = 'multiplier_arguments'
+EXPONENT_ARGUMENT_KEY = 'exponent_argument'
+MAX_EXPONENT_KEY = 'max_exponent'
+# Key of the strawberry field definition in graphql-core field extensions
+DEFINITION_KEY = 'strawberry-definition'
+
+
+def cost_metadata(
+    cost: int = 0,
+    multiplier: int = 1,
+    multiplier_arguments: tuple[str, ...] = (),
+    exponent_argument: str | None = None,
+    max_exponent: int = 1,
+) -> dict[str, Any]:
+    """
+    Build strawberry field metadata declaring the field cost.
+
+    :param cost: Cost of a single item returned by the field.
+    :param multiplier: Expected number of items returned by the field.
+    :param multiplier_arguments: Field arguments defining the number of
+                                 returned or written items, either
+                                 integers (e.g. 'first', 'last') or
+                                 lists (e.g. 'powers'), whose length
+                                 is used. The first provided one is
+                                 used, otherwise the multiplier is used.
+    :param exponent_argument: Integer field argument (e.g. 'hops') the
+                              multiplier is raised to the power of,
+                              1 if not provided.
+    :param max_exponent: Upper limit of the exponent, the limit of
+                         the exponent argument enforced by the field.
+
+    :return: Metadata dict.
+    """
+    return {
+        COST_KEY: cost,
+        MULTIPLIER_KEY: multiplier,
+        MULTIPLIER_ARGUMENTS_KEY: multiplier_arguments,
+        EXPONENT_ARGUMENT_KEY: exponent_argument,
+        MAX_EXPONENT_KEY: max_exponent,
+    }
+
+
+# Metadata of Relay-style connection fields, the cost of their
+# selection is multiplied by the requested page size.
+PAGE_COST_METADATA = cost_metadata(
+    multiplier=DEFAULT_PAGE_SIZE, multiplier_arguments=('first', 'last'),
+)
+
+
+def _get_argument_value(
+    arguments: dict[str, Any],
+    name: str,
+    variables: dict[str, Any],
+) -> int | None:
+    """
+    Get the integer value of a field argument. List arguments are
+    represented by their length.
+
+    :param arguments: Argument value nodes keyed by argument names.
+    :param name: Name of the argument.
+    :param variables: Operation variables.
+
+    :return: Value of the argument, None if not provided or
+             not an integer or a list.
+    """
+    value = arguments.get(name)
+    if isinstance(value, VariableNode):
+        value = variables.get(value.name.value)
+    elif isinstance(value, IntValueNode):
+        value = int(value.value)
+    elif isinstance(value, ListValueNode):
+        value = value.values
+    if isinstance(value, (list, tuple)):
+        value = len(value)
+    return value if isinstance(value, int) else None
+
+
+def _get_multiplier(
+    metadata: dict[str, Any],
+    node: FieldNode,
+    variables: dict[str, Any],
+) -> int:
+    """
+    Get the expected number of items returned or written by a field.
+
+    :param metadata: Cost metadata of the field.
+    :param node: Field node of the document.
+    :param variables: Operation variables.
+
+    :return: Multiplier of the field.
+    """
+    multiplier = metadata.get(MULTIPLIER_KEY, 1)
+    arguments = {argument.name.value: argument.value
+                 for argument in node.arguments or ()}
+
+    for name in metadata.get(MULTIPLIER_ARGUMENTS_KEY, ()):
+        value = _get_argument_value(arguments, name, variables)
+        if value is not None:
+            multiplier = max(value, 0)
+            break
+
+    name = metadata.get(EXPONENT_ARGUMENT_KEY)
+    if name is not None:
+        exponent = _get_argument_value(arguments, name, variables)
+        multiplier **= min(
+            max(1 if exponent is None else exponent, 0),
+            metadata.get(MAX_EXPONENT_KEY, 1),
+        )
+    return multiplier
+
+
+def _get_selection_cost(
+    schema: GraphQLSchema,
+    selection_set: SelectionSetNode | None,
+    parent_type: Any,
+    fragments: dict[str, FragmentDefinitionNode],
+    variables: dict[str, Any],
+) -> int:
+    """
+    Compute the cost of a selection set.
+
+    :param schema: graphql-core schema.
+    :param selection_set: Selection set of the document.
+    :param parent_type: Type the selections are made on.
+    :param fragments: Fragment definitions of the document by name.
+    :param variables: Operation variables.
+
+    :return: Cost of the selection set.
+    """
+    if selection_set is None or not isinstance(
+        parent_type, GraphQLObjectType
+    ):
+        return 0
+
+    total = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            field_definition = parent_type.fields.get(selection.name.value)
+            if field_definition is None:
+                continue
+
+            field = field_definition.extensions.get(DEFINITION_KEY)
+            metadata = getattr(field, 'metadata', None) or dict()
+            nested = _get_selection_cost(
+                schema,
+                selection.selection_set,
+                get_named_type(field_definition.type),
+                fragments,
+                variables,
+            )
+            multiplier = _get_multiplier(metadata, selection, variables)
+            total += multiplier * (metadata.get(COST_KEY, 0) + nested)
+
+        elif isinstance(selection, InlineFragmentNode):
+            fragment_type = parent_type
+            if selection.type_condition is not None:
+                fragment_type = schema.get_type(
+                    selection.type_condition.name.value,
+                )
+            total += _get_selection_cost(
+                schema,
+                selection.selection_set,
+                fragment_type,
+                fragments,
+                variables,
+            )
+
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is None:
+                continue
+            total += _get_selection_cost(
+                schema,
+                fragment.selection_set,
+                schema.get_type(fragment.type_condition.name.value),
+                fragments,
+                variables,
+            )
+    return total
+
+
+def get_operation_cost(
+    schema: GraphQLSchema,
+    operation: OperationDefinitionNode,
+    fragments: list[FragmentDefinitionNode],
+    variables: dict[str, Any] | None = None,
+) -> int:
+    """
+    Compute the static cost of a validated GraphQL operation.
+
+    :param schema: graphql-core schema.
+    :param operation: Operation definition of the document.
+    :param fragments: Fragment definitions of the document.
+    :param variables: Operation variables. Default values of the
+                      operation are used for omitted variables.
+
+    :return: Cost of the operation.
+    """
+    variables = dict(variables or ())
+    for definition in operation.variable_definitions or ():
+        name = definition.variable.name.value
+        if name not in variables and definition.default_value is not None:
+            variables[name] = value_from_ast_untyped(
+                definition.default_value,
+            )
+
+    root_type = schema.get_root_type(operation.operation)
+    return _get_selection_cost(
+        schema,
+        operation.selection_set,
+        root_type,
+        {fragment.name.value: fragment for fragment in fragments},
+        variables,
+    )
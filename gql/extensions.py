@@ -0,0 +1,307 @@
+"""
+extensions.py
+
+This module defines strawberry schema extensions used by the app.
+Extensions hook into the GraphQL operation lifecycle (parsing,
+validation, execution) and are registered on the schema
+in gql/schema.py.
+"""
+
+
+from hashlib import sha256
+from inspect import isawaitable
+from time import perf_counter
+from typing import Any, Awaitable
+
+from graphql import FragmentDefinitionNode, GraphQLError, get_operation_ast
+from strawberry.extensions import SchemaExtension
+
+from data_access.cache import Cache
+from data_access.identity_map import identity_map_scope
+from gql.clients import CLIENT_CONTEXT_KEY
+from gql.cost import get_operation_cost
+from logger import CustomLogger
+from metrics import OPERATION_DURATION, ROOT_FIELD_DURATION
+from settings import (
+    CLIENT_MAX_QUERY_COST,
+    DOCUMENT_CACHE,
+    MAX_QUERY_COST,
+    PERSISTED_QUERY_CACHE,
+)
+
+
+logger = CustomLogger('gql.extensions')
+
+# Key of the tags of the read data in the GraphQL context
+TAGS_CONTEXT_KEY = 'response_cache_tags'
+
+# Process-wide caches of persisted query texts and of parsed
+# documents along with their validation errors, keyed by sha256 hash
+# of the query text.
+persisted_queries = Cache(**PERSISTED_QUERY_CACHE)
+documents = Cache(**DOCUMENT_CACHE)
+
+
+class IdentityMapExtension(SchemaExtension):
+    """
+    Activates a new identity map for every GraphQL operation, so
+    documents are loaded and assembled at most once per request.
+    Tags of the data the operation read are stored in the context,
+    so the response can be cached (see gql/response_cache.py).
+    """
+
+    def on_operation(self):
+        with identity_map_scope() as identity_map:
+            yield
+            context = self.execution_context.context
+            if isinstance(context, dict):
+                context[TAGS_CONTEXT_KEY] = identity_map.get_tags()
+
+
+class QueryCostExtension(SchemaExtension):
+    """
+    Computes the static cost of every operation right after its
+    validation (see gql/cost.py) and rejects operations exceeding
+    the cost limit of the client, before any resolver is executed.
+    The computed cost is reported in the response 'extensions'.
+
+    Attributes:
+        cost: Cost of the current operation, None until computed.
+        max_cost: Cost limit of the client of the current operation.
+    """
+
+    def __init__(self, *, execution_context: Any = None):
+        super().__init__(execution_context=execution_context)
+        self.cost: int | None = None
+        self.max_cost: int = MAX_QUERY_COST
+
+    @staticmethod
+    def get_max_cost(context: Any) -> int:
+        """
+        Get the cost limit of the client sending the request.
+        Only clients authenticated by the context getter (see
+        gql/clients.py) are recognized, request headers are not
+        trusted here.
+
+        :param context: GraphQL context of the request.
+
+        :return: Cost limit of the client, or MAX_QUERY_COST for
+                 anonymous and unknown clients.
+        """
+        try:
+            client = context.get(CLIENT_CONTEXT_KEY)
+        except AttributeError:
+            client = None
+        return CLIENT_MAX_QUERY_COST.get(client, MAX_QUERY_COST)
+
+    def on_validate(self):
+        yield
+
+        execution_context = self.execution_context
+        if execution_context.pre_execution_errors:
+            return
+
+        document = execution_context.graphql_document
+        operation = get_operation_ast(
+            document, execution_context.operation_name,
+        )
+        if operation is None:
+            return
+
+        self.cost = get_operation_cost(
+            execution_context.schema._schema,
+            operation,
+            [definition for definition in document.definitions
+             if isinstance(definition, FragmentDefinitionNode)],
+            execution_context.variables,
+        )
+        self.max_cost = self.get_max_cost(execution_context.context)
+        if self.cost > self.max_cost:
+            logger.log_event(
+                f'Query rejected, cost {self.cost} exceeds {self.max_cost}'
+            )
+            raise GraphQLError(
+                f'Query cost {self.cost} exceeds the maximum allowed '
+                f'cost of {self.max_cost}. Request fewer items (e.g. '
+                'lower "first"/"last") or fewer nested levels.',
+                extensions={'code': 'QUERY_COST_EXCEEDED'},
+            )
+
+    def get_results(self) -> dict[str, Any]:
+        if self.cost is None:
+            return dict()
+        return {
+            'cost': {
+                'requestedQueryCost': self.cost,
+                'maximumAvailable': self.max_cost,
+            },
+        }
+
+
+class PersistedQueryExtension(SchemaExtension):
+    """
+    Implements automatic persisted queries (APQ) and caches parsed
+    and validated documents, so every distinct query is parsed and
+    validated only once.
+
+    A client may send only the sha256 hash of the query in
+    'extensions.persistedQuery.sha256Hash' (also over GET, so the
+    request can be cached by HTTP caches). An unknown hash is answered
+    with a PersistedQueryNotFound error, then the client repeats the
+    request with both the hash and the query text, and the query is
+    registered under the hash.
+
+    Attributes:
+        query_hash: sha256 hash of the query text of the current
+                    operation, None if there is no query.
+    """
+
+    def __init__(self, *, execution_context: Any = None):
+        super().__init__(execution_context=execution_context)
+        self.query_hash: str | None = None
+
+    @staticmethod
+    def get_query_hash(query: str) -> str:
+        """
+        Compute the persisted query hash of a query text.
+
+        :param query: GraphQL query text.
+
+        :return: Hex digest of sha256 hash of the query.
+        """
+        return sha256(query.encode('utf-8')).hexdigest()
+
+    def on_operation(self):
+        execution_context = self.execution_context
+        extensions = execution_context.operation_extensions or dict()
+        persisted_query = extensions.get('persistedQuery')
+
+        if isinstance(persisted_query, dict):
+            execution_context.query = resolve_persisted_query(
+                execution_context.query, persisted_query,
+            )
+            self.query_hash = persisted_query['sha256Hash']
+
+        elif execution_context.query is not None:
+            self.query_hash = self.get_query_hash(execution_context.query)
+
+        yield
+
+    def on_parse(self):
+        execution_context = self.execution_context
+        cached = None
+        if self.query_hash is not None:
+            hit, cached = documents.get(self.query_hash)
+
+        if cached is not None:
+            execution_context.graphql_document = cached[0]
+        yield
+
+        if cached is None and self.query_hash is not None and \
+                execution_context.graphql_document is not None:
+            documents.set(
+                self.query_hash, (execution_context.graphql_document, None),
+            )
+
+    def on_validate(self):
+        execution_context = self.execution_context
+        document, errors = None, None
+        if self.query_hash is not None:
+            hit, cached = documents.get(self.query_hash)
+            if hit and cached is not None:
+                document, errors = cached
+
+        if errors is not None:
+            execution_context.pre_execution_errors = list(errors)
+        yield
+
+        if errors is None and document is not None and \
+                execution_context.pre_execution_errors is not None:
+            documents.set(
+                self.query_hash,
+                (document, list(execution_context.pre_execution_errors)),
+            )
+
+
+def resolve_persisted_query(
+    query: str | None, persisted_query: dict[str, Any]
+) -> str:
+    """
+    Resolve the query text of an automatic persisted query. A query
+    sent along with its hash is verified and registered under the
+    hash, otherwise the registered query is looked up. Called before
+    the response cache lookup as well, so cached queries are
+    registered and verified too.
+
+    :param query: Query text of the request, None if only the hash
+                  was sent.
+    :param persisted_query: 'persistedQuery' request extension.
+
+    :return: Query text.
+
+    :raise GraphQLError: Raised if the hash is missing, it doesn't
+                         match the query, or no query is registered
+                         under it.
+    """
+    query_hash = persisted_query.get('sha256Hash')
+    if not isinstance(query_hash, str):
+        raise GraphQLError(
+            'Persisted query hash is missing.',
+            extensions={'code': 'PERSISTED_QUERY_INVALID'},
+        )
+
+    if query is None:
+        hit, query = persisted_queries.get(query_hash)
+        if not hit:
+            raise GraphQLError(
+                'PersistedQueryNotFound',
+                extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'},
+            )
+    elif PersistedQueryExtension.get_query_hash(query) != query_hash:
+        raise GraphQLError(
+            'Provided sha256 hash does not match the query.',
+            extensions={'code': 'PERSISTED_QUERY_INVALID'},
+        )
+    else:
+        persisted_queries.set(query_hash, query)
+    return query
+
+
+class MetricsExtension(SchemaExtension):
+    """
+    Records latency histograms of every operation and of resolvers
+    of its root fields (see metrics.py). Nested fields are passed
+    through untouched.
+    """
+
+    def on_operation(self):
+        started = perf_counter()
+        yield
+        try:
+            operation_type = self.execution_context.operation_type.value
+        except RuntimeError:
+            operation_type = 'unknown'
+        OPERATION_DURATION.labels(operation_type).time_since(started)
+
+    @staticmethod
+    async def _observe_async(result: Awaitable, started: float, field: str):
+        try:
+            return await result
+        finally:
+            ROOT_FIELD_DURATION.labels(field).time_since(started)
+
+    def resolve(self, _next, root, info, *args, **kwargs) -> Any:
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+
+        started = perf_counter()
+        try:
+            result = _next(root, info, *args, **kwargs)
+        except Exception:
+            ROOT_FIELD_DURATION.labels(info.field_name).time_since(started)
+            raise
+
+        if isawaitable(result):
+            return self._observe_async(result, started, info.field_name)
+        ROOT_FIELD_DURATION.labels(info.field_name).time_since(started)
+        return result
@@ -5,6 +5,13 @@ This module provides the necessary GraphQL queries related to
 the Character domain. The actual data processing is delegated to the
 'character_handler' which is expected to be provided in
 the GraphQL context. 
+
+AsyncCharacterQuery exposes the same fields with coroutine resolvers,
+it expects an async handler in the context.
+
+CharacterMutation provides batch mutations, items of a batch are
+written with a single bulk write and reported one by one.
+AsyncCharacterMutation is its counterpart for the async handler.
 """
 
 
@@ -13,18 +20,48 @@ from typing import Optional
 import strawberry
 from strawberry.types.info import Info
 
-from gql.types.character_types import CharacterType
+from gql.cost import PAGE_COST_METADATA, cost_metadata
+from gql.types.character_types import (
+    CharacterConnection,
+    CharacterFilter,
+    CharacterInput,
+    CharacterOrder,
+    CharacterStats,
+    CharacterSuggestion,
+    CharacterType,
+    CharacterUpdateInput,
+    EnemyNeighbor,
+    SimilarCharacter,
+)
+from gql.types.common_types import BatchResult
+from gql.types.power_types import PowerStats
 from logger import CustomLogger
+from settings import (
+    AUTOCOMPLETE_DEFAULT_LIMIT,
+    ENEMIES_COST_MULTIPLIER,
+    ENEMY_NEIGHBORHOOD_MAX_HOPS,
+    POWER_HOLDERS_COST_MULTIPLIER,
+    POWER_STATS_DEFAULT_LIMIT,
+    SHARED_POWERS_DEFAULT_LIMIT,
+)
 from utils import utils
 
 
 logger = CustomLogger('service.character_resolvers')
 
+# Every hop multiplies the expected number of reached characters
+ENEMY_NEIGHBORHOOD_COST_METADATA = cost_metadata(
+    1,
+    ENEMIES_COST_MULTIPLIER,
+    exponent_argument='hops',
+    max_exponent=ENEMY_NEIGHBORHOOD_MAX_HOPS,
+)
+
 
 @strawberry.type
 class CharacterQuery:
 
-    @strawberry.field
+    @strawberry.field(metadata=cost_metadata(1))
     def character(
         self, info: Info, id: strawberry.ID
     ) -> Optional[CharacterType]:
@@ -50,18 +87,41 @@ class CharacterQuery:
             logger.log_error('Failed to access handler or it was not provided')
             return None
 
-        character = handler.get_one_by_id(id, selected_fields)
+        character = handler.get_one_by_id(
+            id,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
         return character
 
-    @strawberry.field
-    def allCharacters(self, info:Info) -> list[CharacterType]:
+    @strawberry.field(metadata=PAGE_COST_METADATA)
+    def allCharacters(
+        self,
+        info: Info,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        filter: Optional[CharacterFilter] = None,
+        order_by: Optional[CharacterOrder] = None,
+    ) -> Optional[CharacterConnection]:
         """
-        Fetches all Character entities while analysing query.
+        Fetches a page of Character entities while analysing query.
+        Relay-style cursor pagination is used, a single page is
+        limited by MAX_PAGE_SIZE. Characters are filtered and ordered
+        by the database.
 
         :param info: GraphQL context. 
+        :param first: Number of characters after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of characters before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param filter: Conditions the characters have to match.
+        :param order_by: Ordering of the characters, ascending ID
+                         if not provided.
 
-        :return: List of CharacterTypes. List will be empty if
-                 there are no character documents or failed to
+        :return: CharacterConnection or None if failed to
                  access handler.
         """
         try:
@@ -72,8 +132,743 @@ class CharacterQuery:
         try:
             handler = info.context['character_handler']
         except (AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        all_characters = handler.get_page(
+            selected_fields,
+            first,
+            after,
+            last,
+            before,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+            filter,
+            order_by,
+        )
+        return all_characters
+
+
+    @strawberry.field(
+        metadata=cost_metadata(1, POWER_HOLDERS_COST_MULTIPLIER)
+    )
+    def charactersWithPower(
+        self, info: Info, powerId: strawberry.ID
+    ) -> list[CharacterType]:
+        """
+        Fetches all Character entities with a power while analysing
+        query. Characters are looked up by the index of their powers.
+
+        :param info: GraphQL context.
+        :param powerId: ObjectID of a power document in MongoDB.
+
+        :return: List of CharacterTypes, empty if failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        characters = handler.get_many_by_power(
+            powerId,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(
+        metadata=cost_metadata(1, SHARED_POWERS_DEFAULT_LIMIT, ('limit',))
+    )
+    def charactersSharingPowers(
+        self,
+        info: Info,
+        id: strawberry.ID,
+        minShared: int = 1,
+        limit: int = SHARED_POWERS_DEFAULT_LIMIT,
+    ) -> list[SimilarCharacter]:
+        """
+        Fetches characters sharing at least 'minShared' powers with
+        a character, found by an in-process index of characters by
+        their powers.
+
+        :param info: GraphQL context.
+        :param id: ObjectID of a character document in MongoDB.
+        :param minShared: Minimum number of shared powers.
+        :param limit: Maximum number of characters.
+
+        :return: List of SimilarCharacters, the most shared powers
+                 first. Empty if failed to access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        characters = handler.get_many_sharing_powers(
+            id,
+            minShared,
+            limit,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(
+        metadata=cost_metadata(1, POWER_HOLDERS_COST_MULTIPLIER)
+    )
+    def charactersWithAllPowers(
+        self, info: Info, powerIds: list[strawberry.ID]
+    ) -> list[CharacterType]:
+        """
+        Fetches characters having all of the powers, found by
+        intersecting an in-process index of characters by their
+        powers.
+
+        :param info: GraphQL context.
+        :param powerIds: ObjectIDs of power documents in MongoDB.
+
+        :return: List of CharacterTypes, empty if failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
             logger.log_error('Failed to access handler or it was not provided')
             return []
 
-        all_characters = handler.get_all(selected_fields)
+        characters = handler.get_many_with_all_powers(
+            powerIds,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(metadata=cost_metadata(1, ENEMIES_COST_MULTIPLIER))
+    def enemyPath(
+        self, info: Info, fromId: strawberry.ID, toId: strawberry.ID
+    ) -> Optional[list[CharacterType]]:
+        """
+        Fetches a shortest chain of enemies leading from one character
+        to another, found by an in-process graph index of enemies.
+
+        :param info: GraphQL context.
+        :param fromId: ObjectID of the first character.
+        :param toId: ObjectID of the last character.
+
+        :return: List of CharacterTypes along the chain, both ends
+                 included, or None if there is no chain or failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        characters = handler.get_enemy_path(
+            fromId,
+            toId,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(metadata=ENEMY_NEIGHBORHOOD_COST_METADATA)
+    def enemyNeighborhood(
+        self, info: Info, id: strawberry.ID, hops: int = 1
+    ) -> list[EnemyNeighbor]:
+        """
+        Fetches characters reachable from a character through at most
+        'hops' enemy references, found by an in-process graph index
+        of enemies.
+
+        :param info: GraphQL context.
+        :param id: ObjectID of a character document in MongoDB.
+        :param hops: Maximum number of enemy references.
+
+        :return: List of EnemyNeighbors, the nearest first. Empty if
+                 failed to access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        neighbors = handler.get_enemy_neighborhood(
+            id,
+            hops,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return neighbors
+
+    @strawberry.field(metadata=cost_metadata(1))
+    def autocompleteCharacters(
+        self,
+        info: Info,
+        prefix: str,
+        limit: int = AUTOCOMPLETE_DEFAULT_LIMIT,
+    ) -> list[CharacterSuggestion]:
+        """
+        Suggests characters by a prefix of their alias or name, e.g.
+        for a search box. Suggestions are served from an in-process
+        index, without a database query per keystroke.
+
+        :param info: GraphQL context.
+        :param prefix: Prefix of an alias, a name or a word of them.
+        :param limit: Maximum number of suggestions.
+
+        :return: List of CharacterSuggestions, empty if failed to
+                 access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        suggestions = handler.autocomplete(prefix, limit)
+        return suggestions
+
+    @strawberry.field(metadata=cost_metadata(1))
+    def characterStats(self, info: Info) -> Optional[CharacterStats]:
+        """
+        Fetches statistics of all characters, computed by the
+        database: the number of characters per role and the average
+        and maximum numbers of their powers and enemies.
+
+        :param info: GraphQL context.
+
+        :return: CharacterStats or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        stats = handler.get_stats()
+        return stats
+
+    @strawberry.field(metadata=cost_metadata(1))
+    def powerStats(
+        self, info: Info, limit: int = POWER_STATS_DEFAULT_LIMIT
+    ) -> list[PowerStats]:
+        """
+        Fetches the most common powers with the number of characters
+        having them, counted by the database.
+
+        :param info: GraphQL context.
+        :param limit: Maximum number of powers.
+
+        :return: List of PowerStats, empty if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        stats = handler.get_power_stats(limit)
+        return stats
+
+@strawberry.type
+class AsyncCharacterQuery:
+
+    @strawberry.field(metadata=cost_metadata(1))
+    async def character(
+        self, info: Info, id: strawberry.ID
+    ) -> Optional[CharacterType]:
+        """
+        Fetches a single Character entity based on provided ID and
+        analysis query.
+
+        :param info: GraphQL context. 
+        :param id: ObjectID of a character document in MongoDB.
+
+        :return: CharacterType or None if there is no document
+                 with provided ID.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        character = await handler.get_one_by_id(
+            id,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return character
+
+    @strawberry.field(metadata=PAGE_COST_METADATA)
+    async def allCharacters(
+        self,
+        info: Info,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+        filter: Optional[CharacterFilter] = None,
+        order_by: Optional[CharacterOrder] = None,
+    ) -> Optional[CharacterConnection]:
+        """
+        Fetches a page of Character entities while analysing query.
+        Relay-style cursor pagination is used, a single page is
+        limited by MAX_PAGE_SIZE. Characters are filtered and ordered
+        by the database.
+
+        :param info: GraphQL context. 
+        :param first: Number of characters after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of characters before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param filter: Conditions the characters have to match.
+        :param order_by: Ordering of the characters, ascending ID
+                         if not provided.
+
+        :return: CharacterConnection or None if failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        all_characters = await handler.get_page(
+            selected_fields,
+            first,
+            after,
+            last,
+            before,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+            filter,
+            order_by,
+        )
         return all_characters
+
+
+    @strawberry.field(
+        metadata=cost_metadata(1, POWER_HOLDERS_COST_MULTIPLIER)
+    )
+    async def charactersWithPower(
+        self, info: Info, powerId: strawberry.ID
+    ) -> list[CharacterType]:
+        """
+        Fetches all Character entities with a power while analysing
+        query. Characters are looked up by the index of their powers.
+
+        :param info: GraphQL context.
+        :param powerId: ObjectID of a power document in MongoDB.
+
+        :return: List of CharacterTypes, empty if failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        characters = await handler.get_many_by_power(
+            powerId,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(
+        metadata=cost_metadata(1, SHARED_POWERS_DEFAULT_LIMIT, ('limit',))
+    )
+    async def charactersSharingPowers(
+        self,
+        info: Info,
+        id: strawberry.ID,
+        minShared: int = 1,
+        limit: int = SHARED_POWERS_DEFAULT_LIMIT,
+    ) -> list[SimilarCharacter]:
+        """
+        Fetches characters sharing at least 'minShared' powers with
+        a character, found by an in-process index of characters by
+        their powers.
+
+        :param info: GraphQL context.
+        :param id: ObjectID of a character document in MongoDB.
+        :param minShared: Minimum number of shared powers.
+        :param limit: Maximum number of characters.
+
+        :return: List of SimilarCharacters, the most shared powers
+                 first. Empty if failed to access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        characters = await handler.get_many_sharing_powers(
+            id,
+            minShared,
+            limit,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(
+        metadata=cost_metadata(1, POWER_HOLDERS_COST_MULTIPLIER)
+    )
+    async def charactersWithAllPowers(
+        self, info: Info, powerIds: list[strawberry.ID]
+    ) -> list[CharacterType]:
+        """
+        Fetches characters having all of the powers, found by
+        intersecting an in-process index of characters by their
+        powers.
+
+        :param info: GraphQL context.
+        :param powerIds: ObjectIDs of power documents in MongoDB.
+
+        :return: List of CharacterTypes, empty if failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        characters = await handler.get_many_with_all_powers(
+            powerIds,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(metadata=cost_metadata(1, ENEMIES_COST_MULTIPLIER))
+    async def enemyPath(
+        self, info: Info, fromId: strawberry.ID, toId: strawberry.ID
+    ) -> Optional[list[CharacterType]]:
+        """
+        Fetches a shortest chain of enemies leading from one character
+        to another, found by an in-process graph index of enemies.
+
+        :param info: GraphQL context.
+        :param fromId: ObjectID of the first character.
+        :param toId: ObjectID of the last character.
+
+        :return: List of CharacterTypes along the chain, both ends
+                 included, or None if there is no chain or failed to
+                 access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        characters = await handler.get_enemy_path(
+            fromId,
+            toId,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return characters
+
+    @strawberry.field(metadata=ENEMY_NEIGHBORHOOD_COST_METADATA)
+    async def enemyNeighborhood(
+        self, info: Info, id: strawberry.ID, hops: int = 1
+    ) -> list[EnemyNeighbor]:
+        """
+        Fetches characters reachable from a character through at most
+        'hops' enemy references, found by an in-process graph index
+        of enemies.
+
+        :param info: GraphQL context.
+        :param id: ObjectID of a character document in MongoDB.
+        :param hops: Maximum number of enemy references.
+
+        :return: List of EnemyNeighbors, the nearest first. Empty if
+                 failed to access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields = []
+
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        neighbors = await handler.get_enemy_neighborhood(
+            id,
+            hops,
+            selected_fields,
+            info.context.get('character_loader'),
+            info.context.get('power_loader'),
+        )
+        return neighbors
+
+    @strawberry.field(metadata=cost_metadata(1))
+    async def autocompleteCharacters(
+        self,
+        info: Info,
+        prefix: str,
+        limit: int = AUTOCOMPLETE_DEFAULT_LIMIT,
+    ) -> list[CharacterSuggestion]:
+        """
+        Suggests characters by a prefix of their alias or name, e.g.
+        for a search box. Suggestions are served from an in-process
+        index, without a database query per keystroke.
+
+        :param info: GraphQL context.
+        :param prefix: Prefix of an alias, a name or a word of them.
+        :param limit: Maximum number of suggestions.
+
+        :return: List of CharacterSuggestions, empty if failed to
+                 access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        suggestions = await handler.autocomplete(prefix, limit)
+        return suggestions
+
+    @strawberry.field(metadata=cost_metadata(1))
+    async def characterStats(self, info: Info) -> Optional[CharacterStats]:
+        """
+        Fetches statistics of all characters, computed by the
+        database: the number of characters per role and the average
+        and maximum numbers of their powers and enemies.
+
+        :param info: GraphQL context.
+
+        :return: CharacterStats or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        stats = await handler.get_stats()
+        return stats
+
+    @strawberry.field(metadata=cost_metadata(1))
+    async def powerStats(
+        self, info: Info, limit: int = POWER_STATS_DEFAULT_LIMIT
+    ) -> list[PowerStats]:
+        """
+        Fetches the most common powers with the number of characters
+        having them, counted by the database.
+
+        :param info: GraphQL context.
+        :param limit: Maximum number of powers.
+
+        :return: List of PowerStats, empty if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return []
+
+        stats = await handler.get_power_stats(limit)
+        return stats
+
+@strawberry.type
+class CharacterMutation:
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('characters',))
+    )
+    def createCharacters(
+        self, info: Info, characters: list[CharacterInput]
+    ) -> Optional[BatchResult]:
+        """
+        Creates a batch of Character entities. References to powers
+        and enemies are validated for the whole batch at once,
+        invalid characters are reported and not created.
+
+        :param info: GraphQL context.
+        :param characters: New characters, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = handler.create_many(characters)
+        return result
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('characters',))
+    )
+    def updateCharacters(
+        self, info: Info, characters: list[CharacterUpdateInput]
+    ) -> Optional[BatchResult]:
+        """
+        Updates a batch of Character entities, only provided fields
+        are changed. References to powers and enemies are validated
+        for the whole batch at once.
+
+        :param info: GraphQL context.
+        :param characters: Changes of characters identified by their
+                           IDs, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = handler.update_many(characters)
+        return result
+
+
+@strawberry.type
+class AsyncCharacterMutation:
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('characters',))
+    )
+    async def createCharacters(
+        self, info: Info, characters: list[CharacterInput]
+    ) -> Optional[BatchResult]:
+        """
+        Creates a batch of Character entities. References to powers
+        and enemies are validated for the whole batch at once,
+        invalid characters are reported and not created.
+
+        :param info: GraphQL context.
+        :param characters: New characters, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = await handler.create_many(characters)
+        return result
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('characters',))
+    )
+    async def updateCharacters(
+        self, info: Info, characters: list[CharacterUpdateInput]
+    ) -> Optional[BatchResult]:
+        """
+        Updates a batch of Character entities, only provided fields
+        are changed. References to powers and enemies are validated
+        for the whole batch at once.
+
+        :param info: GraphQL context.
+        :param characters: Changes of characters identified by their
+                           IDs, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['character_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = await handler.update_many(characters)
+        return result
@@ -5,6 +5,13 @@ This module provides the necessary GraphQL queries related to
 the Power domain. The actual data processing is delegated to the
 'power_handler' which is expected to be provided in
 the GraphQL context. 
+
+AsyncPowerQuery exposes the same fields with coroutine resolvers,
+it expects an async handler in the context.
+
+PowerMutation provides batch mutations, items of a batch are
+written with a single bulk write and reported one by one.
+AsyncPowerMutation is its counterpart for the async handler.
 """
 
 
@@ -13,8 +20,11 @@ from typing import Optional
 import strawberry
 from strawberry.types.info import Info
 
-from gql.types.power_types import PowerType
+from gql.cost import PAGE_COST_METADATA, cost_metadata
+from gql.types.common_types import BatchResult
+from gql.types.power_types import PowerConnection, PowerInput, PowerType
 from logger import CustomLogger
+from utils import utils
 
 
 logger = CustomLogger('service.power_resolvers')
@@ -23,10 +33,97 @@ logger = CustomLogger('service.power_resolvers')
 @strawberry.type
 class PowerQuery:
 
-    @strawberry.field
+    @strawberry.field(metadata=cost_metadata(1))
     def power(self, info: Info, id: strawberry.ID) -> Optional[PowerType]:
         """
         Fetches a single Power entity based on provided ID.
+        Only the selected fields are loaded from the database.
+
+        :param info: GraphQL context. 
+        :param id: ObjectID of a power document in MongoDB.
+
+        :return: PowerType or None if there is no document
+                 with provided ID.
+        """
+        try:
+            only = utils.get_projection(
+                utils.get_primary_selected_fields(info)
+            )
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            only = None
+
+        try:
+            handler = info.context['power_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        power = handler.get_one_by_id(id, only)
+        return power
+
+    @strawberry.field(metadata=PAGE_COST_METADATA)
+    def allPowers(
+        self,
+        info: Info,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+    ) -> Optional[PowerConnection]:
+        """
+        Fetches a page of Power entities.
+        Relay-style cursor pagination is used, a single page is
+        limited by MAX_PAGE_SIZE. Only the selected fields are
+        loaded from the database.
+
+        :param info: GraphQL context. 
+        :param first: Number of powers after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of powers before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+
+        :return: PowerConnection or None if failed to access handler.
+        """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+            node_fields = utils.get_connection_node_fields(selected_fields)
+            only = utils.get_projection(node_fields) if node_fields else ['id']
+            initial_count = utils.get_stream_initial_count(
+                selected_fields, 'edges',
+            )
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields, only, initial_count = [], None, None
+
+        try:
+            handler = info.context['power_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        all_powers = handler.get_page(
+            first,
+            after,
+            last,
+            before,
+            only,
+            utils.is_field_selected(selected_fields, 'totalCount'),
+            initial_count is not None,
+        )
+        return all_powers
+
+
+@strawberry.type
+class AsyncPowerQuery:
+
+    @strawberry.field(metadata=cost_metadata(1))
+    async def power(
+        self, info: Info, id: strawberry.ID
+    ) -> Optional[PowerType]:
+        """
+        Fetches a single Power entity based on provided ID.
+        Only the selected fields are loaded from the database.
 
         :param info: GraphQL context. 
         :param id: ObjectID of a power document in MongoDB.
@@ -34,31 +131,128 @@ class PowerQuery:
         :return: PowerType or None if there is no document
                  with provided ID.
         """
+        try:
+            only = utils.get_projection(
+                utils.get_primary_selected_fields(info)
+            )
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            only = None
+
         try:
             handler = info.context['power_handler']
         except (KeyError, AttributeError, TypeError):
             logger.log_error('Failed to access handler or it was not provided')
             return None
 
-        power = handler.get_one_by_id(id)
+        power = await handler.get_one_by_id(id, only)
         return power
 
-    @strawberry.field
-    def allPowers(self, info: Info) -> list[PowerType]:
+    @strawberry.field(metadata=PAGE_COST_METADATA)
+    async def allPowers(
+        self,
+        info: Info,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        last: Optional[int] = None,
+        before: Optional[str] = None,
+    ) -> Optional[PowerConnection]:
         """
-        Fetches all Power entities.
+        Fetches a page of Power entities.
+        Relay-style cursor pagination is used, a single page is
+        limited by MAX_PAGE_SIZE. Only the selected fields are
+        loaded from the database.
 
         :param info: GraphQL context. 
+        :param first: Number of powers after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of powers before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
 
-        :return: List of PowerTypes. List will be empty if
-                 there are no power documents or failed to
-                 access handler.
+        :return: PowerConnection or None if failed to access handler.
         """
+        try:
+            selected_fields = utils.get_primary_selected_fields(info)
+            node_fields = utils.get_connection_node_fields(selected_fields)
+            only = utils.get_projection(node_fields) if node_fields else ['id']
+            initial_count = utils.get_stream_initial_count(
+                selected_fields, 'edges',
+            )
+        except (IndexError, AttributeError, TypeError):
+            logger.log_error('Failed to extract selected fields')
+            selected_fields, only, initial_count = [], None, None
+
         try:
             handler = info.context['power_handler']
         except (KeyError, AttributeError, TypeError):
             logger.log_error('Failed to access handler or it was not provided')
-            return []
+            return None
 
-        all_powers = handler.get_all()
+        all_powers = await handler.get_page(
+            first,
+            after,
+            last,
+            before,
+            only,
+            utils.is_field_selected(selected_fields, 'totalCount'),
+            initial_count is not None,
+        )
         return all_powers
+
+
+@strawberry.type
+class PowerMutation:
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('powers',))
+    )
+    def upsertPowers(
+        self, info: Info, powers: list[PowerInput]
+    ) -> Optional[BatchResult]:
+        """
+        Creates or updates a batch of Power entities identified by
+        their unique names. Omitted descriptions of existing powers
+        are kept.
+
+        :param info: GraphQL context.
+        :param powers: Powers, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['power_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = handler.upsert_many(powers)
+        return result
+
+
+@strawberry.type
+class AsyncPowerMutation:
+
+    @strawberry.mutation(
+        metadata=cost_metadata(1, multiplier_arguments=('powers',))
+    )
+    async def upsertPowers(
+        self, info: Info, powers: list[PowerInput]
+    ) -> Optional[BatchResult]:
+        """
+        Creates or updates a batch of Power entities identified by
+        their unique names. Omitted descriptions of existing powers
+        are kept.
+
+        :param info: GraphQL context.
+        :param powers: Powers, limited by MAX_BATCH_SIZE.
+
+        :return: BatchResult or None if failed to access handler.
+        """
+        try:
+            handler = info.context['power_handler']
+        except (KeyError, AttributeError, TypeError):
+            logger.log_error('Failed to access handler or it was not provided')
+            return None
+
+        result = await handler.upsert_many(powers)
+        return result
@@ -0,0 +1,150 @@
+"""
+response_cache.py
+
+This module provides the process-wide cache of serialized GraphQL
+responses used by the GraphQL router (see gql/router.py).
+
+Responses are keyed by the normalized query text, variables, operation
+name and client ID. Only query operations, whose every root field has
+a configured time to live in `settings.RESPONSE_CACHE_TTL`, are cached.
+The entry expires after the shortest TTL of its root fields.
+
+Every cached response keeps the tags of the data it was built from
+(see IdentityMap.get_tags). A write of a document drops all responses
+tagged with the document or with its whole model.
+"""
+
+
+import json
+from hashlib import sha256
+from typing import Any, Hashable
+
+from graphql import (
+    FieldNode, GraphQLError, OperationType, get_operation_ast, parse
+)
+from graphql.utilities import strip_ignored_characters
+
+from data_access import events
+from data_access.cache import Cache
+from gql.extensions import PersistedQueryExtension, documents
+from settings import RESPONSE_CACHE, RESPONSE_CACHE_TTL
+
+response_cache = Cache(**RESPONSE_CACHE)
+
+
+class CachedResponse:
+    """
+    A serialized GraphQL response stored in the response cache.
+
+    Attributes:
+        body: Serialized response.
+        etag: Strong entity tag of the body.
+        tags: Tags of the data the response was built from.
+    """
+
+    def __init__(self, body: bytes, tags: frozenset[tuple[str, Hashable]]):
+        self.body = body
+        self.etag = get_etag(body)
+        self.tags = tags
+
+
+def get_etag(body: bytes) -> str:
+    """
+    Compute a strong entity tag of a response body.
+
+    :param body: Serialized response.
+
+    :return: Quoted ETag header value.
+    """
+    return f'"{sha256(body).hexdigest()}"'
+
+
+def is_not_modified(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check whether the client already has the current response.
+
+    :param if_none_match: Value of the If-None-Match request header.
+    :param etag: ETag of the current response.
+
+    :return: True if the ETag matches one of the requested ones.
+    """
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (
+        tag[2:] if tag.startswith('W/') else tag for tag in tags
+    )
+
+
+def get_ttl(query: str, operation_name: str | None) -> float | None:
+    """
+    Get the time to live of the response to a query.
+
+    :param query: GraphQL query text.
+    :param operation_name: Name of the operation to execute.
+
+    :return: The shortest TTL of the root fields, or None if the
+             response should not be cached (e.g. a mutation, an
+             invalid query or a root field without configured TTL).
+    """
+    hit, cached = documents.get(PersistedQueryExtension.get_query_hash(query))
+    if hit and cached is not None:
+        document = cached[0]
+    else:
+        try:
+            document = parse(query)
+        except GraphQLError:
+            return None
+
+    operation = get_operation_ast(document, operation_name)
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+
+    ttls = []
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or \
+                selection.name.value not in RESPONSE_CACHE_TTL:
+            return None
+        ttls.append(RESPONSE_CACHE_TTL[selection.name.value])
+    return min(ttls, default=None)
+
+
+def get_cache_key(
+    query: str,
+    variables: dict[str, Any] | None,
+    operation_name: str | None,
+    client: str | None,
+) -> str:
+    """
+    Build the response cache key of a request.
+
+    :param query: GraphQL query text.
+    :param variables: Operation variables.
+    :param operation_name: Name of the operation to execute.
+    :param client: ID of the client, responses may differ per client
+                   (e.g. reported cost limits).
+
+    :return: Cache key.
+    """
+    key = json.dumps(
+        [strip_ignored_characters(query), variables, operation_name, client],
+        sort_keys=True,
+        default=str,
+    )
+    return sha256(key.encode('utf-8')).hexdigest()
+
+
+def invalidate_responses(model_name: str, ids: list[Any]):
+    """
+    Drop all cached responses built from written documents or from
+    their whole model. Subscribed to write events.
+
+    :param model_name: Name of the written model.
+    :param ids: IDs of written documents.
+    """
+    tags = {(model_name, None)} | {(model_name, id) for id in ids}
+    response_cache.invalidate_if(lambda entry: not tags.isdisjoint(entry.tags))
+
+
+events.subscribe(invalidate_responses)
@@ -0,0 +1,187 @@
+"""
+router.py
+
+This module provides the GQLRouter class, the GraphQLRouter of the app.
+
+Queries may be sent as automatic persisted queries (a sha256 hash
+instead of the query text), also over GET, so they can be cached
+by HTTP caches. Hash-only GET requests are executed instead of
+rendering the GraphQL IDE. Persisted queries are resolved, verified
+and registered before the response cache lookup, so a cache hit
+doesn't skip their registration.
+
+With `settings.RESPONSE_CACHE_ENABLED` serialized responses of
+cacheable queries are served from the response cache (see
+response_cache.py) without executing the operation. Cached responses
+carry a strong ETag, so clients can revalidate them with
+If-None-Match and get an empty 304 Not Modified response.
+"""
+
+
+import json
+from typing import Any
+
+from fastapi import Request, Response, status
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.types.unset import UNSET
+
+from gql.clients import get_client_id
+from gql.extensions import TAGS_CONTEXT_KEY, resolve_persisted_query
+from gql.response_cache import (
+    CachedResponse,
+    get_cache_key,
+    get_ttl,
+    is_not_modified,
+    response_cache,
+)
+from settings import RESPONSE_CACHE_ENABLED
+
+
+class GQLRouter(GraphQLRouter):
+    """
+    GraphQLRouter executing hash-only GET requests instead of rendering
+    the IDE, and serving cacheable queries from the response cache.
+    """
+
+    def should_render_graphql_ide(self, request) -> bool:
+        if request.query_params.get('extensions') is not None:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    @staticmethod
+    async def get_request_data(request: Request) -> dict[str, Any] | None:
+        """
+        Read GraphQL request parameters without executing them.
+
+        :param request: HTTP request.
+
+        :return: A dict of request parameters or None if they can't be
+                 read (e.g. batch or multipart requests).
+        """
+        try:
+            if request.method == 'GET':
+                data = dict(request.query_params)
+                for name in ('variables', 'extensions'):
+                    if data.get(name):
+                        data[name] = json.loads(data[name])
+                return data
+            if request.method == 'POST' and request.headers.get(
+                'content-type', ''
+            ).startswith('application/json'):
+                data = await request.json()
+                return data if isinstance(data, dict) else None
+        except ValueError:
+            pass
+        return None
+
+    @classmethod
+    async def get_cache_entry_key(
+        cls, request: Request
+    ) -> tuple[str | None, float | None]:
+        """
+        Build the response cache key and time to live of a request.
+
+        :param request: HTTP request.
+
+        :return: A tuple of the cache key and TTL of the response,
+                 (None, None) if the response should not be cached.
+        """
+        data = await cls.get_request_data(request)
+        if data is None:
+            return None, None
+
+        query = data.get('query') or None
+        extensions = data.get('extensions')
+        persisted_query = extensions.get('persistedQuery') \
+            if isinstance(extensions, dict) else None
+        if isinstance(persisted_query, dict):
+            # Invalid persisted queries are executed to report errors
+            try:
+                query = resolve_persisted_query(query, persisted_query)
+            except GraphQLError:
+                return None, None
+        if not isinstance(query, str):
+            return None, None
+
+        operation_name = data.get('operationName')
+        ttl = get_ttl(query, operation_name)
+        if ttl is None:
+            return None, None
+
+        key = get_cache_key(
+            query,
+            data.get('variables'),
+            operation_name,
+            get_client_id(request),
+        )
+        return key, ttl
+
+    @staticmethod
+    def is_cacheable(response: Response) -> bool:
+        """
+        Check whether an executed response can be cached.
+        Responses with errors are never cached.
+
+        :param response: Response of the executed operation.
+
+        :return: True if the response can be cached.
+        """
+        if response.status_code != status.HTTP_200_OK or \
+                response.media_type != 'application/json':
+            return False
+        try:
+            return 'errors' not in json.loads(response.body)
+        except ValueError:
+            return False
+
+    @staticmethod
+    def create_cached_response(
+        request: Request, entry: CachedResponse, hit: bool
+    ) -> Response:
+        """
+        Build the response from a cache entry.
+
+        :param request: HTTP request.
+        :param entry: Cached response.
+        :param hit: Whether the entry was found in the cache.
+
+        :return: 304 response if the client has the current version,
+                 otherwise the cached body.
+        """
+        headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+        if is_not_modified(request.headers.get('if-none-match'), entry.etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers,
+            )
+
+        headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return Response(
+            entry.body, media_type='application/json', headers=headers,
+        )
+
+    async def run(
+        self,
+        request: Any,
+        context: Any = UNSET,
+        root_value: Any = UNSET,
+    ) -> Any:
+        if not RESPONSE_CACHE_ENABLED or self.is_websocket_request(request):
+            return await super().run(request, context, root_value)
+
+        key, ttl = await self.get_cache_entry_key(request)
+        if key is None:
+            return await super().run(request, context, root_value)
+
+        hit, entry = response_cache.get(key)
+        if not hit:
+            response = await super().run(request, context, root_value)
+            tags = context.get(TAGS_CONTEXT_KEY) \
+                if isinstance(context, dict) else None
+            # Responses without tags can't be invalidated on writes
+            if tags is None or not self.is_cacheable(response):
+                return response
+
+            entry = CachedResponse(response.body, tags)
+            response_cache.set(key, entry, ttl)
+        return self.create_cached_response(request, entry, hit)
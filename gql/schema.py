@@ -5,7 +5,18 @@ This module sets up the GraphQL router for the application.
 It merges different GraphQL query resolvers and provides a
 unified schema for the app.
 The router is configured with context getters to fetch the necessary
-services for resolving GraphQL queries.
+services for resolving GraphQL queries. The context getter is called
+for every request, so it is also the place where request-scoped
+DataLoaders are created.
+
+Mutations are batch mutations (e.g. createCharacters), their
+responses are never cached.
+
+Incremental delivery (@defer and @stream directives) is enabled,
+operations using them are answered with multipart/mixed responses.
+
+The router itself (persisted queries over GET and the response
+cache) is defined in gql/router.py.
 
 Classes:
     - TestQuery: A simple GraphQL query for demonstration purposes.
@@ -15,12 +26,29 @@ Classes:
 
 
 import strawberry
-from strawberry.fastapi import GraphQLRouter
+from fastapi import Request
+from strawberry.schema.config import StrawberryConfig
 from strawberry.tools import merge_types
 
 import service
-from gql.resolvers.character_resolvers import CharacterQuery
-from gql.resolvers.power_resolvers import PowerQuery
+from gql.clients import CLIENT_CONTEXT_KEY, get_client_id
+from gql.extensions import (
+    IdentityMapExtension,
+    MetricsExtension,
+    PersistedQueryExtension,
+    QueryCostExtension,
+)
+from gql.resolvers.character_resolvers import (
+    AsyncCharacterMutation,
+    AsyncCharacterQuery,
+    CharacterMutation,
+    CharacterQuery,
+)
+from gql.resolvers.power_resolvers import (
+    AsyncPowerMutation, AsyncPowerQuery, PowerMutation, PowerQuery
+)
+from gql.router import GQLRouter
+from settings import ASYNC_DATA_PATH
 
 
 @strawberry.type
@@ -35,17 +63,53 @@ class TestQuery:
     
 
 # Merging individual GraphQL query, mutation and subscription resolvers
-# to create a unified set.
-queries = merge_types('Query', (TestQuery, CharacterQuery, PowerQuery))
+# to create a unified set. Resolvers of the selected data path are used.
+if ASYNC_DATA_PATH:
+    queries = merge_types(
+        'Query', (TestQuery, AsyncCharacterQuery, AsyncPowerQuery),
+    )
+    mutations = merge_types(
+        'Mutation', (AsyncCharacterMutation, AsyncPowerMutation),
+    )
+else:
+    queries = merge_types('Query', (TestQuery, CharacterQuery, PowerQuery))
+    mutations = merge_types('Mutation', (CharacterMutation, PowerMutation))
+
+
+def get_context(request: Request) -> dict:
+    """
+    Build the context for a single GraphQL request.
+
+    :param request: HTTP request.
+
+    :return: A dict with handlers, request-scoped DataLoaders and
+             the ID of the authenticated client (None if anonymous).
+    """
+    return {
+        CLIENT_CONTEXT_KEY: get_client_id(request),
+        'character_handler': service.get_character_handler(),
+        'power_handler': service.get_power_handler(),
+        'character_loader': service.get_character_loader(),
+        'power_loader': service.get_power_loader(),
+    }
 
 
 # Setting up the GraphQL router with the merged queries and
 # configuring context to provide necessary handlers.
-gql_router = GraphQLRouter(
-    schema=strawberry.Schema(query=queries),
+gql_router = GQLRouter(
+    schema=strawberry.Schema(
+        query=queries,
+        mutation=mutations,
+        extensions=[
+            MetricsExtension,
+            PersistedQueryExtension,
+            QueryCostExtension,
+            IdentityMapExtension,
+        ],
+        config=StrawberryConfig(
+            enable_experimental_incremental_execution=True,
+        ),
+    ),
     # Providing the necessary handlers as context for GraphQL resolvers.
-    context_getter=lambda: {
-            'character_handler': service.get_character_handler(),
-            'power_handler': service.get_power_handler()
-        }
+    context_getter=get_context,
 )
@@ -7,12 +7,16 @@ with the character object.
 
 
 from enum import Enum
+from typing import Optional
 
 import strawberry
 
-from gql.types.common_types import GQLType
+from gql.cost import cost_metadata
+from gql.types.common_types import GQLType, PageInfo, SortDirection
 from gql.types.power_types import PowerType
-from settings import MAX_QUERY_DEPTH
+from settings import (
+    ENEMIES_COST_MULTIPLIER, MAX_QUERY_DEPTH, POWERS_COST_MULTIPLIER
+)
 
 
 @strawberry.enum(description='Represents the alignment of a character.')
@@ -35,16 +39,174 @@ class CharacterType(GQLType):
     name: str = strawberry.field(description='Character real name.')
     role: RoleEnum = strawberry.field(description='Character role.')
     powers: list[PowerType] = strawberry.field(
-        description='List of character powers.'
+        description='List of character powers.',
+        metadata=cost_metadata(1, POWERS_COST_MULTIPLIER),
     )
     enemies: list['CharacterType'] = (
         strawberry.field(
             description=(
                 'List of character enemies. Will be empty, if query '
                 f'exceeds a depth level of {MAX_QUERY_DEPTH}.'
-            )
+            ),
+            metadata=cost_metadata(1, ENEMIES_COST_MULTIPLIER),
         )
     )
     enemy_ids: list[strawberry.ID] = strawberry.field(
         description='List of character enemy IDs.'
     )
+    enemy_of: list['CharacterType'] = strawberry.field(
+        default_factory=list,
+        description=(
+            'List of characters listing this character as an enemy. '
+            'Will be empty, if query exceeds a depth level of '
+            f'{MAX_QUERY_DEPTH}.'
+        ),
+        metadata=cost_metadata(1, ENEMIES_COST_MULTIPLIER),
+    )
+
+
+@strawberry.type(description='Statistics of the length of a list field.')
+class DegreeStats:
+    """
+    Average and maximum number of references (e.g. enemies)
+    of characters.
+    """
+    average: float
+    max: int
+
+
+@strawberry.type(description='Statistics of characters of a single role.')
+class RoleStats:
+    role: Optional[RoleEnum] = strawberry.field(
+        description='Role of the characters, null for characters '
+                    'without a role.'
+    )
+    count: int
+    powers: DegreeStats
+    enemies: DegreeStats
+
+
+@strawberry.type(description='Statistics of all characters.')
+class CharacterStats:
+    """
+    Statistics computed by the database, only the aggregated numbers
+    are transferred.
+    """
+    count: int
+    by_role: list[RoleStats]
+    powers: DegreeStats
+    enemies: DegreeStats
+
+
+@strawberry.type(description='A character matching an autocomplete prefix.')
+class CharacterSuggestion:
+    """
+    A lightweight view of a character, served from the autocomplete
+    index without a database query.
+    """
+    id: strawberry.ID
+    alias: str
+    name: Optional[str] = None
+
+
+@strawberry.type(description='A character reachable through enemies.')
+class EnemyNeighbor:
+    hops: int = strawberry.field(
+        description='Number of enemy references leading to the character.'
+    )
+    character: CharacterType = strawberry.field(metadata=cost_metadata(1))
+
+
+@strawberry.type(description='A character sharing powers with another one.')
+class SimilarCharacter:
+    shared_powers: int = strawberry.field(
+        description='Number of powers shared with the other character.'
+    )
+    character: CharacterType = strawberry.field(metadata=cost_metadata(1))
+
+
+@strawberry.type
+class CharacterEdge:
+    """
+    A single CharacterType of a paginated list along with its cursor.
+    """
+    cursor: str
+    node: CharacterType = strawberry.field(metadata=cost_metadata(1))
+
+
+@strawberry.type
+class CharacterConnection:
+    """
+    A page of CharacterTypes (Relay-style connection).
+    """
+    edges: list[CharacterEdge]
+    page_info: PageInfo
+    total_count: Optional[int] = strawberry.field(
+        description=(
+            'Number of characters matching the filter, estimated '
+            'if there is no filter.'
+        )
+    )
+
+
+@strawberry.input(description='A new character.')
+class CharacterInput:
+    alias: str
+    name: Optional[str] = None
+    role: Optional[RoleEnum] = None
+    powers: list[strawberry.ID] = strawberry.field(
+        default_factory=list, description='IDs of character powers.'
+    )
+    enemies: list[strawberry.ID] = strawberry.field(
+        default_factory=list, description='IDs of character enemies.'
+    )
+
+
+@strawberry.input(
+    description='Changes of a character, omitted fields are kept.'
+)
+class CharacterUpdateInput:
+    id: strawberry.ID
+    alias: Optional[str] = None
+    name: Optional[str] = None
+    role: Optional[RoleEnum] = None
+    powers: Optional[list[strawberry.ID]] = strawberry.field(
+        default=None, description='IDs of character powers.'
+    )
+    enemies: Optional[list[strawberry.ID]] = strawberry.field(
+        default=None, description='IDs of character enemies.'
+    )
+
+
+@strawberry.input(
+    description='Conditions characters have to match, all of them.'
+)
+class CharacterFilter:
+    role: Optional[RoleEnum] = None
+    alias: Optional[str] = None
+    alias_prefix: Optional[str] = strawberry.field(
+        default=None, description='Beginning of the alias.'
+    )
+    name: Optional[str] = None
+    name_prefix: Optional[str] = strawberry.field(
+        default=None, description='Beginning of the real name.'
+    )
+    has_power: Optional[strawberry.ID] = strawberry.field(
+        default=None, description='ID of a power the character has.'
+    )
+    has_enemy: Optional[strawberry.ID] = strawberry.field(
+        default=None, description='ID of an enemy of the character.'
+    )
+
+
+@strawberry.enum(description='Fields characters can be ordered by.')
+class CharacterOrderField(Enum):
+    ID = 'id'
+    ALIAS = 'alias'
+    NAME = 'name'
+
+
+@strawberry.input(description='Ordering of characters.')
+class CharacterOrder:
+    field: CharacterOrderField = CharacterOrderField.ID
+    direction: SortDirection = SortDirection.ASC
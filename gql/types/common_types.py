@@ -7,9 +7,67 @@ more specialized types.
 """
 
 
+from enum import Enum
+from typing import Optional
+
+import strawberry
+
+
 class GQLType:
     """
     Abstract base class for GraphQL types.
     Used only as a generic reference for type hints.
     """
     pass
+
+
+@strawberry.enum(description='Direction of an ordering.')
+class SortDirection(Enum):
+    ASC = 1
+    DESC = -1
+
+
+@strawberry.type(description='Relay-style pagination details.')
+class PageInfo:
+    """
+    Describes the position of a page within the whole result set.
+    """
+    has_next_page: bool
+    has_previous_page: bool
+    start_cursor: Optional[str] = strawberry.field(
+        description='Cursor of the first edge, null for empty pages.'
+    )
+    end_cursor: Optional[str] = strawberry.field(
+        description='Cursor of the last edge, null for empty pages.'
+    )
+
+
+@strawberry.type(description='Result of a single item of a batch mutation.')
+class BatchItemResult:
+    """
+    Describes the outcome of a single item, at the position of
+    the item within the batch.
+    """
+    index: int = strawberry.field(description='Position of the item.')
+    id: Optional[strawberry.ID] = strawberry.field(
+        description='ID of the written object, null for failed items.'
+    )
+    error: Optional[str] = strawberry.field(
+        description='Error message, null for written items.'
+    )
+
+    @strawberry.field(description='Whether the item was written.')
+    def success(self) -> bool:
+        return self.error is None
+
+
+@strawberry.type(description='Results of a batch mutation.')
+class BatchResult:
+    """
+    Per-item results of a batch mutation. Items are written
+    independently, so a failed item doesn't prevent writing others.
+    """
+    results: list[BatchItemResult]
+    written_count: int = strawberry.field(
+        description='Number of written items.'
+    )
@@ -6,9 +6,12 @@ with the power object.
 """
 
 
+from typing import Optional
+
 import strawberry
 
-from gql.types.common_types import GQLType
+from gql.cost import cost_metadata
+from gql.types.common_types import GQLType, PageInfo
 
 
 @strawberry.type
@@ -20,3 +23,40 @@ class PowerType(GQLType):
     id: strawberry.ID
     name: str
     description: str
+
+
+@strawberry.type
+class PowerEdge:
+    """
+    A single PowerType of a paginated list along with its cursor.
+    """
+    cursor: str
+    node: PowerType = strawberry.field(metadata=cost_metadata(1))
+
+
+@strawberry.type
+class PowerConnection:
+    """
+    A page of PowerTypes (Relay-style connection).
+    """
+    edges: list[PowerEdge]
+    page_info: PageInfo
+    total_count: Optional[int] = strawberry.field(
+        description='Estimated number of all powers.'
+    )
+
+
+@strawberry.type(description='A power with the number of its holders.')
+class PowerStats:
+    power: PowerType
+    holder_count: int = strawberry.field(
+        description='Number of characters with the power.'
+    )
+
+
+@strawberry.input(
+    description='A power, identified by its unique name.'
+)
+class PowerInput:
+    name: str
+    description: Optional[str] = None
@@ -2,7 +2,7 @@
 logger.py
 
 This module defines a custom logging class `CustomLogger` tailored for
-creating and handling both event and error logs. 
+creating and handling both event and error logs.
 
 Key Features:
 - Event Logger: Records all types of messages, from informational
@@ -12,13 +12,21 @@ Key Features:
 
 Other functionalities include:
 - Log events and errors with distinct formatting and handlers.
-- Rotate log files based on a set interval to manage log size and
-  backups.
+- Write records asynchronously: loggers only put records into
+  a bounded queue, a background listener thread writes them into
+  files and stdout. Records over the queue limit are dropped and
+  counted, so a burst of errors never blocks request threads on I/O.
+- Rotate log files at midnight or by size, optionally compressing
+  rotated files with gzip.
+- Write records as formatted text or as JSON lines.
 - Ensure the existence of the logging directory and
   handle potential issues during log file creation.
 - Offer streamlined logging methods for easier integration into
   applications.
 
+Handlers and the listener are set up once per process, on the first
+CustomLogger creation, and shared by all loggers.
+
 Note:
     Ensure that the appropriate permissions and configurations
     are set for the logging directory and files when
@@ -26,50 +34,167 @@ Note:
 """
 
 
-import sys
-import os
+import atexit
+import copy
+import gzip
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import os
+import queue
+import shutil
+import sys
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from pathlib import Path
+from threading import Lock
 
-from settings import EVENT_LOG_FORMAT, ERROR_LOG_FORMAT, BACKUP_LOG_COUNT
+from settings import (
+    BACKUP_LOG_COUNT,
+    COMPRESS_LOGS,
+    ERROR_LOG_FORMAT,
+    EVENT_LOG_FORMAT,
+    LOG_JSON,
+    LOG_QUEUE_SIZE,
+    LOG_ROTATION,
+    MAX_LOG_SIZE,
+)
 
 
-class CustomLogger:
+EVENT_LOGGER_NAME = 'event'
+
+_queue_handler: 'BoundedQueueHandler | None' = None
+_listener: QueueListener | None = None
+_setup_lock = Lock()
+
+
+class BoundedQueueHandler(QueueHandler):
     """
-    Custom Logger class for creating and handling event and error logs.
+    QueueHandler, that never blocks on a full queue. Records that
+    don't fit into the queue are dropped and counted.
 
     Attributes:
-        event_logger (Logger): Logger instance for events.
-        error_logger (Logger): Logger instance for errors.
-
-    Usage example:
-        logger = CustomLogger('module_name')
-        logger.log_event('This is an event message.')
-        logger.log_error('This is an error message.')
+        dropped: Number of dropped records.
     """
 
-    def __init__(self, name: str):
-        self.event_logger = self._create_event_logger()
-        self.error_logger = self._create_error_logger(name)
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._dropped_lock = Lock()
 
-    def _file_handler(
-        self, fname: str, level: int, format: str
-    ) -> TimedRotatingFileHandler:
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
         """
-        Create a file handler for logging. This method ensures that the
-        logging directory ('logs') exists, creating it if necessary.
+        Prepare a record for the listener thread. The message and the
+        traceback are rendered here, as the exception info is only
+        available on the logging thread, while the formatting is left
+        to the listener handlers.
 
-        :param fname: Filename for the log.
-        :param level: Logging level (e.g., logging.INFO, 40).
-        :param format: Logging format.
+        :param record: Record to enqueue.
 
-        :return: Handler instance for logging into file.
+        :return: A copy of the record without unpicklable references.
         """
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info,
+            )
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter writing every record as a single JSON line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _compressed_name(name: str) -> str:
+    """
+    Name rotated log files as gzip archives.
+
+    :param name: Default name of the rotated file.
+
+    :return: Name of the archive.
+    """
+    return f'{name}.gz'
+
+
+def _compress(source: str, dest: str):
+    """
+    Rotate a log file by compressing it into a gzip archive.
+
+    :param source: Path of the current log file.
+    :param dest: Path of the archive.
+    """
+    with open(source, 'rb') as source_file, \
+            gzip.open(dest, 'wb') as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
 
-        fname = Path('logs') / f'{fname}.log'
+def _formatter(format: str) -> logging.Formatter:
+    """
+    Create a formatter of the configured output.
+
+    :param format: Logging format of text output.
+
+    :return: JsonFormatter if JSON output is enabled,
+             otherwise a text formatter.
+    """
+    return JsonFormatter() if LOG_JSON else logging.Formatter(format)
+
+
+def _file_handler(fname: str, level: int, format: str) -> logging.Handler:
+    """
+    Create a file handler for logging. This function ensures that the
+    logging directory ('logs') exists, creating it if necessary.
+
+    :param fname: Filename for the log.
+    :param level: Logging level (e.g., logging.INFO, 40).
+    :param format: Logging format.
+
+    :return: Handler instance for logging into file.
+
+    :raise OSError: Raised when there's an issue creating the directory.
+    """
+    if not os.path.exists('logs'):
+        os.makedirs('logs')
+
+    fname = Path('logs') / f'{fname}.log'
+    if LOG_ROTATION == 'size':
+        handler = RotatingFileHandler(
+            filename=fname,
+            maxBytes=MAX_LOG_SIZE,
+            backupCount=BACKUP_LOG_COUNT,
+            encoding='utf-8',
+            delay=True,
+        )
+    else:
         handler = TimedRotatingFileHandler(
             filename=fname,
             when='midnight',
@@ -78,78 +203,117 @@ class CustomLogger:
             encoding='utf-8',
             delay=True,
         )
-        handler.setLevel(level)
-        handler.setFormatter(logging.Formatter(format))
-        return handler
+    if COMPRESS_LOGS:
+        handler.namer = _compressed_name
+        handler.rotator = _compress
+    handler.setLevel(level)
+    handler.setFormatter(_formatter(format))
+    return handler
 
-    def _stdout_handler(
-        self, level: int, format: str
-    ) -> logging.StreamHandler:
-        """
-        Create a stream handler for logging to stdout.
 
-        :param level: Logging level.
-        :param format: Logging format.
+def _stdout_handler(level: int, format: str) -> logging.StreamHandler:
+    """
+    Create a stream handler for logging to stdout.
 
-        :return: Handler instance for logging to stdout.
-        """
-        handler = logging.StreamHandler(stream=sys.stdout)
-        handler.setLevel(level)
-        handler.setFormatter(logging.Formatter(format))
-        return handler
+    :param level: Logging level.
+    :param format: Logging format.
 
-    def _create_event_logger(self) -> logging.Logger:
-        """
-        Create and set up an event logger.
+    :return: Handler instance for logging to stdout.
+    """
+    handler = logging.StreamHandler(stream=sys.stdout)
+    handler.setLevel(level)
+    handler.setFormatter(_formatter(format))
+    return handler
 
-        :return: Configured logger for events.
 
-        :raise OSError: Raised when there's an issue creating the file.
-        """
-        logger = logging.getLogger('event')
-        logger.setLevel(logging.INFO)
-        if not any(
-            isinstance(h, logging.StreamHandler) for h in logger.handlers
-        ):
-            logger.addHandler(
-                self._stdout_handler(logging.INFO, EVENT_LOG_FORMAT)
+def _get_queue_handler() -> BoundedQueueHandler:
+    """
+    Get the process-wide queue handler, setting up the output handlers
+    and starting their listener thread on the first call. Records of
+    the event logger are written to stdout and the event log, records
+    of all other loggers to the error log.
+
+    :return: BoundedQueueHandler shared by all loggers.
+
+    :raise OSError: Raised when there's an issue creating the file.
+    """
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    with _setup_lock:
+        if _queue_handler is None:
+            event_handlers = [
+                _stdout_handler(logging.INFO, EVENT_LOG_FORMAT),
+                _file_handler('event', logging.INFO, EVENT_LOG_FORMAT),
+            ]
+            for handler in event_handlers:
+                handler.addFilter(logging.Filter(EVENT_LOGGER_NAME))
+            error_handler = _file_handler(
+                'error', logging.ERROR, ERROR_LOG_FORMAT,
             )
-        if not any(
-            isinstance(h, TimedRotatingFileHandler) for h in logger.handlers
-        ):
-            try:
-                logger.addHandler(
-                    self._file_handler(
-                        'event', logging.INFO, EVENT_LOG_FORMAT
-                    )
-                )
-            except OSError:
-                raise
-        return logger
+            error_handler.addFilter(
+                lambda record: record.name != EVENT_LOGGER_NAME
+            )
+
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            _listener = QueueListener(
+                log_queue,
+                *event_handlers,
+                error_handler,
+                respect_handler_level=True,
+            )
+            _listener.start()
+            # Flushes records still in the queue on exit
+            atexit.register(_listener.stop)
+            _queue_handler = BoundedQueueHandler(log_queue)
+    return _queue_handler
+
 
-    def _create_error_logger(self, name: str) -> logging.Logger:
+def get_dropped_count() -> int:
+    """
+    Get the number of log records dropped because of a full queue.
+
+    :return: Number of dropped records.
+    """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+class CustomLogger:
+    """
+    Custom Logger class for creating and handling event and error logs.
+
+    Attributes:
+        event_logger (Logger): Logger instance for events.
+        error_logger (Logger): Logger instance for errors.
+
+    Usage example:
+        logger = CustomLogger('module_name')
+        logger.log_event('This is an event message.')
+        logger.log_error('This is an error message.')
+    """
+
+    def __init__(self, name: str):
+        self.event_logger = self._get_logger(EVENT_LOGGER_NAME, logging.INFO)
+        self.error_logger = self._get_logger(name, logging.ERROR)
+
+    @staticmethod
+    def _get_logger(name: str, level: int) -> logging.Logger:
         """
-        Create and set up an error logger with a given name.
+        Get a logger writing through the process-wide queue handler.
 
-        :param name: Name of the logger (e.g., module name).
+        :param name: Name of the logger.
+        :param level: Logging level.
 
-        :return: Configured logger for errors.
+        :return: Configured logger.
 
         :raise OSError: Raised when there's an issue creating the file.
         """
+        handler = _get_queue_handler()
         logger = logging.getLogger(name)
-        logger.setLevel(logging.ERROR)
-        if not any(
-            isinstance(h, TimedRotatingFileHandler) for h in logger.handlers
-        ):
-            try:
-                logger.addHandler(
-                    self._file_handler(
-                        'error', logging.ERROR, ERROR_LOG_FORMAT
-                    )
-                )
-            except OSError:
-                raise
+        logger.setLevel(level)
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
         return logger
 
     def log_event(self, msg: str):
@@ -3,7 +3,15 @@ main.py
 
 This module initializes a FastAPI application with a MongoDB backend
 and sets up routing for GraphQL operations. It provides a health check
-endpoint to verify that the service is operational.
+endpoint to verify that the service is operational, a readiness probe
+reporting database latency and connection pool usage, an endpoint
+exposing document cache counters and a Prometheus metrics endpoint.
+
+MongoDB connections are opened by the app lifespan (see
+data_access/connection.py). The connection pool, database indexes and
+in-process indexes (the character autocomplete, enemy graph and power
+indexes) are warmed up on startup, so the first requests don't pay
+for them.
 
 Usage:
     Run the script directly to start the FastAPI server:
@@ -14,17 +22,135 @@ Usage:
 """
 
 
-import mongoengine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from anyio.to_thread import current_default_thread_limiter, run_sync
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from mongoengine.connection import ConnectionFailure
+from pymongo.errors import PyMongoError
 
+import metrics
+import service
+from data_access import connection
+from data_access.cache import get_aggregate_cache, get_cache_stats
+from data_access.snapshot import get_snapshot_store
+from gql.extensions import documents, persisted_queries
+from gql.response_cache import response_cache
 from gql.schema import gql_router
-from settings import MONGODB_CONNECTION
+from logger import CustomLogger, get_dropped_count
+from settings import ASYNC_DATA_PATH, SNAPSHOT_ENABLED
+
+
+logger = CustomLogger('main')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Connect to MongoDB, warm up the connection pool, load the snapshot
+    (if enabled) and build indexes before serving requests, and close
+    the connections at shutdown. A failed warm-up doesn't prevent the
+    startup, it is reported by the readiness probe and in-process
+    indexes are built on first use.
+    """
+    connection.connect()
+    try:
+        await run_sync(connection.warm_up)
+        if ASYNC_DATA_PATH:
+            await connection.async_warm_up()
+        if SNAPSHOT_ENABLED:
+            await run_sync(get_snapshot_store().get)
+    except PyMongoError:
+        logger.log_error('Warming up the database connection failed')
+    else:
+        handler = service.get_character_handler()
+        try:
+            if ASYNC_DATA_PATH:
+                await handler.build_autocomplete_index()
+                await handler.build_enemy_index()
+                await handler.build_power_index()
+            else:
+                await run_sync(handler.build_autocomplete_index)
+                await run_sync(handler.build_enemy_index)
+                await run_sync(handler.build_power_index)
+        except PyMongoError:
+            logger.log_error('Building in-process indexes failed')
 
+    try:
+        yield
+    finally:
+        get_snapshot_store().stop()
+        await connection.disconnect()
 
-# Initializing MongoDB connection for the app.
-mongoengine.connect(**MONGODB_CONNECTION)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+def get_all_cache_stats() -> dict[str, dict[str, int]]:
+    """
+    Get counters of document caches (keyed by model name), of the
+    aggregation result cache and of GraphQL document and response
+    caches.
+    """
+    aggregate_cache = get_aggregate_cache()
+    return get_cache_stats() | {
+        'persisted_query': persisted_queries.get_stats(),
+        'document': documents.get_stats(),
+        'response': response_cache.get_stats(),
+    } | ({'aggregate': aggregate_cache.get_stats()} if aggregate_cache else {})
+
+
+def get_threadpool_stats() -> dict[str, float]:
+    """
+    Get the size and usage of the worker thread pool running sync
+    endpoints. Available from the event loop only.
+    """
+    try:
+        limiter = current_default_thread_limiter()
+    except RuntimeError:
+        return dict()
+    return {'max': limiter.total_tokens, 'busy': limiter.borrowed_tokens}
+
+
+# Registering metrics read on every scrape.
+metrics.CallbackMetric(
+    'cache_entries', 'Number of cached entries.', ('cache',),
+    lambda: [((name,), stats['size'])
+             for name, stats in get_all_cache_stats().items()],
+)
+for stat in ('hits', 'misses', 'evictions', 'expirations'):
+    metrics.CallbackMetric(
+        f'cache_{stat}_total', f'Number of cache {stat}.', ('cache',),
+        lambda stat=stat: [((name,), stats[stat])
+                           for name, stats in get_all_cache_stats().items()],
+        type='counter',
+    )
+for stat, description in (('max', 'Maximum'), ('busy', 'Number of busy')):
+    metrics.CallbackMetric(
+        f'threadpool_{stat}_threads',
+        f'{description} worker threads of sync endpoints.',
+        (),
+        lambda stat=stat: [((), value) for name, value
+                           in get_threadpool_stats().items() if name == stat],
+    )
+metrics.CallbackMetric(
+    'mongodb_pool_connections',
+    'Number of pooled MongoDB connections.',
+    ('client', 'state'),
+    lambda: [((client, state), stats.get_stats()[state])
+             for client, stats in connection.pool_stats.items()
+             for state in ('open', 'in_use')],
+)
+metrics.CallbackMetric(
+    'log_records_dropped_total',
+    'Number of log records dropped because of a full log queue.',
+    (),
+    lambda: [((), get_dropped_count())],
+    type='counter',
+)
+
 
 @app.get('/')
 def health_check():
@@ -33,6 +159,49 @@ def health_check():
     """
     return {'status': 'ok'}
 
+@app.get('/ready')
+async def readiness_check():
+    """
+    Check whether the service is ready to serve requests: the database
+    is pinged through the client of the active data path. Reports the
+    ping latency and the connection pool usage, or responds with
+    503 Service Unavailable if the database is unreachable.
+    """
+    try:
+        if ASYNC_DATA_PATH:
+            latency = await connection.async_ping()
+        else:
+            latency = await run_sync(connection.ping)
+    except (PyMongoError, ConnectionFailure):
+        logger.log_warning('Readiness check failed, database unreachable')
+        return JSONResponse({'status': 'unavailable'}, status_code=503)
+
+    pool = connection.pool_stats['async' if ASYNC_DATA_PATH else 'sync']
+    return {
+        'status': 'ready',
+        'ping_ms': round(latency * 1000, 3),
+        'pool': pool.get_stats(),
+    }
+
+@app.get('/cache')
+def cache_stats():
+    """
+    Get hit, miss, eviction and expiration counters of
+    the document caches, keyed by model name.
+    """
+    return get_cache_stats()
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Get metrics in the Prometheus text exposition format.
+    Served from the event loop, so thread pool gauges can be read.
+    """
+    return PlainTextResponse(
+        metrics.render(),
+        media_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
 # Including the GraphQL router to the FastAPI app.
 app.include_router(gql_router, prefix="/graphql")
 
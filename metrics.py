@@ -0,0 +1,297 @@
+"""
+metrics.py
+
+This module provides lightweight, dependency-free metrics rendered in
+the Prometheus text exposition format (served at `/metrics`).
+
+Metrics are process-wide and updated in place: every label set
+(e.g. a model and DAO method pair) gets its own child holding plain
+counters, created once on the first use or up front when label values
+are known in advance. Recording a value is a dict lookup and a few
+additions under a lock, so metrics are cheap enough to stay enabled in
+production. Values that already exist elsewhere (e.g. cache counters)
+are not duplicated, they are read by collector callbacks on scrape.
+"""
+
+
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterable
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+DB_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+Sample = tuple[tuple[str, ...], float]
+Collector = Callable[[], Iterable[Sample]]
+
+_metrics: list['Metric'] = []
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """
+    Render a label set.
+
+    :param names: Label names.
+    :param values: Label values aligned with names.
+
+    :return: Rendered label set, empty string for no labels.
+    """
+    if not names:
+        return ''
+    labels = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return f'{{{labels}}}'
+
+
+class Metric:
+    """
+    Base class of all metrics. Metrics register themselves on
+    creation, so they are rendered by `render`.
+
+    Attributes:
+        name: Metric name.
+        help: Description of the metric.
+        labelnames: Names of the metric labels.
+    """
+    type = 'untyped'
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        label_values: Iterable[tuple[str, ...]] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = dict()
+        self._lock = Lock()
+        for values in label_values:
+            self.labels(*values)
+        _metrics.append(self)
+
+    def _create_child(self) -> Any:
+        """
+        Create the holder of values of a single label set.
+
+        :return: Child instance.
+        """
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        """
+        Get the child of a label set, creating it on the first call.
+
+        :param values: Label values aligned with label names.
+
+        :return: Child instance.
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._create_child())
+        return child
+
+    def collect(self) -> list[str]:
+        """
+        Render the samples of the metric.
+
+        :return: List of sample lines.
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Render the metric with its metadata.
+
+        :return: Metric in the text exposition format.
+        """
+        return '\n'.join([
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} {self.type}',
+            *self.collect(),
+        ])
+
+
+class _CounterChild:
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter.
+    """
+    type = 'counter'
+
+    def _create_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def collect(self) -> list[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, values)} '
+            f'{child.value}'
+            for values, child in list(self._children.items())
+        ]
+
+
+class _HistogramChild:
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time_since(self, started: float):
+        """
+        Observe the time elapsed since a `perf_counter` value.
+
+        :param started: Value of `perf_counter` at the start.
+        """
+        self.observe(perf_counter() - started)
+
+
+class Histogram(Metric):
+    """
+    Histogram of observed values with fixed buckets.
+
+    Attributes:
+        buckets: Upper bounds of the buckets in ascending order.
+    """
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        label_values: Iterable[tuple[str, ...]] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = buckets
+        super().__init__(name, help, labelnames, label_values)
+
+    def _create_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def collect(self) -> list[str]:
+        lines = []
+        labelnames = self.labelnames + ('le',)
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else str(bound)
+                labels = _format_labels(labelnames, values + (le,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    Metric, whose samples are read from a collector callback on every
+    scrape (e.g. sizes of caches or counters kept by other objects).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...],
+        collector: Collector,
+        type: str = 'gauge',
+    ):
+        self.type = type
+        self.collector = collector
+        super().__init__(name, help, labelnames)
+
+    def collect(self) -> list[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, values)} {value}'
+            for values, value in self.collector()
+        ]
+
+
+def render() -> str:
+    """
+    Render all registered metrics.
+
+    :return: Metrics in the Prometheus text exposition format.
+    """
+    return '\n'.join(metric.render() for metric in _metrics) + '\n'
+
+
+# GraphQL metrics, recorded by MetricsExtension (see gql/extensions.py)
+OPERATION_DURATION = Histogram(
+    'graphql_operation_duration_seconds',
+    'Duration of GraphQL operations.',
+    ('operation_type',),
+    label_values=[('query',), ('mutation',), ('subscription',), ('unknown',)],
+)
+ROOT_FIELD_DURATION = Histogram(
+    'graphql_root_field_duration_seconds',
+    'Duration of resolvers of GraphQL root fields.',
+    ('field',),
+)
+
+# DAO metrics, recorded by the DAO classes for every database query
+DAO_QUERIES = Counter(
+    'dao_queries_total',
+    'Number of database queries.',
+    ('model', 'method'),
+)
+DAO_QUERY_DURATION = Histogram(
+    'dao_query_duration_seconds',
+    'Duration of database queries.',
+    ('model', 'method'),
+    buckets=DB_BUCKETS,
+)
+DAO_DOCUMENTS = Counter(
+    'dao_documents_returned_total',
+    'Number of documents returned by database queries.',
+    ('model', 'method'),
+)
+
+
+def observe_query(model: str, method: str, started: float, documents: int):
+    """
+    Record a finished database query.
+
+    :param model: Name of the queried model.
+    :param method: Name of the DAO method.
+    :param started: Value of `perf_counter` at the start of the query.
+    :param documents: Number of returned documents.
+    """
+    DAO_QUERY_DURATION.labels(model, method).time_since(started)
+    DAO_QUERIES.labels(model, method).inc()
+    DAO_DOCUMENTS.labels(model, method).inc(documents)
@@ -1,9 +1,17 @@
-from service.character_handler import CharacterHandler
-from service.power_handler import PowerHandler
+from data_access.data_loader import DataLoader
+from service.character_handler import AsyncCharacterHandler, CharacterHandler
+from service.power_handler import AsyncPowerHandler, PowerHandler
+from settings import ASYNC_DATA_PATH
 
 
 def get_character_handler():
-    return CharacterHandler
+    return AsyncCharacterHandler if ASYNC_DATA_PATH else CharacterHandler
 
 def get_power_handler():
-    return PowerHandler
+    return AsyncPowerHandler if ASYNC_DATA_PATH else PowerHandler
+
+def get_character_loader() -> DataLoader:
+    return get_character_handler().create_character_loader()
+
+def get_power_loader() -> DataLoader:
+    return get_character_handler().create_power_loader()
@@ -0,0 +1,412 @@
+"""
+character_assembly.py
+
+This module provides supportive functions assembling CharacterTypes
+from raw documents (dicts) returned by the DAO layer, shared by
+CharacterHandler and AsyncCharacterHandler. None of them sends
+a query, handlers fetch the data and pass it in.
+
+Selections are parsed to decide which relations of sibling characters
+have to be fetched, whether the enemy subgraph of a single character
+is expanded with one query, and under which identity map keys the
+assembled objects are kept within a request. Fetched relations are
+distributed between sibling characters by their references.
+"""
+
+
+from typing import Any, Callable
+
+from strawberry.types.nodes import SelectedField
+
+from gql.types.character_types import CharacterType
+from gql.types.power_types import PowerType
+from data_access.identity_map import get_identity_map
+from data_access.models import Character, RawDocument
+from logger import CustomLogger
+from utils import utils
+from settings import ENEMY_GRAPH_LOOKUP, MAX_QUERY_DEPTH
+
+
+logger = CustomLogger('service.character_assembly')
+
+# GraphQL fields of CharacterType returning characters
+SELF_REFERENCES = ('enemies', 'enemyOf')
+
+
+def get_enemies_height(
+    signature: tuple, names: tuple[str, ...] = ('enemies',)
+) -> int:
+    """
+    Calculate how many nested levels of enemies are requested by the
+    selection signature.
+
+    :param signature: Selection signature built with
+                      utils.get_selection_signature.
+    :param names: Names of the counted fields.
+
+    :return: Number of nested levels of the counted fields.
+    """
+    return max(
+        (get_enemies_height(nested, names) + 1
+         for name, nested in signature if name in names),
+        default=0,
+    )
+
+
+def is_powers_selected(signature: tuple) -> bool:
+    """
+    Check whether powers are requested at any level of the selection
+    signature.
+
+    :param signature: Selection signature built with
+                      utils.get_selection_signature.
+
+    :return: True if 'powers' field is selected at any level.
+    """
+    return any(
+        name == 'powers' or is_powers_selected(nested)
+        for name, nested in signature
+    )
+
+
+def get_graph_selection(
+    selected_fields: list[SelectedField]
+) -> tuple[int, bool]:
+    """
+    Decide whether the enemy subgraph of a character should be
+    expanded with a single query. Expanded documents are only reused
+    through the request identity map, so it has to be active.
+
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            character via GraphQL query.
+
+    :return: A tuple of the number of enemy levels to expand
+             (0 if the subgraph should not be expanded) and a flag
+             whether powers have to be fetched as well.
+    """
+    if not ENEMY_GRAPH_LOOKUP or get_identity_map() is None:
+        return 0, False
+    # Deferred enemies must not delay the initial response
+    if utils.is_deferred(selected_fields, 'enemies'):
+        return 0, False
+
+    try:
+        signature = utils.get_selection_signature(selected_fields)
+    except (AttributeError, TypeError):
+        return 0, False
+
+    # Enemies are fetched while rec_depth <= MAX_QUERY_DEPTH,
+    # starting with rec_depth 0 for the root character.
+    depth = min(get_enemies_height(signature), MAX_QUERY_DEPTH + 1)
+    return depth, is_powers_selected(signature)
+
+
+def get_assembled_keys(
+    data: list[RawDocument],
+    selected_fields: list[SelectedField],
+    rec_depth: int,
+) -> list[tuple] | None:
+    """
+    Build identity map keys of CharacterType objects assembled from
+    provided data.
+
+    :param data: List of raw character documents from MongoDB.
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            character via GraphQL query.
+    :param rec_depth: Recursion depth flag, used to control
+                      self-referensing fields and overal query depth.
+
+    :return: List of keys aligned with data, or None if the
+             selection can't be processed.
+    """
+    try:
+        signature = utils.get_selection_signature(selected_fields)
+    except (AttributeError, TypeError):
+        return None
+
+    # The same selection gives the same result at any depth,
+    # unless it is cut by MAX_QUERY_DEPTH.
+    height = get_enemies_height(signature, SELF_REFERENCES)
+    if rec_depth + height - 1 <= MAX_QUERY_DEPTH:
+        depth_key = None
+    else:
+        depth_key = rec_depth
+    keys = [('CharacterType', str(entry.id), signature, depth_key)
+            for entry in data]
+    return keys
+
+
+def parse_selection(
+    selected_fields: list[SelectedField],
+    rec_depth: int,
+) -> tuple[list[SelectedField] | None, ...]:
+    """
+    Decide which related objects have to be fetched for the
+    selection.
+
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            character via GraphQL query.
+    :param rec_depth: Recursion depth flag, used to control
+                      self-referensing fields and overal query depth.
+
+    :return: A tuple of the powers, enemies and enemyOf
+             selections. None is returned for relations that
+             should not be fetched.
+    """
+    try:
+        selected_fields = utils.get_selected_complex_fields(
+            selected_fields,
+        )
+    except AttributeError:
+        logger.log_error('Failed to process selected fields')
+        selected_fields = dict()
+
+    powers_fields = None
+    if 'powers' in selected_fields:
+        try:
+            powers_fields = selected_fields['powers'].selections
+        except AttributeError:
+            logger.log_error('Failed to process selected fields')
+            powers_fields = list()
+
+    characters_fields = []
+    for name in SELF_REFERENCES:
+        fields = None
+        if name in selected_fields and rec_depth <= MAX_QUERY_DEPTH:
+            try:
+                fields = selected_fields[name].selections
+            except AttributeError:
+                logger.log_error('Failed to process selected fields')
+                fields = list()
+        characters_fields.append(fields)
+
+    return powers_fields, *characters_fields
+
+
+def create_character(
+    data: RawDocument,
+    powers: list[PowerType],
+    enemies: list[CharacterType],
+    enemy_of: list[CharacterType] | None = None,
+) -> CharacterType:
+    """
+    Create a CharacterType object.
+
+    :param data: Raw character document from MongoDB.
+    :param powers: Assembled powers of the character.
+    :param enemies: Assembled enemies of the character.
+    :param enemy_of: Assembled characters listing the character
+                     as an enemy.
+
+    :return: Composed CharacterType object.
+    """
+    character = CharacterType(
+        id=data.id,
+        alias=data.get('alias'),
+        name=data.get('name', Character.name.default),
+        role=data.get('role'),
+        powers=powers,
+        enemies=enemies,
+        enemy_ids=data.get('enemies', []),
+        enemy_of=enemy_of if enemy_of is not None else [],
+    )
+    return character
+
+
+def get_pending(
+    data: list[RawDocument],
+    selected_fields: list[SelectedField],
+    rec_depth: int,
+) -> tuple[list[tuple] | None, dict[Any, RawDocument]]:
+    """
+    Find characters that are not assembled for the selection within
+    the current request yet.
+
+    :param data: List of raw character documents from MongoDB.
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            character via GraphQL query.
+    :param rec_depth: Recursion depth flag, used to control
+                      self-referensing fields and overal query depth.
+
+    :return: A tuple of identity map keys aligned with data (None
+             if assembled objects can't be reused) and documents
+             to build keyed by their identity map keys (by their
+             positions if keys are None).
+    """
+    identity_map = get_identity_map()
+    keys = None
+    if identity_map is not None:
+        keys = get_assembled_keys(data, selected_fields, rec_depth)
+
+    if keys is None:
+        return None, dict(enumerate(data))
+    pending = {key: entry for key, entry in zip(keys, data)
+               if key not in identity_map.assembled}
+    return keys, pending
+
+
+def store_assembled(
+    keys: list[tuple] | None,
+    pending: dict[Any, RawDocument],
+    built: list[CharacterType],
+) -> list[CharacterType]:
+    """
+    Keep built characters in the request identity map and collect
+    assembled characters.
+
+    :param keys: Identity map keys returned by get_pending.
+    :param pending: Documents to build returned by get_pending.
+    :param built: CharacterTypes built from pending documents.
+
+    :return: List of composed CharacterType objects, aligned with
+             the keys (with the pending documents if keys are None).
+    """
+    if keys is None:
+        return built
+    identity_map = get_identity_map()
+    identity_map.assembled.update(zip(pending.keys(), built))
+    return [identity_map.assembled[key] for key in keys]
+
+
+def create_characters(
+    data: list[RawDocument],
+    fetches: list[tuple[Callable | None, bool]],
+    fetched: list[list[list]],
+) -> list[CharacterType]:
+    """
+    Create CharacterType objects from sibling characters and their
+    fetched relations. Deferred relations are fetched when the
+    executor awaits them.
+
+    :param data: List of raw character documents from MongoDB.
+    :param fetches: Relation fetches returned by
+                    CharacterHandler._get_relation_fetches.
+    :param fetched: Results of the fetches that are neither
+                    skipped nor deferred, in the same order.
+
+    :return: List of composed CharacterType objects, in the same
+             order as provided data.
+    """
+    fetched = iter(fetched)
+    relations = []
+    for fetch, deferred in fetches:
+        if fetch is None:
+            relations.append([[] for _ in data])
+        elif deferred:
+            relations.append(utils.DeferredBatch(fetch).items(len(data)))
+        else:
+            relations.append(next(fetched))
+
+    characters = [
+        create_character(*entry)
+        for entry in zip(data, *relations)
+    ]
+    return characters
+
+
+def get_unique_ids(ids: list[list[Any]]) -> list[str]:
+    """
+    Collect unique references of sibling characters, so they are
+    fetched with a single batch.
+
+    :param ids: List of ObjectID lists, one list per sibling
+                character.
+
+    :return: Unique IDs as strings, in order of appearance.
+    """
+    return list(dict.fromkeys(str(id) for entry in ids for id in entry))
+
+
+def map_powers(
+    power_ids: list[list[str]],
+    unique_ids: list[str],
+    powers: list[PowerType | None],
+) -> list[list[PowerType]]:
+    """
+    Distribute fetched powers between sibling characters.
+
+    :param power_ids: List of power ObjectID lists, one list per
+                      sibling character.
+    :param unique_ids: Unique power IDs.
+    :param powers: PowerTypes aligned with unique_ids, None for
+                   powers that were not found.
+
+    :return: List of PowerType lists, aligned with power_ids.
+    """
+    powers_by_id = dict(zip(unique_ids, powers))
+    return [
+        [powers_by_id[str(id)] for id in ids if powers_by_id[str(id)]]
+        for ids in power_ids
+    ]
+
+
+def map_enemies(
+    enemy_ids: list[list[str]],
+    assembled: list[CharacterType],
+) -> list[list[CharacterType]]:
+    """
+    Distribute assembled enemies between sibling characters.
+
+    :param enemy_ids: List of enemy ObjectID lists, one list per
+                      sibling character.
+    :param assembled: Assembled unique enemies.
+
+    :return: List of CharacterType lists, aligned with enemy_ids.
+    """
+    enemies_by_id = {str(enemy.id): enemy for enemy in assembled}
+
+    enemies = [
+        [enemies_by_id[str(id)] for id in ids if str(id) in enemies_by_id]
+        for ids in enemy_ids
+    ]
+    return enemies
+
+
+def map_enemy_of(
+    ids: list[str],
+    data: list[RawDocument],
+    assembled: list[CharacterType],
+) -> list[list[CharacterType]]:
+    """
+    Distribute characters listing sibling characters as enemies
+    between the siblings.
+
+    :param ids: ObjectIDs of sibling characters.
+    :param data: Raw documents of the referencing characters.
+    :param assembled: Assembled referencing characters, aligned
+                      with data.
+
+    :return: List of CharacterType lists, aligned with ids.
+    """
+    referencing = {str(id): [] for id in ids}
+    for entry, character in zip(data, assembled):
+        enemy_ids = entry.get('enemies', [])
+        for enemy_id in dict.fromkeys(str(id) for id in enemy_ids):
+            if enemy_id in referencing:
+                referencing[enemy_id].append(character)
+
+    return [referencing[str(id)] for id in ids]
+
+
+def map_by_ids(
+    ids: list[str],
+    data: list[RawDocument],
+    characters: list[CharacterType],
+) -> dict[str, CharacterType]:
+    """
+    Order characters found by an in-process index.
+
+    :param ids: IDs of the characters, in order of the index.
+    :param data: Raw documents of the characters found.
+    :param characters: CharacterTypes aligned with data.
+
+    :return: CharacterTypes keyed by ID, in order of the IDs.
+             Characters that were not found are missing.
+    """
+    assembled = {str(entry.id): character
+                 for entry, character in zip(data, characters)}
+    return {id: assembled[id] for id in ids if id in assembled}
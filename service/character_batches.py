@@ -0,0 +1,153 @@
+"""
+character_batches.py
+
+This module provides supportive functions of character batch
+mutations, shared by CharacterHandler and AsyncCharacterHandler.
+Inputs are mapped to document fields, references of the whole batch
+are collected so that every referenced model is checked with a single
+query, and all items are validated before a single bulk write.
+"""
+
+
+from typing import Any
+
+from gql.types.character_types import CharacterInput, CharacterUpdateInput
+from data_access.identity_map import to_key
+from data_access.models import Character
+from utils import utils
+
+
+# Character fields referencing other documents
+REFERENCE_FIELDS = ('powers', 'enemies')
+
+
+def get_character_fields(
+    character: CharacterInput | CharacterUpdateInput
+) -> dict[str, Any]:
+    """
+    Map a character input to document field values. Omitted (null)
+    fields are left out.
+
+    :param character: Character input of a batch mutation.
+
+    :return: Field values keyed by model field names, references
+             are identity map keys.
+    """
+    fields = dict()
+    for name in ('alias', 'name', 'role', *REFERENCE_FIELDS):
+        value = getattr(character, name)
+        if value is None:
+            continue
+        if name == 'role':
+            value = value.value
+        elif name in REFERENCE_FIELDS:
+            value = [to_key(id) for id in value]
+        fields[name] = value
+    return fields
+
+
+def get_references(batch: list[dict[str, Any]]) -> dict[str, set]:
+    """
+    Collect references of a whole batch, so every referenced model
+    is checked with a single query.
+
+    :param batch: Field values of all items.
+
+    :return: Referenced IDs keyed by reference field name.
+    """
+    references = {name: set() for name in REFERENCE_FIELDS}
+    for fields in batch:
+        for name in REFERENCE_FIELDS:
+            references[name].update(fields.get(name, ()))
+    return references
+
+
+def check_batch(
+    batch: list[dict[str, Any]],
+    existing: dict[str, set],
+    partial: bool,
+) -> list[str | None]:
+    """
+    Validate all items of a batch before writing them.
+
+    :param batch: Field values of all items.
+    :param existing: IDs of existing referenced documents keyed by
+                     reference field name.
+    :param partial: Whether items are updates, so only provided
+                    fields are validated.
+
+    :return: Error messages aligned with items, None for valid ones.
+    """
+    errors = []
+    for fields in batch:
+        error = None
+        for name in REFERENCE_FIELDS:
+            unknown = [str(id) for id in fields.get(name, ())
+                       if id not in existing[name]]
+            if unknown:
+                error = f'Unknown {name}: {", ".join(unknown)}'
+                break
+        if error is None and partial and not fields:
+            error = 'Nothing to update.'
+        if error is None:
+            error = utils.validate_document(Character, fields, partial)
+        errors.append(error)
+    return errors
+
+
+def prepare_batch(
+    characters: list[CharacterInput] | list[CharacterUpdateInput]
+) -> tuple[list[dict[str, Any]], dict[str, set]]:
+    """
+    Map inputs of a batch mutation to document field values.
+
+    :param characters: Character inputs of a batch mutation.
+
+    :return: A tuple of field values aligned with inputs and
+             referenced IDs of the whole batch keyed by reference
+             field name.
+
+    :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+    """
+    utils.check_batch_size(len(characters))
+    batch = [get_character_fields(entry) for entry in characters]
+    return batch, get_references(batch)
+
+
+def get_new_documents(
+    batch: list[dict[str, Any]], errors: list[str | None]
+) -> list[dict[str, Any]]:
+    """
+    Build raw documents of valid new characters.
+
+    :param batch: Field values of all items.
+    :param errors: Error messages aligned with items.
+
+    :return: Raw documents of items without errors.
+    """
+    return [
+        utils.to_raw_document(Character, fields)
+        for fields, error in zip(batch, errors) if error is None
+    ]
+
+
+def get_changed_documents(
+    characters: list[CharacterUpdateInput],
+    batch: list[dict[str, Any]],
+    errors: list[str | None],
+) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Build changes of valid updates.
+
+    :param characters: Changes of existing characters.
+    :param batch: Field values aligned with characters.
+    :param errors: Error messages aligned with characters.
+
+    :return: Pairs of character IDs and changed raw fields of items
+             without errors.
+    """
+    return [
+        (entry.id, utils.to_raw_document(Character, fields, True))
+        for entry, fields, error in zip(characters, batch, errors)
+        if error is None
+    ]
@@ -5,22 +5,161 @@ This module acts as an intermediary, providing stateless methods to
 facilitate the interaction between GraphQL resolvers and the DAO layer
 related to the Character domain.
 It ensures proper data transformation and integrity when
-moving between these layers.
+moving between these layers. CharacterTypes are assembled straight
+from raw documents (dicts) returned by the DAO layer.
+
+Related characters are assembled level by level: all power and enemy
+IDs required at a given depth are collected across sibling characters
+and fetched through request-scoped DataLoaders with a single query.
+Within a request every (character, selection) pair is assembled only
+once, assembled objects are kept in the request identity map.
+
+A single character with nested enemies is fetched with one query:
+its enemy subgraph (and powers) is expanded by the DAO with
+$graphLookup up to the selected depth, and the assembly is then
+served from the request identity map.
+
+Reverse relations (characters listing a character as an enemy, or
+characters with a power) are looked up through the multikey indexes
+of the reference fields, with a single query per depth level.
+
+Incremental delivery is supported as well. Enemies selected only
+within deferred fragments (@defer) are fetched when the deferred part
+of the response is executed, still with a single batch per depth
+level. Edges of streamed pages (@stream) are assembled lazily in
+batches, the initial ones before the initial response.
+
+Character autocomplete is answered from an in-process prefix index
+of aliases and names (see prefix_index.py), documents written since
+the last lookup are refreshed with a single query.
+
+Enemy paths and neighborhoods are answered from an in-process graph
+index of enemy references (see graph_index.py), memory-mapped from
+a file at startup when ENEMY_INDEX_FILE is set and the file was saved
+with the current version of enemy references in the database. Only
+the characters found are fetched, with a single query.
+
+Characters by their powers are looked up in an in-process inverted
+index (see inverted_index.py): characters having all of given powers
+are found by intersecting sorted posting lists, and characters sharing
+powers with a character by counting over the posting lists of its
+powers.
+
+Character and power statistics are computed by the database with
+aggregation pipelines, only the aggregated numbers are transferred.
+
+With SNAPSHOT_ENABLED, reads are served by the snapshot DAO classes
+from an in-process copy of the collections (see snapshot.py), no
+handler or resolver logic depends on the choice.
+
+Batch mutations validate all items before a single bulk write, and
+references of the whole batch are checked with one query per
+referenced model.
+
+AsyncCharacterHandler is the counterpart for the asyncio data path.
+It fetches powers and enemies of a depth level concurrently.
+Argument validation, selection processing, assembly, pagination,
+index maintenance, statistics and batch validation don't send queries
+and are shared by both classes: they are functions of the
+character_assembly, character_pages, character_indexes,
+character_stats and character_batches modules. Handler methods only
+fetch the data and pass it to them.
 """
 
 
+import asyncio
+from functools import partial
+from typing import Any, Callable
+
+from pymongo.errors import PyMongoError
+from strawberry.dataloader import DataLoader as AsyncDataLoader
 from strawberry.types.nodes import SelectedField
 
-from gql.types.character_types import CharacterType
-from service.power_handler import PowerHandler
-from data_access.character_dao import CharacterDAO
-from data_access.models import Character
-from logger import CustomLogger
+from gql.types.character_types import (
+    CharacterConnection,
+    CharacterEdge,
+    CharacterFilter,
+    CharacterInput,
+    CharacterOrder,
+    CharacterStats,
+    CharacterSuggestion,
+    CharacterType,
+    CharacterUpdateInput,
+    EnemyNeighbor,
+    SimilarCharacter,
+)
+from gql.types.common_types import BatchResult
+from gql.types.power_types import PowerStats, PowerType
+from service.character_assembly import (
+    create_characters,
+    get_graph_selection,
+    get_pending,
+    get_unique_ids,
+    map_by_ids,
+    map_enemies,
+    map_enemy_of,
+    map_powers,
+    parse_selection,
+    store_assembled,
+)
+from service.character_batches import (
+    check_batch,
+    get_changed_documents,
+    get_new_documents,
+    prepare_batch,
+)
+from service.character_indexes import (
+    AUTOCOMPLETE_FIELDS,
+    ENEMY_INDEX_FIELD,
+    ENEMY_PATH_ATTEMPTS,
+    POWER_INDEX_FIELD,
+    build_prefix_index,
+    build_reference_index,
+    create_neighbors,
+    create_path,
+    create_similar_characters,
+    create_suggestions,
+    find_sharing_powers,
+    get_hops,
+    load_index_file,
+    save_index_file,
+    update_prefix_index,
+    update_reference_index,
+)
+from service.character_pages import (
+    create_connection,
+    create_cursors,
+    create_edges,
+    get_page_query,
+    stream_edges,
+)
+from service.character_stats import (
+    create_character_stats,
+    create_power_stats,
+    get_limit,
+)
+from service.power_handler import AsyncPowerHandler, PowerHandler
+from data_access.character_dao import (
+    AsyncCharacterDAO,
+    AsyncSnapshotCharacterDAO,
+    CharacterDAO,
+    SnapshotCharacterDAO,
+)
+from data_access.data_loader import (
+    DataLoader, create_async_loader, prime_loader
+)
+from data_access.models import Character, RawDocument
+from data_access.graph_index import GraphIndex, get_graph_index
+from data_access.inverted_index import InvertedIndex, get_inverted_index
+from data_access.prefix_index import PrefixIndex, get_prefix_index
 from utils import utils
-from settings import MAX_QUERY_DEPTH
-
-
-logger = CustomLogger('service.character_handler')
+from settings import (
+    AUTOCOMPLETE_DEFAULT_LIMIT,
+    ENEMY_INDEX_FILE,
+    ENEMY_INDEX_MAX_AGE,
+    POWER_STATS_DEFAULT_LIMIT,
+    SNAPSHOT_ENABLED,
+)
 
 
 class CharacterHandler:
@@ -37,96 +176,700 @@ class CharacterHandler:
                        references related to powers within the
                        Character domain.
     """
-    dao = CharacterDAO
+    dao = SnapshotCharacterDAO if SNAPSHOT_ENABLED else CharacterDAO
     power_handler = PowerHandler
 
     @classmethod
-    def _assemble_character(
+    def create_character_loader(cls) -> DataLoader[RawDocument]:
+        """
+        Create a request-scoped DataLoader for character documents.
+
+        :return: DataLoader batching calls to the DAO.
+        """
+        return DataLoader(cls.dao.get_many_by_ids)
+
+    @classmethod
+    def create_power_loader(cls) -> DataLoader[PowerType]:
+        """
+        Create a request-scoped DataLoader for PowerTypes.
+
+        :return: DataLoader batching calls to the power handler.
+        """
+        return DataLoader(cls.power_handler.get_many_by_ids)
+
+    @classmethod
+    def _get_relation_fetches(
+        cls,
+        data: list[RawDocument],
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | AsyncDataLoader,
+        power_loader: DataLoader[PowerType] | AsyncDataLoader,
+        rec_depth: int,
+    ) -> list[tuple[Callable | None, bool]]:
+        """
+        A supportive method used to prepare fetching of objects related
+        to sibling characters, one batch per relation.
+
+        :param data: List of raw character documents from MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: Pairs of a fetching function (None for relations that
+                 should not be fetched) and a flag whether the relation
+                 is deferred, for powers, enemies and enemyOf.
+        """
+        powers_fields, enemies_fields, enemy_of_fields = parse_selection(
+            selected_fields, rec_depth,
+        )
+
+        fetches = [(
+            partial(
+                cls._fetch_powers,
+                [entry.get('powers', []) for entry in data],
+                powers_fields,
+                power_loader,
+            ) if powers_fields is not None else None,
+            False,
+        )]
+        for name, fields, fetch, ids in (
+            ('enemies', enemies_fields, cls._fetch_enemies,
+             [entry.get('enemies', []) for entry in data]),
+            ('enemyOf', enemy_of_fields, cls._fetch_enemy_of,
+             [entry.id for entry in data]),
+        ):
+            if fields is None:
+                fetches.append((None, False))
+                continue
+            fetches.append((
+                partial(
+                    fetch,
+                    ids,
+                    fields,
+                    character_loader,
+                    power_loader,
+                    rec_depth+1,
+                ),
+                utils.is_deferred(selected_fields, name),
+            ))
+        return fetches
+
+    @classmethod
+    def _assemble_characters(
         cls,
-        data: Character,
+        data: list[RawDocument],
         selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument],
+        power_loader: DataLoader[PowerType],
         rec_depth: int = 0,
-    ) -> CharacterType:
+    ) -> list[CharacterType]:
         """
-        A supportive method used for CharacterType object creation.
+        A supportive method used for CharacterType objects creation.
+        Reuses objects already assembled for the same character and
+        selection within the current request, the rest are built.
 
-        :param data: Character model object from MongoDB.
+        :param data: List of raw character documents from MongoDB.
         :param selected_fields: List of strawberry type SelectedField,
                                 representing fields selected for the
                                 character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
         :param rec_depth: Recursion depth flag, used to control
                           self-referensing fields and overal query depth.
 
-        :return: Composed CharacterType object.
+        :return: List of composed CharacterType objects, in the same
+                 order as provided data.
         """
-        enemy_ids = [enemy.id for enemy in data.enemies]
-        try:
-            selected_fields = utils.get_selected_complex_fields(
-                selected_fields,
-            )
-        except AttributeError:
-            logger.log_error('Failed to process selected fields')
-            selected_fields = dict()
+        keys, pending = get_pending(data, selected_fields, rec_depth)
+        built = cls._build_characters(
+            list(pending.values()),
+            selected_fields,
+            character_loader,
+            power_loader,
+            rec_depth,
+        )
+        return store_assembled(keys, pending, built)
 
-        if 'powers' in selected_fields:
-            power_ids = [power.id for power in data.powers]
-            powers = cls.power_handler.get_many_by_ids(power_ids)
-        else:
-            powers = []
+    @classmethod
+    def _build_characters(
+        cls,
+        data: list[RawDocument],
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument],
+        power_loader: DataLoader[PowerType],
+        rec_depth: int = 0,
+    ) -> list[CharacterType]:
+        """
+        A supportive method used for CharacterType objects creation.
+        Processes all sibling characters of the same depth at once,
+        so every depth level costs at most one query for powers
+        and one query for enemies. Deferred enemies are fetched
+        when the executor awaits them.
 
-        if 'enemies' in selected_fields and rec_depth <= MAX_QUERY_DEPTH:
-            try:
-                enemies_fields = selected_fields['enemies'].selections
-            except AttributeError:
-                logger.log_error('Failed to process selected fields')
-                selected_fields = list()
-            enemies = cls._fetch_enemies(
-                enemy_ids, enemies_fields, rec_depth+1
-            )
-        else:
-            enemies = []
+        :param data: List of raw character documents from MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of composed CharacterType objects, in the same
+                 order as provided data.
+        """
+        if not data:
+            return []
 
-        character = CharacterType(
-            id=data.id,
-            alias=data.alias,
-            name=data.name,
-            role=data.role,
-            powers=powers,
-            enemies=enemies,
-            enemy_ids=enemy_ids,
+        fetches = cls._get_relation_fetches(
+            data, selected_fields, character_loader, power_loader, rec_depth,
         )
-        return character
+        fetched = [fetch() for fetch, deferred in fetches
+                   if fetch is not None and not deferred]
+        return create_characters(data, fetches, fetched)
+
+    @classmethod
+    def _fetch_powers(
+        cls,
+        power_ids: list[list[str]],
+        selected_fields: list[SelectedField],
+        power_loader: DataLoader[PowerType],
+    ) -> list[list[PowerType]]:
+        """
+        A supportive method used for fetching powers of sibling
+        characters with a single batch.
+
+        :param power_ids: List of power ObjectID lists, one list per
+                          sibling character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                powers via GraphQL query.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+
+        :return: List of PowerType lists, aligned with power_ids.
+        """
+        unique_ids = get_unique_ids(power_ids)
+        only = utils.get_projection(selected_fields)
+        powers = power_loader.load_many(unique_ids, only)
+        return map_powers(power_ids, unique_ids, powers)
 
     @classmethod
     def _fetch_enemies(
         cls,
-        enemy_ids: list[str],
+        enemy_ids: list[list[str]],
         selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument],
+        power_loader: DataLoader[PowerType],
         rec_depth: int,
-    ) -> list[CharacterType]:
+    ) -> list[list[CharacterType]]:
+        """
+        A supportive method used for fetching enemies data of sibling
+        characters and creating CharacterType objects from fetched data.
+        Every unique enemy is fetched and assembled only once.
+
+        :param enemy_ids: List of enemy ObjectID lists, one list per
+                          sibling character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of CharacterType lists, aligned with enemy_ids.
+        """
+        unique_ids = get_unique_ids(enemy_ids)
+        only = utils.get_projection(selected_fields)
+        enemies_data = [entry for entry in character_loader.load_many(
+            unique_ids, only) if entry]
+
+        assembled = cls._assemble_characters(
+            enemies_data,
+            selected_fields,
+            character_loader,
+            power_loader,
+            rec_depth,
+        )
+        return map_enemies(enemy_ids, assembled)
+
+    @classmethod
+    def _fetch_enemy_of(
+        cls,
+        ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument],
+        power_loader: DataLoader[PowerType],
+        rec_depth: int,
+    ) -> list[list[CharacterType]]:
         """
-        A supportive method used for fetching enemies data and
-        creating CharacterType objects from fetched data.
+        A supportive method used for fetching characters listing
+        sibling characters as enemies, with a single indexed query,
+        and creating CharacterType objects from fetched data.
 
-        :param enemy_ids: List of ObjectIDs of Character documents
-                          from MongoDB.
+        :param ids: ObjectIDs of sibling characters.
         :param selected_fields: List of strawberry type SelectedField,
                                 representing fields selected for the
                                 character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
         :param rec_depth: Recursion depth flag, used to control
                           self-referensing fields and overal query depth.
 
-        :return: List of CharacterTypes.
+        :return: List of CharacterType lists, aligned with ids.
+        """
+        only = utils.get_projection(selected_fields)
+        data = cls.dao.get_many_by_reference('enemies', ids, only)
+        prime_loader(character_loader, data, only)
+
+        assembled = cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader, rec_depth,
+        )
+        return map_enemy_of(ids, data, assembled)
+
+    @classmethod
+    def get_many_by_power(
+        cls,
+        power_id: str,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+    ) -> list[CharacterType]:
+        """
+        Create CharacterTypes for all characters with a power, fetched
+        with a single query backed by the index of character powers.
+
+        :param power_id: ObjectID of a power document in MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes. List will be empty if
+                 no character has the power.
+        """
+        only = utils.get_projection(selected_fields)
+        data = cls.dao.get_many_by_reference('powers', [power_id], only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, only)
+
+        characters = cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader,
+        )
+        return characters
+
+    @classmethod
+    def build_autocomplete_index(cls) -> PrefixIndex:
+        """
+        Build the autocomplete index from all character documents,
+        e.g. at startup.
+
+        :return: Built index.
+        """
+        index = get_prefix_index(Character, AUTOCOMPLETE_FIELDS)
+        data = cls.dao.get_all(list(AUTOCOMPLETE_FIELDS))
+        build_prefix_index(index, data)
+        return index
+
+    @classmethod
+    def autocomplete(
+        cls, prefix: str, limit: int = AUTOCOMPLETE_DEFAULT_LIMIT
+    ) -> list[CharacterSuggestion]:
+        """
+        Find characters by a prefix of their alias, name or a word of
+        them. The index is built on the first call, if it wasn't built
+        at startup, and characters written since the last call are
+        refreshed with a single query. Otherwise no query is sent.
+
+        :param prefix: Prefix to match, case-insensitively.
+        :param limit: Maximum number of suggestions, limited by
+                      AUTOCOMPLETE_MAX_LIMIT.
+
+        :return: List of CharacterSuggestions, aliases first.
+
+        :raise ValueError: Raised if the limit is negative.
+        """
+        index = get_prefix_index(Character, AUTOCOMPLETE_FIELDS)
+        if not index.built:
+            cls.build_autocomplete_index()
+
+        cls._refresh_index(
+            index, list(AUTOCOMPLETE_FIELDS), update_prefix_index,
+        )
+        return create_suggestions(index, prefix, limit)
+
+    @classmethod
+    def _refresh_index(
+        cls,
+        index: PrefixIndex | GraphIndex | InvertedIndex,
+        only: list[str],
+        update: Callable[[Any, list[str], list[RawDocument]], None],
+    ):
+        """
+        A supportive method refreshing characters written since the
+        last lookup of an in-process index, with a single query.
+        Characters stay marked stale if the query fails.
+
+        :param index: Built in-process index.
+        :param only: Indexed character fields.
+        :param update: Method applying refreshed documents to
+                       the index, called with the index, IDs of
+                       refreshed characters and documents found.
+        """
+        stale = index.pop_stale()
+        if stale:
+            try:
+                data = cls.dao.get_many_by_ids(stale, only)
+            except PyMongoError:
+                index.mark_stale(stale)
+                raise
+            update(index, stale, data)
+
+    @classmethod
+    def _assemble_by_ids(
+        cls,
+        ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None,
+        power_loader: DataLoader[PowerType] | None,
+    ) -> dict[str, CharacterType]:
+        """
+        A supportive method creating CharacterTypes of characters
+        found by an in-process index, fetched with a single query.
+
+        :param ids: IDs of the characters.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: CharacterTypes keyed by ID, in order of the IDs.
+                 Characters that were not found are missing.
+        """
+        if not ids:
+            return dict()
+        only = utils.get_projection(selected_fields)
+        data = cls.dao.get_many_by_ids(ids, only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, only)
+
+        characters = cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader,
+        )
+        return map_by_ids(ids, data, characters)
+
+    @classmethod
+    def build_enemy_index(cls) -> GraphIndex:
+        """
+        Build the enemy graph index, e.g. at startup. An index saved
+        to ENEMY_INDEX_FILE is memory-mapped if it is recent enough
+        and enemy references weren't changed since, otherwise
+        the index is built from all character documents and saved.
+
+        :return: Built index.
+        """
+        index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+        # Taken first, so the saved index is never older than it
+        version = cls.dao.get_reference_version(ENEMY_INDEX_FIELD) \
+            if ENEMY_INDEX_FILE else ''
+        if load_index_file(
+            index, ENEMY_INDEX_FILE, ENEMY_INDEX_MAX_AGE, version,
+        ):
+            return index
+        data = cls.dao.get_all([ENEMY_INDEX_FIELD])
+        build_reference_index(index, data, ENEMY_INDEX_FIELD)
+        save_index_file(index, ENEMY_INDEX_FILE, version)
+        return index
+
+    @classmethod
+    def _get_enemy_index(cls) -> GraphIndex:
+        """
+        A supportive method getting the up-to-date enemy graph index.
+        The index is built on the first call, if it wasn't built at
+        startup, and characters written since the last call are
+        refreshed with a single query. The index is saved again
+        when refreshed references were merged into its arrays.
+
+        :return: Enemy graph index.
+        """
+        index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+        if not index.built:
+            cls.build_enemy_index()
+        update = partial(
+            update_reference_index, field=ENEMY_INDEX_FIELD,
+        )
+        compactions = index.compactions
+        cls._refresh_index(index, [ENEMY_INDEX_FIELD], update)
+        if ENEMY_INDEX_FILE and index.compactions != compactions:
+            # Taken before refreshing characters written meanwhile,
+            # so the saved index is never older than it
+            version = cls.dao.get_reference_version(ENEMY_INDEX_FIELD)
+            cls._refresh_index(index, [ENEMY_INDEX_FIELD], update)
+            save_index_file(index, ENEMY_INDEX_FILE, version)
+        return index
+
+    @classmethod
+    def get_enemy_path(
+        cls,
+        from_id: str,
+        to_id: str,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+    ) -> list[CharacterType] | None:
+        """
+        Find a shortest chain of enemies leading from one character
+        to another (each character lists the next one as an enemy).
+        The chain is found by the enemy graph index, only its
+        characters are fetched. A chain through characters missing
+        in the database (e.g. with a stale index) is searched again
+        without them.
+
+        :param from_id: ObjectID of the first character.
+        :param to_id: ObjectID of the last character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes along the chain, both ends
+                 included, or None if there is no chain or one of
+                 the characters doesn't exist.
+        """
+        # A path through characters missing in the database is
+        # searched again, once they are removed from the index
+        for _ in range(ENEMY_PATH_ATTEMPTS):
+            path = cls._get_enemy_index().shortest_path(from_id, to_id)
+            if path is None:
+                return None
+            characters = create_path(path, cls._assemble_by_ids(
+                path, selected_fields, character_loader, power_loader,
+            ))
+            if characters is not None:
+                return characters
+        return None
+
+    @classmethod
+    def get_enemy_neighborhood(
+        cls,
+        id: str,
+        hops: int,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+    ) -> list[EnemyNeighbor]:
+        """
+        Find characters reachable from a character through a limited
+        number of enemy references (enemies, their enemies etc.).
+        Characters are found by the enemy graph index, only the found
+        ones are fetched.
+
+        :param id: ObjectID of the character.
+        :param hops: Maximum number of enemy references, limited by
+                     ENEMY_NEIGHBORHOOD_MAX_HOPS.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                EnemyNeighbors via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of EnemyNeighbors, the nearest first. The list is
+                 empty if the character doesn't exist.
+
+        :raise ValueError: Raised if the number of hops is negative.
+        """
+        hops = get_hops(hops)
+        found = cls._get_enemy_index().neighborhood(id, hops)
+        characters = cls._assemble_by_ids(
+            [id for id, _ in found],
+            utils.get_nested_fields(selected_fields, 'character'),
+            character_loader,
+            power_loader,
+        )
+        return create_neighbors(found, characters)
+
+    @classmethod
+    def build_power_index(cls) -> InvertedIndex:
+        """
+        Build the power index (characters by their powers) from all
+        character documents, e.g. at startup.
+
+        :return: Built index.
+        """
+        index = get_inverted_index(Character, POWER_INDEX_FIELD)
+        data = cls.dao.get_all([POWER_INDEX_FIELD])
+        build_reference_index(index, data, POWER_INDEX_FIELD)
+        return index
+
+    @classmethod
+    def _get_power_index(cls) -> InvertedIndex:
+        """
+        A supportive method getting the up-to-date power index.
+        The index is built on the first call, if it wasn't built at
+        startup, and characters written since the last call are
+        refreshed with a single query.
+
+        :return: Power index.
+        """
+        index = get_inverted_index(Character, POWER_INDEX_FIELD)
+        if not index.built:
+            cls.build_power_index()
+        cls._refresh_index(index, [POWER_INDEX_FIELD], partial(
+            update_reference_index, field=POWER_INDEX_FIELD,
+        ))
+        return index
+
+    @classmethod
+    def get_many_sharing_powers(
+        cls,
+        id: str,
+        min_shared: int,
+        limit: int,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+    ) -> list[SimilarCharacter]:
+        """
+        Find characters sharing at least a number of powers with
+        a character. Characters are found by the power index, only
+        the found ones are fetched.
+
+        :param id: ObjectID of the character.
+        :param min_shared: Minimum number of shared powers.
+        :param limit: Maximum number of characters, limited by
+                      MAX_PAGE_SIZE.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                SimilarCharacters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of SimilarCharacters, the most shared powers
+                 first. The list is empty if the character doesn't
+                 exist.
+
+        :raise ValueError: Raised if the minimum is not positive or
+                           the limit is negative.
+        """
+        found = find_sharing_powers(
+            cls._get_power_index(), id, min_shared, limit,
+        )
+        characters = cls._assemble_by_ids(
+            [id for id, _ in found],
+            utils.get_nested_fields(selected_fields, 'character'),
+            character_loader,
+            power_loader,
+        )
+        return create_similar_characters(found, characters)
+
+    @classmethod
+    def get_many_with_all_powers(
+        cls,
+        power_ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+    ) -> list[CharacterType]:
+        """
+        Find characters having all of the powers. Characters are found
+        by intersecting posting lists of the power index, only the
+        found ones are fetched.
+
+        :param power_ids: ObjectIDs of power documents in MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes. List will be empty if no
+                 power is given or no character has all of them.
         """
-        enemies_data = cls.dao.get_many_by_ids(enemy_ids)
+        ids = cls._get_power_index().find_all(power_ids)
+        characters = cls._assemble_by_ids(
+            ids, selected_fields, character_loader, power_loader,
+        )
+        return list(characters.values())
+
+    @classmethod
+    def get_stats(cls) -> CharacterStats:
+        """
+        Create statistics of all characters: their number per role
+        and the average and maximum numbers of their powers and
+        enemies. The numbers are computed by the database with
+        a single aggregation, so no character document is transferred.
+
+        :return: CharacterStats object.
+        """
+        return create_character_stats(cls.dao.get_role_stats())
+
+    @classmethod
+    def get_power_stats(
+        cls, limit: int = POWER_STATS_DEFAULT_LIMIT
+    ) -> list[PowerStats]:
+        """
+        Create statistics of the most common powers of characters.
+        Holders are counted by the database with a single aggregation,
+        powers are then fetched by their IDs.
+
+        :param limit: Maximum number of powers, limited by
+                      MAX_PAGE_SIZE.
+
+        :return: List of PowerStats, the most common powers first.
+
+        :raise ValueError: Raised if the limit is negative.
+        """
+        limit = get_limit(limit)
+        if not limit:
+            return []
 
-        enemies = [cls._assemble_character(data, selected_fields, rec_depth) 
-                   for data in enemies_data]
-        return enemies
+        data = cls.dao.get_power_stats(limit)
+        powers = cls.power_handler.get_many_by_ids(
+            [entry['_id'] for entry in data],
+        )
+        return create_power_stats(data, powers)
 
     @classmethod
     def get_one_by_id(
-        cls, id: str, selected_fields: list[SelectedField]
+        cls,
+        id: str,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
     ) -> CharacterType | None:
         """
         Create a CharacterType from MongoDB character document
@@ -136,20 +879,41 @@ class CharacterHandler:
         :param selected_fields: List of strawberry type SelectedField,
                                 representing fields selected for the
                                 character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
 
         :return: CharacterType or None if there is no document
                  with provided ID.
         """
-        data = cls.dao.get_one_by_id(id)
+        only = utils.get_projection(selected_fields)
+        depth, with_powers = get_graph_selection(selected_fields)
+        if depth:
+            data = cls.dao.get_enemy_graph(id, depth, with_powers)
+        else:
+            data = cls.dao.get_one_by_id(id, only)
         if not data:
             return None
 
-        character = cls._assemble_character(data, selected_fields)
+        character_loader = character_loader or cls.create_character_loader()
+        prime_loader(character_loader, [data], only)
+
+        character = cls._assemble_characters(
+            [data],
+            selected_fields,
+            character_loader,
+            power_loader or cls.create_power_loader(),
+        )[0]
         return character
 
     @classmethod
     def get_all(
-        cls, selected_fields: list[SelectedField]
+        cls,
+        selected_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
     ) -> list[CharacterType]:
         """
         Create CharacterType for every character document in MongoDB.
@@ -157,12 +921,1142 @@ class CharacterHandler:
         :param selected_fields: List of strawberry type SelectedField,
                                 representing fields selected for the
                                 character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
 
         :return: List of CharacterTypes. List will be empty if
                  there are no character documents.
         """
-        data = cls.dao.get_all()
+        only = utils.get_projection(selected_fields)
+        data = cls.dao.get_all(only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        prime_loader(character_loader, data, only)
 
-        characters = [cls._assemble_character(entry, selected_fields) for 
-                      entry in data]
+        characters = cls._assemble_characters(
+            data,
+            selected_fields,
+            character_loader,
+            power_loader or cls.create_power_loader(),
+        )
         return characters
+
+    @classmethod
+    def _assemble_edges(
+        cls,
+        data: list[RawDocument],
+        cursors: list[str],
+        node_fields: list[SelectedField],
+        character_loader: DataLoader[RawDocument],
+        power_loader: DataLoader[PowerType],
+    ) -> list[CharacterEdge]:
+        """
+        A supportive method used to assemble a batch of streamed edges.
+
+        :param data: Raw character documents of the batch.
+        :param cursors: Cursors aligned with data.
+        :param node_fields: Fields selected for the nodes.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+
+        :return: List of CharacterEdges, aligned with data.
+        """
+        return create_edges(cls._assemble_characters(
+            data, node_fields, character_loader, power_loader,
+        ), cursors)
+
+    @classmethod
+    def get_page(
+        cls,
+        selected_fields: list[SelectedField],
+        first: int | None = None,
+        after: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+        character_loader: DataLoader[RawDocument] | None = None,
+        power_loader: DataLoader[PowerType] | None = None,
+        filter: CharacterFilter | None = None,
+        order_by: CharacterOrder | None = None,
+    ) -> CharacterConnection:
+        """
+        Create a CharacterConnection for a page of character documents.
+        The page is fetched with a single keyset query.
+
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                connection via GraphQL query.
+        :param first: Number of characters after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of characters before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+        :param filter: Conditions the characters have to match.
+        :param order_by: Ordering of the characters, ascending ID
+                         if not provided.
+
+        :return: CharacterConnection object.
+
+        :raise ValueError: Raised for invalid pagination arguments.
+        """
+        query = get_page_query(
+            selected_fields, first, after, last, before, filter, order_by,
+        )
+
+        data = cls.dao.get_page(
+            query.limit + 1,
+            query.after_id,
+            query.before_id,
+            query.reverse,
+            query.only,
+            query.filters,
+            query.order,
+        )
+        total_count = cls.dao.get_count(query.filters) \
+            if query.with_total else None
+
+        data, has_more = utils.trim_page(data, query.limit, query.reverse)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, query.only)
+
+        cursors = create_cursors(data, query.order[0])
+        if query.initial_count is not None:
+            edges = stream_edges(data, cursors, partial(
+                cls._assemble_edges,
+                node_fields=query.node_fields,
+                character_loader=character_loader,
+                power_loader=power_loader,
+            ), query.initial_count)
+        else:
+            edges = cls._assemble_edges(
+                data,
+                cursors,
+                query.node_fields,
+                character_loader,
+                power_loader,
+            )
+        return create_connection(
+            cursors,
+            edges,
+            has_more,
+            query.reverse,
+            after,
+            before,
+            total_count,
+        )
+
+    @classmethod
+    def _get_existing_references(
+        cls, references: dict[str, set]
+    ) -> dict[str, set]:
+        """
+        A supportive method checking references of a whole batch,
+        with a single query per referenced model.
+
+        :param references: Referenced IDs keyed by reference field name.
+
+        :return: IDs of existing referenced documents keyed by
+                 reference field name.
+        """
+        return {
+            'powers': cls.power_handler.dao.get_existing_ids(
+                list(references['powers'])
+            ),
+            'enemies': cls.dao.get_existing_ids(list(references['enemies'])),
+        }
+
+    @classmethod
+    def create_many(cls, characters: list[CharacterInput]) -> BatchResult:
+        """
+        Create characters with a single bulk write. References of
+        the whole batch are checked with one query per referenced
+        model, invalid items are reported without being written.
+
+        :param characters: Inputs of new characters.
+
+        :return: BatchResult with a result per character.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        batch, references = prepare_batch(characters)
+        existing = cls._get_existing_references(references)
+
+        errors = check_batch(batch, existing, False)
+        written = cls.dao.bulk_insert(
+            get_new_documents(batch, errors),
+        )
+        return utils.create_batch_result(errors, written)
+
+    @classmethod
+    def update_many(
+        cls, characters: list[CharacterUpdateInput]
+    ) -> BatchResult:
+        """
+        Update characters with a single bulk write. Only provided
+        fields are changed. References of the whole batch are checked
+        with one query per referenced model.
+
+        :param characters: Changes of existing characters.
+
+        :return: BatchResult with a result per character.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        batch, references = prepare_batch(characters)
+        existing = cls._get_existing_references(references)
+
+        errors = check_batch(batch, existing, True)
+        written = cls.dao.bulk_update(
+            get_changed_documents(characters, batch, errors),
+        )
+        return utils.create_batch_result(errors, written)
+
+
+class AsyncCharacterHandler(CharacterHandler):
+    """
+    Service layer responsible for orchestrating operations related to
+    the Character domain on the asyncio data path. Inherits the
+    supportive methods of CharacterHandler that don't send queries,
+    while all data fetching methods are coroutines.
+
+    Attributes:
+        dao: A reference to the async data access class responsible
+             for direct interactions with the database.
+        power_handler: An async service layer dedicated to operations
+                       associated with power types and objects.
+    """
+    dao = AsyncSnapshotCharacterDAO if SNAPSHOT_ENABLED \
+        else AsyncCharacterDAO
+    power_handler = AsyncPowerHandler
+
+    @classmethod
+    def create_character_loader(cls) -> AsyncDataLoader:
+        """
+        Create a request-scoped asyncio DataLoader for
+        character documents.
+
+        :return: DataLoader batching calls to the DAO.
+        """
+        return create_async_loader(cls.dao.get_many_by_ids)
+
+    @classmethod
+    def create_power_loader(cls) -> AsyncDataLoader:
+        """
+        Create a request-scoped asyncio DataLoader for PowerTypes.
+
+        :return: DataLoader batching calls to the power handler.
+        """
+        return create_async_loader(cls.power_handler.get_many_by_ids)
+
+    @classmethod
+    def _get_loader_projection(
+        cls, selected_fields: list[SelectedField]
+    ) -> tuple[str, ...] | None:
+        """
+        A supportive method used to build the projection part of
+        asyncio DataLoader keys.
+
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                type via GraphQL query.
+
+        :return: Projection tuple, or None for whole documents.
+        """
+        only = utils.get_projection(selected_fields)
+        return tuple(only) if only else None
+
+    @classmethod
+    async def _assemble_characters(
+        cls,
+        data: list[RawDocument],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader,
+        power_loader: AsyncDataLoader,
+        rec_depth: int = 0,
+    ) -> list[CharacterType]:
+        """
+        A supportive method used for CharacterType objects creation.
+        Reuses objects already assembled for the same character and
+        selection within the current request, the rest are built.
+
+        :param data: List of raw character documents from MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of composed CharacterType objects, in the same
+                 order as provided data.
+        """
+        keys, pending = get_pending(data, selected_fields, rec_depth)
+        built = await cls._build_characters(
+            list(pending.values()),
+            selected_fields,
+            character_loader,
+            power_loader,
+            rec_depth,
+        )
+        return store_assembled(keys, pending, built)
+
+    @classmethod
+    async def _build_characters(
+        cls,
+        data: list[RawDocument],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader,
+        power_loader: AsyncDataLoader,
+        rec_depth: int = 0,
+    ) -> list[CharacterType]:
+        """
+        A supportive method used for CharacterType objects creation.
+        Processes all sibling characters of the same depth at once,
+        powers and enemies of the level are fetched concurrently.
+        Deferred enemies are fetched when the executor awaits them.
+
+        :param data: List of raw character documents from MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of composed CharacterType objects, in the same
+                 order as provided data.
+        """
+        if not data:
+            return []
+
+        fetches = cls._get_relation_fetches(
+            data, selected_fields, character_loader, power_loader, rec_depth,
+        )
+        fetched = await asyncio.gather(*(
+            fetch() for fetch, deferred in fetches
+            if fetch is not None and not deferred
+        ))
+        return create_characters(data, fetches, fetched)
+
+    @classmethod
+    async def _fetch_powers(
+        cls,
+        power_ids: list[list[str]],
+        selected_fields: list[SelectedField],
+        power_loader: AsyncDataLoader,
+    ) -> list[list[PowerType]]:
+        """
+        A supportive method used for fetching powers of sibling
+        characters with a single batch.
+
+        :param power_ids: List of power ObjectID lists, one list per
+                          sibling character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                powers via GraphQL query.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+
+        :return: List of PowerType lists, aligned with power_ids.
+        """
+        unique_ids = get_unique_ids(power_ids)
+        projection = cls._get_loader_projection(selected_fields)
+        powers = await power_loader.load_many(
+            (id, projection) for id in unique_ids
+        )
+        return map_powers(power_ids, unique_ids, powers)
+
+    @classmethod
+    async def _fetch_enemies(
+        cls,
+        enemy_ids: list[list[str]],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader,
+        power_loader: AsyncDataLoader,
+        rec_depth: int,
+    ) -> list[list[CharacterType]]:
+        """
+        A supportive method used for fetching enemies data of sibling
+        characters and creating CharacterType objects from fetched data.
+        Every unique enemy is fetched and assembled only once.
+
+        :param enemy_ids: List of enemy ObjectID lists, one list per
+                          sibling character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of CharacterType lists, aligned with enemy_ids.
+        """
+        unique_ids = get_unique_ids(enemy_ids)
+        projection = cls._get_loader_projection(selected_fields)
+        enemies_data = [entry for entry in await character_loader.load_many(
+            (id, projection) for id in unique_ids) if entry]
+
+        assembled = await cls._assemble_characters(
+            enemies_data,
+            selected_fields,
+            character_loader,
+            power_loader,
+            rec_depth,
+        )
+        return map_enemies(enemy_ids, assembled)
+
+    @classmethod
+    async def _fetch_enemy_of(
+        cls,
+        ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader,
+        power_loader: AsyncDataLoader,
+        rec_depth: int,
+    ) -> list[list[CharacterType]]:
+        """
+        A supportive method used for fetching characters listing
+        sibling characters as enemies, with a single indexed query,
+        and creating CharacterType objects from fetched data.
+
+        :param ids: ObjectIDs of sibling characters.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+        :param rec_depth: Recursion depth flag, used to control
+                          self-referensing fields and overal query depth.
+
+        :return: List of CharacterType lists, aligned with ids.
+        """
+        only = utils.get_projection(selected_fields)
+        data = await cls.dao.get_many_by_reference('enemies', ids, only)
+        prime_loader(character_loader, data, only)
+
+        assembled = await cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader, rec_depth,
+        )
+        return map_enemy_of(ids, data, assembled)
+
+    @classmethod
+    async def get_many_by_power(
+        cls,
+        power_id: str,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[CharacterType]:
+        """
+        Create CharacterTypes for all characters with a power, fetched
+        with a single query backed by the index of character powers.
+
+        :param power_id: ObjectID of a power document in MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes. List will be empty if
+                 no character has the power.
+        """
+        only = utils.get_projection(selected_fields)
+        data = await cls.dao.get_many_by_reference('powers', [power_id], only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, only)
+
+        characters = await cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader,
+        )
+        return characters
+
+    @classmethod
+    async def build_autocomplete_index(cls) -> PrefixIndex:
+        """
+        Build the autocomplete index from all character documents,
+        e.g. at startup.
+
+        :return: Built index.
+        """
+        index = get_prefix_index(Character, AUTOCOMPLETE_FIELDS)
+        data = await cls.dao.get_all(list(AUTOCOMPLETE_FIELDS))
+        build_prefix_index(index, data)
+        return index
+
+    @classmethod
+    async def autocomplete(
+        cls, prefix: str, limit: int = AUTOCOMPLETE_DEFAULT_LIMIT
+    ) -> list[CharacterSuggestion]:
+        """
+        Find characters by a prefix of their alias, name or a word of
+        them. The index is built on the first call, if it wasn't built
+        at startup, and characters written since the last call are
+        refreshed with a single query. Otherwise no query is sent.
+
+        :param prefix: Prefix to match, case-insensitively.
+        :param limit: Maximum number of suggestions, limited by
+                      AUTOCOMPLETE_MAX_LIMIT.
+
+        :return: List of CharacterSuggestions, aliases first.
+
+        :raise ValueError: Raised if the limit is negative.
+        """
+        index = get_prefix_index(Character, AUTOCOMPLETE_FIELDS)
+        if not index.built:
+            await cls.build_autocomplete_index()
+
+        await cls._refresh_index(
+            index, list(AUTOCOMPLETE_FIELDS), update_prefix_index,
+        )
+        return create_suggestions(index, prefix, limit)
+
+    @classmethod
+    async def _refresh_index(
+        cls,
+        index: PrefixIndex | GraphIndex | InvertedIndex,
+        only: list[str],
+        update: Callable[[Any, list[str], list[RawDocument]], None],
+    ):
+        """
+        A supportive method refreshing characters written since the
+        last lookup of an in-process index, with a single query.
+        Characters stay marked stale if the query fails.
+
+        :param index: Built in-process index.
+        :param only: Indexed character fields.
+        :param update: Method applying refreshed documents to
+                       the index, called with the index, IDs of
+                       refreshed characters and documents found.
+        """
+        stale = index.pop_stale()
+        if stale:
+            try:
+                data = await cls.dao.get_many_by_ids(stale, only)
+            except PyMongoError:
+                index.mark_stale(stale)
+                raise
+            update(index, stale, data)
+
+    @classmethod
+    async def _assemble_by_ids(
+        cls,
+        ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None,
+        power_loader: AsyncDataLoader | None,
+    ) -> dict[str, CharacterType]:
+        """
+        A supportive method creating CharacterTypes of characters
+        found by an in-process index, fetched with a single query.
+
+        :param ids: IDs of the characters.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: CharacterTypes keyed by ID, in order of the IDs.
+                 Characters that were not found are missing.
+        """
+        if not ids:
+            return dict()
+        only = utils.get_projection(selected_fields)
+        data = await cls.dao.get_many_by_ids(ids, only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, only)
+
+        characters = await cls._assemble_characters(
+            data, selected_fields, character_loader, power_loader,
+        )
+        return map_by_ids(ids, data, characters)
+
+    @classmethod
+    async def build_enemy_index(cls) -> GraphIndex:
+        """
+        Build the enemy graph index, e.g. at startup. An index saved
+        to ENEMY_INDEX_FILE is memory-mapped if it is recent enough
+        and enemy references weren't changed since, otherwise
+        the index is built from all character documents and saved.
+
+        :return: Built index.
+        """
+        index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+        # Taken first, so the saved index is never older than it
+        version = await cls.dao.get_reference_version(ENEMY_INDEX_FIELD) \
+            if ENEMY_INDEX_FILE else ''
+        if await asyncio.to_thread(
+            load_index_file,
+            index,
+            ENEMY_INDEX_FILE,
+            ENEMY_INDEX_MAX_AGE,
+            version,
+        ):
+            return index
+        data = await cls.dao.get_all([ENEMY_INDEX_FIELD])
+        build_reference_index(index, data, ENEMY_INDEX_FIELD)
+        await asyncio.to_thread(
+            save_index_file, index, ENEMY_INDEX_FILE, version,
+        )
+        return index
+
+    @classmethod
+    async def _get_enemy_index(cls) -> GraphIndex:
+        """
+        A supportive method getting the up-to-date enemy graph index.
+        The index is built on the first call, if it wasn't built at
+        startup, and characters written since the last call are
+        refreshed with a single query. The index is saved again
+        when refreshed references were merged into its arrays.
+
+        :return: Enemy graph index.
+        """
+        index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+        if not index.built:
+            await cls.build_enemy_index()
+        update = partial(
+            update_reference_index, field=ENEMY_INDEX_FIELD,
+        )
+        compactions = index.compactions
+        await cls._refresh_index(index, [ENEMY_INDEX_FIELD], update)
+        if ENEMY_INDEX_FILE and index.compactions != compactions:
+            # Taken before refreshing characters written meanwhile,
+            # so the saved index is never older than it
+            version = await cls.dao.get_reference_version(
+                ENEMY_INDEX_FIELD,
+            )
+            await cls._refresh_index(index, [ENEMY_INDEX_FIELD], update)
+            await asyncio.to_thread(
+            save_index_file, index, ENEMY_INDEX_FILE, version,
+        )
+        return index
+
+    @classmethod
+    async def get_enemy_path(
+        cls,
+        from_id: str,
+        to_id: str,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[CharacterType] | None:
+        """
+        Find a shortest chain of enemies leading from one character
+        to another (each character lists the next one as an enemy).
+        The chain is found by the enemy graph index, only its
+        characters are fetched. A chain through characters missing
+        in the database (e.g. with a stale index) is searched again
+        without them.
+
+        :param from_id: ObjectID of the first character.
+        :param to_id: ObjectID of the last character.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes along the chain, both ends
+                 included, or None if there is no chain or one of
+                 the characters doesn't exist.
+        """
+        # A path through characters missing in the database is
+        # searched again, once they are removed from the index
+        for _ in range(ENEMY_PATH_ATTEMPTS):
+            index = await cls._get_enemy_index()
+            path = index.shortest_path(from_id, to_id)
+            if path is None:
+                return None
+            characters = create_path(path, await cls._assemble_by_ids(
+                path, selected_fields, character_loader, power_loader,
+            ))
+            if characters is not None:
+                return characters
+        return None
+
+    @classmethod
+    async def get_enemy_neighborhood(
+        cls,
+        id: str,
+        hops: int,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[EnemyNeighbor]:
+        """
+        Find characters reachable from a character through a limited
+        number of enemy references (enemies, their enemies etc.).
+        Characters are found by the enemy graph index, only the found
+        ones are fetched.
+
+        :param id: ObjectID of the character.
+        :param hops: Maximum number of enemy references, limited by
+                     ENEMY_NEIGHBORHOOD_MAX_HOPS.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                EnemyNeighbors via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of EnemyNeighbors, the nearest first. The list is
+                 empty if the character doesn't exist.
+
+        :raise ValueError: Raised if the number of hops is negative.
+        """
+        hops = get_hops(hops)
+        index = await cls._get_enemy_index()
+        found = index.neighborhood(id, hops)
+        characters = await cls._assemble_by_ids(
+            [id for id, _ in found],
+            utils.get_nested_fields(selected_fields, 'character'),
+            character_loader,
+            power_loader,
+        )
+        return create_neighbors(found, characters)
+
+    @classmethod
+    async def build_power_index(cls) -> InvertedIndex:
+        """
+        Build the power index (characters by their powers) from all
+        character documents, e.g. at startup.
+
+        :return: Built index.
+        """
+        index = get_inverted_index(Character, POWER_INDEX_FIELD)
+        data = await cls.dao.get_all([POWER_INDEX_FIELD])
+        build_reference_index(index, data, POWER_INDEX_FIELD)
+        return index
+
+    @classmethod
+    async def _get_power_index(cls) -> InvertedIndex:
+        """
+        A supportive method getting the up-to-date power index.
+        The index is built on the first call, if it wasn't built at
+        startup, and characters written since the last call are
+        refreshed with a single query.
+
+        :return: Power index.
+        """
+        index = get_inverted_index(Character, POWER_INDEX_FIELD)
+        if not index.built:
+            await cls.build_power_index()
+        await cls._refresh_index(index, [POWER_INDEX_FIELD], partial(
+            update_reference_index, field=POWER_INDEX_FIELD,
+        ))
+        return index
+
+    @classmethod
+    async def get_many_sharing_powers(
+        cls,
+        id: str,
+        min_shared: int,
+        limit: int,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[SimilarCharacter]:
+        """
+        Find characters sharing at least a number of powers with
+        a character. Characters are found by the power index, only
+        the found ones are fetched.
+
+        :param id: ObjectID of the character.
+        :param min_shared: Minimum number of shared powers.
+        :param limit: Maximum number of characters, limited by
+                      MAX_PAGE_SIZE.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                SimilarCharacters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of SimilarCharacters, the most shared powers
+                 first. The list is empty if the character doesn't
+                 exist.
+
+        :raise ValueError: Raised if the minimum is not positive or
+                           the limit is negative.
+        """
+        found = find_sharing_powers(
+            await cls._get_power_index(), id, min_shared, limit,
+        )
+        characters = await cls._assemble_by_ids(
+            [id for id, _ in found],
+            utils.get_nested_fields(selected_fields, 'character'),
+            character_loader,
+            power_loader,
+        )
+        return create_similar_characters(found, characters)
+
+    @classmethod
+    async def get_many_with_all_powers(
+        cls,
+        power_ids: list[str],
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[CharacterType]:
+        """
+        Find characters having all of the powers. Characters are found
+        by intersecting posting lists of the power index, only the
+        found ones are fetched.
+
+        :param power_ids: ObjectIDs of power documents in MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                characters via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes. List will be empty if no
+                 power is given or no character has all of them.
+        """
+        index = await cls._get_power_index()
+        characters = await cls._assemble_by_ids(
+            index.find_all(power_ids),
+            selected_fields,
+            character_loader,
+            power_loader,
+        )
+        return list(characters.values())
+
+    @classmethod
+    async def get_stats(cls) -> CharacterStats:
+        """
+        Create statistics of all characters: their number per role
+        and the average and maximum numbers of their powers and
+        enemies. The numbers are computed by the database with
+        a single aggregation, so no character document is transferred.
+
+        :return: CharacterStats object.
+        """
+        return create_character_stats(await cls.dao.get_role_stats())
+
+    @classmethod
+    async def get_power_stats(
+        cls, limit: int = POWER_STATS_DEFAULT_LIMIT
+    ) -> list[PowerStats]:
+        """
+        Create statistics of the most common powers of characters.
+        Holders are counted by the database with a single aggregation,
+        powers are then fetched by their IDs.
+
+        :param limit: Maximum number of powers, limited by
+                      MAX_PAGE_SIZE.
+
+        :return: List of PowerStats, the most common powers first.
+
+        :raise ValueError: Raised if the limit is negative.
+        """
+        limit = get_limit(limit)
+        if not limit:
+            return []
+
+        data = await cls.dao.get_power_stats(limit)
+        powers = await cls.power_handler.get_many_by_ids(
+            [entry['_id'] for entry in data],
+        )
+        return create_power_stats(data, powers)
+
+    @classmethod
+    async def _assemble_edges(
+        cls,
+        data: list[RawDocument],
+        cursors: list[str],
+        node_fields: list[SelectedField],
+        character_loader: AsyncDataLoader,
+        power_loader: AsyncDataLoader,
+    ) -> list[CharacterEdge]:
+        """
+        A supportive method used to assemble a batch of streamed edges.
+
+        :param data: Raw character documents of the batch.
+        :param cursors: Cursors aligned with data.
+        :param node_fields: Fields selected for the nodes.
+        :param character_loader: Request-scoped DataLoader
+                                 for character documents.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+
+        :return: List of CharacterEdges, aligned with data.
+        """
+        return create_edges(await cls._assemble_characters(
+            data, node_fields, character_loader, power_loader,
+        ), cursors)
+
+    @classmethod
+    async def get_one_by_id(
+        cls,
+        id: str,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> CharacterType | None:
+        """
+        Create a CharacterType from MongoDB character document
+        fetched by provided ID.
+
+        :param id: ObjectID of a character document in MongoDB.
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: CharacterType or None if there is no document
+                 with provided ID.
+        """
+        only = utils.get_projection(selected_fields)
+        depth, with_powers = get_graph_selection(selected_fields)
+        if depth:
+            data = await cls.dao.get_enemy_graph(id, depth, with_powers)
+        else:
+            data = await cls.dao.get_one_by_id(id, only)
+        if not data:
+            return None
+
+        character_loader = character_loader or cls.create_character_loader()
+        prime_loader(character_loader, [data], only)
+
+        characters = await cls._assemble_characters(
+            [data],
+            selected_fields,
+            character_loader,
+            power_loader or cls.create_power_loader(),
+        )
+        return characters[0]
+
+    @classmethod
+    async def get_all(
+        cls,
+        selected_fields: list[SelectedField],
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+    ) -> list[CharacterType]:
+        """
+        Create CharacterType for every character document in MongoDB.
+
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                character via GraphQL query.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+
+        :return: List of CharacterTypes. List will be empty if
+                 there are no character documents.
+        """
+        only = utils.get_projection(selected_fields)
+        data = await cls.dao.get_all(only)
+
+        character_loader = character_loader or cls.create_character_loader()
+        prime_loader(character_loader, data, only)
+
+        characters = await cls._assemble_characters(
+            data,
+            selected_fields,
+            character_loader,
+            power_loader or cls.create_power_loader(),
+        )
+        return characters
+
+    @classmethod
+    async def get_page(
+        cls,
+        selected_fields: list[SelectedField],
+        first: int | None = None,
+        after: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+        character_loader: AsyncDataLoader | None = None,
+        power_loader: AsyncDataLoader | None = None,
+        filter: CharacterFilter | None = None,
+        order_by: CharacterOrder | None = None,
+    ) -> CharacterConnection:
+        """
+        Create a CharacterConnection for a page of character documents.
+        The page and the total count are fetched concurrently.
+
+        :param selected_fields: List of strawberry type SelectedField,
+                                representing fields selected for the
+                                connection via GraphQL query.
+        :param first: Number of characters after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of characters before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param character_loader: Request-scoped DataLoader for
+                                 character documents. A new one is
+                                 created if not provided.
+        :param power_loader: Request-scoped DataLoader for PowerTypes.
+                             A new one is created if not provided.
+        :param filter: Conditions the characters have to match.
+        :param order_by: Ordering of the characters, ascending ID
+                         if not provided.
+
+        :return: CharacterConnection object.
+
+        :raise ValueError: Raised for invalid pagination arguments.
+        """
+        query = get_page_query(
+            selected_fields, first, after, last, before, filter, order_by,
+        )
+
+        async def no_total() -> None:
+            return None
+
+        data, total_count = await asyncio.gather(
+            cls.dao.get_page(
+                query.limit + 1,
+                query.after_id,
+                query.before_id,
+                query.reverse,
+                query.only,
+                query.filters,
+                query.order,
+            ),
+            cls.dao.get_count(query.filters) if query.with_total
+            else no_total(),
+        )
+
+        data, has_more = utils.trim_page(data, query.limit, query.reverse)
+
+        character_loader = character_loader or cls.create_character_loader()
+        power_loader = power_loader or cls.create_power_loader()
+        prime_loader(character_loader, data, query.only)
+
+        cursors = create_cursors(data, query.order[0])
+        if query.initial_count is not None:
+            edges = stream_edges(data, cursors, partial(
+                cls._assemble_edges,
+                node_fields=query.node_fields,
+                character_loader=character_loader,
+                power_loader=power_loader,
+            ), query.initial_count)
+        else:
+            edges = await cls._assemble_edges(
+                data,
+                cursors,
+                query.node_fields,
+                character_loader,
+                power_loader,
+            )
+        return create_connection(
+            cursors,
+            edges,
+            has_more,
+            query.reverse,
+            after,
+            before,
+            total_count,
+        )
+
+    @classmethod
+    async def _get_existing_references(
+        cls, references: dict[str, set]
+    ) -> dict[str, set]:
+        """
+        A supportive method checking references of a whole batch,
+        referenced models are queried concurrently.
+
+        :param references: Referenced IDs keyed by reference field name.
+
+        :return: IDs of existing referenced documents keyed by
+                 reference field name.
+        """
+        powers, enemies = await asyncio.gather(
+            cls.power_handler.dao.get_existing_ids(
+                list(references['powers'])
+            ),
+            cls.dao.get_existing_ids(list(references['enemies'])),
+        )
+        return {'powers': powers, 'enemies': enemies}
+
+    @classmethod
+    async def create_many(
+        cls, characters: list[CharacterInput]
+    ) -> BatchResult:
+        """
+        Create characters with a single bulk write. References of
+        the whole batch are checked with one query per referenced
+        model, invalid items are reported without being written.
+
+        :param characters: Inputs of new characters.
+
+        :return: BatchResult with a result per character.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        batch, references = prepare_batch(characters)
+        existing = await cls._get_existing_references(references)
+
+        errors = check_batch(batch, existing, False)
+        written = await cls.dao.bulk_insert(
+            get_new_documents(batch, errors),
+        )
+        return utils.create_batch_result(errors, written)
+
+    @classmethod
+    async def update_many(
+        cls, characters: list[CharacterUpdateInput]
+    ) -> BatchResult:
+        """
+        Update characters with a single bulk write. Only provided
+        fields are changed. References of the whole batch are checked
+        with one query per referenced model.
+
+        :param characters: Changes of existing characters.
+
+        :return: BatchResult with a result per character.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        batch, references = prepare_batch(characters)
+        existing = await cls._get_existing_references(references)
+
+        errors = check_batch(batch, existing, True)
+        written = await cls.dao.bulk_update(
+            get_changed_documents(characters, batch, errors),
+        )
+        return utils.create_batch_result(errors, written)
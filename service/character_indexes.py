@@ -0,0 +1,316 @@
+"""
+character_indexes.py
+
+This module provides supportive functions maintaining and querying
+the in-process character indexes, shared by CharacterHandler and
+AsyncCharacterHandler. None of them sends a query, handlers fetch
+the documents and pass them in.
+
+The autocomplete index (see prefix_index.py) holds aliases and names,
+the enemy graph index (see graph_index.py) and the power index (see
+inverted_index.py) hold references of every character. Indexes are
+built from all character documents and refreshed with documents of
+characters written since the last lookup. A graph index can be saved
+to a file and memory-mapped from it, if the file is recent enough and
+was saved with the current version of the indexed references.
+
+Results found by the indexes are turned into GraphQL types here as
+well, characters that were not fetched are skipped.
+"""
+
+
+from typing import Any
+
+from gql.types.character_types import (
+    CharacterSuggestion,
+    CharacterType,
+    EnemyNeighbor,
+    SimilarCharacter,
+)
+from service.character_stats import get_limit
+from data_access.graph_index import GraphIndex, get_graph_index, is_file_fresh
+from data_access.inverted_index import InvertedIndex
+from data_access.models import Character, RawDocument
+from data_access.prefix_index import PrefixIndex
+from logger import CustomLogger
+from settings import AUTOCOMPLETE_MAX_LIMIT, ENEMY_NEIGHBORHOOD_MAX_HOPS
+
+
+logger = CustomLogger('service.character_indexes')
+
+# Character fields of the autocomplete index, in order of ranking
+AUTOCOMPLETE_FIELDS = ('alias', 'name')
+# Character field of the enemy graph index
+ENEMY_INDEX_FIELD = 'enemies'
+# Number of searches of an enemy path through missing characters
+ENEMY_PATH_ATTEMPTS = 2
+# Character field of the power index
+POWER_INDEX_FIELD = 'powers'
+
+
+def get_index_values(entry: RawDocument) -> tuple[str | None, ...]:
+    """
+    Extract values of the autocomplete index from a character
+    document.
+
+    :param entry: Raw character document.
+
+    :return: Values aligned with AUTOCOMPLETE_FIELDS.
+    """
+    return tuple(
+        entry.get(Character._fields[field].db_field)
+        for field in AUTOCOMPLETE_FIELDS
+    )
+
+
+def build_prefix_index(index: PrefixIndex, data: list[RawDocument]):
+    """
+    Replace the autocomplete index with values of all character
+    documents.
+
+    :param index: Autocomplete index.
+    :param data: Raw documents of all characters.
+    """
+    index.build((entry.id, get_index_values(entry)) for entry in data)
+
+
+def update_prefix_index(
+    index: PrefixIndex, ids: list[str], data: list[RawDocument]
+):
+    """
+    Apply refreshed character documents to the autocomplete index.
+    Characters that were not found are removed.
+
+    :param index: Autocomplete index.
+    :param ids: IDs of refreshed characters.
+    :param data: Raw character documents found for the IDs.
+    """
+    found = set()
+    for entry in data:
+        index.put(entry.id, get_index_values(entry))
+        found.add(str(entry.id))
+    for id in ids:
+        if id not in found:
+            index.remove(id)
+
+
+def create_suggestions(
+    index: PrefixIndex, prefix: str, limit: int
+) -> list[CharacterSuggestion]:
+    """
+    Create CharacterSuggestion objects.
+
+    :param index: Up-to-date autocomplete index.
+    :param prefix: Prefix of an alias or a name.
+    :param limit: Maximum number of suggestions.
+
+    :return: List of ranked CharacterSuggestions.
+
+    :raise ValueError: Raised if the limit is negative.
+    """
+    if limit < 0:
+        raise ValueError('"limit" must not be negative.')
+    return [
+        CharacterSuggestion(
+            id=suggestion.id,
+            alias=suggestion.values[0],
+            name=suggestion.values[1],
+        )
+        for suggestion in index.search(
+            prefix, min(limit, AUTOCOMPLETE_MAX_LIMIT),
+        )
+    ]
+
+
+def get_indexed_references(entry: RawDocument, field: str) -> list[Any]:
+    """
+    Extract references of an in-process reference index from a
+    character document.
+
+    :param entry: Raw character document.
+    :param field: Indexed reference field (e.g. 'enemies').
+
+    :return: List of referenced IDs.
+    """
+    return entry.get(Character._fields[field].db_field) or []
+
+
+def build_reference_index(
+    index: GraphIndex | InvertedIndex,
+    data: list[RawDocument],
+    field: str,
+):
+    """
+    Replace an in-process reference index with references of all
+    character documents.
+
+    :param index: Enemy graph index or power index.
+    :param data: Raw documents of all characters.
+    :param field: Indexed reference field.
+    """
+    index.build(
+        (entry.id, get_indexed_references(entry, field))
+        for entry in data
+    )
+
+
+def update_reference_index(
+    index: GraphIndex | InvertedIndex,
+    ids: list[str],
+    data: list[RawDocument],
+    field: str,
+):
+    """
+    Apply refreshed character documents to an in-process reference
+    index. Characters that were not found are removed.
+
+    :param index: Enemy graph index or power index.
+    :param ids: IDs of refreshed characters.
+    :param data: Raw character documents found for the IDs.
+    :param field: Indexed reference field.
+    """
+    found = set()
+    for entry in data:
+        index.put(entry.id, get_indexed_references(entry, field))
+        found.add(str(entry.id))
+    for id in ids:
+        if id not in found:
+            index.remove(id)
+
+
+def create_path(
+    path: list[str], characters: dict[str, CharacterType]
+) -> list[CharacterType] | None:
+    """
+    Check that all characters along an enemy path were found.
+    Missing characters are marked stale in the enemy graph index, so
+    they are removed from the index before the next search.
+
+    :param path: IDs of characters along the path.
+    :param characters: CharacterTypes found, keyed by ID.
+
+    :return: CharacterTypes along the path, or None if one of
+             the characters is missing.
+    """
+    missing = [id for id in path if id not in characters]
+    if missing:
+        get_graph_index(Character, ENEMY_INDEX_FIELD).mark_stale(missing)
+        return None
+    return [characters[id] for id in path]
+
+
+def load_index_file(
+    index: GraphIndex, path: str, max_age: float, version: str
+) -> bool:
+    """
+    Memory-map a graph index saved to a file, unless the file is
+    older than max_age or it was saved with another version.
+
+    :param index: Graph index to load into.
+    :param path: Path of the index file, empty if the index is not
+                 saved.
+    :param max_age: Maximum age of the file in seconds.
+    :param version: Current version of the indexed references.
+
+    :return: True if the index was loaded.
+    """
+    if not path or not is_file_fresh(path, max_age, version):
+        return False
+    try:
+        index.load(path)
+    except (OSError, ValueError):
+        logger.log_error(f'Failed to load the graph index file {path}')
+        return False
+    return True
+
+
+def save_index_file(index: GraphIndex, path: str, version: str):
+    """
+    Save a graph index to a file, if the path is set.
+
+    :param index: Built graph index.
+    :param path: Path of the index file, empty if the index is not
+                 saved.
+    :param version: Version of the indexed references the index is
+                    not older than.
+    """
+    if not path:
+        return
+    try:
+        index.save(path, version)
+    except OSError:
+        logger.log_error(f'Failed to save the graph index file {path}')
+
+
+def get_hops(hops: int) -> int:
+    """
+    Validate the number of hops of an enemy neighborhood.
+
+    :param hops: Requested number of hops.
+
+    :return: Number of hops, limited by ENEMY_NEIGHBORHOOD_MAX_HOPS.
+
+    :raise ValueError: Raised if the number is negative.
+    """
+    if hops < 0:
+        raise ValueError('"hops" must not be negative.')
+    return min(hops, ENEMY_NEIGHBORHOOD_MAX_HOPS)
+
+
+def create_neighbors(
+    found: list[tuple[str, int]],
+    characters: dict[str, CharacterType],
+) -> list[EnemyNeighbor]:
+    """
+    Create EnemyNeighbor objects.
+
+    :param found: Pairs of character IDs and their distances.
+    :param characters: CharacterTypes keyed by ID.
+
+    :return: List of EnemyNeighbors, characters that were not
+             found are skipped.
+    """
+    return [EnemyNeighbor(hops=hops, character=characters[id])
+            for id, hops in found if id in characters]
+
+
+def create_similar_characters(
+    found: list[tuple[str, int]],
+    characters: dict[str, CharacterType],
+) -> list[SimilarCharacter]:
+    """
+    Create SimilarCharacter objects.
+
+    :param found: Pairs of character IDs and numbers of shared
+                  powers.
+    :param characters: CharacterTypes keyed by ID.
+
+    :return: List of SimilarCharacters, characters that were not
+             found are skipped.
+    """
+    return [SimilarCharacter(shared_powers=shared, character=characters[id])
+            for id, shared in found if id in characters]
+
+
+def find_sharing_powers(
+    index: InvertedIndex, id: str, min_shared: int, limit: int
+) -> list[tuple[str, int]]:
+    """
+    Validate arguments of a shared powers lookup and find the
+    characters.
+
+    :param index: Up-to-date power index.
+    :param id: ObjectID of the character.
+    :param min_shared: Minimum number of shared powers.
+    :param limit: Maximum number of characters, limited by
+                  MAX_PAGE_SIZE.
+
+    :return: Pairs of character IDs and numbers of shared powers.
+
+    :raise ValueError: Raised if the minimum is not positive or
+                       the limit is negative.
+    """
+    if min_shared < 1:
+        raise ValueError('"minShared" must be positive.')
+    limit = get_limit(limit)
+    return index.find_sharing(id, min_shared, limit)
@@ -0,0 +1,293 @@
+"""
+character_pages.py
+
+This module provides supportive functions of character pagination,
+shared by CharacterHandler and AsyncCharacterHandler. Arguments of
+a connection field are turned into the arguments of a single keyset
+query, fetched documents of the page into cursors, edges and
+the CharacterConnection.
+
+Edges of streamed pages (@stream) are assembled lazily in batches by
+a function of the handler, the initial ones before the initial
+response.
+"""
+
+
+from functools import partial
+from typing import Any, Callable, NamedTuple
+
+from strawberry.types.nodes import SelectedField
+
+from gql.types.character_types import (
+    CharacterConnection,
+    CharacterEdge,
+    CharacterFilter,
+    CharacterOrder,
+    CharacterType,
+)
+from data_access.models import Character, RawDocument
+from logger import CustomLogger
+from utils import utils
+from settings import STREAM_BATCH_SIZE
+
+
+logger = CustomLogger('service.character_pages')
+
+
+class PageQuery(NamedTuple):
+    """
+    Arguments of a page query, derived from the arguments and
+    the selection of a connection field.
+
+    Attributes:
+        filters: Filter values keyed by DAO filter keys.
+        order: A pair of the ordering model field and direction.
+        limit: Page size.
+        after_id: Decoded 'after' position, None if not provided.
+        before_id: Decoded 'before' position, None if not provided.
+        reverse: Whether the page is taken from the end.
+        node_fields: Fields selected for the nodes.
+        only: Projection of the nodes.
+        with_total: Whether the total count is requested.
+        initial_count: Initial count of streamed edges, None if
+                       edges are not streamed.
+    """
+    filters: dict[str, Any]
+    order: tuple[str, int]
+    limit: int
+    after_id: Any
+    before_id: Any
+    reverse: bool
+    node_fields: list[SelectedField]
+    only: list[str] | None
+    with_total: bool
+    initial_count: int | None
+
+
+def get_page_selection(
+    selected_fields: list[SelectedField]
+) -> tuple[list[SelectedField], list[str] | None, bool, int | None]:
+    """
+    Process the selection of a connection field.
+
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            connection via GraphQL query.
+
+    :return: A tuple of the node selection, node projection,
+             a flag whether the total count is requested and
+             the initial count of streamed edges (None if edges
+             are not streamed).
+    """
+    try:
+        node_fields = utils.get_connection_node_fields(selected_fields)
+    except (AttributeError, TypeError):
+        logger.log_error('Failed to process selected fields')
+        node_fields = []
+
+    # Only cursors are needed, if no node fields are requested.
+    only = utils.get_projection(node_fields) if node_fields else ['id']
+    with_total = utils.is_field_selected(selected_fields, 'totalCount')
+    initial_count = utils.get_stream_initial_count(
+        selected_fields, 'edges',
+    )
+    return node_fields, only, with_total, initial_count
+
+
+def get_filters(filter: CharacterFilter | None) -> dict[str, Any]:
+    """
+    Map a character filter to DAO filters.
+
+    :param filter: Character filter of the query, None for
+                   no filter.
+
+    :return: Filter values keyed by DAO filter keys, unset
+             conditions are left out.
+    """
+    if filter is None:
+        return dict()
+    filters = {
+        'role': filter.role.value if filter.role else None,
+        'alias': filter.alias,
+        'alias__prefix': filter.alias_prefix,
+        'name': filter.name,
+        'name__prefix': filter.name_prefix,
+        'powers': filter.has_power,
+        'enemies': filter.has_enemy,
+    }
+    return {key: value for key, value in filters.items()
+            if value is not None}
+
+
+def get_order(order_by: CharacterOrder | None) -> tuple[str, int]:
+    """
+    Map a character ordering to the DAO ordering.
+
+    :param order_by: Ordering of the query, None for ascending ID.
+
+    :return: A pair of the ordering model field and direction.
+    """
+    if order_by is None:
+        return 'id', 1
+    return order_by.field.value, order_by.direction.value
+
+
+def get_page_query(
+    selected_fields: list[SelectedField],
+    first: int | None,
+    after: str | None,
+    last: int | None,
+    before: str | None,
+    filter: CharacterFilter | None,
+    order_by: CharacterOrder | None,
+) -> PageQuery:
+    """
+    Validate the arguments of a connection field and derive
+    the arguments of its page query.
+
+    :param selected_fields: List of strawberry type SelectedField,
+                            representing fields selected for the
+                            connection via GraphQL query.
+    :param first: Number of characters after the 'after' cursor.
+    :param after: Cursor to paginate forward from.
+    :param last: Number of characters before the 'before' cursor.
+    :param before: Cursor to paginate backward from.
+    :param filter: Conditions the characters have to match.
+    :param order_by: Ordering of the characters, ascending ID
+                     if not provided.
+
+    :return: PageQuery of the page.
+
+    :raise ValueError: Raised for invalid pagination arguments.
+    """
+    filters = get_filters(filter)
+    order = get_order(order_by)
+    limit, after_id, before_id, reverse = utils.get_page_args(
+        first, after, last, before,
+        None if order[0] == 'id' else order[0],
+    )
+    node_fields, only, with_total, initial_count = get_page_selection(
+        selected_fields,
+    )
+    return PageQuery(
+        filters,
+        order,
+        limit,
+        after_id,
+        before_id,
+        reverse,
+        node_fields,
+        only,
+        with_total,
+        initial_count,
+    )
+
+
+def create_cursors(data: list[RawDocument], field: str) -> list[str]:
+    """
+    Create cursors. Pages ordered by a field other than the ID get
+    cursors holding the value of the field.
+
+    :param data: Raw character documents of the page,
+                 in output order.
+    :param field: Ordering model field of the page.
+
+    :return: List of cursors, aligned with data.
+    """
+    if field == 'id':
+        return [utils.encode_cursor(entry.id) for entry in data]
+    db_field = Character._fields[field].db_field
+    return [
+        utils.encode_keyset_cursor(field, entry.get(db_field), entry.id)
+        for entry in data
+    ]
+
+
+def create_edges(
+    characters: list[CharacterType], cursors: list[str]
+) -> list[CharacterEdge]:
+    """
+    Create CharacterEdge objects.
+
+    :param characters: Assembled characters, in output order.
+    :param cursors: Cursors aligned with characters.
+
+    :return: List of CharacterEdges.
+    """
+    return [
+        CharacterEdge(cursor=cursor, node=character)
+        for character, cursor in zip(characters, cursors)
+    ]
+
+
+def stream_edges(
+    data: list[RawDocument],
+    cursors: list[str],
+    assemble: Callable[[list[RawDocument], list[str]], Any],
+    initial_count: int,
+) -> list[utils.DeferredItem]:
+    """
+    Assemble edges of a streamed page lazily. The first
+    'initial_count' edges form the first batch, the rest are split
+    into batches of STREAM_BATCH_SIZE. Every batch is assembled at
+    once, when the executor awaits its first edge, so later batches
+    are assembled while earlier ones are already sent.
+
+    :param data: Raw character documents of the page.
+    :param cursors: Cursors aligned with data.
+    :param assemble: Function (or coroutine function) assembling
+                     edges of a batch, called with its documents
+                     and cursors.
+    :param initial_count: Number of edges of the initial response.
+
+    :return: List of awaitable edges, aligned with data.
+    """
+    edges = []
+    start = 0
+    while start < len(data):
+        size = initial_count if start == 0 and initial_count \
+            else STREAM_BATCH_SIZE
+        batch = data[start:start+size]
+        edges.extend(utils.DeferredBatch(partial(
+            assemble, batch, cursors[start:start+size],
+        )).items(len(batch)))
+        start += len(batch)
+    return edges
+
+
+def create_connection(
+    cursors: list[str],
+    edges: list[CharacterEdge] | list[utils.DeferredItem],
+    has_more: bool,
+    reverse: bool,
+    after: str | None,
+    before: str | None,
+    total_count: int | None,
+) -> CharacterConnection:
+    """
+    Create a CharacterConnection object.
+
+    :param cursors: Cursors of the page, in output order.
+    :param edges: Assembled edges (or awaitable edges of a streamed
+                  page), aligned with cursors.
+    :param has_more: Whether there are more characters in the
+                     pagination direction.
+    :param reverse: Whether the page is taken from the end.
+    :param after: The 'after' cursor of the request.
+    :param before: The 'before' cursor of the request.
+    :param total_count: Number of matching characters.
+
+    :return: Composed CharacterConnection object.
+    """
+    connection = CharacterConnection(
+        edges=edges,
+        page_info=utils.create_page_info(
+            cursors,
+            has_more,
+            reverse,
+            after,
+            before,
+        ),
+        total_count=total_count,
+    )
+    return connection
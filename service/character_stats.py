@@ -0,0 +1,116 @@
+"""
+character_stats.py
+
+This module provides supportive functions shaping character and power
+statistics, shared by CharacterHandler and AsyncCharacterHandler.
+The numbers are aggregated by the database, the functions only turn
+the aggregated documents into GraphQL types.
+"""
+
+
+from gql.types.character_types import (
+    CharacterStats,
+    DegreeStats,
+    RoleEnum,
+    RoleStats,
+)
+from gql.types.power_types import PowerStats, PowerType
+from data_access.models import RawDocument
+from settings import MAX_PAGE_SIZE
+
+
+def create_degree_stats(
+    total: int, maximum: int | None, count: int
+) -> DegreeStats:
+    """
+    Create a DegreeStats object.
+
+    :param total: Total length of the list field.
+    :param maximum: Maximum length of the list field.
+    :param count: Number of characters.
+
+    :return: DegreeStats object, zeros for no characters.
+    """
+    return DegreeStats(
+        average=total / count if count else 0.0,
+        max=maximum or 0,
+    )
+
+
+def create_character_stats(data: list[RawDocument]) -> CharacterStats:
+    """
+    Create CharacterStats from aggregated per-role documents. Totals
+    of all characters are summed up from the per-role numbers.
+
+    :param data: Documents returned by the role stats pipeline.
+
+    :return: CharacterStats object.
+    """
+    roles = {role.value: role for role in RoleEnum}
+    by_role = [
+        RoleStats(
+            role=roles.get(entry.get('_id')),
+            count=entry['count'],
+            powers=create_degree_stats(
+                entry['powers'], entry['max_powers'], entry['count'],
+            ),
+            enemies=create_degree_stats(
+                entry['enemies'], entry['max_enemies'], entry['count'],
+            ),
+        )
+        for entry in data
+    ]
+
+    count = sum(entry['count'] for entry in data)
+    return CharacterStats(
+        count=count,
+        by_role=by_role,
+        powers=create_degree_stats(
+            sum(entry['powers'] for entry in data),
+            max((entry['max_powers'] for entry in data), default=0),
+            count,
+        ),
+        enemies=create_degree_stats(
+            sum(entry['enemies'] for entry in data),
+            max((entry['max_enemies'] for entry in data), default=0),
+            count,
+        ),
+    )
+
+
+def get_limit(limit: int) -> int:
+    """
+    Validate the number of items of a bounded list (e.g. power
+    statistics).
+
+    :param limit: Requested number of items.
+
+    :return: Number of items, limited by MAX_PAGE_SIZE.
+
+    :raise ValueError: Raised if the limit is negative.
+    """
+    if limit < 0:
+        raise ValueError('"limit" must not be negative.')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def create_power_stats(
+    data: list[RawDocument], powers: list[PowerType]
+) -> list[PowerStats]:
+    """
+    Create PowerStats objects. Powers that no longer exist are
+    skipped.
+
+    :param data: Documents returned by the power stats pipeline.
+    :param powers: PowerTypes of the aggregated power IDs.
+
+    :return: List of PowerStats, aligned with data.
+    """
+    powers_by_id = {str(power.id): power for power in powers}
+    return [
+        PowerStats(
+            power=powers_by_id[str(entry['_id'])],
+            holder_count=entry['count'],
+        )
+        for entry in data if str(entry['_id']) in powers_by_id
+    ]
@@ -5,13 +5,33 @@ This module acts as an intermediary, providing stateless methods to
 facilitate the interaction between GraphQL resolvers and the DAO layer
 related to the Power domain.
 It ensures proper data transformation and integrity when
-moving between these layers.
+moving between these layers. PowerTypes are assembled straight
+from raw documents (dicts) returned by the DAO layer.
+
+Edges of streamed pages (@stream) are created lazily, while the
+executor iterates them.
+
+Powers are upserted in batches by their unique names, all items are
+validated before a single bulk write.
+
+AsyncPowerHandler is the counterpart for the asyncio data path.
+Both read from the in-process snapshot if SNAPSHOT_ENABLED is set.
 """
 
 
-from gql.types.power_types import PowerType
-from data_access.power_dao import PowerDAO
-from data_access.models import Power
+import asyncio
+from typing import Iterable, Iterator
+
+from gql.types.common_types import BatchResult
+from gql.types.power_types import (
+    PowerConnection, PowerEdge, PowerInput, PowerType
+)
+from data_access.power_dao import (
+    AsyncPowerDAO, AsyncSnapshotPowerDAO, PowerDAO, SnapshotPowerDAO,
+)
+from data_access.models import Power, RawDocument
+from settings import SNAPSHOT_ENABLED
+from utils import utils
 
 
 class PowerHandler:
@@ -23,36 +43,50 @@ class PowerHandler:
         dao: A reference to the data access class responsible 
              for direct interactions with the database.
     """
-    dao = PowerDAO
+    dao = SnapshotPowerDAO if SNAPSHOT_ENABLED else PowerDAO
 
     @classmethod
-    def _assemble_power(cls, data: Power) -> PowerType:
+    def _assemble_power(cls, data: RawDocument) -> PowerType:
         """
         A supportive method used for PowerType object creation.
 
-        :param data: Power model object from MongoDB.
+        :param data: Raw power document from MongoDB.
 
         :return: Composed PowerType object.
         """
         power = PowerType(
             id=data.id,
-            name=data.name,
-            description=data.description,
+            name=data.get('name'),
+            description=data.get('description', Power.description.default),
         )
         return power
 
     @classmethod
-    def get_one_by_id(cls, id: str) -> PowerType | None:
+    def _assemble_powers(cls, data: list[RawDocument]) -> list[PowerType]:
+        """
+        A supportive method used for PowerType objects creation.
+
+        :param data: List of raw power documents from MongoDB.
+
+        :return: List of composed PowerType objects, aligned with data.
+        """
+        return [cls._assemble_power(entry) for entry in data]
+
+    @classmethod
+    def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> PowerType | None:
         """
         Create a PowerType from MongoDB power document
         fetched by provided ID.
 
         :param id: ObjectID of a power document in MongoDB.
+        :param only: Document fields to load, None to load all of them.
 
         :return: PowerType or None if there is no document
                  with provided ID.
         """
-        data = cls.dao.get_one_by_id(id)
+        data = cls.dao.get_one_by_id(id, only)
         if not data:
             return None
 
@@ -60,7 +94,9 @@ class PowerHandler:
         return power
 
     @classmethod
-    def get_many_by_ids(cls, ids: list[str]) -> list[PowerType]:
+    def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[PowerType]:
         """
         Create PowerTypes from MongoDB power documents
         fetched by provided IDs. This method is designed to be used
@@ -68,24 +104,292 @@ class PowerHandler:
         specific character.
 
         :param ids: List of ObjectIDs of powers in MongoDB.
+        :param only: Document fields to load, None to load all of them.
 
         :return: List of PowerTypes. List will be empty if
                  there are no power documents with provided IDs.
         """
-        data = cls.dao.get_many_by_ids(ids)
+        data = cls.dao.get_many_by_ids(ids, only)
 
-        powers = [cls._assemble_power(entry) for entry in data]
-        return powers
+        return cls._assemble_powers(data)
 
     @classmethod
-    def get_all(cls) -> list[PowerType]:
+    def get_all(cls, only: list[str] | None = None) -> list[PowerType]:
         """
         Create PowerType for every power document in MongoDB.
 
+        :param only: Document fields to load, None to load all of them.
+
         :return: List of PowerTypes. List will be empty if
                  there are no power documents.
         """
-        data = cls.dao.get_all()
+        data = cls.dao.get_all(only)
+
+        return cls._assemble_powers(data)
+
+    @classmethod
+    def _create_edges(cls, data: list[RawDocument]) -> Iterator[PowerEdge]:
+        """
+        A supportive method used for PowerEdge objects creation.
+
+        :param data: Raw power documents, in output order.
+
+        :return: Iterator of PowerEdges, created one by one.
+        """
+        for entry in data:
+            power = cls._assemble_power(entry)
+            yield PowerEdge(cursor=utils.encode_cursor(power.id), node=power)
+
+    @classmethod
+    def _create_connection(
+        cls,
+        data: list[RawDocument],
+        has_more: bool,
+        reverse: bool,
+        after: str | None,
+        before: str | None,
+        total_count: int | None,
+        stream: bool = False,
+    ) -> PowerConnection:
+        """
+        A supportive method used for PowerConnection object creation.
+
+        :param data: Raw power documents of the page, in output order.
+        :param has_more: Whether there are more powers in the
+                         pagination direction.
+        :param reverse: Whether the page is taken from the end.
+        :param after: The 'after' cursor of the request.
+        :param before: The 'before' cursor of the request.
+        :param total_count: Estimated number of all powers.
+        :param stream: Whether edges are streamed, so they are created
+                       lazily instead of up front.
+
+        :return: Composed PowerConnection object.
+        """
+        edges: Iterable[PowerEdge] = cls._create_edges(data)
+        connection = PowerConnection(
+            edges=edges if stream else list(edges),
+            page_info=utils.create_page_info(
+                [utils.encode_cursor(entry.id) for entry in data],
+                has_more,
+                reverse,
+                after,
+                before,
+            ),
+            total_count=total_count,
+        )
+        return connection
+
+    @classmethod
+    def get_page(
+        cls,
+        first: int | None = None,
+        after: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+        only: list[str] | None = None,
+        with_total: bool = False,
+        stream: bool = False,
+    ) -> PowerConnection:
+        """
+        Create a PowerConnection for a page of power documents.
+        The page is fetched with a single keyset query.
+
+        :param first: Number of powers after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of powers before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param only: Document fields to load, None to load all of them.
+        :param with_total: Whether the estimated number of all powers
+                           should be included.
+        :param stream: Whether edges are streamed (@stream).
+
+        :return: PowerConnection object.
+
+        :raise ValueError: Raised for invalid pagination arguments.
+        """
+        limit, after_id, before_id, reverse = utils.get_page_args(
+            first, after, last, before,
+        )
+        data = cls.dao.get_page(limit + 1, after_id, before_id, reverse, only)
+        total_count = cls.dao.get_count() if with_total else None
+
+        data, has_more = utils.trim_page(data, limit, reverse)
+
+        return cls._create_connection(
+            data, has_more, reverse, after, before, total_count, stream,
+        )
+
+    @classmethod
+    def _prepare_upserts(
+        cls, powers: list[PowerInput]
+    ) -> tuple[list[str | None], list[dict]]:
+        """
+        A supportive method validating power inputs of a batch upsert.
+
+        :param powers: Power inputs of a batch mutation.
+
+        :return: A tuple of error messages aligned with inputs (None
+                 for valid ones) and raw documents of valid inputs.
+                 Omitted descriptions are left out of documents,
+                 so existing ones are kept.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        utils.check_batch_size(len(powers))
+        errors, documents = [], []
+        for entry in powers:
+            fields = {'name': entry.name}
+            if entry.description is not None:
+                fields['description'] = entry.description
+
+            error = utils.validate_document(Power, fields)
+            errors.append(error)
+            if error is None:
+                documents.append(utils.to_raw_document(Power, fields, True))
+        return errors, documents
+
+    @classmethod
+    def upsert_many(cls, powers: list[PowerInput]) -> BatchResult:
+        """
+        Create or update powers identified by their names with
+        a single bulk write.
+
+        :param powers: Power inputs.
+
+        :return: BatchResult with a result per power.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        errors, documents = cls._prepare_upserts(powers)
+        written = cls.dao.bulk_upsert(documents, Power.name.db_field)
+        return utils.create_batch_result(errors, written)
+
+
+class AsyncPowerHandler(PowerHandler):
+    """
+    Service layer responsible for orchestrating operations related to
+    the Power domain on the asyncio data path. Inherits object
+    creation of PowerHandler, while all data fetching methods
+    are coroutines.
+
+    Attributes:
+        dao: A reference to the async data access class responsible
+             for direct interactions with the database.
+    """
+    dao = AsyncSnapshotPowerDAO if SNAPSHOT_ENABLED else AsyncPowerDAO
 
-        powers = [cls._assemble_power(entry) for entry in data]
-        return powers
+    @classmethod
+    async def get_one_by_id(
+        cls, id: str, only: list[str] | None = None
+    ) -> PowerType | None:
+        """
+        Create a PowerType from MongoDB power document
+        fetched by provided ID.
+
+        :param id: ObjectID of a power document in MongoDB.
+        :param only: Document fields to load, None to load all of them.
+
+        :return: PowerType or None if there is no document
+                 with provided ID.
+        """
+        data = await cls.dao.get_one_by_id(id, only)
+        if not data:
+            return None
+
+        power = cls._assemble_power(data)
+        return power
+
+    @classmethod
+    async def get_many_by_ids(
+        cls, ids: list[str], only: list[str] | None = None
+    ) -> list[PowerType]:
+        """
+        Create PowerTypes from MongoDB power documents
+        fetched by provided IDs.
+
+        :param ids: List of ObjectIDs of powers in MongoDB.
+        :param only: Document fields to load, None to load all of them.
+
+        :return: List of PowerTypes. List will be empty if
+                 there are no power documents with provided IDs.
+        """
+        data = await cls.dao.get_many_by_ids(ids, only)
+
+        return cls._assemble_powers(data)
+
+    @classmethod
+    async def get_all(cls, only: list[str] | None = None) -> list[PowerType]:
+        """
+        Create PowerType for every power document in MongoDB.
+
+        :param only: Document fields to load, None to load all of them.
+
+        :return: List of PowerTypes. List will be empty if
+                 there are no power documents.
+        """
+        data = await cls.dao.get_all(only)
+
+        return cls._assemble_powers(data)
+
+    @classmethod
+    async def get_page(
+        cls,
+        first: int | None = None,
+        after: str | None = None,
+        last: int | None = None,
+        before: str | None = None,
+        only: list[str] | None = None,
+        with_total: bool = False,
+        stream: bool = False,
+    ) -> PowerConnection:
+        """
+        Create a PowerConnection for a page of power documents.
+        The page and the estimated total are fetched concurrently.
+
+        :param first: Number of powers after the 'after' cursor.
+        :param after: Cursor to paginate forward from.
+        :param last: Number of powers before the 'before' cursor.
+        :param before: Cursor to paginate backward from.
+        :param only: Document fields to load, None to load all of them.
+        :param with_total: Whether the estimated number of all powers
+                           should be included.
+        :param stream: Whether edges are streamed (@stream).
+
+        :return: PowerConnection object.
+
+        :raise ValueError: Raised for invalid pagination arguments.
+        """
+        limit, after_id, before_id, reverse = utils.get_page_args(
+            first, after, last, before,
+        )
+
+        async def no_total() -> None:
+            return None
+
+        data, total_count = await asyncio.gather(
+            cls.dao.get_page(limit + 1, after_id, before_id, reverse, only),
+            cls.dao.get_count() if with_total else no_total(),
+        )
+
+        data, has_more = utils.trim_page(data, limit, reverse)
+
+        return cls._create_connection(
+            data, has_more, reverse, after, before, total_count, stream,
+        )
+
+    @classmethod
+    async def upsert_many(cls, powers: list[PowerInput]) -> BatchResult:
+        """
+        Create or update powers identified by their names with
+        a single bulk write.
+
+        :param powers: Power inputs.
+
+        :return: BatchResult with a result per power.
+
+        :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+        """
+        errors, documents = cls._prepare_upserts(powers)
+        written = await cls.dao.bulk_upsert(documents, Power.name.db_field)
+        return utils.create_batch_result(errors, written)
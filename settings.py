@@ -9,6 +9,51 @@ Configurations:
 MongoDB:
 - MONGODB_CONNECTION: Contains configurations for connecting to
                       the MongoDB instance.
+- MONGODB_POOL: Connection pool options of both MongoDB clients
+                (pymongo keyword arguments), set by environment:
+                MONGODB_MAX_POOL_SIZE - maximum pooled connections,
+                MONGODB_MIN_POOL_SIZE - connections kept open and
+                opened at startup,
+                MONGODB_MAX_IDLE_TIME_MS - idle time before a pooled
+                connection is closed,
+                MONGODB_SERVER_SELECTION_TIMEOUT_MS - time to wait
+                for a reachable server, bounds the readiness probe,
+                MONGODB_COMPRESSORS - comma-separated wire protocol
+                compressors (zlib, or zstd/snappy if installed).
+- ASYNC_DATA_PATH: Selects the asyncio data path (async DAO, handlers
+                   and resolvers) instead of the blocking mongoengine
+                   one. Set ASYNC_DATA_PATH=true in the environment.
+- SNAPSHOT_ENABLED: Serves reads of characters and powers from an
+                    in-process snapshot of both collections instead
+                    of MongoDB (see data_access/snapshot.py). Set
+                    SNAPSHOT_ENABLED=true to enable it.
+- SNAPSHOT_REFRESH_INTERVAL: Seconds between periodic reloads of the
+                             snapshot. Writes of the process reload
+                             it on the next read regardless.
+- ENEMY_GRAPH_LOOKUP: Fetches a character with its nested enemies and
+                      their powers with a single aggregation pipeline
+                      ($graphLookup) instead of a query per depth level.
+                      Set ENEMY_GRAPH_LOOKUP=false to disable it.
+- ENEMY_INDEX_FILE: Path of the file the enemy graph index (see
+                    data_access/graph_index.py) is saved to and
+                    memory-mapped from at startup, unless enemy
+                    references in the database changed since. The
+                    index is built from the database and not saved
+                    if empty.
+- ENEMY_INDEX_MAX_AGE: Seconds after which a saved enemy graph index
+                       is rebuilt at startup instead of being loaded.
+
+Cache:
+- CACHE_ENABLED: Enables the process-wide document cache of DAO read
+                 operations. Set CACHE_ENABLED=false to disable it.
+- DAO_CACHE: Cache configuration per model name. Models missing here
+             are not cached. Options:
+             max_size - maximum number of cached documents,
+             ttl - time to live of cached documents in seconds,
+             negative_ttl - time to live of cached unknown IDs.
+- AGGREGATE_CACHE: Cache configuration of aggregation results
+                   (e.g. characterStats), dropped on writes of the
+                   aggregated model.
     
 File paths:
 - PREFILL_FILES: Specifies the paths to the JSON files containing
@@ -19,17 +64,78 @@ Logging:
 - EVENT_LOG_FORMAT: The format of log messages for event log.
 - ERROR_LOG_FORMAT: The format of log messages for error log.
 - BACKUP_LOG_COUNT: The number of backup log files to retain.
+- LOG_ROTATION: 'time' to rotate log files at midnight, 'size' to
+                rotate them when they exceed MAX_LOG_SIZE bytes.
+- MAX_LOG_SIZE: Maximum size of a log file with size-based rotation.
+- COMPRESS_LOGS: Whether rotated log files are compressed with gzip.
+- LOG_JSON: Whether log records are written as JSON lines instead
+            of formatted text. Set LOG_JSON=true to enable it.
+- LOG_QUEUE_SIZE: Maximum number of log records waiting to be
+                  written. Records over the limit are dropped.
+
+GraphQL documents:
+- PERSISTED_QUERY_CACHE: Cache configuration of automatic persisted
+                         queries (query texts by sha256 hash).
+- DOCUMENT_CACHE: Cache configuration of parsed and validated
+                  documents (by sha256 hash of the query text).
+
+Response cache:
+- RESPONSE_CACHE_ENABLED: Enables the cache of serialized GraphQL
+                          responses with ETag support. Set
+                          RESPONSE_CACHE_ENABLED=true to enable it.
+- RESPONSE_CACHE: Cache configuration of responses.
+- RESPONSE_CACHE_TTL: Time to live of cached responses per root field
+                      in seconds. Responses with other root fields
+                      are not cached.
 
 GraphQL settings:
 - MAX_QUERY_DEPTH: Determines the depth of nested queries before
                    returning simpler data. Beyond this depth,
                    only IDs are returned instead of full objects.
+- DEFAULT_PAGE_SIZE: Page size of connection fields (e.g.
+                     allCharacters), when neither 'first' nor 'last'
+                     argument is provided.
+- MAX_PAGE_SIZE: Upper limit for 'first' and 'last' arguments.
+- STREAM_BATCH_SIZE: Number of edges of a streamed page (@stream)
+                     assembled at once, after the initial ones.
+- MAX_BATCH_SIZE: Upper limit for the number of items of a single
+                  batch mutation (e.g. createCharacters).
+- AUTOCOMPLETE_DEFAULT_LIMIT: Number of suggestions of
+                              autocompleteCharacters, when no 'limit'
+                              argument is provided.
+- AUTOCOMPLETE_MAX_LIMIT: Upper limit for the 'limit' argument
+                          of autocompleteCharacters.
+- POWER_STATS_DEFAULT_LIMIT: Number of powers of powerStats, when no
+                             'limit' argument is provided. The limit
+                             is bounded by MAX_PAGE_SIZE.
+- ENEMY_NEIGHBORHOOD_MAX_HOPS: Upper limit for the 'hops' argument
+                               of enemyNeighborhood.
+- SHARED_POWERS_DEFAULT_LIMIT: Number of characters of
+                               charactersSharingPowers, when no 'limit'
+                               argument is provided. The limit is
+                               bounded by MAX_PAGE_SIZE.
+
+Query cost:
+- MAX_QUERY_COST: Maximum static cost of a single operation. Costlier
+                  operations are rejected before execution.
+- CLIENT_MAX_QUERY_COST: Cost limits of specific clients, overriding
+                         MAX_QUERY_COST, keyed by client ID.
+- CLIENT_API_KEYS: Client IDs keyed by their API keys. Clients are
+                   identified only by a known key, requests without
+                   one get MAX_QUERY_COST. Set CLIENT_API_KEYS to
+                   comma-separated 'key:client' pairs in the
+                   environment.
+- API_KEY_HEADER: Request header carrying the API key of a client.
+- ENEMIES_COST_MULTIPLIER: Expected number of enemies of a character.
+- POWERS_COST_MULTIPLIER: Expected number of powers of a character.
+- POWER_HOLDERS_COST_MULTIPLIER: Expected number of characters with
+                                 a single power.
 """
 
 
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 
 # MongoDB configurations
@@ -40,6 +146,44 @@ MONGODB_CONNECTION = {
     # 'username': config('MONGODB_USERNAME'),
     # 'password': config('MONGODB_PASSWORD'),
 }
+MONGODB_POOL = {
+    'maxPoolSize': config('MONGODB_MAX_POOL_SIZE', default=100, cast=int),
+    'minPoolSize': config('MONGODB_MIN_POOL_SIZE', default=10, cast=int),
+    'maxIdleTimeMS': config(
+        'MONGODB_MAX_IDLE_TIME_MS', default=300000, cast=int,
+    ),
+    'serverSelectionTimeoutMS': config(
+        'MONGODB_SERVER_SELECTION_TIMEOUT_MS', default=5000, cast=int,
+    ),
+    'compressors': config('MONGODB_COMPRESSORS', default='zlib'),
+}
+ASYNC_DATA_PATH = config('ASYNC_DATA_PATH', default=False, cast=bool)
+ENEMY_GRAPH_LOOKUP = config('ENEMY_GRAPH_LOOKUP', default=True, cast=bool)
+SNAPSHOT_ENABLED = config('SNAPSHOT_ENABLED', default=False, cast=bool)
+SNAPSHOT_REFRESH_INTERVAL = config(
+    'SNAPSHOT_REFRESH_INTERVAL', default=60, cast=float,
+)
+ENEMY_INDEX_FILE = config('ENEMY_INDEX_FILE', default='')
+ENEMY_INDEX_MAX_AGE = config('ENEMY_INDEX_MAX_AGE', default=3600, cast=float)
+
+# Cache configurations
+CACHE_ENABLED = config('CACHE_ENABLED', default=True, cast=bool)
+DAO_CACHE = {
+    'Power': {
+        'max_size': 1000,
+        'ttl': 3600,
+        'negative_ttl': 60,
+    },
+    'Character': {
+        'max_size': 10000,
+        'ttl': 60,
+        'negative_ttl': 10,
+    },
+}
+AGGREGATE_CACHE = {
+    'max_size': 100,
+    'ttl': 10,
+}
 
 # File paths
 PREFILL_FILES = {
@@ -51,6 +195,62 @@ PREFILL_FILES = {
 EVENT_LOG_FORMAT = '%(asctime)s: [%(levelname)s] %(message)s'
 ERROR_LOG_FORMAT = '%(asctime)s: [%(levelname)s] [%(name)s] %(message)s'
 BACKUP_LOG_COUNT = 5
+LOG_ROTATION = config('LOG_ROTATION', default='time')
+MAX_LOG_SIZE = 10 * 1024 * 1024
+COMPRESS_LOGS = True
+LOG_JSON = config('LOG_JSON', default=False, cast=bool)
+LOG_QUEUE_SIZE = 10000
+
+# GraphQL documents configurations
+PERSISTED_QUERY_CACHE = {
+    'max_size': 1000,
+    'ttl': 86400,
+}
+DOCUMENT_CACHE = {
+    'max_size': 1000,
+    'ttl': 86400,
+}
+
+# Response cache configurations
+RESPONSE_CACHE_ENABLED = config(
+    'RESPONSE_CACHE_ENABLED', default=False, cast=bool,
+)
+RESPONSE_CACHE = {
+    'max_size': 1000,
+    'ttl': 60,
+}
+RESPONSE_CACHE_TTL = {
+    'hello': 3600,
+    'character': 60,
+    'allCharacters': 60,
+    'power': 3600,
+    'allPowers': 3600,
+    'charactersWithPower': 60,
+    'characterStats': 60,
+    'powerStats': 60,
+}
 
 # GraphQL settings
 MAX_QUERY_DEPTH = 4 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 20
+MAX_BATCH_SIZE = 1000
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+POWER_STATS_DEFAULT_LIMIT = 10
+ENEMY_NEIGHBORHOOD_MAX_HOPS = 3
+SHARED_POWERS_DEFAULT_LIMIT = 10
+
+# Query cost settings
+MAX_QUERY_COST = config('MAX_QUERY_COST', default=10000, cast=int)
+CLIENT_MAX_QUERY_COST: dict[str, int] = {}
+CLIENT_API_KEYS: dict[str, str] = dict(
+    entry.split(':', 1) for entry in config(
+        'CLIENT_API_KEYS', default='', cast=Csv(),
+    ) if ':' in entry
+)
+API_KEY_HEADER = 'X-API-Key'
+ENEMIES_COST_MULTIPLIER = 3
+POWERS_COST_MULTIPLIER = 3
+POWER_HOLDERS_COST_MULTIPLIER = 10
@@ -0,0 +1,26 @@
+from benchmarks.driver import QUERY_SHAPES, percentile, summarize
+
+
+def test_query_shapes():
+    assert QUERY_SHAPES['character_depth_2'].count('enemies') == 2
+    assert QUERY_SHAPES['character_depth_4'].count('enemies') == 4
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0
+
+def test_summarize():
+    results = [
+        {'latency': 0.01, 'round_trips': 2, 'error': False},
+        {'latency': 0.03, 'round_trips': 4, 'error': True},
+    ]
+    summary = summarize(results, 2)
+
+    assert summary['requests'] == 2
+    assert summary['errors'] == 1
+    assert summary['throughput'] == 1
+    assert summary['latency_ms']['p50'] == 10
+    assert summary['round_trips_per_query'] == 3
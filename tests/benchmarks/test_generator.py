@@ -0,0 +1,25 @@
+from benchmarks.generator import generate_graph
+
+
+def test_generate_graph():
+    powers, characters = generate_graph(
+        50, 10, enemy_degree=3, cycle_density=1.0, seed=1,
+    )
+    ids = {character['_id'] for character in characters}
+
+    assert len(powers) == 10
+    assert len(characters) == 50
+    assert len({character['alias'] for character in characters}) == 50
+    for character in characters:
+        assert len(character['powers']) == 2
+        assert len(character['enemies']) >= 3
+        assert character['_id'] not in character['enemies']
+        assert set(character['enemies']) <= ids
+        # All enemy relations are mutual with full cycle density
+        for enemy_id in character['enemies']:
+            enemy = next(entry for entry in characters
+                         if entry['_id'] == enemy_id)
+            assert character['_id'] in enemy['enemies']
+
+def test_generate_graph_is_deterministic():
+    assert generate_graph(20, 5, seed=3) == generate_graph(20, 5, seed=3)
@@ -0,0 +1,100 @@
+import pytest
+from bson import ObjectId
+
+from data_access.base_dao import (
+    DUPLICATE_KEY_ERROR,
+    create_filter,
+    create_keyset_filter,
+    create_page_query,
+    create_sort,
+    create_update_requests,
+    create_upsert_requests,
+    get_aggregate_key,
+    get_write_errors,
+)
+from data_access.models import Character, Power
+
+
+def test_get_write_errors():
+    details = {'writeErrors': [
+        {'index': 0, 'code': DUPLICATE_KEY_ERROR, 'errmsg': 'E11000 ...'},
+        {'index': 3, 'code': 121, 'errmsg': 'Document failed validation'},
+    ]}
+
+    assert get_write_errors(details) == {
+        0: 'Document already exists.', 3: 'Document failed validation',
+    }
+    assert get_write_errors({}) == {}
+
+def test_create_upsert_requests():
+    requests = create_upsert_requests([{'name': 'flight'}], 'name')
+
+    assert requests[0]._filter == {'name': 'flight'}
+    assert requests[0]._doc == {'$set': {'name': 'flight'}}
+    assert requests[0]._upsert == True
+
+def test_create_update_requests():
+    id = ObjectId()
+    requests = create_update_requests([(str(id), {'alias': 'Robin'})])
+
+    assert requests[0]._filter == {'_id': id}
+    assert requests[0]._doc == {'$set': {'alias': 'Robin'}}
+    assert not requests[0]._upsert
+
+def test_create_filter():
+    id = ObjectId()
+
+    assert create_filter(Character, {
+        'role': 'villain', 'alias__prefix': 'J.', 'enemies': str(id),
+    }) == {
+        'role': 'villain',
+        'alias': {'$regex': r'^J\.'},
+        'enemies': id,
+    }
+    assert create_filter(Character, {
+        'alias': 'Joker', 'alias__prefix': 'Jo',
+    }) == {'alias': {'$eq': 'Joker', '$regex': '^Jo'}}
+    assert create_filter(Character, None) == {}
+    for key in ('unknown', 'alias__suffix'):
+        with pytest.raises(ValueError):
+            create_filter(Character, {key: 'value'})
+
+def test_create_keyset_filter():
+    id = ObjectId()
+
+    assert create_keyset_filter('_id', -1, str(id)) == {'_id': {'$lt': id}}
+    assert create_keyset_filter('alias', 1, ('Joker', str(id))) == {
+        '$or': [
+            {'alias': {'$gt': 'Joker'}},
+            {'alias': 'Joker', '_id': {'$gt': id}},
+        ],
+    }
+    assert len(create_keyset_filter(
+        'alias', 1, ('Batman', str(id)), ('Joker', str(id)),
+    )['$and']) == 2
+    assert create_keyset_filter('alias', 1) == {}
+
+def test_create_sort():
+    assert create_sort('_id', 1, True) == [('_id', -1)]
+    assert create_sort('alias', -1, False) == [('alias', -1), ('_id', -1)]
+
+def test_create_page_query():
+    query, sort, only = create_page_query(
+        Character, ('Joker', '1'), None, False, ['id'],
+        {'role': 'villain'}, ('alias', 1),
+    )
+
+    assert query['$and'][0] == {'role': 'villain'}
+    assert sort == [('alias', 1), ('_id', 1)]
+    assert only == ['id', 'alias']
+    with pytest.raises(ValueError):
+        create_page_query(Character, None, None, False, None, None, ('x', 1))
+
+def test_get_aggregate_key():
+    pipeline = [{'$group': {'_id': '$role', 'count': {'$sum': 1}}}]
+    reordered = [{'$group': {'count': {'$sum': 1}, '_id': '$role'}}]
+
+    assert get_aggregate_key(Character, pipeline) \
+        == get_aggregate_key(Character, reordered)
+    assert get_aggregate_key(Character, pipeline) \
+        != get_aggregate_key(Power, pipeline)
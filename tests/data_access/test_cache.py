@@ -0,0 +1,128 @@
+from bson import ObjectId
+
+from data_access import events
+from data_access.cache import (
+    ALL_KEY, Cache, get_aggregate_cache, get_cache,
+)
+from data_access.models import Character, Power
+
+
+object_ids = ['651c3b5e8f1d2a6b4c9e0a1' + str(i) for i in range(3)]
+
+
+class MockTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_set():
+    cache = Cache(max_size=10, ttl=60)
+
+    assert cache.get('key') == (False, None)
+
+    cache.set('key', 'value')
+
+    assert cache.get('key') == (True, 'value')
+    assert cache.get_stats() == {
+        'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0, 'expirations': 0,
+    }
+
+def test_lru_eviction():
+    cache = Cache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+def test_ttl_expiration():
+    timer = MockTimer()
+    cache = Cache(max_size=10, ttl=60, negative_ttl=5, timer=timer)
+    cache.set('found', 'value')
+    cache.set('unknown', None)
+    timer.now = 10
+
+    assert cache.get('found') == (True, 'value')
+    assert cache.get('unknown') == (False, None)
+
+    timer.now = 61
+
+    assert cache.get('found') == (False, None)
+    assert cache.expirations == 2
+    assert len(cache) == 0
+
+def test_get_documents():
+    cache = Cache(max_size=10, ttl=60)
+    document = Power(id=object_ids[0], name='flight')
+    cache.put_documents(object_ids[:2], [document])
+    found, missing = cache.get_documents(object_ids + [object_ids[0]])
+
+    assert found == [document]
+    assert missing == [ObjectId(object_ids[2])]
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+def test_invalidate():
+    cache = Cache(max_size=10, ttl=60)
+    cache.put_documents(
+        [object_ids[0]], [Power(id=object_ids[0], name='flight')]
+    )
+    cache.set(ALL_KEY, [])
+    cache.invalidate(object_ids[0])
+    cache.invalidate(ALL_KEY)
+
+    assert len(cache) == 0
+
+    cache.set('key', 'value')
+    cache.clear()
+
+    assert cache.get('key') == (False, None)
+
+def test_set_ttl():
+    timer = MockTimer()
+    cache = Cache(max_size=10, ttl=60, timer=timer)
+    cache.set('key', 'value', ttl=5)
+    timer.now = 5
+
+    assert cache.get('key') == (False, None)
+
+def test_invalidate_if():
+    cache = Cache(max_size=10, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.invalidate_if(lambda value: value > 1) == 1
+    assert cache.get('a') == (True, 1)
+    assert cache.get('b') == (False, None)
+
+def test_invalidate_on_write():
+    cache = get_cache(Power)
+    cache.put_documents(
+        [object_ids[0]], [Power(id=object_ids[0], name='flight')]
+    )
+    cache.set(ALL_KEY, [])
+    events.publish_write(Power, [object_ids[0]])
+
+    assert cache.get(ObjectId(object_ids[0])) == (False, None)
+    assert cache.get(ALL_KEY) == (False, None)
+
+def test_get_cache():
+    assert get_cache(Power) is get_cache(Power)
+    assert get_cache(Power) is not get_cache(Character)
+
+def test_invalidate_aggregates_on_write():
+    cache = get_aggregate_cache()
+    cache.set('characters', ('Character', [{'count': 1}]))
+    cache.set('powers', ('Power', [{'count': 2}]))
+    events.publish_write(Character, [object_ids[0]])
+
+    assert cache.get('characters') == (False, None)
+    assert cache.get('powers') == (True, ('Power', [{'count': 2}]))
@@ -0,0 +1,137 @@
+from bson import ObjectId
+
+from data_access import base_dao, character_dao
+from data_access.character_dao import (
+    CharacterDAO,
+    _build_graph_pipeline,
+    _build_power_stats_pipeline,
+    _build_reference_version_pipeline,
+    _build_role_stats_pipeline,
+    _get_known_graph,
+    _get_reference_version,
+    _process_graph,
+)
+from data_access.identity_map import identity_map_scope
+from data_access.models import Character, Power, RawDocument
+
+
+ids = [ObjectId('651c3b5e8f1d2a6b4c9e0b1' + str(i)) for i in range(5)]
+
+
+def test_build_graph_pipeline():
+    pipeline = _build_graph_pipeline(str(ids[0]), 3, False)
+
+    assert pipeline[0] == {'$match': {'_id': ids[0]}}
+    assert pipeline[1]['$graphLookup']['maxDepth'] == 2
+    assert len(pipeline) == 2
+
+def test_build_graph_pipeline_with_powers():
+    pipeline = _build_graph_pipeline(str(ids[0]), 1, True)
+
+    assert pipeline[1]['$graphLookup']['maxDepth'] == 0
+    assert pipeline[-1]['$lookup']['from'] == 'powers'
+
+def test_process_graph():
+    raw = RawDocument({
+        '_id': ids[0], 'alias': 'Batman', 'powers': [ids[4]],
+        'enemies': [ids[1], ids[2]],
+        '_enemy_graph': [
+            RawDocument({'_id': ids[1], 'alias': 'Joker', 'powers': [],
+                         'enemies': [ids[0], ids[3]]}),
+        ],
+        '_powers': [RawDocument({'_id': ids[4], 'name': 'gadgets'})],
+        '_power_ids': [ids[4]],
+    })
+
+    with identity_map_scope() as identity_map:
+        root = _process_graph(raw, 2, True)
+
+        assert root == {'_id': ids[0], 'alias': 'Batman',
+                        'powers': [ids[4]], 'enemies': [ids[1], ids[2]]}
+        assert identity_map.get_document(Character, ids[1])[1]['alias'] == (
+            'Joker')
+        assert identity_map.get_document(Power, ids[4])[1]['name'] == (
+            'gadgets')
+        # Enemies referenced within the depth, but not found
+        assert identity_map.get_document(Character, ids[2]) == (True, None)
+        assert identity_map.get_document(Character, ids[3]) == (True, None)
+
+def test_get_known_graph(monkeypatch):
+    monkeypatch.setattr(character_dao, 'get_cache', lambda model: None)
+    raw = RawDocument({
+        '_id': ids[0], 'powers': [ids[4]], 'enemies': [ids[1]],
+        '_enemy_graph': [
+            RawDocument({'_id': ids[1], 'powers': [], 'enemies': [ids[2]]}),
+        ],
+        '_powers': [],
+    })
+
+    with identity_map_scope():
+        root = _process_graph(raw, 1, False)
+
+        assert _get_known_graph(str(ids[0]), 1, False) == (True, root)
+        # Enemies of the second level and powers were not fetched
+        assert _get_known_graph(str(ids[0]), 2, False) == (False, None)
+        assert _get_known_graph(str(ids[0]), 1, True) == (False, None)
+        assert _get_known_graph(str(ids[3]), 1, False) == (False, None)
+
+def test_get_enemy_graph_skips_known_subgraph(monkeypatch):
+    monkeypatch.setattr(character_dao, 'get_cache', lambda model: None)
+
+    def collection(cls):
+        raise AssertionError('The pipeline must not run')
+
+    monkeypatch.setattr(CharacterDAO, '_collection', classmethod(collection))
+    raw = RawDocument({
+        '_id': ids[0], 'powers': [], 'enemies': [ids[1]],
+        '_enemy_graph': [RawDocument({'_id': ids[1], 'enemies': []})],
+    })
+
+    with identity_map_scope():
+        root = _process_graph(raw, 2, False)
+
+        assert CharacterDAO.get_enemy_graph(str(ids[0]), 2) is root
+
+def test_build_role_stats_pipeline():
+    pipeline = _build_role_stats_pipeline()
+    group = pipeline[0]['$group']
+
+    assert group['_id'] == '$role'
+    assert group['max_enemies'] == {
+        '$max': {'$size': {'$ifNull': ['$enemies', []]}},
+    }
+
+def test_build_power_stats_pipeline():
+    pipeline = _build_power_stats_pipeline(5)
+
+    assert pipeline[0] == {'$unwind': '$powers'}
+    assert pipeline[-1] == {'$limit': 5}
+
+def test_reference_version():
+    group = _build_reference_version_pipeline('enemies')[0]['$group']
+
+    assert group['_id'] is None
+    assert group['references'] == {
+        '$sum': {'$size': {'$ifNull': ['$enemies', []]}},
+    }
+    assert _get_reference_version([RawDocument(
+        _id=None, count=2, max_id=ids[1], references=3,
+    )]) == f'2:{ids[1]}:3'
+    assert _get_reference_version([]) == '::'
+
+def test_bulk_write_counts_writes(monkeypatch):
+    counted = []
+
+    class MockCollection:
+
+        def bulk_write(self, requests, ordered):
+            return type('Result', (), {'upserted_ids': None})()
+
+    monkeypatch.setattr(
+        CharacterDAO, '_collection', classmethod(lambda cls: MockCollection()),
+    )
+    monkeypatch.setattr(base_dao, 'count_write', counted.append)
+    monkeypatch.setattr(base_dao, 'observe_query', lambda *args: None)
+
+    assert CharacterDAO._bulk_write('bulk_update', []) == ({}, {})
+    assert counted == [Character]
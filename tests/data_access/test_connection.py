@@ -0,0 +1,23 @@
+from data_access.connection import PoolStats, get_async_client
+from settings import MONGODB_POOL
+
+
+def test_pool_stats():
+    stats = PoolStats()
+    for _ in range(3):
+        stats.connection_created(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    stats.connection_closed(None)
+
+    assert stats.get_stats() == {
+        'open': 2, 'in_use': 1, 'max': MONGODB_POOL['maxPoolSize'],
+    }
+
+def test_get_async_client():
+    client = get_async_client()
+
+    assert client is get_async_client()
+    assert client.options.pool_options.max_pool_size \
+        == MONGODB_POOL['maxPoolSize']
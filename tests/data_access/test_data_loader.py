@@ -0,0 +1,110 @@
+import asyncio
+
+from data_access.data_loader import (
+    DataLoader, create_async_loader, prime_loader
+)
+from tests.mock_classes import MockAsyncDAO, MockDAO
+
+
+class MockEntry:
+
+    def __init__(self, id: str):
+        self.id = id
+
+
+mock_entries = {id: MockEntry(id) for id in ('1', '2', '3')}
+mock_dao = MockDAO(mock_entries)
+
+
+def test_load():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+    result = loader.load('1')
+
+    assert result.id == '1'
+    assert loader.batch_count == 1
+
+def test_load_missing():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+
+    assert loader.load('8') == None
+    assert loader.load('8') == None
+    assert loader.batch_count == 1
+
+def test_load_many_batches_and_aligns():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+    result = loader.load_many(['3', '8', '1', '3'])
+
+    assert [entry.id if entry else None for entry in result] == (
+        ['3', None, '1', '3'])
+    assert loader.batch_count == 1
+
+def test_load_many_memoized():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+    loader.load_many(['1', '2'])
+    loader.load_many(['2', '1'])
+
+    assert loader.batch_count == 1
+
+    loader.load_many(['2', '3'])
+    assert loader.batch_count == 2
+
+def test_prime():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+    loader.prime('1', MockEntry('1'))
+
+    assert loader.load('1').id == '1'
+    assert loader.batch_count == 0
+
+
+def test_async_loader_batches_concurrent_loads():
+    batches = []
+    mock_async_dao = MockAsyncDAO(mock_entries)
+
+    async def load_fn(ids, only):
+        batches.append((ids, only))
+        return await mock_async_dao.get_many_by_ids(ids, only)
+
+    async def load():
+        loader = create_async_loader(load_fn)
+        return await asyncio.gather(
+            loader.load(('1', None)),
+            loader.load_many([('2', None), ('8', None), ('3', ('id',))]),
+        )
+
+    single, many = asyncio.run(load())
+
+    assert single.id == '1'
+    assert many[0].id == '2'
+    assert many[1] == None
+    assert many[2].id == '3'
+    # One call per distinct projection within the batch.
+    assert batches == [(['1', '2', '8'], None), (['3'], ['id'])]
+
+def test_load_many_per_projection():
+    calls = []
+
+    def load_fn(ids, only):
+        calls.append((ids, only))
+        return mock_dao.get_many_by_ids(ids, only)
+
+    loader = DataLoader(load_fn)
+    loader.load_many(['1', '2'], ['alias'])
+    loader.load_many(['1', '2'], ['alias'])
+    loader.load_many(['1'])
+
+    assert calls == [(['1', '2'], ['alias']), (['1'], None)]
+
+
+def test_prime_loader():
+    loader = DataLoader(mock_dao.get_many_by_ids)
+    prime_loader(loader, [MockEntry('1')], ['alias'])
+
+    assert loader.load('1', ['alias']).id == '1'
+    assert loader.batch_count == 0
+
+    async def load():
+        loader = create_async_loader(MockAsyncDAO(dict()).get_many_by_ids)
+        prime_loader(loader, [MockEntry('1')], ['alias'])
+        return await loader.load(('1', ('alias',)))
+
+    assert asyncio.run(load()).id == '1'
@@ -0,0 +1,36 @@
+from bson import ObjectId
+
+from data_access import events
+from data_access.models import Character
+
+
+object_id = '651c3b5e8f1d2a6b4c9e0a11'
+
+
+def test_publish_write():
+    calls = []
+    subscriber = lambda model_name, ids: calls.append((model_name, ids))
+    events.subscribe(subscriber)
+    events.subscribe(subscriber)
+    try:
+        events.publish_write(Character, [object_id, '1'])
+    finally:
+        events.unsubscribe(subscriber)
+    events.publish_write(Character, [object_id])
+
+    assert calls == [('Character', [ObjectId(object_id), '1'])]
+
+def test_publish_write_failing_subscriber():
+    calls = []
+    def failing(model_name, ids):
+        raise RuntimeError
+    subscriber = lambda model_name, ids: calls.append(model_name)
+    events.subscribe(failing)
+    events.subscribe(subscriber)
+    try:
+        events.publish_write(Character, [object_id])
+    finally:
+        events.unsubscribe(failing)
+        events.unsubscribe(subscriber)
+
+    assert calls == ['Character']
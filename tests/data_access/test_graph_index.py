@@ -0,0 +1,104 @@
+import pytest
+
+from data_access import events
+from data_access.graph_index import (
+    GraphIndex, get_graph_index, is_file_fresh,
+)
+from data_access.models import Character
+
+
+def create_index():
+    index = GraphIndex()
+    index.build([
+        ('1', ['2', '3']),
+        ('2', ['4']),
+        ('3', ['4', '9']),
+        ('4', ['1']),
+        ('5', []),
+    ])
+    return index
+
+def test_shortest_path():
+    index = create_index()
+
+    assert index.shortest_path('1', '4') == ['1', '2', '4']
+    assert index.shortest_path('4', '3') == ['4', '1', '3']
+    assert index.shortest_path('2', '2') == ['2']
+    assert index.shortest_path('1', '5') is None
+    # Referenced IDs without a document are not indexed
+    assert index.shortest_path('3', '9') is None
+    assert index.shortest_path('unknown', '1') is None
+
+def test_neighborhood():
+    index = create_index()
+
+    assert index.neighborhood('1', 2) == [('2', 1), ('3', 1), ('4', 2)]
+    assert index.neighborhood('4', 1) == [('1', 1)]
+    assert index.neighborhood('4', 0) == []
+    assert index.neighborhood('unknown', 2) == []
+    assert len(index) == 5
+
+def test_put_and_remove():
+    index = create_index()
+    index.put('5', ['1'])
+    index.put('9', ['5'])
+    index.remove('2')
+    index.remove('unknown')
+
+    assert index.shortest_path('5', '4') == ['5', '1', '3', '4']
+    assert index.shortest_path('3', '5') == ['3', '9', '5']
+    assert index.neighborhood('1', 1) == [('3', 1)]
+    assert len(index) == 5
+
+def test_compaction(monkeypatch):
+    monkeypatch.setattr('data_access.graph_index.COMPACTION_MIN', 1)
+    index = create_index()
+    index.put('5', ['1'])
+    index.put('6', ['5'])
+
+    assert index._outgoing.changed == index._incoming.changed == dict()
+    assert index.shortest_path('6', '4') == ['6', '5', '1', '2', '4']
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    index = create_index()
+    index.put('5', ['4'])
+    index.save(path)
+    loaded = GraphIndex()
+    loaded.load(path)
+
+    assert loaded.built == True
+    assert loaded.shortest_path('5', '3') == ['5', '4', '1', '3']
+    assert loaded.neighborhood('1', 2) == index.neighborhood('1', 2)
+    loaded.put('2', [])
+    assert loaded.shortest_path('1', '4') == ['1', '3', '4']
+    assert is_file_fresh(path, 60)
+    assert not is_file_fresh(path, -1)
+    assert not is_file_fresh(path, 60, 'version')
+    index.save(path, 'version')
+    assert is_file_fresh(path, 60, 'version')
+    assert not is_file_fresh(str(tmp_path / 'missing.bin'), 60)
+
+def test_save_and_load_empty(tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    GraphIndex().save(path)
+    loaded = GraphIndex()
+    loaded.load(path)
+
+    assert len(loaded) == 0
+    assert loaded.neighborhood('1', 1) == []
+
+def test_load_invalid_file(tmp_path):
+    path = tmp_path / 'graph.bin'
+    path.write_bytes(b'not a graph index')
+
+    with pytest.raises(ValueError):
+        GraphIndex().load(str(path))
+
+def test_mark_stale_on_write():
+    index = get_graph_index(Character, 'enemies')
+    index.pop_stale()
+    events.publish_write(Character, ['1'])
+
+    assert index.pop_stale() == ['1']
+    assert index.pop_stale() == []
@@ -0,0 +1,89 @@
+from bson import ObjectId
+
+from data_access.identity_map import (
+    IdentityMap, get_identity_map, identity_map_scope, to_key
+)
+from data_access.models import Character, Power
+
+
+object_id = '651c3b5e8f1d2a6b4c9e0a11'
+
+
+def test_to_key():
+    assert to_key(object_id) == ObjectId(object_id)
+    assert to_key(ObjectId(object_id)) == ObjectId(object_id)
+    assert to_key('1') == '1'
+
+def test_get_document_unknown():
+    identity_map = IdentityMap()
+
+    assert identity_map.get_document(Character, object_id) == (False, None)
+
+def test_put_document():
+    identity_map = IdentityMap()
+    document = Character(alias='Batman')
+    identity_map.put_document(Character, ObjectId(object_id), document)
+
+    assert identity_map.get_document(Character, object_id) == (
+        True, document)
+    assert identity_map.get_document(Power, object_id) == (False, None)
+
+def test_put_document_not_found():
+    identity_map = IdentityMap()
+    identity_map.put_document(Power, object_id, None)
+
+    assert identity_map.get_document(Power, object_id) == (True, None)
+
+def test_identity_map_scope():
+    assert get_identity_map() == None
+
+    with identity_map_scope() as identity_map:
+        assert get_identity_map() is identity_map
+        with identity_map_scope() as nested_map:
+            assert get_identity_map() is nested_map
+        assert get_identity_map() is identity_map
+
+    assert get_identity_map() == None
+
+def test_get_document_projection():
+    identity_map = IdentityMap()
+    document = Character(alias='Batman')
+    identity_map.put_document(Character, object_id, document, ['alias', 'id'])
+
+    assert identity_map.get_document(Character, object_id, ['alias']) == (
+        True, document)
+    assert identity_map.get_document(Character, object_id, ['name']) == (
+        False, None)
+    assert identity_map.get_document(Character, object_id) == (False, None)
+
+def test_put_document_keeps_wider_projection():
+    identity_map = IdentityMap()
+    document = Character(alias='Batman')
+    identity_map.put_document(Character, object_id, document)
+    identity_map.put_document(Character, object_id, Character(), ['alias'])
+
+    assert identity_map.get_document(Character, object_id) == (
+        True, document)
+
+def test_get_documents():
+    identity_map = IdentityMap()
+    document = Character(id=object_id, alias='Batman')
+    missing_id = '651c3b5e8f1d2a6b4c9e0a12'
+    identity_map.put_documents(
+        Character, [object_id, missing_id], [document],
+    )
+
+    known, missing = identity_map.get_documents(
+        Character, [object_id, missing_id, '1'],
+    )
+    assert known == [document]
+    assert missing == ['1']
+
+def test_get_tags():
+    identity_map = IdentityMap()
+    identity_map.put_document(Character, object_id, None)
+    identity_map.collections.add('Power')
+
+    assert identity_map.get_tags() == {
+        ('Character', ObjectId(object_id)), ('Power', None),
+    }
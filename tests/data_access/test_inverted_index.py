@@ -0,0 +1,79 @@
+from data_access import events
+from data_access.inverted_index import (
+    InvertedIndex, contains, get_inverted_index,
+)
+from data_access.models import Character
+
+
+def create_index():
+    index = InvertedIndex()
+    index.build([
+        ('1', ['a', 'b', 'c']),
+        ('2', ['a', 'b', 'b']),
+        ('3', ['c']),
+        ('4', []),
+        ('5', ['a', 'c']),
+    ])
+    return index
+
+def test_contains():
+    postings = create_index()._postings['a']
+
+    assert contains(postings, 4)
+    assert not contains(postings, 2)
+
+def test_find_all():
+    index = create_index()
+
+    assert index.find_all(['a', 'b']) == ['1', '2']
+    assert index.find_all(['c', 'a']) == ['1', '5']
+    assert index.find_all(['a', 'a']) == ['1', '2', '5']
+    assert index.find_all(['a', 'unknown']) == []
+    assert index.find_all([]) == []
+
+def test_find_all_probing(monkeypatch):
+    monkeypatch.setattr('data_access.inverted_index.PROBE_RATIO', 1)
+    index = create_index()
+
+    assert index.find_all(['a', 'b', 'c']) == ['1']
+    assert index.find_all(['b', 'c', 'a']) == ['1']
+
+def test_find_sharing():
+    index = create_index()
+
+    assert index.find_sharing('1') == [('2', 2), ('5', 2), ('3', 1)]
+    assert index.find_sharing('1', 2) == [('2', 2), ('5', 2)]
+    assert index.find_sharing('1', 1, 2) == [('2', 2), ('5', 2)]
+    assert index.find_sharing('1', 1, 0) == []
+    assert index.find_sharing('3') == [('1', 1), ('5', 1)]
+    assert index.find_sharing('4') == []
+    assert index.find_sharing('unknown') == []
+
+def test_put_and_remove():
+    index = create_index()
+    index.put('3', ['a', 'b'])
+    index.put('6', ['b', 'c'])
+    index.remove('1')
+    index.remove('unknown')
+
+    assert index.find_all(['a', 'b']) == ['2', '3']
+    assert index.find_all(['c']) == ['5', '6']
+    assert index.find_sharing('6') == [('2', 1), ('3', 1), ('5', 1)]
+    assert 'unknown' not in index._postings
+    assert len(index) == 5
+
+def test_remove_last_holder():
+    index = create_index()
+    index.put('3', [])
+
+    assert index.find_all(['c']) == ['1', '5']
+    index.remove('1')
+    index.remove('5')
+    assert 'c' not in index._postings
+
+def test_mark_stale_on_write():
+    index = get_inverted_index(Character, 'powers')
+    index.pop_stale()
+    events.publish_write(Character, ['1'])
+
+    assert index.pop_stale() == ['1']
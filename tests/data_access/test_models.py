@@ -0,0 +1,27 @@
+from bson import ObjectId
+
+from data_access.models import Character, RawDocument
+
+
+object_id = ObjectId('651c3b5e8f1d2a6b4c9e0a11')
+
+
+def test_raw_document_id():
+    document = RawDocument({'_id': object_id, 'alias': 'Batman'})
+
+    assert document.id == object_id
+    assert document['alias'] == 'Batman'
+    assert RawDocument().id is None
+
+def test_character_reference_indexes():
+    indexes = [index['fields'] for index in Character._meta['index_specs']]
+
+    assert [('enemies', 1)] in indexes
+    assert [('powers', 1)] in indexes
+
+def test_character_page_indexes():
+    indexes = [index['fields'] for index in Character._meta['index_specs']]
+
+    assert [('alias', 1), ('_id', 1)] in indexes
+    assert [('role', 1), ('alias', 1), ('_id', 1)] in indexes
+    assert [('role', 1), ('name', 1), ('_id', 1)] in indexes
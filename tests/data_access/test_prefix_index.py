@@ -0,0 +1,59 @@
+from bson import ObjectId
+
+from data_access import events
+from data_access.models import Character
+from data_access.prefix_index import PrefixIndex, fold, get_prefix_index
+
+
+def create_index():
+    index = PrefixIndex(('alias', 'name'))
+    index.build([
+        ('1', ('Batman', 'Bruce Wayne')),
+        ('2', ('Joker', 'unknown')),
+        ('3', ('Bat-Mite', None)),
+        ('4', ('Wonder Woman', 'Diana Prince')),
+        ('5', ('Brainiac', 'Vril Dox')),
+    ])
+    return index
+
+def ids(suggestions):
+    return [suggestion.id for suggestion in suggestions]
+
+def test_fold():
+    assert fold('Élan VITAL') == 'elan vital'
+
+def test_search_ranking():
+    index = create_index()
+
+    assert ids(index.search('bat', 10)) == ['3', '1']
+    assert ids(index.search('b', 10)) == ['3', '1', '5']
+    # Aliases first, then names, then inner words
+    assert ids(index.search('w', 10)) == ['4', '1']
+    assert ids(index.search('DI', 10)) == ['4']
+    assert index.search('bat', 1)[0].values == ('Bat-Mite', None)
+
+def test_search_empty():
+    index = create_index()
+
+    assert index.search('  ', 10) == []
+    assert index.search('x', 10) == []
+    assert index.search('bat', 0) == []
+
+def test_put_and_remove():
+    index = create_index()
+    index.put('2', ('Batwoman', 'Kate Kane'))
+    index.remove('3')
+    index.remove('unknown')
+
+    assert ids(index.search('bat', 10)) == ['1', '2']
+    assert index.search('joker', 10) == []
+    assert len(index) == 4
+
+def test_stale_documents():
+    id = ObjectId()
+    index = get_prefix_index(Character, ('alias', 'name'))
+    index.pop_stale()
+    events.publish_write(Character, [str(id)])
+
+    assert index.pop_stale() == [str(id)]
+    assert index.pop_stale() == []
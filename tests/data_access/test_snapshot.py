@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import pytest
+from bson import ObjectId
+
+from data_access import events
+from data_access.character_dao import (
+    AsyncSnapshotCharacterDAO, SnapshotCharacterDAO,
+)
+from data_access.identity_map import identity_map_scope
+from data_access.models import Character, Power, RawDocument
+from data_access.snapshot import (
+    ModelSnapshot, Snapshot, SnapshotStore, create_matcher,
+    get_snapshot_store,
+)
+
+
+ids = [ObjectId('651c3b5e8f1d2a6b4c9e0c1' + str(i)) for i in range(5)]
+power_id = ObjectId('651c3b5e8f1d2a6b4c9e0d10')
+
+characters = [
+    RawDocument(_id=ids[0], alias='Batman', name='Bruce Wayne',
+                role='hero', powers=[power_id], enemies=[ids[1], ids[2]]),
+    RawDocument(_id=ids[1], alias='Joker', role='villain',
+                enemies=[ids[0]]),
+    RawDocument(_id=ids[2], alias='Bane', role='villain',
+                enemies=[ids[0]]),
+    RawDocument(_id=ids[3], alias='Robin', role='hero',
+                powers=[power_id], enemies=[ids[1], ids[1]]),
+    RawDocument(_id=ids[4], alias='Alfred', role='hero'),
+]
+
+
+def create_snapshot() -> ModelSnapshot:
+    return ModelSnapshot(Character, list(characters))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = get_snapshot_store()
+    loads = []
+
+    def load_snapshot(models, version):
+        loads.append(version)
+        return Snapshot({
+            'Character': create_snapshot(),
+            'Power': ModelSnapshot(Power, [RawDocument(_id=power_id)]),
+        }, version)
+
+    monkeypatch.setattr('data_access.snapshot.load_snapshot', load_snapshot)
+    monkeypatch.setattr(store, 'interval', 0)
+    monkeypatch.setattr(store, 'snapshot', None)
+    yield loads
+    store.stop()
+
+def test_create_matcher():
+    match = create_matcher(Character, {
+        'role': 'villain', 'alias__prefix': 'Jo', 'enemies': str(ids[0]),
+    })
+
+    assert [match(character) for character in characters] == [
+        False, True, False, False, False,
+    ]
+    # Conditions on the same field must all match
+    match = create_matcher(Character, {
+        'alias': characters[1]['alias'], 'alias__prefix': 'X',
+    })
+    assert not any(match(character) for character in characters)
+    with pytest.raises(ValueError):
+        create_matcher(Character, {'alias__suffix': 'an'})
+
+def test_get_many():
+    snapshot = create_snapshot()
+
+    assert snapshot.get_one(str(ids[1]))['alias'] == 'Joker'
+    assert snapshot.get_one('unknown') is None
+    assert [entry['alias'] for entry in snapshot.get_many(
+        [ids[2], str(ids[2]), ids[0], 'unknown']
+    )] == ['Bane', 'Batman']
+    assert len(snapshot.get_all()) == len(snapshot) == 5
+
+def test_get_page_by_id():
+    snapshot = create_snapshot()
+
+    first = snapshot.get_page(2)
+    assert [entry.id for entry in first] == ids[:2]
+    assert [entry.id for entry in snapshot.get_page(2, after=ids[1])] \
+        == ids[2:4]
+    assert [entry.id for entry in snapshot.get_page(2, reverse=True)] \
+        == [ids[4], ids[3]]
+    assert [entry.id for entry in snapshot.get_page(
+        5, after=ids[0], before=str(ids[3]),
+    )] == ids[1:3]
+
+def test_get_page_ordered():
+    snapshot = create_snapshot()
+    sort = ('alias', -1)
+
+    page = snapshot.get_page(2, filters={'role': 'hero'}, sort=sort)
+    assert [entry['alias'] for entry in page] == ['Robin', 'Batman']
+    page = snapshot.get_page(
+        2, after=('Batman', str(ids[0])), filters={'role': 'hero'},
+        sort=sort,
+    )
+    assert [entry['alias'] for entry in page] == ['Alfred']
+    page = snapshot.get_page(
+        2, before=('Bane', ids[2]), reverse=True, sort=sort,
+    )
+    assert [entry['alias'] for entry in page] == ['Batman', 'Joker']
+    with pytest.raises(ValueError):
+        snapshot.get_page(2, sort=('unknown', 1))
+
+def test_get_page_missing_values_first():
+    snapshot = create_snapshot()
+
+    page = snapshot.get_page(2, sort=('name', 1))
+    assert [entry['alias'] for entry in page] == ['Joker', 'Bane']
+
+def test_get_many_by_reference():
+    snapshot = create_snapshot()
+
+    assert [entry['alias'] for entry in snapshot.get_many_by_reference(
+        'enemies', [ids[1]],
+    )] == ['Batman', 'Robin']
+    assert [entry['alias'] for entry in snapshot.get_many_by_reference(
+        'powers', [str(power_id)],
+    )] == ['Batman', 'Robin']
+    assert snapshot.get_many_by_reference('enemies', [ids[4]]) == []
+
+def test_get_count():
+    snapshot = create_snapshot()
+
+    assert snapshot.get_count() == 5
+    assert snapshot.get_count({'role': 'villain'}) == 2
+
+def test_store_refresh_on_write(store):
+    snapshot_store = get_snapshot_store()
+    snapshot = snapshot_store.get()
+
+    assert snapshot_store.get() is snapshot
+    events.publish_write(Power, [power_id])
+    assert snapshot_store.is_current() == False
+    assert snapshot_store.get() is not snapshot
+    assert len(store) == 2
+
+def test_store_refresh_thread(monkeypatch):
+    store = SnapshotStore((Character,), 0.01)
+    loaded = []
+
+    def load_snapshot(models, version):
+        loaded.append(version)
+        return Snapshot({}, version)
+
+    monkeypatch.setattr('data_access.snapshot.load_snapshot', load_snapshot)
+    store.get()
+    while len(loaded) < 3:
+        time.sleep(0.01)
+    store.stop()
+
+    assert store._thread is None
+
+def test_snapshot_dao(store):
+    with identity_map_scope() as identity_map:
+        character = SnapshotCharacterDAO.get_enemy_graph(str(ids[0]), 2)
+        enemies = SnapshotCharacterDAO.get_many_by_ids(character['enemies'])
+        page = SnapshotCharacterDAO.get_page(1, filters={'role': 'hero'})
+
+        assert [entry['alias'] for entry in enemies] == ['Joker', 'Bane']
+        assert page[0]['alias'] == 'Batman'
+        assert ('Character', ids[1]) in identity_map.get_tags()
+        assert ('Character', None) in identity_map.get_tags()
+    assert len(store) == 1
+
+def test_async_snapshot_dao(store):
+    async def read():
+        character = await AsyncSnapshotCharacterDAO.get_one_by_id(ids[3])
+        count = await AsyncSnapshotCharacterDAO.get_count({'role': 'hero'})
+        return character, count
+
+    character, count = asyncio.run(read())
+
+    assert character['alias'] == 'Robin'
+    assert count == 3
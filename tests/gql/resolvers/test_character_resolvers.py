@@ -1,6 +1,18 @@
-from gql.types.character_types import CharacterType
-from gql.resolvers.character_resolvers import CharacterQuery
-from tests.mock_classes import MockHandler, MockInfo, MockSelectedField
+import asyncio
+
+from gql.types.character_types import (
+    CharacterFilter, CharacterInput, CharacterOrder, CharacterOrderField,
+    CharacterType, CharacterUpdateInput, RoleEnum,
+)
+from gql.resolvers.character_resolvers import (
+    AsyncCharacterMutation,
+    AsyncCharacterQuery,
+    CharacterMutation,
+    CharacterQuery,
+)
+from tests.mock_classes import (
+    MockAsyncHandler, MockHandler, MockInfo, MockSelectedField
+)
 
 
 mock_character_types = {
@@ -30,6 +42,10 @@ mock_info = MockInfo(
     selected_fields=[MockSelectedField('character')],
     context = {'character_handler': mock_character_handler}
 )
+mock_async_info = MockInfo(
+    selected_fields=[MockSelectedField('character')],
+    context = {'character_handler': MockAsyncHandler(mock_character_types)}
+)
 
 
 def test_character_valid_id():
@@ -50,7 +66,7 @@ def test_character_invalid_id():
     assert result == None
 
 def test_allCharacters():
-    result = CharacterQuery().allCharacters(info=mock_info)
+    result = CharacterQuery().allCharacters(info=mock_info, first=5)
 
     assert isinstance(result, list)
     assert len(result) == 2
@@ -58,3 +74,174 @@ def test_allCharacters():
 
     aliases = [character.alias for character in result]
     assert len(aliases) == len(set(aliases))
+    assert mock_character_handler.page_args[1:5] == (5, None, None, None)
+
+def test_allCharacters_filtered():
+    filter = CharacterFilter(role=RoleEnum.HERO)
+    order_by = CharacterOrder(field=CharacterOrderField.ALIAS)
+    CharacterQuery().allCharacters(
+        info=mock_info, filter=filter, order_by=order_by,
+    )
+
+    assert mock_character_handler.page_args[-2:] == (filter, order_by)
+
+
+def test_async_character_valid_id():
+    result = asyncio.run(AsyncCharacterQuery().character(
+        info=mock_async_info,
+        id='1',
+    ))
+
+    assert result.alias == 'Batman'
+
+def test_async_character_invalid_id():
+    result = asyncio.run(AsyncCharacterQuery().character(
+        info=mock_async_info,
+        id='8',
+    ))
+
+    assert result == None
+
+def test_async_allCharacters():
+    result = asyncio.run(
+        AsyncCharacterQuery().allCharacters(info=mock_async_info)
+    )
+
+    assert len(result) == 2
+    assert isinstance(result[0], CharacterType)
+
+def test_charactersWithPower():
+    result = CharacterQuery().charactersWithPower(
+        info=mock_info, powerId='1',
+    )
+
+    assert result == []
+
+def test_async_charactersWithPower_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().charactersWithPower(
+        info=MockInfo(), powerId='1',
+    ))
+
+    assert result == []
+
+def test_autocompleteCharacters():
+    result = CharacterQuery().autocompleteCharacters(
+        info=mock_info, prefix='jo',
+    )
+
+    assert [character.alias for character in result] == ['Joker']
+
+def test_async_autocompleteCharacters_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().autocompleteCharacters(
+        info=MockInfo(), prefix='jo',
+    ))
+
+    assert result == []
+
+def test_characterStats():
+    result = CharacterQuery().characterStats(info=mock_info)
+
+    assert result == {'count': len(mock_character_handler.data_set)}
+
+def test_powerStats():
+    result = CharacterQuery().powerStats(info=mock_info, limit=1)
+
+    assert len(result) == 1
+
+def test_async_characterStats_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().characterStats(
+        info=MockInfo(),
+    ))
+
+    assert result is None
+
+def test_async_powerStats_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().powerStats(info=MockInfo()))
+
+    assert result == []
+
+def test_charactersSharingPowers():
+    result = CharacterQuery().charactersSharingPowers(
+        info=mock_info, id='1', minShared=0, limit=5,
+    )
+
+    assert [(shared, character.alias) for shared, character in result] == [
+        (0, 'Joker'),
+    ]
+    assert CharacterQuery().charactersSharingPowers(
+        info=mock_info, id='1',
+    ) == []
+
+def test_charactersWithAllPowers():
+    result = CharacterQuery().charactersWithAllPowers(
+        info=mock_info, powerIds=['1'],
+    )
+
+    assert result == []
+
+def test_async_charactersSharingPowers_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().charactersSharingPowers(
+        info=MockInfo(), id='1',
+    ))
+
+    assert result == []
+
+def test_async_charactersWithAllPowers():
+    result = asyncio.run(AsyncCharacterQuery().charactersWithAllPowers(
+        info=mock_async_info, powerIds=[],
+    ))
+
+    assert result == []
+
+def test_enemyPath():
+    result = CharacterQuery().enemyPath(info=mock_info, fromId='1', toId='2')
+
+    assert [character.alias for character in result] == ['Batman', 'Joker']
+    assert CharacterQuery().enemyPath(
+        info=mock_info, fromId='1', toId='3',
+    ) is None
+
+def test_enemyNeighborhood():
+    result = CharacterQuery().enemyNeighborhood(info=mock_info, id='2')
+
+    assert [(hops, character.alias) for hops, character in result] == [
+        (1, 'Batman'),
+    ]
+
+def test_async_enemyPath():
+    result = asyncio.run(AsyncCharacterQuery().enemyPath(
+        info=mock_async_info, fromId='2', toId='2',
+    ))
+
+    assert [character.alias for character in result] == ['Joker']
+
+def test_async_enemyNeighborhood_without_handler():
+    result = asyncio.run(AsyncCharacterQuery().enemyNeighborhood(
+        info=MockInfo(), id='1', hops=2,
+    ))
+
+    assert result == []
+
+def test_createCharacters():
+    characters = [CharacterInput(alias='Robin')]
+    result = CharacterMutation().createCharacters(
+        info=mock_info, characters=characters,
+    )
+
+    assert result == characters
+    assert mock_character_handler.batch_args == ('create', characters)
+
+def test_updateCharacters_without_handler():
+    result = CharacterMutation().updateCharacters(
+        info=MockInfo(), characters=[CharacterUpdateInput(id='1')],
+    )
+
+    assert result == None
+
+def test_async_updateCharacters():
+    characters = [CharacterUpdateInput(id='1', name='Bruce')]
+    result = asyncio.run(AsyncCharacterMutation().updateCharacters(
+        info=mock_async_info, characters=characters,
+    ))
+
+    assert result == characters
@@ -1,6 +1,10 @@
-from gql.types.power_types import PowerType
-from gql.resolvers.power_resolvers import PowerQuery
-from tests.mock_classes import MockHandler, MockInfo
+import asyncio
+
+from gql.types.power_types import PowerInput, PowerType
+from gql.resolvers.power_resolvers import (
+    AsyncPowerMutation, AsyncPowerQuery, PowerMutation, PowerQuery
+)
+from tests.mock_classes import MockAsyncHandler, MockHandler, MockInfo
 
 
 mock_power_types = {
@@ -21,6 +25,9 @@ mock_power_handler = MockHandler(mock_power_types)
 mock_info = MockInfo(
     context = {'power_handler': mock_power_handler}
 )
+mock_async_info = MockInfo(
+    context = {'power_handler': MockAsyncHandler(mock_power_types)}
+)
 
 
 def test_power_valid_id():
@@ -40,7 +47,7 @@ def test_power_invalid_id():
     assert result == None
 
 def test_allPowers():
-    result = PowerQuery().allPowers(info=mock_info)
+    result = PowerQuery().allPowers(info=mock_info, last=1, before='xyz')
 
     assert isinstance(result, list)
     assert len(result) == 2
@@ -48,3 +55,34 @@ def test_allPowers():
 
     names = [power.name for power in result]
     assert len(names) == len(set(names))
+    assert mock_power_handler.page_args[:4] == (None, None, 1, 'xyz')
+
+
+def test_async_power_valid_id():
+    result = asyncio.run(AsyncPowerQuery().power(
+        info=mock_async_info,
+        id='1',
+    ))
+
+    assert result.name == 'flight'
+
+def test_async_allPowers():
+    result = asyncio.run(AsyncPowerQuery().allPowers(info=mock_async_info))
+
+    assert len(result) == 2
+    assert isinstance(result[0], PowerType)
+
+def test_upsertPowers():
+    powers = [PowerInput(name='flight', description='Ability to soar')]
+    result = PowerMutation().upsertPowers(info=mock_info, powers=powers)
+
+    assert result == powers
+    assert mock_power_handler.batch_args == ('upsert', powers)
+
+def test_async_upsertPowers():
+    powers = [PowerInput(name='flight')]
+    result = asyncio.run(
+        AsyncPowerMutation().upsertPowers(info=mock_async_info, powers=powers)
+    )
+
+    assert result == powers
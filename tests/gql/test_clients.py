@@ -0,0 +1,29 @@
+from gql import clients
+from gql.extensions import QueryCostExtension
+from settings import MAX_QUERY_COST
+
+
+class MockRequest:
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+def test_get_client_id(monkeypatch):
+    monkeypatch.setattr(clients, 'CLIENT_API_KEYS', {'secret': 'partner'})
+
+    assert clients.get_client_id(MockRequest({'X-API-Key': 'secret'})) == (
+        'partner')
+    assert clients.get_client_id(MockRequest({'X-API-Key': 'guess'})) == None
+    assert clients.get_client_id(MockRequest({})) == None
+    assert clients.get_client_id(None) == None
+
+def test_get_max_cost(monkeypatch):
+    monkeypatch.setattr(
+        'gql.extensions.CLIENT_MAX_QUERY_COST', {'partner': 50000},
+    )
+
+    assert QueryCostExtension.get_max_cost({'client_id': 'partner'}) == 50000
+    assert QueryCostExtension.get_max_cost({'client_id': None}) == (
+        MAX_QUERY_COST)
+    assert QueryCostExtension.get_max_cost(None) == MAX_QUERY_COST
@@ -0,0 +1,74 @@
+from graphql import parse
+
+from gql.cost import get_operation_cost
+from gql.schema import gql_router
+from settings import (
+    DEFAULT_PAGE_SIZE, ENEMIES_COST_MULTIPLIER, ENEMY_NEIGHBORHOOD_MAX_HOPS,
+)
+
+
+schema = gql_router.schema._schema
+
+
+def get_cost(query: str, variables: dict = None) -> int:
+    document = parse(query)
+    operations = [definition for definition in document.definitions
+                  if definition.kind == 'operation_definition']
+    fragments = [definition for definition in document.definitions
+                 if definition.kind == 'fragment_definition']
+    return get_operation_cost(schema, operations[0], fragments, variables)
+
+def test_scalar_fields_are_free():
+    assert get_cost('{hello}') == 0
+    assert get_cost('{power (id: "1") {name description}}') == 1
+
+def test_list_multipliers():
+    # 1 (character) + 3 * 1 (powers) + 3 * (1 + 3 * 1) (enemies)
+    assert get_cost(
+        '{character (id: "1") {powers {name} enemies {enemies {alias}}}}'
+    ) == 16
+
+def test_page_multiplier():
+    assert get_cost('{allPowers {edges {node {name}}}}') == (
+        DEFAULT_PAGE_SIZE)
+    assert get_cost('{allPowers (last: 5) {edges {node {name}}}}') == 5
+    assert get_cost(
+        'query ($first: Int) {allCharacters (first: $first) '
+        '{edges {node {powers {name}}}}}',
+        {'first': 2},
+    ) == 8
+
+def test_fragments():
+    assert get_cost(
+        'query {character (id: "1") {...enemies ... on CharacterType '
+        '{powers {name}}}} fragment enemies on CharacterType '
+        '{enemies {alias}}'
+    ) == 7
+
+def test_batch_mutation_multiplier():
+    assert get_cost(
+        'mutation {upsertPowers (powers: [{name: "a"}, {name: "b"}]) '
+        '{writtenCount}}'
+    ) == 2
+    assert get_cost(
+        'mutation ($characters: [CharacterInput!]!) '
+        '{createCharacters (characters: $characters) {writtenCount}}',
+        {'characters': [{'alias': str(i)} for i in range(5)]},
+    ) == 5
+
+def test_exponent_multiplier():
+    query = ('query ($hops: Int) {enemyNeighborhood (id: "1", hops: $hops) '
+             '{hops character {alias}}}')
+    # 1 (neighbor) + 1 (character) per expected neighbor
+    assert get_cost(query) == 2 * ENEMIES_COST_MULTIPLIER
+    assert get_cost(query, {'hops': 2}) == (
+        2 * ENEMIES_COST_MULTIPLIER ** 2)
+    assert get_cost(query, {'hops': 100}) == (
+        2 * ENEMIES_COST_MULTIPLIER ** ENEMY_NEIGHBORHOOD_MAX_HOPS)
+
+def test_variable_default_values():
+    query = ('query ($first: Int = 20) {allCharacters (first: $first) '
+             '{edges {node {powers {name}}}}}')
+
+    assert get_cost(query) == get_cost(query, {'first': 20}) == 80
+    assert get_cost(query, {'first': 2}) == 8
@@ -0,0 +1,54 @@
+from bson import ObjectId
+
+from data_access import events
+from data_access.models import Character
+from gql.response_cache import (
+    CachedResponse,
+    get_cache_key,
+    get_ttl,
+    is_not_modified,
+    response_cache,
+)
+
+
+object_id = '651c3b5e8f1d2a6b4c9e0a11'
+
+
+def test_get_ttl():
+    assert get_ttl('{hello}', None) == 3600
+    assert get_ttl('{hello character (id: "1") {alias}}', None) == 60
+    assert get_ttl('query A {hello} query B {character (id: "1") {alias}}',
+                   'A') == 3600
+    assert get_ttl('{__typename}', None) is None
+    assert get_ttl('mutation {hello}', None) is None
+    assert get_ttl('{hello', None) is None
+
+def test_get_cache_key():
+    key = get_cache_key('{ hello }', {'a': 1, 'b': 2}, None, None)
+
+    assert key == get_cache_key('{hello}', {'b': 2, 'a': 1}, None, None)
+    assert key != get_cache_key('{hello}', {'a': 1, 'b': 2}, None, 'client')
+
+def test_is_not_modified():
+    etag = CachedResponse(b'{}', frozenset()).etag
+
+    assert not is_not_modified(None, etag)
+    assert not is_not_modified('"other"', etag)
+    assert is_not_modified(etag, etag)
+    assert is_not_modified(f'"other", W/{etag}', etag)
+    assert is_not_modified('*', etag)
+
+def test_invalidate_on_write():
+    response_cache.set('document', CachedResponse(
+        b'{}', frozenset({('Character', ObjectId(object_id))}),
+    ))
+    response_cache.set('collection', CachedResponse(
+        b'{}', frozenset({('Character', None)}),
+    ))
+    response_cache.set('other', CachedResponse(b'{}', frozenset()))
+    events.publish_write(Character, [object_id])
+
+    assert response_cache.get('document') == (False, None)
+    assert response_cache.get('collection') == (False, None)
+    assert response_cache.get('other')[0]
+    response_cache.clear()
@@ -1,11 +1,10 @@
 from typing import Generic, TypeVar, Any
 
-from mongoengine import Document
-
+from data_access.models import RawDocument
 from gql.types.common_types import GQLType
 
 
-T = TypeVar('T', Document, GQLType)
+T = TypeVar('T', RawDocument, GQLType)
 
 
 class MockSelectedField:
@@ -13,10 +12,25 @@ class MockSelectedField:
     def __init__(
         self,
         name: str,
-        selections: list['MockSelectedField'] = None
+        selections: list['MockSelectedField'] = None,
+        directives: dict[str, dict] = None,
     ):
         self.name = name
         self.selections = selections or []
+        self.directives = directives or dict()
+
+
+class MockFragment:
+
+    def __init__(
+        self,
+        selections: list[MockSelectedField],
+        directives: dict[str, dict] = None,
+        type_condition: str = None,
+    ):
+        self.type_condition = type_condition
+        self.selections = selections
+        self.directives = directives or dict()
 
 
 class MockInfo:
@@ -45,9 +59,284 @@ class BaseMockDataInterface(Generic[T]):
         return list(self.data_set.values())
 
 
-class MockDAO(BaseMockDataInterface[Document]):
-    pass
+class MockDAO(BaseMockDataInterface[RawDocument]):
+
+    def __init__(self, data_set: dict[str, RawDocument]):
+        super().__init__(data_set)
+        self.graph_args = None
+        self.written = None
+        self.write_count = 0
+
+    def get_enemy_graph(self, *args) -> RawDocument | None:
+        self.graph_args = args
+        return self.data_set.get(args[0])
+
+    def _matches(self, entry: RawDocument, filters: dict | None) -> bool:
+        for key, value in (filters or {}).items():
+            field, _, lookup = key.partition('__')
+            stored = entry.get(field)
+            if lookup == 'prefix':
+                if not isinstance(stored, str) or not stored.startswith(value):
+                    return False
+            elif value != stored and not (
+                isinstance(stored, list) and value in stored
+            ):
+                return False
+        return True
+
+    def get_page(
+        self,
+        limit: int,
+        after: Any = None,
+        before: Any = None,
+        reverse: bool = False,
+        only: list[str] = None,
+        filters: dict = None,
+        sort: tuple[str, int] = None,
+    ) -> list[RawDocument]:
+        self.page_args = (filters, sort)
+        field, direction = sort or ('id', 1)
+
+        def key(id: str) -> Any:
+            if field == 'id':
+                return id
+            return (self.data_set[id].get(field), id)
+
+        def position(cursor: Any) -> Any:
+            return cursor if field == 'id' else tuple(cursor)
+
+        ids = sorted(
+            (id for id, entry in self.data_set.items()
+             if self._matches(entry, filters)),
+            key=key, reverse=direction < 0,
+        )
+        if after is not None:
+            ids = [id for id in ids
+                   if (key(id) > position(after)) == (direction > 0)
+                   and key(id) != position(after)]
+        if before is not None:
+            ids = [id for id in ids
+                   if (key(id) < position(before)) == (direction > 0)
+                   and key(id) != position(before)]
+        if reverse:
+            ids.reverse()
+        return [self.data_set[id] for id in ids[:limit]]
+
+    def get_count(self, filters: dict = None) -> int:
+        return sum(self._matches(entry, filters)
+                   for entry in self.data_set.values())
+
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        return {id for id in ids if id in self.data_set}
+
+    def get_reference_version(self, field: str) -> str:
+        return ':'.join(map(str, (
+            self.write_count,
+            len(self.data_set),
+            max(self.data_set, default=''),
+            sum(len(entry.get(field, []))
+                for entry in self.data_set.values()),
+        )))
+
+    def get_role_stats(self) -> list[RawDocument]:
+        stats = dict()
+        for entry in self.data_set.values():
+            role = entry.get('role')
+            stat = stats.setdefault(role, RawDocument(
+                _id=role, count=0, powers=0, max_powers=0,
+                enemies=0, max_enemies=0,
+            ))
+            stat['count'] += 1
+            for field in ('powers', 'enemies'):
+                degree = len(entry.get(field, []))
+                stat[field] += degree
+                stat[f'max_{field}'] = max(stat[f'max_{field}'], degree)
+        return [stats[role] for role in sorted(stats, key=str)]
+
+    def get_power_stats(self, limit: int) -> list[RawDocument]:
+        counts = dict()
+        for entry in self.data_set.values():
+            for id in entry.get('powers', []):
+                counts[id] = counts.get(id, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [RawDocument(_id=id, count=count)
+                for id, count in ranked[:limit]]
+
+    def get_many_by_reference(
+        self, field: str, ids: list[str], *args
+    ) -> list[RawDocument]:
+        return [entry for entry in self.data_set.values()
+                if set(entry.get(field, [])) & set(ids)]
+
+    def bulk_insert(self, documents: list[dict]) -> list[tuple]:
+        self.written = documents
+        self.write_count += 1
+        return [(f'new{index}', None) for index in range(len(documents))]
+
+    def bulk_upsert(self, documents: list[dict], key: str) -> list[tuple]:
+        self.written = documents
+        self.write_count += 1
+        return [(document[key], None) for document in documents]
+
+    def bulk_update(self, updates: list[tuple]) -> list[tuple]:
+        self.written = updates
+        self.write_count += 1
+        return [(id, None) if id in self.data_set
+                else (None, 'Document not found.') for id, _ in updates]
 
 
 class MockHandler(BaseMockDataInterface[GQLType]):
-    pass
+
+    def __init__(self, data_set: dict[str, GQLType]):
+        super().__init__(data_set)
+        self.page_args = None
+        self.batch_args = None
+
+    def get_page(self, *args) -> list[GQLType]:
+        self.page_args = args
+        return list(self.data_set.values())
+
+    def get_many_by_power(self, power_id: str, *args) -> list[GQLType]:
+        return [entry for entry in self.data_set.values()
+                if power_id in [power.id for power in entry.powers]]
+
+    def get_enemy_path(
+        self, from_id: str, to_id: str, *args
+    ) -> list[GQLType] | None:
+        if from_id not in self.data_set or to_id not in self.data_set:
+            return None
+        return [self.data_set[id] for id in dict.fromkeys((from_id, to_id))]
+
+    def get_enemy_neighborhood(
+        self, id: str, hops: int, *args
+    ) -> list[tuple[int, GQLType]]:
+        return [(1, entry) for key, entry in self.data_set.items()
+                if key != id and id in self.data_set and hops > 0]
+
+    def get_many_sharing_powers(
+        self, id: str, min_shared: int, limit: int, *args
+    ) -> list[tuple[int, GQLType]]:
+        powers = {power.id for power in self.data_set[id].powers} \
+            if id in self.data_set else set()
+        shared = [
+            (len(powers & {power.id for power in entry.powers}), entry)
+            for key, entry in self.data_set.items() if key != id
+        ]
+        return [(count, entry) for count, entry in shared
+                if count >= min_shared][:limit]
+
+    def get_many_with_all_powers(
+        self, power_ids: list[str], *args
+    ) -> list[GQLType]:
+        return [entry for entry in self.data_set.values()
+                if power_ids and set(power_ids)
+                <= {power.id for power in entry.powers}]
+
+    def autocomplete(self, prefix: str, limit: int) -> list[GQLType]:
+        return [entry for entry in self.data_set.values()
+                if entry.alias.lower().startswith(prefix.lower())][:limit]
+
+    def get_stats(self) -> dict[str, int]:
+        return {'count': len(self.data_set)}
+
+    def get_power_stats(self, limit: int) -> list[GQLType]:
+        return list(self.data_set.values())[:limit]
+
+    def create_many(self, items: list) -> list:
+        self.batch_args = ('create', items)
+        return items
+
+    def update_many(self, items: list) -> list:
+        self.batch_args = ('update', items)
+        return items
+
+    def upsert_many(self, items: list) -> list:
+        self.batch_args = ('upsert', items)
+        return items
+
+
+class BaseAsyncMockDataInterface(BaseMockDataInterface[T]):
+
+    async def get_one_by_id(self, id: str, *args) -> T | None:
+        return super().get_one_by_id(id, *args)
+
+    async def get_many_by_ids(self, ids: list[str], *args) -> list[T]:
+        return super().get_many_by_ids(ids, *args)
+
+    async def get_all(self, *args) -> list[T]:
+        return super().get_all(*args)
+
+
+class MockAsyncDAO(BaseAsyncMockDataInterface[RawDocument], MockDAO):
+
+    async def get_page(self, *args) -> list[RawDocument]:
+        return MockDAO.get_page(self, *args)
+
+    async def get_count(self, *args) -> int:
+        return MockDAO.get_count(self, *args)
+
+    async def get_enemy_graph(self, *args) -> RawDocument | None:
+        return MockDAO.get_enemy_graph(self, *args)
+
+    async def get_existing_ids(self, ids: list[str]) -> set[str]:
+        return MockDAO.get_existing_ids(self, ids)
+
+    async def get_reference_version(self, field: str) -> str:
+        return MockDAO.get_reference_version(self, field)
+
+    async def get_role_stats(self) -> list[RawDocument]:
+        return MockDAO.get_role_stats(self)
+
+    async def get_power_stats(self, limit: int) -> list[RawDocument]:
+        return MockDAO.get_power_stats(self, limit)
+
+    async def get_many_by_reference(self, *args) -> list[RawDocument]:
+        return MockDAO.get_many_by_reference(self, *args)
+
+    async def bulk_insert(self, documents: list[dict]) -> list[tuple]:
+        return MockDAO.bulk_insert(self, documents)
+
+    async def bulk_upsert(self, documents: list[dict], key: str) -> list:
+        return MockDAO.bulk_upsert(self, documents, key)
+
+    async def bulk_update(self, updates: list[tuple]) -> list[tuple]:
+        return MockDAO.bulk_update(self, updates)
+
+
+class MockAsyncHandler(BaseAsyncMockDataInterface[GQLType], MockHandler):
+
+    async def get_page(self, *args) -> list[GQLType]:
+        return MockHandler.get_page(self, *args)
+
+    async def get_many_by_power(self, *args) -> list[GQLType]:
+        return MockHandler.get_many_by_power(self, *args)
+
+    async def get_enemy_path(self, *args) -> list[GQLType] | None:
+        return MockHandler.get_enemy_path(self, *args)
+
+    async def get_enemy_neighborhood(self, *args) -> list[tuple]:
+        return MockHandler.get_enemy_neighborhood(self, *args)
+
+    async def get_many_sharing_powers(self, *args) -> list[tuple]:
+        return MockHandler.get_many_sharing_powers(self, *args)
+
+    async def get_many_with_all_powers(self, *args) -> list[GQLType]:
+        return MockHandler.get_many_with_all_powers(self, *args)
+
+    async def autocomplete(self, *args) -> list[GQLType]:
+        return MockHandler.autocomplete(self, *args)
+
+    async def get_stats(self) -> dict[str, int]:
+        return MockHandler.get_stats(self)
+
+    async def get_power_stats(self, limit: int) -> list[GQLType]:
+        return MockHandler.get_power_stats(self, limit)
+
+    async def create_many(self, items: list) -> list:
+        return MockHandler.create_many(self, items)
+
+    async def update_many(self, items: list) -> list:
+        return MockHandler.update_many(self, items)
+
+    async def upsert_many(self, items: list) -> list:
+        return MockHandler.upsert_many(self, items)
@@ -0,0 +1,91 @@
+from data_access.identity_map import identity_map_scope
+from data_access.models import RawDocument
+from gql.types.character_types import CharacterType
+from service.character_assembly import (
+    create_character, get_pending, get_unique_ids, map_by_ids, map_enemies,
+    map_enemy_of, map_powers, parse_selection, store_assembled,
+)
+from tests.mock_classes import MockSelectedField
+from settings import MAX_QUERY_DEPTH
+
+
+docs = [
+    RawDocument(_id='1', alias='Batman', enemies=['2', '3']),
+    RawDocument(_id='2', alias='Joker', enemies=['1']),
+]
+
+
+def test_parse_selection():
+    powers, enemies, enemy_of = parse_selection(
+        [MockSelectedField('powers'), MockSelectedField('enemies')], 0,
+    )
+
+    assert powers == []
+    assert enemies == []
+    assert enemy_of is None
+
+def test_parse_selection_exceeding():
+    powers, enemies, _ = parse_selection(
+        [MockSelectedField('powers'), MockSelectedField('enemies')],
+        MAX_QUERY_DEPTH + 1,
+    )
+
+    assert powers == []
+    assert enemies is None
+
+def test_get_unique_ids():
+    assert get_unique_ids([['1', '2'], ['2', '3'], []]) == ['1', '2', '3']
+
+def test_map_powers():
+    result = map_powers([['1', '2'], ['2']], ['1', '2'], ['flight', None])
+
+    assert result == [['flight'], []]
+
+def test_map_enemies():
+    enemies = [create_character(entry, [], []) for entry in docs]
+
+    result = map_enemies([['2', '3'], ['1']], enemies)
+
+    assert [[enemy.alias for enemy in entry] for entry in result] == [
+        ['Joker'], ['Batman'],
+    ]
+
+def test_map_enemy_of():
+    characters = [create_character(entry, [], []) for entry in docs]
+
+    result = map_enemy_of(['1', '3', '4'], docs, characters)
+
+    assert [[enemy.alias for enemy in entry] for entry in result] == [
+        ['Joker'], ['Batman'], [],
+    ]
+
+def test_map_by_ids():
+    characters = [create_character(entry, [], []) for entry in docs]
+
+    result = map_by_ids(['2', '4', '1'], docs, characters)
+
+    assert list(result) == ['2', '1']
+    assert result['2'].alias == 'Joker'
+
+def test_create_character():
+    character = create_character(docs[0], [], [])
+
+    assert isinstance(character, CharacterType)
+    assert character.enemy_ids == ['2', '3']
+    assert character.enemy_of == []
+
+def test_get_pending_without_identity_map():
+    keys, pending = get_pending(docs, [], 0)
+
+    assert keys is None
+    assert list(pending.values()) == docs
+
+def test_store_assembled():
+    fields = [MockSelectedField('alias')]
+    with identity_map_scope():
+        keys, pending = get_pending(docs, fields, 0)
+        store_assembled(keys, pending, ['Batman', 'Joker'])
+
+        keys, pending = get_pending(docs[1:], fields, 0)
+        assert pending == {}
+        assert store_assembled(keys, pending, []) == ['Joker']
@@ -0,0 +1,77 @@
+import pytest
+from bson import ObjectId
+
+from data_access.identity_map import to_key
+from gql.types.character_types import (
+    CharacterInput, CharacterUpdateInput, RoleEnum,
+)
+from service.character_batches import (
+    check_batch, get_changed_documents, get_character_fields,
+    get_new_documents, prepare_batch,
+)
+from utils import utils
+
+
+power_id = str(ObjectId())
+enemy_id = str(ObjectId())
+
+
+def test_get_character_fields():
+    fields = get_character_fields(CharacterInput(
+        alias='Batman', role=RoleEnum.HERO, powers=[power_id],
+    ))
+
+    assert fields == {
+        'alias': 'Batman',
+        'role': 'hero',
+        'powers': [to_key(power_id)],
+        'enemies': [],
+    }
+    assert get_character_fields(CharacterUpdateInput(
+        id=enemy_id, name='Bruce Wayne',
+    )) == {'name': 'Bruce Wayne'}
+
+def test_prepare_batch():
+    batch, references = prepare_batch([
+        CharacterInput(alias='Batman', enemies=[enemy_id]),
+        CharacterInput(alias='Robin', powers=[power_id], enemies=[enemy_id]),
+    ])
+
+    assert len(batch) == 2
+    assert references == {
+        'powers': {to_key(power_id)},
+        'enemies': {to_key(enemy_id)},
+    }
+
+def test_prepare_batch_exceeding(monkeypatch):
+    monkeypatch.setattr(utils, 'MAX_BATCH_SIZE', 1)
+
+    with pytest.raises(ValueError):
+        prepare_batch([CharacterInput(alias='A'), CharacterInput(alias='B')])
+
+def test_check_batch():
+    batch, references = prepare_batch([
+        CharacterInput(alias='Batman', enemies=[enemy_id]),
+        CharacterInput(alias='Robin', powers=[power_id]),
+    ])
+
+    errors = check_batch(
+        batch, {'powers': set(), 'enemies': references['enemies']}, False,
+    )
+
+    assert errors == [None, f'Unknown powers: {power_id}']
+    assert len(get_new_documents(batch, errors)) == 1
+
+def test_check_batch_updates():
+    characters = [
+        CharacterUpdateInput(id=enemy_id),
+        CharacterUpdateInput(id=power_id, alias='Robin'),
+    ]
+    batch, _ = prepare_batch(characters)
+
+    errors = check_batch(batch, {'powers': set(), 'enemies': set()}, True)
+
+    assert errors == ['Nothing to update.', None]
+    assert [id for id, _ in get_changed_documents(
+        characters, batch, errors,
+    )] == [power_id]
@@ -1,24 +1,44 @@
-from gql.types.character_types import CharacterType
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from gql.types.character_types import (
+    CharacterConnection, CharacterFilter, CharacterInput, CharacterOrder,
+    CharacterOrderField, CharacterType, CharacterUpdateInput, RoleEnum,
+)
+from gql.types.common_types import SortDirection
 from gql.types.power_types import  PowerType
-from service.character_handler import CharacterHandler
-from data_access.models import Character
+from service.character_handler import AsyncCharacterHandler, CharacterHandler
+from service.character_indexes import (
+    AUTOCOMPLETE_FIELDS, ENEMY_INDEX_FIELD, POWER_INDEX_FIELD,
+)
+from data_access.graph_index import (
+    GraphIndex, get_graph_index, is_file_fresh,
+)
+from data_access.identity_map import identity_map_scope
+from data_access.inverted_index import get_inverted_index
+from data_access.models import Character, RawDocument
+from data_access.prefix_index import get_prefix_index
 from tests.mock_classes import (
-    MockHandler, MockDAO, MockSelectedField
+    MockHandler, MockDAO, MockFragment, MockSelectedField, MockAsyncDAO,
+    MockAsyncHandler,
 )
 from settings import MAX_QUERY_DEPTH
+from utils import utils
 
 
 mock_character_docs = {
-    '1': Character(
-        id='1',
+    '1': RawDocument(
+        _id='1',
         alias='Batman',
         name='Bruce Wayne',
         role='hero',
         powers=['1'],
         enemies=['2'],
     ),
-    '2': Character(
-        id='2',
+    '2': RawDocument(
+        _id='2',
         alias='Joker',
         name='unknown',
         role='villain',
@@ -42,6 +62,14 @@ mock_power_types = {
 
 CharacterHandler.dao = MockDAO(mock_character_docs)
 CharacterHandler.power_handler = MockHandler(mock_power_types)
+AsyncCharacterHandler.dao = MockAsyncDAO(mock_character_docs)
+AsyncCharacterHandler.power_handler = MockAsyncHandler(mock_power_types)
+CharacterHandler.power_handler.dao = MockDAO(
+    {id: RawDocument(_id=id) for id in mock_power_types}
+)
+AsyncCharacterHandler.power_handler.dao = MockAsyncDAO(
+    {id: RawDocument(_id=id) for id in mock_power_types}
+)
 
 selected_fields ={
     'hollow': [],
@@ -205,3 +233,773 @@ def test_get_all():
     assert character.enemies == []
     assert isinstance(character.powers, list)
     assert isinstance(character.powers[0], PowerType)
+
+def test_get_all_batched():
+    character_loader = CharacterHandler.create_character_loader()
+    power_loader = CharacterHandler.create_power_loader()
+
+    result = CharacterHandler.get_all(
+        selected_fields=selected_fields['deep'],
+        character_loader=character_loader,
+        power_loader=power_loader,
+    )
+
+    assert len(result) == 2
+    assert result[0].enemies[0].enemies[0].powers[0].name == 'flight'
+    # Characters are primed by get_all with the root projection, which
+    # is reused for the first level of enemies. The second level needs
+    # other fields and is fetched with a single batch.
+    assert character_loader.batch_count == 1
+    # Powers of all characters at the deepest level are fetched at once.
+    assert power_loader.batch_count == 1
+
+def test_get_one_by_id_batched():
+    character_loader = CharacterHandler.create_character_loader()
+
+    result = CharacterHandler.get_one_by_id(
+        id='1',
+        selected_fields=selected_fields['exceeding'],
+        character_loader=character_loader,
+    )
+
+    assert result.enemies[0].enemies[0].alias == 'Batman'
+    assert character_loader.batch_count == 1
+
+def test_get_one_by_id_assembled_once_per_request():
+    with identity_map_scope():
+        first = CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['shallow'],
+        )
+        second = CharacterHandler.get_all(
+            selected_fields=selected_fields['shallow'],
+        )
+
+    assert second[0] is first
+    assert second[1].alias == 'Joker'
+
+def test_get_one_by_id_not_shared_between_requests():
+    with identity_map_scope():
+        first = CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['shallow'],
+        )
+    with identity_map_scope():
+        second = CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['shallow'],
+        )
+
+    assert first is not second
+    assert first.alias == second.alias
+
+def test_get_one_by_id_exceeding_in_scope():
+    with identity_map_scope():
+        result = CharacterHandler.get_one_by_id(
+            id='2',
+            selected_fields=selected_fields['exceeding'],
+        )
+
+    enemy_5 = result.enemies[0].enemies[0].enemies[0].enemies[0].enemies[0]
+    assert enemy_5.alias == 'Batman'
+    assert enemy_5.enemies == []
+
+def test_get_one_by_id_graph_lookup():
+    CharacterHandler.dao.graph_args = None
+    with identity_map_scope():
+        result = CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['deep'],
+        )
+
+    assert result.enemies[0].enemies[0].powers[0].name == 'flight'
+    assert CharacterHandler.dao.graph_args == ('1', 2, True)
+
+def test_get_one_by_id_graph_lookup_depth_limit():
+    with identity_map_scope():
+        CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['exceeding'],
+        )
+
+    assert CharacterHandler.dao.graph_args == (
+        '1', MAX_QUERY_DEPTH + 1, False)
+
+def test_get_one_by_id_no_graph_lookup():
+    CharacterHandler.dao.graph_args = None
+    with identity_map_scope():
+        CharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=selected_fields['with_powers'],
+        )
+    CharacterHandler.get_one_by_id(
+        id='1',
+        selected_fields=selected_fields['deep'],
+    )
+
+    assert CharacterHandler.dao.graph_args == None
+
+def test_async_get_one_by_id_graph_lookup():
+    async def get_one_by_id():
+        with identity_map_scope():
+            return await AsyncCharacterHandler.get_one_by_id(
+                id='2',
+                selected_fields=selected_fields['shallow'],
+            )
+
+    result = asyncio.run(get_one_by_id())
+
+    assert result.enemies[0].alias == 'Batman'
+    assert AsyncCharacterHandler.dao.graph_args == ('2', 1, False)
+
+def test_async_get_one_by_id_invalid_id():
+    result = asyncio.run(AsyncCharacterHandler.get_one_by_id(
+        id='6',
+        selected_fields=selected_fields['hollow'],
+    ))
+
+    assert result == None
+
+def test_async_get_one_by_id_deep():
+    result = asyncio.run(AsyncCharacterHandler.get_one_by_id(
+        id='2',
+        selected_fields=selected_fields['deep'],
+    ))
+
+    assert isinstance(result, CharacterType)
+    assert result.alias == 'Joker'
+
+    enemy = result.enemies[0]
+    assert enemy.alias == 'Batman'
+    assert enemy.powers == []
+
+    ememy_of_enemy = enemy.enemies[0]
+    assert ememy_of_enemy.alias == 'Joker'
+    assert ememy_of_enemy.enemies == []
+    assert ememy_of_enemy.powers[0].name == 'invulnerability'
+
+def test_async_get_one_by_id_exceeding():
+    result = asyncio.run(AsyncCharacterHandler.get_one_by_id(
+        id='2',
+        selected_fields=selected_fields['exceeding'],
+    ))
+
+    enemy_5 = result.enemies[0].enemies[0].enemies[0].enemies[0].enemies[0]
+    assert enemy_5.alias == 'Batman'
+    assert enemy_5.enemies == []
+    assert enemy_5.enemy_ids == ['2']
+
+def test_async_get_all():
+    async def get_all():
+        with identity_map_scope():
+            return await AsyncCharacterHandler.get_all(
+                selected_fields=selected_fields['with_powers'],
+            )
+
+    result = asyncio.run(get_all())
+
+    assert len(result) == 2
+    assert result[0].enemies == []
+    assert isinstance(result[0].powers[0], PowerType)
+    assert result[1].powers[0].name == 'invulnerability'
+
+def page_fields(node_fields):
+    return [
+        MockSelectedField('edges', [MockSelectedField('node', node_fields)]),
+        MockSelectedField('pageInfo'),
+        MockSelectedField('totalCount'),
+    ]
+
+def test_get_page_first():
+    result = CharacterHandler.get_page(
+        selected_fields=page_fields(selected_fields['with_powers']),
+        first=1,
+    )
+
+    assert isinstance(result, CharacterConnection)
+    assert len(result.edges) == 1
+    assert result.edges[0].node.alias == 'Batman'
+    assert result.edges[0].node.powers[0].name == 'flight'
+    assert result.page_info.has_next_page == True
+    assert result.page_info.has_previous_page == False
+    assert result.total_count == 2
+
+def test_get_page_after():
+    first_page = CharacterHandler.get_page(
+        selected_fields=page_fields([]),
+        first=1,
+    )
+    result = CharacterHandler.get_page(
+        selected_fields=page_fields([]),
+        first=1,
+        after=first_page.page_info.end_cursor,
+    )
+
+    assert result.edges[0].node.alias == 'Joker'
+    assert result.page_info.has_next_page == False
+    assert result.page_info.has_previous_page == True
+
+def test_get_page_last():
+    result = CharacterHandler.get_page(
+        selected_fields=page_fields(selected_fields['shallow'])[:1],
+        last=2,
+    )
+
+    assert [edge.node.alias for edge in result.edges] == ['Batman', 'Joker']
+    assert result.edges[1].node.enemies[0].alias == 'Batman'
+    assert result.page_info.has_previous_page == False
+    assert result.total_count == None
+
+def test_async_get_page():
+    result = asyncio.run(AsyncCharacterHandler.get_page(
+        selected_fields=page_fields(selected_fields['with_powers']),
+        last=1,
+    ))
+
+    assert result.edges[0].node.alias == 'Joker'
+    assert result.edges[0].node.powers[0].name == 'invulnerability'
+    assert result.page_info.has_previous_page == True
+    assert result.total_count == 2
+
+def deferred_fields(fields):
+    return [MockFragment(fields, directives={'defer': {}})]
+
+def test_get_one_by_id_deferred_enemies():
+    result = CharacterHandler.get_one_by_id(
+        id='1', selected_fields=deferred_fields(selected_fields['shallow']),
+    )
+
+    async def resolve_enemies():
+        return await result.enemies
+
+    assert result.alias == 'Batman'
+    assert [enemy.alias for enemy in asyncio.run(resolve_enemies())] \
+        == ['Joker']
+
+def test_async_get_one_by_id_deferred_enemies():
+    async def get_one_by_id():
+        character = await AsyncCharacterHandler.get_one_by_id(
+            id='1',
+            selected_fields=deferred_fields(selected_fields['deep']),
+        )
+        enemies = await character.enemies
+        return character, enemies
+
+    character, enemies = asyncio.run(get_one_by_id())
+
+    assert character.alias == 'Batman'
+    assert enemies[0].alias == 'Joker'
+    assert enemies[0].enemies[0].powers[0].name == 'flight'
+
+def streamed_page_fields(node_fields):
+    fields = page_fields(node_fields)
+    fields[0].directives = {'stream': {'initialCount': 1}}
+    return fields
+
+def test_get_page_streamed():
+    result = CharacterHandler.get_page(
+        selected_fields=streamed_page_fields(selected_fields['with_powers']),
+        first=2,
+    )
+
+    async def resolve_edges():
+        return [await edge for edge in result.edges]
+
+    edges = asyncio.run(resolve_edges())
+
+    assert [edge.node.alias for edge in edges] == ['Batman', 'Joker']
+    assert edges[1].node.powers[0].name == 'invulnerability'
+    assert result.page_info.end_cursor == edges[1].cursor
+
+def test_async_get_page_streamed():
+    async def get_page():
+        connection = await AsyncCharacterHandler.get_page(
+            selected_fields=streamed_page_fields(selected_fields['shallow']),
+            first=2,
+        )
+        return [await edge for edge in connection.edges]
+
+    edges = asyncio.run(get_page())
+
+    assert [edge.node.alias for edge in edges] == ['Batman', 'Joker']
+    assert edges[0].node.enemies[0].alias == 'Joker'
+
+def test_get_one_by_id_enemy_of():
+    result = CharacterHandler.get_one_by_id(
+        id='1',
+        selected_fields=[
+            MockSelectedField('enemyOf', [
+                MockSelectedField('alias'),
+                MockSelectedField('enemyOf', [MockSelectedField('alias')]),
+            ]),
+        ],
+    )
+
+    assert [enemy.alias for enemy in result.enemy_of] == ['Joker']
+    assert result.enemy_of[0].enemy_of[0].alias == 'Batman'
+    assert result.enemies == []
+
+def test_get_many_by_power():
+    result = CharacterHandler.get_many_by_power(
+        '2', selected_fields=selected_fields['shallow'],
+    )
+
+    assert [character.alias for character in result] == ['Joker']
+    assert result[0].enemies[0].alias == 'Batman'
+
+def test_async_get_page_enemy_of():
+    result = asyncio.run(AsyncCharacterHandler.get_page(
+        selected_fields=[MockSelectedField('edges', [
+            MockSelectedField('node', [
+                MockSelectedField('enemyOf', [MockSelectedField('alias')]),
+            ]),
+        ])],
+        first=2,
+    ))
+
+    assert [[enemy.alias for enemy in edge.node.enemy_of]
+            for edge in result.edges] == [['Joker'], ['Batman']]
+
+def test_get_page_filtered():
+    result = CharacterHandler.get_page(
+        selected_fields=page_fields([]),
+        filter=CharacterFilter(role=RoleEnum.VILLAIN, alias_prefix='Jo'),
+    )
+
+    assert [edge.node.alias for edge in result.edges] == ['Joker']
+    assert result.total_count == 1
+    assert CharacterHandler.dao.page_args == (
+        {'role': 'villain', 'alias__prefix': 'Jo'}, ('id', 1),
+    )
+
+def test_get_page_ordered():
+    order_by = CharacterOrder(
+        field=CharacterOrderField.NAME, direction=SortDirection.DESC,
+    )
+    first_page = CharacterHandler.get_page(
+        selected_fields=page_fields([]), first=1, order_by=order_by,
+    )
+    result = CharacterHandler.get_page(
+        selected_fields=page_fields([]),
+        first=1,
+        after=first_page.page_info.end_cursor,
+        order_by=order_by,
+    )
+
+    assert first_page.edges[0].node.alias == 'Joker'
+    assert utils.decode_keyset_cursor(
+        first_page.edges[0].cursor, 'name',
+    ) == ('unknown', '2')
+    assert result.edges[0].node.alias == 'Batman'
+    assert result.page_info.has_next_page == False
+    with pytest.raises(ValueError):
+        CharacterHandler.get_page(
+            selected_fields=page_fields([]),
+            after=first_page.page_info.end_cursor,
+        )
+
+def test_async_get_page_filtered():
+    result = asyncio.run(AsyncCharacterHandler.get_page(
+        selected_fields=page_fields([]),
+        filter=CharacterFilter(has_power='1'),
+        order_by=CharacterOrder(field=CharacterOrderField.ALIAS),
+    ))
+
+    assert [edge.node.alias for edge in result.edges] == ['Batman']
+    assert result.total_count == 1
+
+def test_async_get_many_by_power():
+    result = asyncio.run(AsyncCharacterHandler.get_many_by_power(
+        '1', selected_fields=selected_fields['hollow'],
+    ))
+
+    assert [character.alias for character in result] == ['Batman']
+
+def mock_references(monkeypatch, handler, dao_class) -> tuple:
+    # Written references are converted to ObjectIds, so they must be valid
+    enemy_id, power_id = ObjectId(), ObjectId()
+    monkeypatch.setattr(
+        handler, 'dao', dao_class({enemy_id: RawDocument(_id=enemy_id)}),
+    )
+    monkeypatch.setattr(
+        handler.power_handler, 'dao',
+        dao_class({power_id: RawDocument(_id=power_id)}),
+    )
+    return str(enemy_id), str(power_id)
+
+def test_create_many(monkeypatch):
+    enemy_id, power_id = mock_references(
+        monkeypatch, CharacterHandler, MockDAO,
+    )
+    result = CharacterHandler.create_many([
+        CharacterInput(alias='Robin', role=RoleEnum.HERO, powers=[power_id],
+                       enemies=[enemy_id]),
+        CharacterInput(alias='Bane', enemies=['7']),
+        CharacterInput(alias='X'),
+        CharacterInput(alias='Alfred'),
+    ])
+
+    assert result.written_count == 2
+    assert [item.id for item in result.results] == ['new0', None, None, 'new1']
+    assert result.results[1].error == 'Unknown enemies: 7'
+    assert result.results[2].error.startswith('alias:')
+    assert not result.results[2].success()
+
+    written = CharacterHandler.dao.written
+    assert written[0] == {
+        'alias': 'Robin', 'name': 'unknown', 'role': 'hero',
+        'powers': [ObjectId(power_id)], 'enemies': [ObjectId(enemy_id)],
+    }
+    assert written[1]['alias'] == 'Alfred'
+
+def test_update_many():
+    result = CharacterHandler.update_many([
+        CharacterUpdateInput(id='1', name='Bruce', powers=['2', '9']),
+        CharacterUpdateInput(id='2', role=RoleEnum.ANTIHERO),
+        CharacterUpdateInput(id='5', alias='Nobody'),
+        CharacterUpdateInput(id='1'),
+    ])
+
+    assert [item.error for item in result.results] == [
+        'Unknown powers: 9', None, 'Document not found.', 'Nothing to update.',
+    ]
+    # Only provided fields are written
+    assert CharacterHandler.dao.written == [
+        ('2', {'role': 'antihero'}), ('5', {'alias': 'Nobody'}),
+    ]
+
+def test_create_many_exceeding_batch_size(monkeypatch):
+    monkeypatch.setattr(utils, 'MAX_BATCH_SIZE', 1)
+
+    with pytest.raises(ValueError):
+        CharacterHandler.create_many(
+            [CharacterInput(alias='Robin'), CharacterInput(alias='Bane')]
+        )
+
+def test_async_create_many(monkeypatch):
+    enemy_id, power_id = mock_references(
+        monkeypatch, AsyncCharacterHandler, MockAsyncDAO,
+    )
+    result = asyncio.run(AsyncCharacterHandler.create_many([
+        CharacterInput(alias='Robin', powers=[power_id, '8']),
+        CharacterInput(alias='Alfred', enemies=[enemy_id]),
+    ]))
+
+    assert result.written_count == 1
+    assert result.results[0].error == 'Unknown powers: 8'
+    assert AsyncCharacterHandler.dao.written[0]['enemies'] == [
+        ObjectId(enemy_id)
+    ]
+
+def test_async_update_many():
+    result = asyncio.run(AsyncCharacterHandler.update_many([
+        CharacterUpdateInput(id='1', enemies=[]),
+    ]))
+
+    assert result.results[0].id == '1'
+    assert AsyncCharacterHandler.dao.written == [('1', {'enemies': []})]
+
+@pytest.fixture
+def autocomplete_index():
+    index = get_prefix_index(Character, AUTOCOMPLETE_FIELDS)
+    index.built = False
+    index.pop_stale()
+    return index
+
+def test_autocomplete(autocomplete_index):
+    result = CharacterHandler.autocomplete('b')
+
+    assert [(suggestion.id, suggestion.alias, suggestion.name)
+            for suggestion in result] == [('1', 'Batman', 'Bruce Wayne')]
+    assert autocomplete_index.built == True
+    assert CharacterHandler.autocomplete('UNKNOWN', 0) == []
+    with pytest.raises(ValueError):
+        CharacterHandler.autocomplete('b', -1)
+
+def test_autocomplete_stale(autocomplete_index, monkeypatch):
+    CharacterHandler.autocomplete('b')
+    docs = {'1': RawDocument(_id='1', alias='Robin', name='Dick Grayson')}
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(docs))
+    autocomplete_index.mark_stale(['1', '2'])
+
+    assert [suggestion.alias for suggestion
+            in CharacterHandler.autocomplete('r')] == ['Robin']
+    assert CharacterHandler.autocomplete('jo') == []
+
+def test_async_autocomplete(autocomplete_index):
+    result = asyncio.run(AsyncCharacterHandler.autocomplete('unk'))
+
+    assert [suggestion.alias for suggestion in result] == ['Joker']
+
+@pytest.fixture
+def enemy_index():
+    index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+    index.built = False
+    index.pop_stale()
+    return index
+
+def test_get_enemy_path(enemy_index):
+    selection = [MockSelectedField('alias')]
+    result = CharacterHandler.get_enemy_path('2', '1', selection)
+
+    assert [character.alias for character in result] == ['Joker', 'Batman']
+    assert enemy_index.built == True
+    assert CharacterHandler.get_enemy_path('1', '3', selection) is None
+
+def test_get_enemy_neighborhood(enemy_index):
+    selection = [
+        MockSelectedField('hops'),
+        MockSelectedField('character', [MockSelectedField('alias')]),
+    ]
+    result = CharacterHandler.get_enemy_neighborhood('1', 5, selection)
+
+    assert [(neighbor.hops, neighbor.character.alias)
+            for neighbor in result] == [(1, 'Joker')]
+    assert CharacterHandler.get_enemy_neighborhood('1', 0, selection) == []
+    with pytest.raises(ValueError):
+        CharacterHandler.get_enemy_neighborhood('1', -1, selection)
+
+def test_enemy_index_stale(enemy_index, monkeypatch):
+    CharacterHandler.get_enemy_path('1', '2', [])
+    docs = dict(mock_character_docs, **{
+        '2': RawDocument(_id='2', alias='Joker', enemies=['3']),
+        '3': RawDocument(_id='3', alias='Bane', enemies=['1']),
+    })
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(docs))
+    enemy_index.mark_stale(['2', '3'])
+
+    assert [character.alias for character in CharacterHandler.get_enemy_path(
+        '2', '1', [MockSelectedField('alias')],
+    )] == ['Joker', 'Bane', 'Batman']
+
+def test_get_enemy_path_missing_character(enemy_index, monkeypatch):
+    docs = {id: RawDocument(_id=id, enemies=enemies) for id, enemies in (
+        ('1', ['2', '4']), ('2', ['3']), ('3', []), ('4', ['5']),
+        ('5', ['3']),
+    )}
+    dao = MockDAO(docs)
+    monkeypatch.setattr(CharacterHandler, 'dao', dao)
+    CharacterHandler.get_enemy_path('1', '3', [])
+    # Deleted without a write event, the index is stale
+    del dao.data_set['2']
+
+    assert [character.id for character in CharacterHandler.get_enemy_path(
+        '1', '3', [MockSelectedField('id')],
+    )] == ['1', '4', '5', '3']
+
+    del dao.data_set['5']
+    monkeypatch.setattr(
+        AsyncCharacterHandler, 'dao', MockAsyncDAO(dao.data_set),
+    )
+    assert asyncio.run(AsyncCharacterHandler.get_enemy_path(
+        '1', '3', [],
+    )) is None
+
+def test_enemy_index_file(enemy_index, monkeypatch, tmp_path):
+    path = str(tmp_path / 'enemies.bin')
+    monkeypatch.setattr('service.character_handler.ENEMY_INDEX_FILE', path)
+    dao = MockDAO(mock_character_docs)
+    monkeypatch.setattr(CharacterHandler, 'dao', dao)
+    CharacterHandler.build_enemy_index()
+    enemy_index.built = False
+    monkeypatch.setattr(dao, 'get_all', lambda *args: [])
+    CharacterHandler.build_enemy_index()
+
+    assert enemy_index.shortest_path('1', '2') == ['1', '2']
+
+    # Changed enemy references don't match the saved version
+    enemy_index.built = False
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO({}))
+    CharacterHandler.build_enemy_index()
+
+    assert enemy_index.shortest_path('1', '2') is None
+
+def test_enemy_index_file_swapped_enemies(
+    enemy_index, monkeypatch, tmp_path
+):
+    path = str(tmp_path / 'enemies.bin')
+    monkeypatch.setattr('service.character_handler.ENEMY_INDEX_FILE', path)
+    dao = MockDAO(dict(mock_character_docs, **{
+        '3': RawDocument(_id='3', alias='Bane', enemies=['2']),
+    }))
+    monkeypatch.setattr(CharacterHandler, 'dao', dao)
+    CharacterHandler.build_enemy_index()
+    version = dao.get_reference_version(ENEMY_INDEX_FIELD)
+
+    # Swapping an enemy keeps the numbers of characters and references
+    dao.bulk_update([('1', {'enemies': ['3']})])
+    dao.data_set['1'] = RawDocument(dao.data_set['1'], enemies=['3'])
+
+    assert not is_file_fresh(
+        path, 60, dao.get_reference_version(ENEMY_INDEX_FIELD),
+    )
+    assert is_file_fresh(path, 60, version)
+
+    enemy_index.built = False
+    CharacterHandler.build_enemy_index()
+
+    assert enemy_index.shortest_path('1', '3') == ['1', '3']
+
+def test_enemy_index_file_compaction(enemy_index, monkeypatch, tmp_path):
+    path = str(tmp_path / 'enemies.bin')
+    monkeypatch.setattr('service.character_handler.ENEMY_INDEX_FILE', path)
+    monkeypatch.setattr('data_access.graph_index.COMPACTION_MIN', 0)
+    CharacterHandler.get_enemy_path('1', '2', [])
+    docs = dict(mock_character_docs, **{
+        '2': RawDocument(_id='2', alias='Joker', enemies=['3']),
+        '3': RawDocument(_id='3', alias='Bane', enemies=['1']),
+    })
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(docs))
+    enemy_index.mark_stale(['2', '3'])
+    CharacterHandler.get_enemy_path('1', '2', [])
+    saved = GraphIndex()
+    saved.load(path)
+
+    assert saved.shortest_path('2', '1') == ['2', '3', '1']
+    assert is_file_fresh(
+        path, 60, CharacterHandler.dao.get_reference_version('enemies'),
+    )
+
+def test_async_get_enemy_neighborhood(enemy_index):
+    result = asyncio.run(AsyncCharacterHandler.get_enemy_neighborhood(
+        '2', 1, [MockSelectedField('character', [MockSelectedField('id')])],
+    ))
+
+    assert [(neighbor.hops, neighbor.character.id)
+            for neighbor in result] == [(1, '1')]
+
+power_docs = {
+    '1': RawDocument(_id='1', alias='Superman', powers=['1', '2', '3']),
+    '2': RawDocument(_id='2', alias='Supergirl', powers=['1', '2']),
+    '3': RawDocument(_id='3', alias='Flash', powers=['3']),
+    '4': RawDocument(_id='4', alias='Batman', powers=[]),
+}
+
+@pytest.fixture
+def power_index(monkeypatch):
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(power_docs))
+    monkeypatch.setattr(AsyncCharacterHandler, 'dao', MockAsyncDAO(power_docs))
+    index = get_inverted_index(Character, POWER_INDEX_FIELD)
+    index.built = False
+    index.pop_stale()
+    return index
+
+def test_get_many_sharing_powers(power_index):
+    selection = [
+        MockSelectedField('sharedPowers'),
+        MockSelectedField('character', [MockSelectedField('alias')]),
+    ]
+    result = CharacterHandler.get_many_sharing_powers('1', 1, 10, selection)
+
+    assert [(similar.shared_powers, similar.character.alias)
+            for similar in result] == [(2, 'Supergirl'), (1, 'Flash')]
+    assert power_index.built == True
+    assert [similar.character.alias for similar in
+            CharacterHandler.get_many_sharing_powers('1', 2, 10, selection)
+            ] == ['Supergirl']
+    assert len(CharacterHandler.get_many_sharing_powers(
+        '1', 1, 1, selection,
+    )) == 1
+    assert CharacterHandler.get_many_sharing_powers(
+        '4', 1, 10, selection,
+    ) == []
+    with pytest.raises(ValueError):
+        CharacterHandler.get_many_sharing_powers('1', 0, 10, selection)
+    with pytest.raises(ValueError):
+        CharacterHandler.get_many_sharing_powers('1', 1, -1, selection)
+
+def test_get_many_with_all_powers(power_index):
+    selection = [MockSelectedField('alias')]
+
+    assert [character.alias for character in
+            CharacterHandler.get_many_with_all_powers(['2', '1'], selection)
+            ] == ['Superman', 'Supergirl']
+    assert [character.alias for character in
+            CharacterHandler.get_many_with_all_powers(['3'], selection)
+            ] == ['Superman', 'Flash']
+    assert CharacterHandler.get_many_with_all_powers(
+        ['1', 'unknown'], selection,
+    ) == []
+    assert CharacterHandler.get_many_with_all_powers([], selection) == []
+
+def test_power_index_stale(power_index, monkeypatch):
+    CharacterHandler.get_many_with_all_powers(['1'], [])
+    docs = dict(power_docs, **{
+        '2': RawDocument(_id='2', alias='Supergirl', powers=['3']),
+        '5': RawDocument(_id='5', alias='Power Girl', powers=['1', '2']),
+    })
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(docs))
+    power_index.mark_stale(['2', '5'])
+
+    assert [character.alias for character in
+            CharacterHandler.get_many_with_all_powers(
+                ['1', '2'], [MockSelectedField('alias')],
+            )] == ['Superman', 'Power Girl']
+
+def test_async_get_many_sharing_powers(power_index):
+    result = asyncio.run(AsyncCharacterHandler.get_many_sharing_powers(
+        '3', 1, 10,
+        [MockSelectedField('character', [MockSelectedField('alias')])],
+    ))
+
+    assert [(similar.shared_powers, similar.character.alias)
+            for similar in result] == [(1, 'Superman')]
+
+def test_async_get_many_with_all_powers(power_index):
+    result = asyncio.run(AsyncCharacterHandler.get_many_with_all_powers(
+        ['1'], [MockSelectedField('alias')],
+    ))
+
+    assert [character.alias for character in result] == [
+        'Superman', 'Supergirl',
+    ]
+
+def test_get_stats():
+    result = CharacterHandler.get_stats()
+
+    assert result.count == 2
+    assert [(stats.role, stats.count) for stats in result.by_role] == [
+        (RoleEnum.HERO, 1), (RoleEnum.VILLAIN, 1),
+    ]
+    assert (result.powers.average, result.powers.max) == (1.0, 1)
+    assert (result.enemies.average, result.enemies.max) == (1.0, 1)
+
+def test_get_stats_without_characters(monkeypatch):
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO({}))
+    result = CharacterHandler.get_stats()
+
+    assert result.count == 0
+    assert result.by_role == []
+    assert (result.powers.average, result.powers.max) == (0.0, 0)
+
+def test_get_power_stats(monkeypatch):
+    docs = {
+        '1': RawDocument(_id='1', powers=['1', '2']),
+        '2': RawDocument(_id='2', powers=['2', '3']),
+    }
+    monkeypatch.setattr(CharacterHandler, 'dao', MockDAO(docs))
+    result = CharacterHandler.get_power_stats()
+
+    # Power '3' doesn't exist anymore
+    assert [(stats.power.name, stats.holder_count) for stats in result] == [
+        ('invulnerability', 2), ('flight', 1),
+    ]
+    assert [stats.power.name
+            for stats in CharacterHandler.get_power_stats(1)] == [
+        'invulnerability',
+    ]
+    assert CharacterHandler.get_power_stats(0) == []
+    with pytest.raises(ValueError):
+        CharacterHandler.get_power_stats(-1)
+
+def test_async_get_stats():
+    result = asyncio.run(AsyncCharacterHandler.get_stats())
+
+    assert result.count == 2
+
+def test_async_get_power_stats():
+    result = asyncio.run(AsyncCharacterHandler.get_power_stats())
+
+    assert [(stats.power.name, stats.holder_count) for stats in result] == [
+        ('flight', 1), ('invulnerability', 1),
+    ]
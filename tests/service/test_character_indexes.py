@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from data_access.graph_index import GraphIndex, get_graph_index
+from data_access.models import Character, RawDocument
+from data_access.prefix_index import PrefixIndex
+from service.character_indexes import (
+    AUTOCOMPLETE_FIELDS, ENEMY_INDEX_FIELD, build_prefix_index,
+    build_reference_index, create_path, create_suggestions, get_hops,
+    load_index_file, save_index_file, update_prefix_index,
+    update_reference_index,
+)
+from settings import ENEMY_NEIGHBORHOOD_MAX_HOPS
+
+
+docs = [
+    RawDocument(_id='1', alias='Batman', name='Bruce Wayne', enemies=['2']),
+    RawDocument(_id='2', alias='Joker', name='unknown', enemies=['1']),
+]
+
+
+def test_update_prefix_index():
+    index = PrefixIndex(AUTOCOMPLETE_FIELDS)
+    build_prefix_index(index, docs)
+    update_prefix_index(
+        index, ['1', '2'], [RawDocument(_id='2', alias='Bane', name=None)],
+    )
+
+    assert [entry.alias for entry in create_suggestions(index, 'b', 5)] == [
+        'Bane',
+    ]
+
+def test_create_suggestions_limit():
+    index = PrefixIndex(AUTOCOMPLETE_FIELDS)
+    build_prefix_index(index, docs)
+
+    assert [entry.alias for entry in create_suggestions(index, 'b', 5)] \
+        == ['Batman']
+    assert create_suggestions(index, 'b', 0) == []
+    with pytest.raises(ValueError):
+        create_suggestions(index, 'b', -1)
+
+def test_update_reference_index():
+    index = GraphIndex()
+    build_reference_index(index, docs, ENEMY_INDEX_FIELD)
+    update_reference_index(
+        index,
+        ['2', '3'],
+        [RawDocument(_id='3', enemies=['1'])],
+        ENEMY_INDEX_FIELD,
+    )
+
+    assert index.shortest_path('3', '1') == ['3', '1']
+    assert index.shortest_path('1', '2') is None
+
+def test_create_path():
+    index = get_graph_index(Character, ENEMY_INDEX_FIELD)
+    index.pop_stale()
+
+    assert create_path(['1', '2'], {'1': 'Batman', '2': 'Joker'}) == [
+        'Batman', 'Joker',
+    ]
+    assert create_path(['1', '2'], {'1': 'Batman'}) is None
+    assert index.pop_stale() == ['2']
+
+def test_get_hops():
+    assert get_hops(1) == 1
+    assert get_hops(ENEMY_NEIGHBORHOOD_MAX_HOPS + 1) \
+        == ENEMY_NEIGHBORHOOD_MAX_HOPS
+    with pytest.raises(ValueError):
+        get_hops(-1)
+
+def test_index_file(tmp_path):
+    path = str(tmp_path / 'enemies.bin')
+    index = GraphIndex()
+    build_reference_index(index, docs, ENEMY_INDEX_FIELD)
+    save_index_file(index, path, 'v1')
+
+    loaded = GraphIndex()
+    assert not load_index_file(loaded, path, 60, 'v2')
+    assert not load_index_file(loaded, '', 60, 'v1')
+    assert load_index_file(loaded, path, 60, 'v1')
+    assert loaded.shortest_path('1', '2') == ['1', '2']
+
+def test_index_file_expired(tmp_path):
+    path = str(tmp_path / 'enemies.bin')
+    index = GraphIndex()
+    build_reference_index(index, docs, ENEMY_INDEX_FIELD)
+    save_index_file(index, path, 'v1')
+    time.sleep(0.01)
+
+    assert not load_index_file(GraphIndex(), path, 0, 'v1')
+
+def test_index_file_invalid(tmp_path):
+    path = tmp_path / 'enemies.bin'
+    path.write_bytes(b'invalid')
+
+    assert not load_index_file(GraphIndex(), str(path), 60, '')
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from data_access.models import RawDocument
+from gql.types.character_types import (
+    CharacterFilter, CharacterOrder, CharacterOrderField, RoleEnum,
+)
+from gql.types.common_types import SortDirection
+from service.character_pages import (
+    create_cursors, get_filters, get_order, get_page_query, stream_edges,
+)
+from tests.mock_classes import MockSelectedField
+from utils import utils
+
+
+docs = [RawDocument(_id=str(id), alias=f'Alias {id}') for id in range(5)]
+
+connection_fields = [
+    MockSelectedField('edges', [
+        MockSelectedField('node', [MockSelectedField('alias')]),
+    ]),
+    MockSelectedField('totalCount'),
+]
+
+
+def test_get_filters():
+    assert get_filters(None) == {}
+    assert get_filters(CharacterFilter(
+        role=RoleEnum.HERO, alias_prefix='Bat',
+    )) == {'role': 'hero', 'alias__prefix': 'Bat'}
+
+def test_get_order():
+    assert get_order(None) == ('id', 1)
+    assert get_order(CharacterOrder(
+        field=CharacterOrderField.ALIAS, direction=SortDirection.DESC,
+    )) == ('alias', -1)
+
+def test_get_page_query():
+    query = get_page_query(
+        connection_fields, 2, None, None, None,
+        CharacterFilter(name='unknown'), None,
+    )
+
+    assert query.filters == {'name': 'unknown'}
+    assert query.order == ('id', 1)
+    assert query.limit == 2
+    assert query.reverse == False
+    assert query.only == ['alias', 'id']
+    assert query.with_total == True
+    assert query.initial_count is None
+
+def test_get_page_query_invalid():
+    with pytest.raises(ValueError):
+        get_page_query(connection_fields, 1, None, 1, None, None, None)
+
+def test_create_cursors():
+    assert create_cursors(docs[:2], 'id') == [
+        utils.encode_cursor('0'), utils.encode_cursor('1'),
+    ]
+    assert create_cursors(docs[:1], 'alias') == [
+        utils.encode_keyset_cursor('alias', 'Alias 0', '0'),
+    ]
+
+def test_stream_edges(monkeypatch):
+    monkeypatch.setattr('service.character_pages.STREAM_BATCH_SIZE', 2)
+    batches = []
+
+    def assemble(data, cursors):
+        batches.append(cursors)
+        return [entry['alias'] for entry in data]
+
+    cursors = create_cursors(docs, 'id')
+    edges = stream_edges(docs, cursors, assemble, 1)
+
+    async def resolve_edges():
+        return [await edge for edge in edges]
+
+    assert batches == []
+    assert asyncio.run(resolve_edges()) == [entry['alias'] for entry in docs]
+    assert [len(batch) for batch in batches] == [1, 2, 2]
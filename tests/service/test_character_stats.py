@@ -0,0 +1,56 @@
+import pytest
+
+from data_access.models import RawDocument
+from gql.types.character_types import RoleEnum
+from gql.types.power_types import PowerType
+from service.character_stats import (
+    create_character_stats, create_power_stats, get_limit,
+)
+from settings import MAX_PAGE_SIZE
+
+
+def test_create_character_stats():
+    stats = create_character_stats([
+        RawDocument(
+            _id='hero', count=2, powers=3, max_powers=2,
+            enemies=2, max_enemies=1,
+        ),
+        RawDocument(
+            _id='villain', count=1, powers=0, max_powers=0,
+            enemies=4, max_enemies=4,
+        ),
+    ])
+
+    assert stats.count == 3
+    assert [entry.role for entry in stats.by_role] == [
+        RoleEnum.HERO, RoleEnum.VILLAIN,
+    ]
+    assert stats.powers.average == 1.0
+    assert stats.powers.max == 2
+    assert stats.enemies.average == 2.0
+    assert stats.enemies.max == 4
+
+def test_create_character_stats_without_characters():
+    stats = create_character_stats([])
+
+    assert stats.count == 0
+    assert stats.powers.average == 0.0
+    assert stats.enemies.max == 0
+
+def test_get_limit():
+    assert get_limit(5) == 5
+    assert get_limit(MAX_PAGE_SIZE + 1) == MAX_PAGE_SIZE
+    with pytest.raises(ValueError):
+        get_limit(-1)
+
+def test_create_power_stats():
+    flight = PowerType(id='1', name='flight', description='')
+
+    result = create_power_stats(
+        [RawDocument(_id='1', count=3), RawDocument(_id='2', count=1)],
+        [flight],
+    )
+
+    assert [(entry.power, entry.holder_count) for entry in result] == [
+        (flight, 3),
+    ]
@@ -1,23 +1,26 @@
-from gql.types.power_types import  PowerType
-from service.power_handler import PowerHandler
-from data_access.models import Power
-from tests.mock_classes import MockDAO
+import asyncio
+
+from gql.types.power_types import  PowerConnection, PowerInput, PowerType
+from service.power_handler import AsyncPowerHandler, PowerHandler
+from data_access.models import RawDocument
+from tests.mock_classes import MockAsyncDAO, MockDAO
 
 
 mock_power_docs = {
-    '1': Power(
-        id='1',
+    '1': RawDocument(
+        _id='1',
         name='flight',
         description='Ability to fly',
     ),
-    '2': Power(
-        id='2',
+    '2': RawDocument(
+        _id='2',
         name='invulnerability',
         description='Ability to withstand enormous amount of damage.'
     ),
 }
 
 PowerHandler.dao = MockDAO(mock_power_docs)
+AsyncPowerHandler.dao = MockAsyncDAO(mock_power_docs)
 
 
 def test_get_one_by_id_valid_id():
@@ -58,3 +61,90 @@ def test_get_all():
     power = result[0]
     assert hasattr(power, 'name')
     assert hasattr(power, 'description')
+
+def test_async_get_one_by_id():
+    result = asyncio.run(AsyncPowerHandler.get_one_by_id(id='1'))
+
+    assert isinstance(result, PowerType)
+    assert result.name == 'flight'
+    assert asyncio.run(AsyncPowerHandler.get_one_by_id(id='6')) == None
+
+def test_async_get_many_by_ids():
+    result = asyncio.run(AsyncPowerHandler.get_many_by_ids(ids=['2', '3']))
+
+    assert len(result) == 1
+    assert result[0].name == 'invulnerability'
+
+def test_async_get_all():
+    result = asyncio.run(AsyncPowerHandler.get_all())
+
+    assert len(result) == 2
+    assert isinstance(result[0], PowerType)
+
+def test_get_page():
+    result = PowerHandler.get_page(first=1, with_total=True)
+
+    assert isinstance(result, PowerConnection)
+    assert result.edges[0].node.name == 'flight'
+    assert result.page_info.has_next_page == True
+    assert result.total_count == 2
+
+    result = PowerHandler.get_page(
+        first=5, after=result.page_info.end_cursor,
+    )
+
+    assert [edge.node.name for edge in result.edges] == ['invulnerability']
+    assert result.page_info.has_next_page == False
+    assert result.page_info.has_previous_page == True
+    assert result.total_count == None
+
+def test_get_page_invalid_args():
+    try:
+        PowerHandler.get_page(first=1, last=1)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+def test_async_get_page():
+    result = asyncio.run(AsyncPowerHandler.get_page(
+        last=1, with_total=True,
+    ))
+
+    assert result.edges[0].node.name == 'invulnerability'
+    assert result.page_info.has_previous_page == True
+    assert result.total_count == 2
+
+def test_get_page_streamed():
+    result = PowerHandler.get_page(first=2, stream=True)
+
+    assert not isinstance(result.edges, list)
+    assert [edge.node.name for edge in result.edges] \
+        == ['flight', 'invulnerability']
+    assert result.page_info.end_cursor != None
+
+def test_upsert_many():
+    result = PowerHandler.upsert_many([
+        PowerInput(name='flight', description='Ability to soar'),
+        PowerInput(name='x'),
+        PowerInput(name='telepathy'),
+    ])
+
+    assert [item.id for item in result.results] == [
+        'flight', None, 'telepathy',
+    ]
+    assert result.results[1].error.startswith('name:')
+    assert result.written_count == 2
+    # Omitted descriptions are not overwritten with the default
+    assert PowerHandler.dao.written == [
+        {'name': 'flight', 'description': 'Ability to soar'},
+        {'name': 'telepathy'},
+    ]
+
+def test_async_upsert_many():
+    result = asyncio.run(AsyncPowerHandler.upsert_many([
+        PowerInput(name='flight'),
+    ]))
+
+    assert result.results[0].success()
+    assert AsyncPowerHandler.dao.written == [{'name': 'flight'}]
@@ -0,0 +1,57 @@
+import io
+import json
+
+import pytest
+from bson import ObjectId
+
+from _db_prefill import (
+    file_checksum,
+    iter_json_object,
+    map_document,
+    to_object_id,
+)
+
+
+def test_to_object_id():
+    assert isinstance(to_object_id('powers', '1'), ObjectId)
+    assert to_object_id('powers', '1') == to_object_id('powers', '1')
+    assert to_object_id('powers', '1') != to_object_id('characters', '1')
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 16])
+def test_iter_json_object(chunk_size):
+    data = {
+        str(id): {'id': str(id), 'values': [id, 1.5, 'x' * id, None]}
+        for id in range(20)
+    }
+    file = io.StringIO(json.dumps(data, indent=4))
+
+    assert dict(iter_json_object(file, chunk_size)) == data
+
+def test_iter_json_object_empty():
+    assert list(iter_json_object(io.StringIO(' { } '))) == []
+
+def test_iter_json_object_invalid():
+    with pytest.raises(ValueError):
+        list(iter_json_object(io.StringIO('[1, 2]')))
+    with pytest.raises(ValueError):
+        list(iter_json_object(io.StringIO('{"1": {"id": ')))
+
+def test_map_document():
+    entry = {'id': '1', 'alias': 'Batman', 'enemies': ['2'], 'powers': ['1']}
+    document = map_document('characters', '1', entry)
+
+    assert document == {
+        '_id': to_object_id('characters', '1'),
+        'alias': 'Batman',
+        'enemies': [to_object_id('characters', '2')],
+        'powers': [to_object_id('powers', '1')],
+    }
+
+def test_file_checksum(tmp_path):
+    path = tmp_path / 'powers.json'
+    path.write_text('{}')
+    checksum = file_checksum(path)
+
+    assert file_checksum(path) == checksum
+    path.write_text('{"1": {}}')
+    assert file_checksum(path) != checksum
@@ -1,4 +1,9 @@
+import json
+from hashlib import sha256
+
 from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
 from main import app
 
 
@@ -9,6 +14,24 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json() == {'status': 'ok'}
 
+def test_readiness_check(monkeypatch):
+    monkeypatch.setattr('data_access.connection.ping', lambda: 0.0015)
+
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.json()['status'] == 'ready'
+    assert response.json()['ping_ms'] == 1.5
+    assert set(response.json()['pool']) == {'open', 'in_use', 'max'}
+
+def test_readiness_check_unavailable(monkeypatch):
+    def ping():
+        raise ServerSelectionTimeoutError('unreachable')
+    monkeypatch.setattr('data_access.connection.ping', ping)
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.json() == {'status': 'unavailable'}
+
 def test_graphql_hello():
     response = client.post(
         '/graphql', 
@@ -18,7 +41,10 @@ def test_graphql_hello():
     assert response.json() == {
         'data': {
             'hello': 'Hello World!'
-        }
+        },
+        'extensions': {
+            'cost': {'requestedQueryCost': 0, 'maximumAvailable': 10000},
+        },
     }
 
 def test_graphql_hello_name():
@@ -30,5 +56,191 @@ def test_graphql_hello_name():
     assert response.json() == {
         'data': {
             'hello': 'Hello User!'
+        },
+        'extensions': {
+            'cost': {'requestedQueryCost': 0, 'maximumAvailable': 10000},
+        },
+    }
+
+def test_graphql_query_cost_exceeded():
+    response = client.post(
+        '/graphql',
+        json={'query': '{allCharacters (first: 1000) {edges {node '
+                       '{enemies {enemies {enemies {alias}}}}}}}'},
+    )
+    assert response.status_code == 200
+    assert response.json()['data'] == None
+    assert response.json()['errors'][0]['extensions'] == {
+        'code': 'QUERY_COST_EXCEEDED'
+    }
+    assert response.json()['extensions']['cost'] == {
+        'requestedQueryCost': 40000, 'maximumAvailable': 10000,
+    }
+
+def test_graphql_query_cost_variable_default():
+    query = ('query ($n: Int = 1000) {allCharacters (first: $n) {edges '
+             '{node {enemies {enemies {enemies {alias}}}}}}}')
+
+    for variables in ({}, {'n': 1000}):
+        response = client.post(
+            '/graphql', json={'query': query, 'variables': variables},
+        )
+        assert response.json()['data'] == None
+        assert response.json()['extensions']['cost'] == {
+            'requestedQueryCost': 40000, 'maximumAvailable': 10000,
         }
-    }
\ No newline at end of file
+
+def test_graphql_query_cost_client_limit(monkeypatch):
+    monkeypatch.setattr('gql.clients.CLIENT_API_KEYS', {'secret': 'partner'})
+    monkeypatch.setattr(
+        'gql.extensions.CLIENT_MAX_QUERY_COST', {'partner': 50000},
+    )
+    query = ('{allCharacters (first: 1000) {edges {node '
+             '{enemies {enemies {enemies {alias}}}}}}}')
+
+    # Only a known API key identifies the client
+    for headers in ({'X-API-Key': 'guess'}, {'X-Client-Id': 'partner'}):
+        response = client.post(
+            '/graphql', json={'query': '{hello}'}, headers=headers,
+        )
+        assert response.json()['extensions']['cost'] == {
+            'requestedQueryCost': 0, 'maximumAvailable': 10000,
+        }
+
+    monkeypatch.setattr(
+        'service.character_handler.CharacterHandler.get_page',
+        classmethod(lambda cls, *args, **kwargs: None),
+    )
+    response = client.post(
+        '/graphql', json={'query': query}, headers={'X-API-Key': 'secret'},
+    )
+    assert response.json()['extensions']['cost'] == {
+        'requestedQueryCost': 40000, 'maximumAvailable': 50000,
+    }
+
+def test_graphql_persisted_query():
+    query = '{hello (name: "Persisted")}'
+    extensions = {
+        'persistedQuery': {
+            'version': 1,
+            'sha256Hash': sha256(query.encode()).hexdigest(),
+        },
+    }
+
+    response = client.get(
+        '/graphql', params={'extensions': json.dumps(extensions)},
+    )
+    assert response.json()['errors'][0]['message'] == (
+        'PersistedQueryNotFound')
+
+    response = client.post(
+        '/graphql', json={'query': query, 'extensions': extensions},
+    )
+    assert response.json()['data'] == {'hello': 'Hello Persisted!'}
+
+    response = client.get(
+        '/graphql', params={'extensions': json.dumps(extensions)},
+    )
+    assert response.status_code == 200
+    assert response.json()['data'] == {'hello': 'Hello Persisted!'}
+
+def test_graphql_persisted_query_hash_mismatch():
+    response = client.post(
+        '/graphql',
+        json={
+            'query': '{hello}',
+            'extensions': {'persistedQuery': {'sha256Hash': 'abc'}},
+        },
+    )
+    assert response.json()['errors'][0]['extensions'] == {
+        'code': 'PERSISTED_QUERY_INVALID'
+    }
+
+def test_graphql_cached_document_errors():
+    for _ in range(2):
+        response = client.post('/graphql', json={'query': '{unknown}'})
+        assert response.json()['errors'][0]['message'] == (
+            "Cannot query field 'unknown' on type 'Query'.")
+
+def test_graphql_response_cache(monkeypatch):
+    monkeypatch.setattr('gql.router.RESPONSE_CACHE_ENABLED', True)
+    query = {'query': '{hello (name: "Cached")}'}
+
+    response = client.post('/graphql', json=query)
+    assert response.status_code == 200
+    assert response.headers['x-cache'] == 'MISS'
+    assert response.json()['data'] == {'hello': 'Hello Cached!'}
+    etag = response.headers['etag']
+
+    response = client.get('/graphql', params=query)
+    assert response.headers['x-cache'] == 'HIT'
+    assert response.headers['etag'] == etag
+    assert response.json()['data'] == {'hello': 'Hello Cached!'}
+
+    response = client.post(
+        '/graphql', json=query, headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304
+    assert response.content == b''
+
+def test_graphql_response_cache_persisted_query(monkeypatch):
+    monkeypatch.setattr('gql.router.RESPONSE_CACHE_ENABLED', True)
+    query = '{hello (name: "Cached persisted")}'
+    extensions = {
+        'persistedQuery': {
+            'version': 1,
+            'sha256Hash': sha256(query.encode()).hexdigest(),
+        },
+    }
+
+    response = client.post('/graphql', json={'query': query})
+    assert response.headers['x-cache'] == 'MISS'
+
+    # Registered although served from the response cache
+    response = client.post(
+        '/graphql', json={'query': query, 'extensions': extensions},
+    )
+    assert response.headers['x-cache'] == 'HIT'
+
+    response = client.get(
+        '/graphql', params={'extensions': json.dumps(extensions)},
+    )
+    assert response.headers['x-cache'] == 'HIT'
+    assert response.json()['data'] == {'hello': 'Hello Cached persisted!'}
+
+    # A mismatching hash isn't served from the cache
+    extensions['persistedQuery']['sha256Hash'] = 'abc'
+    response = client.post(
+        '/graphql', json={'query': query, 'extensions': extensions},
+    )
+    assert response.json()['errors'][0]['extensions'] == {
+        'code': 'PERSISTED_QUERY_INVALID'
+    }
+
+def test_graphql_response_cache_errors(monkeypatch):
+    monkeypatch.setattr('gql.router.RESPONSE_CACHE_ENABLED', True)
+
+    response = client.post('/graphql', json={'query': '{hello (name: 1)}'})
+    assert 'etag' not in response.headers
+
+def test_metrics():
+    client.post('/graphql', json={'query': '{hello}'})
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'graphql_root_field_duration_seconds_count{field="hello"}' in (
+        response.text)
+    assert 'graphql_operation_duration_seconds_count' \
+           '{operation_type="query"}' in response.text
+
+def test_graphql_defer():
+    response = client.post(
+        '/graphql',
+        json={'query': '{... @defer {hello}}'},
+        headers={'accept': 'multipart/mixed'},
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('multipart/mixed')
+    assert '"hasNext":true' in response.text
+    assert 'Hello World!' in response.text
@@ -0,0 +1,66 @@
+import gzip
+import json
+import logging
+import queue
+
+from logger import (
+    BoundedQueueHandler, CustomLogger, JsonFormatter, _compress,
+    get_dropped_count,
+)
+
+
+def create_record(msg: str, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord(
+        'tests', logging.ERROR, __file__, 1, msg, None, exc_info,
+    )
+
+
+def test_bounded_queue_handler_drops_records():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(create_record('first'))
+    handler.handle(create_record('second'))
+
+    assert handler.queue.get_nowait().msg == 'first'
+    assert handler.dropped == 1
+
+def test_bounded_queue_handler_renders_traceback():
+    handler = BoundedQueueHandler(queue.Queue())
+    try:
+        raise ValueError('broken')
+    except ValueError as error:
+        record = create_record('failed', (type(error), error, None))
+    handler.handle(record)
+
+    prepared = handler.queue.get_nowait()
+    assert prepared.exc_info is None
+    assert 'ValueError: broken' in prepared.exc_text
+    assert record.exc_info is not None
+
+def test_json_formatter():
+    record = create_record('failed')
+    record.exc_text = 'Traceback'
+
+    assert json.loads(JsonFormatter().format(record)) == {
+        'time': JsonFormatter().formatTime(record),
+        'level': 'ERROR',
+        'logger': 'tests',
+        'message': 'failed',
+        'exception': 'Traceback',
+    }
+
+def test_compress(tmp_path):
+    source = tmp_path / 'event.log'
+    source.write_text('event')
+    _compress(str(source), str(tmp_path / 'event.log.1.gz'))
+
+    assert not source.exists()
+    with gzip.open(tmp_path / 'event.log.1.gz', 'rt') as archive:
+        assert archive.read() == 'event'
+
+def test_shared_queue_handler():
+    first = CustomLogger('tests.first')
+    second = CustomLogger('tests.second')
+
+    assert first.error_logger.handlers == second.error_logger.handlers
+    assert len(first.event_logger.handlers) == 1
+    assert get_dropped_count() >= 0
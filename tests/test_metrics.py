@@ -0,0 +1,46 @@
+from metrics import CallbackMetric, Counter, Histogram, _metrics, render
+
+
+def create_metric(metric_class, *args, **kwargs):
+    metric = metric_class(*args, **kwargs)
+    _metrics.remove(metric)
+    return metric
+
+
+def test_counter():
+    counter = create_metric(Counter, 'test_total', 'Test.', ('model',))
+    counter.labels('Power').inc()
+    counter.labels('Power').inc(2)
+
+    assert counter.render() == '\n'.join([
+        '# HELP test_total Test.',
+        '# TYPE test_total counter',
+        'test_total{model="Power"} 3.0',
+    ])
+
+def test_histogram():
+    histogram = create_metric(
+        Histogram, 'test_seconds', 'Test.', ('field',),
+        label_values=[('hello',)], buckets=(0.1, 1.0),
+    )
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.labels('hello').observe(value)
+
+    assert histogram.collect() == [
+        'test_seconds_bucket{field="hello",le="0.1"} 2',
+        'test_seconds_bucket{field="hello",le="1.0"} 3',
+        'test_seconds_bucket{field="hello",le="+Inf"} 4',
+        'test_seconds_sum{field="hello"} 2.65',
+        'test_seconds_count{field="hello"} 4',
+    ]
+
+def test_callback_metric_escapes_labels():
+    metric = create_metric(
+        CallbackMetric, 'test_size', 'Test.', ('cache',),
+        lambda: [(('a"b\\c',), 1)],
+    )
+
+    assert metric.collect() == ['test_size{cache="a\\"b\\\\c"} 1']
+
+def test_render():
+    assert '# TYPE dao_queries_total counter' in render()
@@ -1,5 +1,13 @@
-from tests.mock_classes import MockHandler, MockInfo, MockSelectedField
+import asyncio
 
+import pytest
+
+from data_access.models import Character, Power
+from tests.mock_classes import (
+    MockFragment, MockHandler, MockInfo, MockSelectedField
+)
+
+from settings import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from utils import utils
 
 
@@ -28,3 +36,196 @@ def test_get_selected_complex_fields():
     assert 'alias' not in result.keys()
     assert hasattr(result['enemies'], 'selections')
     assert isinstance(result['enemies'].selections, list)
+
+def test_get_selection_signature():
+    selection = [
+        MockSelectedField('alias'),
+        MockSelectedField('enemies', [MockSelectedField('powers')]),
+        MockSelectedField('powers', [MockSelectedField('name')]),
+    ]
+    result = utils.get_selection_signature(selection)
+
+    assert result == (('enemies', (('powers', ()),)), ('powers', ()))
+    assert result == utils.get_selection_signature(list(reversed(selection)))
+    assert hash(result)
+
+def test_get_projection():
+    selection = [
+        MockSelectedField('alias'),
+        MockSelectedField('enemyIds'),
+        MockSelectedField('__typename'),
+    ]
+    result = utils.get_projection(selection)
+
+    assert result == ['alias', 'enemies', 'id']
+
+def test_get_projection_arrays_only_when_selected():
+    result = utils.get_projection([MockSelectedField('name')])
+
+    assert result == ['id', 'name']
+    # Referencing characters are looked up by the ID only
+    assert utils.get_projection(
+        [MockSelectedField('enemyOf', [MockSelectedField('alias')])]
+    ) == ['id']
+
+def test_get_projection_whole_document():
+    assert utils.get_projection([]) == None
+    assert utils.get_projection([MockSelectedField('unknown')]) == None
+    assert utils.get_projection(None) == None
+
+def test_cursor():
+    cursor = utils.encode_cursor('651c3b5e8f1d2a6b4c9e0a11')
+
+    assert '651c3b5e8f1d2a6b4c9e0a11' not in cursor
+    assert utils.decode_cursor(cursor) == '651c3b5e8f1d2a6b4c9e0a11'
+
+def test_decode_cursor_invalid():
+    for cursor in ('abc', 'YWJj'):
+        try:
+            utils.decode_cursor(cursor)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+def test_get_page_args():
+    cursor = utils.encode_cursor('1')
+
+    assert utils.get_page_args() == (DEFAULT_PAGE_SIZE, None, None, False)
+    assert utils.get_page_args(first=5, after=cursor) == (5, '1', None, False)
+    assert utils.get_page_args(last=10**6, before=cursor) == (
+        MAX_PAGE_SIZE, None, '1', True)
+
+def test_keyset_cursor():
+    cursor = utils.encode_keyset_cursor('alias', 'Batman', '1')
+
+    assert utils.decode_keyset_cursor(cursor, 'alias') == ('Batman', '1')
+    assert utils.get_page_args(after=cursor, order_field='alias') == (
+        DEFAULT_PAGE_SIZE, ('Batman', '1'), None, False)
+    for field, cursor in (('name', cursor), ('alias', utils.encode_cursor(1))):
+        try:
+            utils.decode_keyset_cursor(cursor, field)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+def test_get_page_args_invalid():
+    for kwargs in ({'first': 1, 'last': 1}, {'first': -1}):
+        try:
+            utils.get_page_args(**kwargs)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+def test_get_connection_node_fields():
+    selection = [
+        MockSelectedField('pageInfo'),
+        MockSelectedField(
+            'edges', [MockSelectedField('node', [MockSelectedField('alias')])]
+        ),
+    ]
+    result = utils.get_connection_node_fields(selection)
+
+    assert [entry.name for entry in result] == ['alias']
+    assert utils.is_field_selected(selection, 'pageInfo')
+    assert not utils.is_field_selected(selection, 'totalCount')
+
+def test_get_nested_fields():
+    selection = [
+        MockSelectedField('hops'),
+        MockFragment([
+            MockSelectedField('character', [MockSelectedField('alias')]),
+        ]),
+    ]
+    result = utils.get_nested_fields(selection, 'character')
+
+    assert [entry.name for entry in result] == ['alias']
+    assert utils.get_nested_fields(selection, 'unknown') == []
+
+def test_fragments():
+    selection = [
+        MockSelectedField('alias'),
+        MockFragment([MockSelectedField('enemies', [MockSelectedField('id')])]),
+        MockFragment(
+            [MockSelectedField('enemies', [MockSelectedField('name')])],
+            directives={'defer': {'label': 'enemies'}},
+        ),
+    ]
+    complex_fields = utils.get_selected_complex_fields(selection)
+
+    assert list(complex_fields) == ['enemies']
+    assert [entry.name for entry in complex_fields['enemies'].selections] \
+        == ['id', 'name']
+    assert utils.get_projection(selection) == ['alias', 'enemies', 'id']
+    assert not utils.is_deferred(selection, 'enemies')
+    assert utils.is_deferred(selection[2:], 'enemies')
+    assert not utils.is_deferred(selection[2:], 'alias')
+
+def test_is_deferred_disabled():
+    selection = [MockFragment(
+        [MockSelectedField('enemies')], directives={'defer': {'if': False}},
+    )]
+
+    assert not utils.is_deferred(selection, 'enemies')
+
+def test_get_stream_initial_count():
+    selection = [
+        MockSelectedField('edges', directives={'stream': {'initialCount': 5}}),
+    ]
+
+    assert utils.get_stream_initial_count(selection, 'edges') == 5
+    assert utils.get_stream_initial_count(selection, 'pageInfo') == None
+    assert utils.get_stream_initial_count(
+        [MockSelectedField('edges', directives={'stream': {}})], 'edges',
+    ) == 0
+
+def test_deferred_batch():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return ['a', 'b']
+
+    async def resolve():
+        items = utils.DeferredBatch(compute).items(2)
+        return [await item for item in items]
+
+    assert asyncio.run(resolve()) == ['a', 'b']
+    assert len(calls) == 1
+
+def test_check_batch_size(monkeypatch):
+    monkeypatch.setattr(utils, 'MAX_BATCH_SIZE', 2)
+
+    utils.check_batch_size(2)
+    with pytest.raises(ValueError):
+        utils.check_batch_size(3)
+
+def test_validate_document():
+    assert utils.validate_document(Power, {'name': 'flight'}) == None
+    assert utils.validate_document(Character, {'role': 'hero'}) == (
+        'alias: Field is required')
+    # Missing required fields are not reported for partial documents
+    assert utils.validate_document(Character, {'role': 'hero'}, True) == None
+    assert utils.validate_document(
+        Character, {'role': 'wizard'}, True,
+    ).startswith('role:')
+
+def test_to_raw_document():
+    assert utils.to_raw_document(Power, {'name': 'flight'}) == {
+        'name': 'flight', 'description': Power.description.default,
+    }
+    assert utils.to_raw_document(Power, {'name': 'flight'}, True) == {
+        'name': 'flight',
+    }
+
+def test_create_batch_result():
+    result = utils.create_batch_result(
+        [None, 'invalid', None], [('1', None), (None, 'duplicate')],
+    )
+
+    assert [(item.index, item.id, item.error) for item in result.results] == [
+        (0, '1', None), (1, None, 'invalid'), (2, None, 'duplicate'),
+    ]
+    assert result.written_count == 1
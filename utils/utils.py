@@ -7,11 +7,40 @@ utils for the project.
 """
 
 
+import asyncio
+import base64
+import binascii
+import contextvars
+import json
+from functools import partial
+from inspect import isawaitable
+from typing import Any, Awaitable, Callable, Generator
+
+from mongoengine import Document, ValidationError
 from strawberry.types.nodes import SelectedField
 from strawberry.types.info import Info
 
+from gql.types.common_types import BatchItemResult, BatchResult, PageInfo
+from settings import DEFAULT_PAGE_SIZE, MAX_BATCH_SIZE, MAX_PAGE_SIZE
+
 
-COMPLEX_FIELDS = ['powers', 'enemies']
+COMPLEX_FIELDS = ['powers', 'enemies', 'enemyOf']
+# GraphQL field names mapped to the document fields they are built from.
+PROJECTION_FIELDS = {
+    'id': 'id',
+    'alias': 'alias',
+    'name': 'name',
+    'role': 'role',
+    'description': 'description',
+    'powers': 'powers',
+    'enemies': 'enemies',
+    'enemyIds': 'enemies',
+    # Referencing characters are looked up by the ID
+    'enemyOf': 'id',
+}
+CURSOR_PREFIX = 'cursor:'
+# Prefix of cursors of pages ordered by a field other than the ID
+KEYSET_CURSOR_PREFIX = 'keyset:'
 
 def get_primary_selected_fields(info: Info) -> list[SelectedField]:
     """
@@ -30,13 +59,66 @@ def get_primary_selected_fields(info: Info) -> list[SelectedField]:
     """
     return info.selected_fields[0].selections
 
+def is_fragment(entry: Any) -> bool:
+    """
+    Checks whether a selection entry is a fragment (an inline fragment
+    or a fragment spread) rather than a field.
+
+    :param entry: Selection entry.
+
+    :return: True for fragments.
+    """
+    return hasattr(entry, 'type_condition')
+
+def has_directive(entry: Any, name: str) -> bool:
+    """
+    Checks whether a selection entry carries an active directive.
+    Directives disabled with their 'if' argument are not active.
+
+    :param entry: Selection entry (a field or a fragment).
+    :param name: Name of the directive (e.g. 'defer').
+
+    :return: True if the directive is present and active.
+    """
+    directives = getattr(entry, 'directives', None) or dict()
+    return name in directives and \
+        (directives[name] or dict()).get('if', True) is not False
+
+def flatten_selections(
+    selected_fields: list[SelectedField], deferred: bool = False
+) -> list[tuple[SelectedField, bool]]:
+    """
+    Expands fragments of a selection into their fields.
+
+    :param selected_fields: List of selection entries (fields and
+                            fragments).
+    :param deferred: Whether the selection is within a deferred
+                     fragment.
+
+    :return: List of (field, deferred) pairs, where the flag tells
+             whether the field is within a fragment with @defer.
+
+    :raise TypeError: Raised if selected_fields object is not iterable.
+    """
+    fields = []
+    for entry in selected_fields:
+        if is_fragment(entry):
+            fields.extend(flatten_selections(
+                entry.selections, deferred or has_directive(entry, 'defer'),
+            ))
+        else:
+            fields.append((entry, deferred))
+    return fields
+
 def get_selected_complex_fields(
     selected_fields: list[SelectedField]
 ) -> dict[str, SelectedField]:
     """
     Extracts COMPLEX_FIELDS from list of SelectedField objects.
     This function was designed to prevent the overfetch
-    of not-requested fields.
+    of not-requested fields. Fields selected within fragments are
+    included, a field selected more than once gets the merged
+    selections of all occurrences.
 
     :param selected_fields: List of SelectedField objects representing
                             fields selected for every type in the query.
@@ -48,5 +130,500 @@ def get_selected_complex_fields(
     :raise AttributeError: Raised if selected_fields objects don't have
                            nessary attributes.
     """
-    return {f'{entry.name}': entry for entry in selected_fields if 
-            entry.name in COMPLEX_FIELDS}
+    complex_fields = dict()
+    for entry, _ in flatten_selections(selected_fields):
+        if entry.name not in COMPLEX_FIELDS:
+            continue
+        if entry.name in complex_fields:
+            known = complex_fields[entry.name]
+            entry = SelectedField(
+                name=entry.name,
+                directives=dict(),
+                arguments=dict(),
+                selections=list(known.selections) + list(entry.selections),
+            )
+        complex_fields[entry.name] = entry
+    return complex_fields
+
+def is_deferred(selected_fields: list[SelectedField], name: str) -> bool:
+    """
+    Checks whether a field is selected only within fragments
+    with @defer, so it can be resolved after the initial response.
+
+    :param selected_fields: List of selection entries.
+    :param name: GraphQL name of the field.
+
+    :return: True if the field is selected and every occurrence
+             is deferred.
+    """
+    try:
+        occurrences = [deferred for entry, deferred
+                       in flatten_selections(selected_fields)
+                       if entry.name == name]
+    except (AttributeError, TypeError):
+        return False
+    return bool(occurrences) and all(occurrences)
+
+def get_stream_initial_count(
+    selected_fields: list[SelectedField], name: str
+) -> int | None:
+    """
+    Reads the @stream directive of a list field.
+
+    :param selected_fields: List of selection entries.
+    :param name: GraphQL name of the list field (e.g. 'edges').
+
+    :return: Number of items of the initial response, or None if
+             the field is not streamed.
+    """
+    try:
+        for entry, _ in flatten_selections(selected_fields):
+            if entry.name == name and has_directive(entry, 'stream'):
+                arguments = entry.directives['stream'] or dict()
+                return max(arguments.get('initialCount') or 0, 0)
+    except (AttributeError, TypeError):
+        pass
+    return None
+
+def get_selection_signature(
+    selected_fields: list[SelectedField]
+) -> tuple:
+    """
+    Builds a hashable signature of the COMPLEX_FIELDS selection.
+    Scalar fields are ignored, since they don't affect the way
+    objects are fetched and assembled.
+
+    :param selected_fields: List of SelectedField objects representing
+                            fields selected for every type in the query.
+
+    :return: A sorted tuple of (field name, nested signature) pairs.
+
+    :raise TypeError: Raised if selected_fields object is not iterable.
+    :raise AttributeError: Raised if selected_fields objects don't have
+                           nessary attributes.
+    """
+    return tuple(sorted(
+        (name, get_selection_signature(entry.selections))
+        for name, entry in get_selected_complex_fields(selected_fields).items()
+    ))
+
+def get_projection(
+    selected_fields: list[SelectedField]
+) -> list[str] | None:
+    """
+    Translates selected GraphQL fields into the list of document
+    fields, that have to be loaded from the database.
+    Reference arrays are only included when a field built from them
+    ('powers', 'enemies' or 'enemyIds') is selected.
+
+    :param selected_fields: List of SelectedField objects representing
+                            fields selected for the type in the query.
+
+    :return: A sorted list of document field names, or None if
+             the whole document has to be loaded (e.g. the selection
+             is empty or contains unknown fields).
+    """
+    try:
+        names = [entry.name for entry, _ in flatten_selections(selected_fields)
+                 if not entry.name.startswith('__')]
+    except (AttributeError, TypeError):
+        return None
+
+    if not names or any(name not in PROJECTION_FIELDS for name in names):
+        return None
+    return sorted({PROJECTION_FIELDS[name] for name in names} | {'id'})
+
+def get_connection_node_fields(
+    selected_fields: list[SelectedField]
+) -> list[SelectedField]:
+    """
+    Extracts fields selected for nodes of a Relay-style connection
+    (the 'edges { node { ... } }' part of the query).
+
+    :param selected_fields: List of SelectedField objects representing
+                            fields selected for the connection.
+
+    :return: List of SelectedField objects selected for the node.
+             The list is empty if no nodes were requested.
+
+    :raise TypeError: Raised if selected_fields object is not iterable.
+    :raise AttributeError: Raised if selected_fields objects don't have
+                           nessary attributes.
+    """
+    return [node_field
+            for entry, _ in flatten_selections(selected_fields)
+            if entry.name == 'edges'
+            for edge_field, _ in flatten_selections(entry.selections)
+            if edge_field.name == 'node'
+            for node_field in edge_field.selections]
+
+def get_nested_fields(
+    selected_fields: list[SelectedField], name: str
+) -> list[SelectedField]:
+    """
+    Extracts fields selected for an object field of a wrapper type
+    (e.g. the 'character' part of 'enemyNeighborhood { character }').
+
+    :param selected_fields: List of SelectedField objects representing
+                            fields selected for the wrapper type.
+    :param name: GraphQL name of the object field.
+
+    :return: List of SelectedField objects selected for the field.
+             The list is empty if the field was not requested.
+
+    :raise TypeError: Raised if selected_fields object is not iterable.
+    :raise AttributeError: Raised if selected_fields objects don't have
+                           nessary attributes.
+    """
+    return [nested_field
+            for entry, _ in flatten_selections(selected_fields)
+            if entry.name == name
+            for nested_field in entry.selections]
+
+def is_field_selected(
+    selected_fields: list[SelectedField], name: str
+) -> bool:
+    """
+    Checks whether a field is present in the selection.
+
+    :param selected_fields: List of SelectedField objects.
+    :param name: GraphQL name of the field.
+
+    :return: True if the field is selected.
+    """
+    try:
+        return any(entry.name == name for entry in selected_fields)
+    except (AttributeError, TypeError):
+        return False
+
+def encode_cursor(id: Any) -> str:
+    """
+    Builds an opaque pagination cursor from a document ID.
+
+    :param id: ObjectId or its string representation.
+
+    :return: Base64 encoded cursor.
+    """
+    return base64.urlsafe_b64encode(
+        f'{CURSOR_PREFIX}{id}'.encode()
+    ).decode()
+
+def _decode_cursor(cursor: str, prefix: str) -> str:
+    """
+    Extracts the payload of an opaque pagination cursor.
+
+    :param cursor: Base64 encoded cursor.
+    :param prefix: Expected prefix of the payload.
+
+    :return: Payload without the prefix.
+
+    :raise ValueError: Raised if the cursor is malformed.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+    if not value.startswith(prefix):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return value[len(prefix):]
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Extracts a document ID from an opaque pagination cursor.
+
+    :param cursor: Cursor built with encode_cursor.
+
+    :return: String representation of the document ID.
+
+    :raise ValueError: Raised if the cursor is malformed.
+    """
+    return _decode_cursor(cursor, CURSOR_PREFIX)
+
+def encode_keyset_cursor(field: str, value: Any, id: Any) -> str:
+    """
+    Builds an opaque pagination cursor of a page ordered by a field,
+    holding the value of the field along with the document ID.
+
+    :param field: Name of the ordering field.
+    :param value: JSON-serializable value of the ordering field.
+    :param id: ObjectId or its string representation.
+
+    :return: Base64 encoded cursor.
+    """
+    payload = json.dumps([field, value, str(id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(
+        f'{KEYSET_CURSOR_PREFIX}{payload}'.encode()
+    ).decode()
+
+def decode_keyset_cursor(cursor: str, field: str) -> tuple[Any, str]:
+    """
+    Extracts the ordering value and the document ID from an opaque
+    pagination cursor of a page ordered by a field.
+
+    :param cursor: Cursor built with encode_keyset_cursor.
+    :param field: Name of the ordering field of the page.
+
+    :return: A tuple of the value of the ordering field and string
+             representation of the document ID.
+
+    :raise ValueError: Raised if the cursor is malformed or if it
+                       belongs to a page ordered by another field.
+    """
+    payload = _decode_cursor(cursor, KEYSET_CURSOR_PREFIX)
+    try:
+        cursor_field, value, id = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+
+    if cursor_field != field or not isinstance(id, str):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return value, id
+
+def get_page_args(
+    first: int | None = None,
+    after: str | None = None,
+    last: int | None = None,
+    before: str | None = None,
+    order_field: str | None = None,
+) -> tuple[int, Any, Any, bool]:
+    """
+    Validates and normalizes Relay-style pagination arguments.
+    Page size defaults to DEFAULT_PAGE_SIZE and is limited
+    by MAX_PAGE_SIZE.
+
+    :param first: Number of items after the 'after' cursor.
+    :param after: Cursor to paginate forward from.
+    :param last: Number of items before the 'before' cursor.
+    :param before: Cursor to paginate backward from.
+    :param order_field: Name of the ordering field, None for pages
+                        ordered by ID.
+
+    :return: A tuple of page size, decoded 'after' position, decoded
+             'before' position and a flag whether the page is taken
+             from the end. Positions are IDs for pages ordered by ID,
+             otherwise (value, ID) pairs.
+
+    :raise ValueError: Raised if both 'first' and 'last' are provided,
+                       if any of them is negative or if a cursor
+                       is malformed.
+    """
+    if first is not None and last is not None:
+        raise ValueError('Provide either "first" or "last", not both.')
+    if (first is not None and first < 0) or (last is not None and last < 0):
+        raise ValueError('"first" and "last" must not be negative.')
+
+    reverse = last is not None
+    limit = last if reverse else first
+    limit = min(DEFAULT_PAGE_SIZE if limit is None else limit, MAX_PAGE_SIZE)
+
+    decode = decode_cursor if order_field is None else partial(
+        decode_keyset_cursor, field=order_field,
+    )
+    after_id = decode(after) if after else None
+    before_id = decode(before) if before else None
+    return limit, after_id, before_id, reverse
+
+def trim_page(
+    data: list[Any], limit: int, reverse: bool
+) -> tuple[list[Any], bool]:
+    """
+    Cuts a page fetched with one extra item (limit + 1) to its size.
+
+    :param data: Fetched items, in the pagination direction.
+    :param limit: Page size.
+    :param reverse: Whether the page is taken from the end ('last').
+
+    :return: A tuple of the page items in output order and a flag
+             whether there are more items in the pagination direction.
+    """
+    has_more = len(data) > limit
+    data = data[:limit]
+    if reverse:
+        data.reverse()
+    return data, has_more
+
+def create_page_info(
+    cursors: list[str],
+    has_more: bool,
+    reverse: bool,
+    after: str | None,
+    before: str | None,
+) -> PageInfo:
+    """
+    Builds PageInfo for a fetched page.
+    Only the pagination direction is checked for more items, in the
+    opposite direction a page is considered to have neighbours when
+    it was requested relative to a cursor.
+
+    :param cursors: Cursors of the page items, in output order.
+    :param has_more: Whether there are more items in the pagination
+                     direction.
+    :param reverse: Whether the page is taken from the end ('last').
+    :param after: The 'after' cursor of the request.
+    :param before: The 'before' cursor of the request.
+
+    :return: PageInfo object.
+    """
+    return PageInfo(
+        has_next_page=before is not None if reverse else has_more,
+        has_previous_page=has_more if reverse else after is not None,
+        start_cursor=cursors[0] if cursors else None,
+        end_cursor=cursors[-1] if cursors else None,
+    )
+
+def check_batch_size(size: int):
+    """
+    Validates the number of items of a batch mutation.
+
+    :param size: Number of items.
+
+    :raise ValueError: Raised if the batch exceeds MAX_BATCH_SIZE.
+    """
+    if size > MAX_BATCH_SIZE:
+        raise ValueError(
+            f'Batch exceeds the limit of {MAX_BATCH_SIZE} items.'
+        )
+
+def validate_document(
+    model: type[Document], fields: dict[str, Any], partial: bool = False
+) -> str | None:
+    """
+    Validates document fields against the model without touching
+    the database.
+
+    :param model: Document model class.
+    :param fields: Field values keyed by model field names.
+    :param partial: Whether only provided fields are validated
+                    (e.g. for updates), so missing required fields
+                    are not reported.
+
+    :return: Error message, None for valid fields.
+    """
+    try:
+        model(**fields).validate()
+    except ValidationError as e:
+        errors = {name: error for name, error in (e.errors or {}).items()
+                  if not partial or name in fields}
+        if errors:
+            return '; '.join(
+                f'{name}: {getattr(error, "message", error)}'
+                for name, error in errors.items()
+            )
+    return None
+
+def to_raw_document(
+    model: type[Document], fields: dict[str, Any], partial: bool = False
+) -> dict[str, Any]:
+    """
+    Converts document fields to a raw document, keyed by database
+    field names.
+
+    :param model: Document model class.
+    :param fields: Field values keyed by model field names.
+    :param partial: Whether only provided fields are converted,
+                    otherwise defaults of missing fields are included.
+
+    :return: Raw document without '_id'.
+    """
+    document = model(**fields).to_mongo().to_dict()
+    document.pop('_id', None)
+    if partial:
+        db_fields = {model._fields[name].db_field for name in fields}
+        document = {name: value for name, value in document.items()
+                    if name in db_fields}
+    return document
+
+def create_batch_result(
+    errors: list[str | None], written: list[tuple[Any, str | None]]
+) -> BatchResult:
+    """
+    Builds the result of a batch mutation.
+
+    :param errors: Errors of all items found before writing (e.g.
+                   validation errors), None for items sent to
+                   the database.
+    :param written: (ID, error) pairs of the items sent to the
+                    database, in order of the items.
+
+    :return: BatchResult with a BatchItemResult per item.
+    """
+    written = iter(written)
+    results = []
+    for index, error in enumerate(errors):
+        id = None
+        if error is None:
+            id, error = next(written)
+        results.append(BatchItemResult(
+            index=index, id=None if id is None else str(id), error=error,
+        ))
+    return BatchResult(
+        results=results,
+        written_count=sum(result.error is None for result in results),
+    )
+
+
+class DeferredBatch:
+    """
+    Lazily computed list of values shared by sibling objects, e.g.
+    enemies of all characters of a depth level selected within
+    a deferred fragment. Values are computed with a single call when
+    the first item is awaited, i.e. while the deferred part of the
+    response is executed, so siblings are still fetched in one batch.
+
+    The computation runs within a copy of the context the batch was
+    created in, so it uses the identity map of the request even after
+    the initial response has been sent.
+    """
+
+    def __init__(self, compute: Callable[[], list | Awaitable[list]]):
+        self._compute = compute
+        self._context = contextvars.copy_context()
+        self._future: asyncio.Future | None = None
+
+    async def _run(self) -> list:
+        result = self._compute()
+        if isawaitable(result):
+            result = await result
+        return result
+
+    async def get(self) -> list:
+        """
+        Get all values, computing them on the first call.
+
+        :return: List of computed values.
+        """
+        if self._future is None:
+            self._future = self._context.run(
+                asyncio.ensure_future, self._run(),
+            )
+        return await asyncio.shield(self._future)
+
+    def items(self, count: int) -> list['DeferredItem']:
+        """
+        Create awaitable placeholders of the values.
+
+        :param count: Number of values.
+
+        :return: List of DeferredItems, one per value.
+        """
+        return [DeferredItem(self, index) for index in range(count)]
+
+
+class DeferredItem:
+    """
+    Awaitable placeholder of a single value of a DeferredBatch. It can
+    be used as a value of a GraphQL type field, the executor awaits it
+    when the field is resolved.
+    """
+    __slots__ = ('batch', 'index')
+
+    def __init__(self, batch: DeferredBatch, index: int):
+        self.batch = batch
+        self.index = index
+
+    async def _get(self) -> Any:
+        return (await self.batch.get())[self.index]
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self._get().__await__()